@@ -64,7 +64,15 @@ module.exports = {
     'no-new-func': 'error',
     'no-return-await': 'error',
     'require-await': 'error',
-    'no-throw-literal': 'error'
+    'no-throw-literal': 'error',
+
+    // The repositories barrel loads all of them; import the module itself or use app.repositories
+    'no-restricted-imports': ['error', {
+      patterns: [{
+        group: ['**/repositories', '**/repositories/index'],
+        message: 'Import from ../repositories/<name>.repository or use app.repositories'
+      }]
+    }]
   },
   ignorePatterns: [
     'dist/',
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Streaming analyzer for the pino request logs.
+
+Reads the NDJSON written by loggingMiddleware ("Request completed" records with
+responseTime, statusCode, method and url) one line at a time, plain or gzip,
+and keeps one fixed-size log-linear latency histogram per route and time
+window. Memory depends on the number of routes and windows, never on the
+number of requests, so multi-GB files are fine.
+
+Usage:
+    python3 analyze-request-logs.py pod-*.log.gz --window 5m --jobs 8
+    python3 analyze-request-logs.py app.log --top 20 --json > report.json
+
+Pod files are analyzed in parallel (--jobs) and their histograms merged.
+orjson is used for decoding when installed, the stdlib json module otherwise.
+"""
+import argparse
+import gzip
+import math
+import re
+import sys
+from datetime import datetime, timezone
+from multiprocessing import Pool
+
+try:
+    import orjson
+
+    def decode(line):
+        return orjson.loads(line)
+
+    def encode(data):
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
+except ImportError:
+    import json
+
+    def decode(line):
+        return json.loads(line)
+
+    def encode(data):
+        return json.dumps(data, indent=2)
+
+COMPLETED_MARKER = b'"Request completed"'
+OTHER_ROUTE = '(other)'
+
+# Path segments that are identifiers rather than part of the route:
+# numbers, UUIDs, cuids, nanoids (which always contain a digit here, unlike
+# long kebab-case route names) and long hex strings.
+ID_SEGMENT = re.compile(
+    r'^(?:\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+    r'|c[a-z0-9]{20,30}|(?=.*\d)[A-Za-z0-9_-]{16,}|[0-9a-f]{12,})$'
+)
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram.
+
+    Values are bucketed by power of two and then linearly into SUB_BUCKETS
+    slots, which bounds the relative error of any percentile to about
+    1 / SUB_BUCKETS while keeping at most a few hundred buckets per histogram.
+    """
+
+    SUB_BUCKETS = 32
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def bucket(self, value):
+        if value < 1:
+            return int(value * self.SUB_BUCKETS)
+        exponent = int(math.log2(value))
+        base = 1 << exponent
+        offset = int((value - base) * self.SUB_BUCKETS / base)
+        return (exponent + 1) * self.SUB_BUCKETS + offset
+
+    def bucket_value(self, index):
+        """Midpoint of a bucket, the value reported for percentiles"""
+        exponent, offset = divmod(index, self.SUB_BUCKETS)
+        if exponent == 0:
+            return (offset + 0.5) / self.SUB_BUCKETS
+        base = 1 << (exponent - 1)
+        return base + (offset + 0.5) * base / self.SUB_BUCKETS
+
+    def record(self, value):
+        index = self.bucket(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentiles(self, *quantiles):
+        """Return the value at each quantile (0-1), clamped to the observed range"""
+        if self.count == 0:
+            return [0.0 for _ in quantiles]
+        targets = sorted((max(1, math.ceil(q * self.count)), i) for i, q in enumerate(quantiles))
+        results = [0.0] * len(quantiles)
+        seen = 0
+        t = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            while t < len(targets) and seen >= targets[t][0]:
+                value = self.bucket_value(index)
+                results[targets[t][1]] = min(max(value, self.min), self.max)
+                t += 1
+            if t == len(targets):
+                break
+        return results
+
+    def to_dict(self):
+        return {'counts': self.counts, 'count': self.count, 'total': self.total,
+                'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.counts = data['counts']
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.min = data['min']
+        histogram.max = data['max']
+        return histogram
+
+
+class RouteStats:
+    """Latency histogram plus status counters for one route"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.client_errors = 0
+
+    def record(self, duration, status):
+        self.latency.record(duration)
+        if status >= 500:
+            self.errors += 1
+        elif status >= 400:
+            self.client_errors += 1
+
+    def merge(self, other):
+        self.latency.merge(other.latency)
+        self.errors += other.errors
+        self.client_errors += other.client_errors
+
+    def summary(self):
+        p50, p95, p99 = self.latency.percentiles(0.5, 0.95, 0.99)
+        count = self.latency.count
+        return {
+            'count': count,
+            'p50': round(p50, 2),
+            'p95': round(p95, 2),
+            'p99': round(p99, 2),
+            'max': round(self.latency.max, 2) if count else 0.0,
+            'mean': round(self.latency.total / count, 2) if count else 0.0,
+            'errorRate': round(self.errors / count, 4) if count else 0.0,
+            'clientErrorRate': round(self.client_errors / count, 4) if count else 0.0
+        }
+
+    def to_dict(self):
+        return {'latency': self.latency.to_dict(), 'errors': self.errors,
+                'client_errors': self.client_errors}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.latency = LatencyHistogram.from_dict(data['latency'])
+        stats.errors = data['errors']
+        stats.client_errors = data['client_errors']
+        return stats
+
+
+class Aggregator:
+    """Per-route and per-(window, route) stats for one or more log files"""
+
+    def __init__(self, window_seconds, max_routes):
+        self.window_seconds = window_seconds
+        self.max_routes = max_routes
+        self.routes = {}
+        self.windows = {}
+        self.lines = 0
+        self.skipped = 0
+
+    def route_key(self, route):
+        if route in self.routes or len(self.routes) < self.max_routes:
+            return route
+        return OTHER_ROUTE
+
+    def record(self, timestamp, route, duration, status):
+        route = self.route_key(route)
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = RouteStats()
+        stats.record(duration, status)
+
+        if timestamp is not None:
+            window = int(timestamp // self.window_seconds) * self.window_seconds
+            per_route = self.windows.setdefault(window, {})
+            stats = per_route.get(route)
+            if stats is None:
+                stats = per_route[route] = RouteStats()
+            stats.record(duration, status)
+
+    def merge(self, other):
+        self.lines += other.lines
+        self.skipped += other.skipped
+        for route, stats in other.routes.items():
+            key = self.route_key(route)
+            if key in self.routes:
+                self.routes[key].merge(stats)
+            else:
+                self.routes[key] = stats
+        for window, per_route in other.windows.items():
+            target = self.windows.setdefault(window, {})
+            for route, stats in per_route.items():
+                key = route if route in self.routes else OTHER_ROUTE
+                if key in target:
+                    target[key].merge(stats)
+                else:
+                    target[key] = stats
+
+    def to_dict(self):
+        return {
+            'lines': self.lines,
+            'skipped': self.skipped,
+            'routes': {route: stats.to_dict() for route, stats in self.routes.items()},
+            'windows': {window: {route: stats.to_dict() for route, stats in per_route.items()}
+                        for window, per_route in self.windows.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data, window_seconds, max_routes):
+        aggregator = cls(window_seconds, max_routes)
+        aggregator.lines = data['lines']
+        aggregator.skipped = data['skipped']
+        aggregator.routes = {route: RouteStats.from_dict(stats) for route, stats in data['routes'].items()}
+        aggregator.windows = {
+            window: {route: RouteStats.from_dict(stats) for route, stats in per_route.items()}
+            for window, per_route in data['windows'].items()
+        }
+        return aggregator
+
+
+def normalize_route(method, url):
+    """GET /api/products/ckx1...?page=2 -> GET /api/products/:id"""
+    path = url.split('?', 1)[0]
+    segments = [':id' if ID_SEGMENT.match(segment) else segment for segment in path.split('/')]
+    return f"{method} {'/'.join(segments) or '/'}"
+
+
+def parse_time(value):
+    """pino writes ISO timestamps (stdTimeFunctions.isoTime) or epoch millis"""
+    if isinstance(value, (int, float)):
+        return value / 1000.0
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def open_log(path):
+    if path == '-':
+        return sys.stdin.buffer
+    with open(path, 'rb') as probe:
+        magic = probe.read(2)
+    if magic == b'\x1f\x8b':
+        return gzip.open(path, 'rb')
+    return open(path, 'rb', buffering=1 << 20)
+
+
+def analyze_file(job):
+    """Worker entry point: stream one file and return its serialized aggregate"""
+    path, window_seconds, max_routes = job
+    aggregator = Aggregator(window_seconds, max_routes)
+
+    stream = open_log(path)
+    try:
+        for line in stream:
+            aggregator.lines += 1
+            # Cheap byte test first; most lines are not request completions
+            if COMPLETED_MARKER not in line:
+                continue
+            try:
+                record = decode(line)
+                duration = float(record['responseTime'])
+                status = int(record.get('statusCode', 0))
+                route = record.get('route') or normalize_route(record.get('method', '?'), record.get('url', ''))
+            except (ValueError, KeyError, TypeError):
+                aggregator.skipped += 1
+                continue
+            aggregator.record(parse_time(record.get('time')), route, duration, status)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+    return aggregator.to_dict()
+
+
+def parse_window(value):
+    match = re.fullmatch(r'(\d+)([smhd]?)', value)
+    if not match:
+        raise argparse.ArgumentTypeError(f'invalid window: {value}')
+    amount, unit = match.groups()
+    return int(amount) * {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}[unit]
+
+
+def build_report(aggregator, top, min_count):
+    routes = {route: stats.summary() for route, stats in aggregator.routes.items()}
+    slowest = sorted(
+        ((route, summary) for route, summary in routes.items() if summary['count'] >= min_count),
+        key=lambda item: item[1]['p95'],
+        reverse=True
+    )[:top]
+
+    windows = []
+    for window in sorted(aggregator.windows):
+        per_route = aggregator.windows[window]
+        total = RouteStats()
+        for stats in per_route.values():
+            total.merge(stats)
+        candidates = [(route, stats.summary()) for route, stats in per_route.items()
+                      if stats.latency.count >= min_count]
+        worst = max(candidates, key=lambda item: item[1]['p95'], default=(None, None))
+        windows.append({
+            'start': datetime.fromtimestamp(window, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            **total.summary(),
+            'slowestRoute': worst[0],
+            'slowestRouteP95': worst[1]['p95'] if worst[1] else None
+        })
+
+    overall = RouteStats()
+    for stats in aggregator.routes.values():
+        overall.merge(stats)
+
+    return {
+        'lines': aggregator.lines,
+        'skipped': aggregator.skipped,
+        'overall': overall.summary(),
+        'slowest': [{'route': route, **summary} for route, summary in slowest],
+        'windows': windows
+    }
+
+
+def print_report(report):
+    overall = report['overall']
+    print(f"{report['lines']} lines, {overall['count']} requests, {report['skipped']} unparseable")
+    print(f"overall  p50={overall['p50']}ms p95={overall['p95']}ms p99={overall['p99']}ms "
+          f"5xx={overall['errorRate']:.2%} 4xx={overall['clientErrorRate']:.2%}\n")
+
+    print('Slowest endpoints (by p95):')
+    print(f"  {'route':<50} {'count':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'5xx':>7}")
+    for row in report['slowest']:
+        print(f"  {row['route'][:50]:<50} {row['count']:>9} {row['p50']:>9} {row['p95']:>9} "
+              f"{row['p99']:>9} {row['errorRate']:>7.2%}")
+
+    if report['windows']:
+        print('\nBy window:')
+        print(f"  {'start':<21} {'count':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'5xx':>7}  slowest route")
+        for row in report['windows']:
+            print(f"  {row['start']:<21} {row['count']:>9} {row['p50']:>9} {row['p95']:>9} "
+                  f"{row['p99']:>9} {row['errorRate']:>7.2%}  {row['slowestRoute'] or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency percentiles per route from pino request logs')
+    parser.add_argument('files', nargs='+', help='NDJSON log files, optionally gzipped ("-" for stdin)')
+    parser.add_argument('--window', type=parse_window, default=parse_window('5m'),
+                        help='time window size, e.g. 30s, 5m, 1h (default 5m)')
+    parser.add_argument('--jobs', type=int, default=1, help='files analyzed in parallel')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest endpoints to list')
+    parser.add_argument('--min-count', type=int, default=20,
+                        help='ignore routes with fewer requests when ranking')
+    parser.add_argument('--max-routes', type=int, default=2000,
+                        help='distinct routes tracked before the rest fold into (other)')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    jobs = [(path, args.window, args.max_routes) for path in args.files]
+    aggregator = Aggregator(args.window, args.max_routes)
+
+    if args.jobs > 1 and len(jobs) > 1 and '-' not in args.files:
+        with Pool(min(args.jobs, len(jobs))) as pool:
+            for partial in pool.imap_unordered(analyze_file, jobs):
+                aggregator.merge(Aggregator.from_dict(partial, args.window, args.max_routes))
+    else:
+        for job in jobs:
+            aggregator.merge(Aggregator.from_dict(analyze_file(job), args.window, args.max_routes))
+
+    report = build_report(aggregator, args.top, args.min_count)
+    if args.json:
+        print(encode(report))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression tracker.
+
+Replays the catalogue of SQL that Prisma generates for our hot service
+methods against a local Postgres loaded with benchmark fixtures, stores the
+EXPLAIN (FORMAT JSON, BUFFERS) plans keyed by query fingerprint and diffs each
+run against the stored baseline.
+
+Usage:
+    python3 query-plan-tracker.py baseline            # record a new baseline
+    python3 query-plan-tracker.py check               # diff against baseline
+    python3 query-plan-tracker.py import-log app.log  # add queries from a dev log
+
+The database is taken from --dsn, BENCH_DATABASE_URL or DATABASE_URL. Queries
+run through `psql` inside a transaction that is always rolled back, so write
+statements in the catalogue are safe to EXPLAIN ANALYZE.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+PLANS_DIR = './scripts/query-plans'
+CATALOGUE_PATH = os.path.join(PLANS_DIR, 'catalogue.json')
+BASELINE_PATH = os.path.join(PLANS_DIR, 'baseline.json')
+
+# A plan is only a regression when its cost grows by this factor *and* by at
+# least MIN_COST_DELTA planner units, so tiny queries don't flap.
+COST_FACTOR = 2.0
+MIN_COST_DELTA = 100.0
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'(?<![\w$."])-?\b\d+(?:\.\d+)?\b')
+PLACEHOLDER = re.compile(r'\$\d+')
+IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+
+
+def normalize_sql(sql):
+    """Reduce a statement to its shape: no literals, placeholders or IN-list arity"""
+    sql = COMMENT.sub(' ', sql)
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = PLACEHOLDER.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = IN_LIST.sub('IN (...)', sql)
+    return ' '.join(sql.split()).rstrip(';')
+
+
+def fingerprint(sql):
+    """Stable id for a query shape"""
+    return hashlib.sha1(normalize_sql(sql).encode('utf-8')).hexdigest()[:16]
+
+
+def clean_dsn(dsn):
+    """Drop Prisma-only query parameters (schema, connection_limit...) that psql rejects"""
+    parts = urlsplit(dsn)
+    if not parts.query:
+        return dsn
+    prisma_only = {'schema', 'connection_limit', 'pool_timeout', 'pgbouncer', 'socket_timeout'}
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in prisma_only]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def sql_literal(value):
+    """Render a captured Prisma parameter as a SQL literal for EXECUTE"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def run_psql(dsn, script):
+    """Feed a script to psql and return its unaligned, tuples-only output"""
+    result = subprocess.run(
+        ['psql', dsn, '-X', '-q', '-A', '-t', '-v', 'ON_ERROR_STOP=1'],
+        input=script,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or 'psql failed')
+    return result.stdout
+
+
+def explain(dsn, entry, analyze=True):
+    """EXPLAIN one catalogue entry and return the top-level plan node"""
+    options = 'ANALYZE, BUFFERS, FORMAT JSON' if analyze else 'BUFFERS, FORMAT JSON'
+    sql = entry['sql'].strip().rstrip(';')
+    params = entry.get('params') or []
+
+    lines = ['BEGIN;']
+    if params:
+        lines.append(f'PREPARE qpt_stmt AS {sql};')
+        args = ', '.join(sql_literal(p) for p in params)
+        lines.append(f'EXPLAIN ({options}) EXECUTE qpt_stmt({args});')
+    else:
+        lines.append(f'EXPLAIN ({options}) {sql};')
+    lines.append('ROLLBACK;')
+
+    output = run_psql(dsn, '\n'.join(lines) + '\n')
+    return json.loads(output)[0]
+
+
+def walk(node, depth=0):
+    """Yield (depth, node) for every node of a plan tree"""
+    yield depth, node
+    for child in node.get('Plans', []):
+        yield from walk(child, depth + 1)
+
+
+def summarize(explain_output):
+    """Normalize an EXPLAIN JSON document into the fields we compare"""
+    root = explain_output['Plan']
+    shape = []
+    seq_scans = set()
+    sort_spills = []
+
+    for depth, node in walk(root):
+        node_type = node.get('Node Type')
+        relation = node.get('Relation Name')
+        index = node.get('Index Name')
+        shape.append('  ' * depth + ' '.join(filter(None, [node_type, relation, index])))
+
+        if node_type == 'Seq Scan' and relation:
+            seq_scans.add(relation)
+        if node_type in ('Sort', 'Incremental Sort'):
+            method = node.get('Sort Method', '')
+            if node.get('Sort Space Type') == 'Disk' or 'external' in method:
+                sort_spills.append(f"{method or 'sort'} ({node.get('Sort Space Used', '?')}kB)")
+
+    return {
+        'shape': shape,
+        'shape_hash': hashlib.sha1('\n'.join(shape).encode('utf-8')).hexdigest()[:16],
+        'total_cost': root.get('Total Cost', 0.0),
+        'plan_rows': root.get('Plan Rows', 0),
+        'actual_time_ms': root.get('Actual Total Time'),
+        'shared_read_blocks': root.get('Shared Read Blocks', 0),
+        'seq_scans': sorted(seq_scans),
+        'sort_spills': sort_spills,
+        'plan': explain_output
+    }
+
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def replay(dsn, catalogue, analyze=True, only=None):
+    """Explain every catalogue entry, keyed by fingerprint"""
+    results = {}
+    failures = 0
+
+    for entry in catalogue:
+        if only and only not in entry['name']:
+            continue
+        fp = fingerprint(entry['sql'])
+        try:
+            summary = summarize(explain(dsn, entry, analyze))
+        except (RuntimeError, ValueError, KeyError, IndexError) as error:
+            print(f"  ✗ {entry['name']}: {error}", file=sys.stderr)
+            failures += 1
+            continue
+
+        summary['name'] = entry['name']
+        summary['normalized_sql'] = normalize_sql(entry['sql'])
+        results[fp] = summary
+        print(f"  ✓ {entry['name']} [{fp}] cost={summary['total_cost']:.1f}")
+
+    return results, failures
+
+
+def diff_plans(baseline, current, cost_factor=COST_FACTOR, min_delta=MIN_COST_DELTA):
+    """Compare two runs and return (regressions, notices)"""
+    regressions = []
+    notices = []
+
+    for fp, now in sorted(current.items(), key=lambda item: item[1]['name']):
+        name = f"{now['name']} [{fp}]"
+        before = baseline.get(fp)
+        if before is None:
+            notices.append(f'{name}: no baseline for this fingerprint')
+            continue
+
+        old_cost = before['total_cost'] or 0.0
+        new_cost = now['total_cost'] or 0.0
+        if new_cost > old_cost * cost_factor and new_cost - old_cost >= min_delta:
+            regressions.append(f'{name}: cost blow-up {old_cost:.1f} -> {new_cost:.1f} ({new_cost / max(old_cost, 0.01):.1f}x)')
+
+        new_seq = sorted(set(now['seq_scans']) - set(before['seq_scans']))
+        if new_seq:
+            regressions.append(f"{name}: new seq scan on {', '.join(new_seq)}")
+
+        if now['sort_spills'] and not before['sort_spills']:
+            regressions.append(f"{name}: sort spilled to disk: {'; '.join(now['sort_spills'])}")
+
+        if now['shape_hash'] != before['shape_hash']:
+            notices.append(f'{name}: plan shape changed')
+            for line in before['shape']:
+                notices.append(f'      - {line}')
+            for line in now['shape']:
+                notices.append(f'      + {line}')
+
+    for fp in sorted(set(baseline) - set(current)):
+        notices.append(f"{baseline[fp]['name']} [{fp}]: in baseline but not replayed")
+
+    return regressions, notices
+
+
+def import_log(log_paths, catalogue):
+    """Add 'Database query' events from pino dev logs to the catalogue"""
+    known = {fingerprint(entry['sql']) for entry in catalogue}
+    added = 0
+
+    for log_path in log_paths:
+        with open(log_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('msg') != 'Database query' or 'query' not in record:
+                    continue
+
+                sql = record['query']
+                fp = fingerprint(sql)
+                if fp in known or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+                    continue
+
+                params = record.get('params') or '[]'
+                try:
+                    params = json.loads(params) if isinstance(params, str) else params
+                except ValueError:
+                    params = []
+
+                catalogue.append({'name': f'captured:{fp}', 'sql': sql, 'params': params})
+                known.add(fp)
+                added += 1
+
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Track Postgres query plans for hot Prisma queries')
+    parser.add_argument('command', choices=['baseline', 'check', 'import-log'])
+    parser.add_argument('logs', nargs='*', help='pino NDJSON logs for import-log')
+    parser.add_argument('--dsn', default=os.environ.get('BENCH_DATABASE_URL') or os.environ.get('DATABASE_URL'))
+    parser.add_argument('--catalogue', default=CATALOGUE_PATH)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--fixtures', help='SQL file loaded into the database before replaying')
+    parser.add_argument('--only', help='only replay entries whose name contains this string')
+    parser.add_argument('--no-analyze', action='store_true', help='plan only; sort spills are not detectable')
+    parser.add_argument('--cost-factor', type=float, default=COST_FACTOR)
+    parser.add_argument('--min-cost-delta', type=float, default=MIN_COST_DELTA)
+    args = parser.parse_args()
+
+    catalogue = load_json(args.catalogue, [])
+
+    if args.command == 'import-log':
+        if not args.logs:
+            parser.error('import-log needs at least one log file')
+        added = import_log(args.logs, catalogue)
+        save_json(args.catalogue, catalogue)
+        print(f'Added {added} queries to {args.catalogue} ({len(catalogue)} total)')
+        return 0
+
+    if not args.dsn:
+        parser.error('no database: pass --dsn or set BENCH_DATABASE_URL')
+    dsn = clean_dsn(args.dsn)
+
+    if args.fixtures:
+        with open(args.fixtures) as f:
+            run_psql(dsn, f.read())
+        run_psql(dsn, 'ANALYZE;\n')
+        print(f'Loaded fixtures from {args.fixtures}')
+
+    print(f'Replaying {len(catalogue)} queries...')
+    current, failures = replay(dsn, catalogue, analyze=not args.no_analyze, only=args.only)
+
+    if args.command == 'baseline':
+        baseline = load_json(args.baseline, {}) if args.only else {}
+        baseline.update(current)
+        save_json(args.baseline, baseline)
+        print(f'\nStored {len(current)} plans in {args.baseline}')
+        return 1 if failures else 0
+
+    baseline = load_json(args.baseline, None)
+    if baseline is None:
+        print(f'No baseline at {args.baseline}; run "baseline" first', file=sys.stderr)
+        return 2
+
+    regressions, notices = diff_plans(baseline, current, args.cost_factor, args.min_cost_delta)
+    if notices:
+        print('\nNotices:')
+        for notice in notices:
+            print(f'  {notice}')
+    if regressions:
+        print('\nPlan regressions:')
+        for regression in regressions:
+            print(f'  ✗ {regression}')
+    print(f'\n{len(regressions)} regressions, {failures} failed queries, {len(current)} plans checked')
+
+    return 1 if regressions or failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
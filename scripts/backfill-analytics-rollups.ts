@@ -0,0 +1,42 @@
+import { PrismaClient } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { AnalyticsRollupService } from '../src/services/analytics-rollup.service';
+import dotenv from 'dotenv';
+
+dotenv.config();
+
+const prisma = new PrismaClient();
+const redis = new Redis({
+  host: process.env.REDIS_HOST || 'localhost',
+  port: parseInt(process.env.REDIS_PORT || '6379'),
+  password: process.env.REDIS_PASSWORD
+});
+
+// Recompute analytics rollups for a date range: backfill-analytics-rollups.ts <from> [to]
+async function main() {
+  const [fromArg, toArg] = process.argv.slice(2);
+  const from = fromArg ? new Date(fromArg) : undefined;
+  const to = toArg ? new Date(toArg) : new Date();
+
+  if (!from || isNaN(from.getTime()) || isNaN(to.getTime()) || from >= to) {
+    console.error('Usage: analytics:backfill <from> [to]  (ISO dates, from before to)');
+    process.exit(1);
+  }
+
+  console.log(`🔄 Backfilling analytics rollups from ${from.toISOString()} to ${to.toISOString()}...`);
+
+  try {
+    const rollups = new AnalyticsRollupService(prisma, redis);
+    const hours = await rollups.backfill(from, to);
+
+    console.log(`✅ Recomputed ${hours} hourly buckets`);
+  } catch (error) {
+    console.error('❌ Backfill failed:', error);
+    process.exit(1);
+  } finally {
+    await prisma.$disconnect();
+    redis.disconnect();
+  }
+}
+
+main();
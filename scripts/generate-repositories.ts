@@ -1,6 +1,7 @@
 import fs from 'fs/promises';
 import path from 'path';
 import { getDMMF } from '@prisma/internals';
+import { generateRepositoryRegistry } from './generate-repository-registry';
 
 const PRISMA_SCHEMA_PATH = path.join(process.cwd(), 'prisma/schema.prisma');
 const REPOSITORIES_PATH = path.join(process.cwd(), 'src/repositories');
@@ -360,21 +361,6 @@ async function generateRepository(model: ModelInfo): Promise<void> {
         children: true
       }
     });
-  }
-
-  async getFullPath(categoryId: string): Promise<Category[]> {
-    const path: Category[] = [];
-    let currentId: string | null = categoryId;
-
-    while (currentId) {
-      const category = await this.findById(currentId);
-      if (!category) break;
-      
-      path.unshift(category);
-      currentId = category.parentId;
-    }
-
-    return path;
   }`,
 
     Inventory: `
@@ -515,7 +501,9 @@ async function generateRepositoriesIndex(models: ModelInfo[]): Promise<void> {
     exports.push(`export { ${modelName}Repository };`);
   }
 
-  const content = `// Auto-generated repository exports
+  const content = `// Auto-generated repository exports. Loading this barrel loads every
+// repository, so application code imports repository modules directly (or
+// uses app.repositories); this is for scripts and tooling only.
 ${imports.join('\n')}
 
 // Export base repository
@@ -525,6 +513,10 @@ export type { FindOptions, BatchOptions } from './base.repository';
 // Export all repositories
 ${exports.join('\n')}
 
+// Lazy, memoized access to every repository (generated)
+export { RepositoryRegistry, getRepositoryRegistry } from './registry';
+export type { RepositoryMap, RepositoryName } from './registry';
+
 // Repository types
 export type RepositoryTypes = {
 ${models.map(m => `  ${toCamelCase(m.name)}: ${toPascalCase(m.name)}Repository;`).join('\n')}
@@ -563,12 +555,15 @@ async function main() {
     // Generate index file
     await generateRepositoriesIndex(models);
 
+    // Keep the lazy registry in sync with the files just written
+    await generateRepositoryRegistry();
+
     console.log(`\n✅ Successfully generated ${models.length} repositories!`);
     console.log('📁 Location: src/repositories/');
     console.log('\n📝 Next steps:');
     console.log('1. Run "npm run db:generate" to generate Prisma client');
     console.log('2. Run "npm run db:migrate" to create database tables');
-    console.log('3. Import and use repositories in your services');
+    console.log('3. Import repository modules directly in your services, not through src/repositories/index.ts');
 
   } catch (error) {
     console.error('❌ Error generating repositories:', error);
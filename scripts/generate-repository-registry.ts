@@ -0,0 +1,157 @@
+import fs from 'fs/promises';
+import path from 'path';
+
+const REPOSITORIES_PATH = path.join(process.cwd(), 'src/repositories');
+const REGISTRY_PATH = path.join(REPOSITORIES_PATH, 'registry.ts');
+
+// Abstract bases, not concrete repositories
+const SKIP_FILES = ['base.repository.ts', 'simple-base.repository.ts'];
+
+interface RepositoryEntry {
+  key: string;
+  className: string;
+  module: string;
+}
+
+function toCamelCase(str: string): string {
+  return str.charAt(0).toLowerCase() + str.slice(1);
+}
+
+async function scanRepositories(): Promise<RepositoryEntry[]> {
+  const files = (await fs.readdir(REPOSITORIES_PATH))
+    .filter(file => file.endsWith('.repository.ts') && !SKIP_FILES.includes(file))
+    .sort();
+
+  const entries: RepositoryEntry[] = [];
+  for (const file of files) {
+    const source = await fs.readFile(path.join(REPOSITORIES_PATH, file), 'utf-8');
+    const match = source.match(/^export class (\w+Repository)\b/m);
+    if (!match) {
+      console.warn(`⚠️  No exported *Repository class in ${file}, skipping`);
+      continue;
+    }
+
+    const className = match[1];
+    entries.push({
+      key: toCamelCase(className.replace(/Repository$/, '')),
+      className,
+      module: `./${file.replace(/\.ts$/, '')}`
+    });
+  }
+
+  return entries;
+}
+
+function renderRegistry(entries: RepositoryEntry[]): string {
+  const typeImports = entries
+    .map(e => `import type { ${e.className} } from '${e.module}';`)
+    .join('\n');
+  const mapFields = entries.map(e => `  ${e.key}: ${e.className};`).join('\n');
+  const loaders = entries
+    .map(e => `  ${e.key}: () => require('${e.module}').${e.className},`)
+    .join('\n');
+  const accessors = entries
+    .map(e => `  get ${e.key}(): ${e.className} {\n    return this.get('${e.key}');\n  }`)
+    .join('\n\n');
+
+  return `// Auto-generated by scripts/generate-repository-registry.ts - do not edit.
+// Run "npm run generate:repository-registry" after adding or removing a repository.
+/* eslint-disable @typescript-eslint/no-var-requires */
+import { PrismaClient } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { Logger } from 'pino';
+${typeImports}
+
+type RepositoryConstructor<R> = new (prisma: PrismaClient, redis: Redis, logger: Logger) => R;
+
+export interface RepositoryMap {
+${mapFields}
+}
+
+// Repository modules are required on first access only; type imports above are erased
+const loaders: { [K in keyof RepositoryMap]: () => RepositoryConstructor<RepositoryMap[K]> } = {
+${loaders}
+};
+
+export type RepositoryName = keyof RepositoryMap;
+
+export class RepositoryRegistry {
+  private instances: Partial<RepositoryMap> = {};
+
+  constructor(
+    private readonly prisma: PrismaClient,
+    private readonly redis: Redis,
+    private readonly logger: Logger
+  ) {}
+
+  // Load the repository module and construct it once per registry
+  get<K extends RepositoryName>(name: K): RepositoryMap[K] {
+    let instance = this.instances[name];
+    if (!instance) {
+      const Repository = loaders[name]();
+      instance = new Repository(this.prisma, this.redis, this.logger);
+      this.instances[name] = instance;
+    }
+    return instance as RepositoryMap[K];
+  }
+
+  // Names of the repositories constructed so far
+  loaded(): RepositoryName[] {
+    return Object.keys(this.instances) as RepositoryName[];
+  }
+
+${accessors}
+}
+
+const registries = new WeakMap<PrismaClient, RepositoryRegistry>();
+
+// One registry per Prisma client, so each process builds each repository once
+export function getRepositoryRegistry(
+  prisma: PrismaClient,
+  redis: Redis,
+  logger: Logger
+): RepositoryRegistry {
+  let registry = registries.get(prisma);
+  if (!registry) {
+    registry = new RepositoryRegistry(prisma, redis, logger);
+    registries.set(prisma, registry);
+  }
+  return registry;
+}
+`;
+}
+
+export async function generateRepositoryRegistry(options: { check?: boolean } = {}): Promise<boolean> {
+  const entries = await scanRepositories();
+  const content = renderRegistry(entries);
+
+  let current = '';
+  try {
+    current = await fs.readFile(REGISTRY_PATH, 'utf-8');
+  } catch {
+    // First run
+  }
+
+  if (current === content) {
+    console.log(`✅ Repository registry up to date (${entries.length} repositories)`);
+    return true;
+  }
+
+  if (options.check) {
+    console.error('❌ src/repositories/registry.ts is out of date; run "npm run generate:repository-registry"');
+    return false;
+  }
+
+  await fs.writeFile(REGISTRY_PATH, content, 'utf-8');
+  console.log(`✅ Generated repository registry (${entries.length} repositories)`);
+  return true;
+}
+
+if (require.main === module) {
+  generateRepositoryRegistry({ check: process.argv.includes('--check') })
+    .then(ok => process.exit(ok ? 0 : 1))
+    .catch(error => {
+      console.error('❌ Error generating repository registry:', error);
+      process.exit(1);
+    });
+}
@@ -0,0 +1,36 @@
+import { PrismaClient } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { CategoryRepository } from '../src/repositories/category.repository';
+import { invalidateCategoryHierarchy } from '../src/utils/category-hierarchy';
+import { logger } from '../src/utils/logger';
+import dotenv from 'dotenv';
+
+dotenv.config();
+
+const prisma = new PrismaClient();
+const redis = new Redis({
+  host: process.env.REDIS_HOST || 'localhost',
+  port: parseInt(process.env.REDIS_PORT || '6379'),
+  password: process.env.REDIS_PASSWORD
+});
+
+// Backfill category_closure from categories.parentId
+async function main() {
+  console.log('🔄 Rebuilding category closure table...');
+
+  try {
+    const categoryRepo = new CategoryRepository(prisma, redis, logger);
+    const rows = await categoryRepo.rebuildClosure();
+    await invalidateCategoryHierarchy(redis);
+
+    console.log(`✅ Wrote ${rows} closure rows`);
+  } catch (error) {
+    console.error('❌ Rebuild failed:', error);
+    process.exit(1);
+  } finally {
+    await prisma.$disconnect();
+    redis.disconnect();
+  }
+}
+
+main();
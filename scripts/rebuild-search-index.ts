@@ -0,0 +1,58 @@
+// Load .env before the search module creates its Typesense client
+import 'dotenv/config';
+import { PrismaClient } from '@prisma/client';
+import { SEARCH_COLLECTIONS, isSearchCollection, rebuildSearchIndex } from '../src/utils/search';
+import { SearchIndexQueue } from '../src/queues/search-index.queue';
+import { redis, queueRedis } from '../src/config/redis';
+import { cache } from '../src/utils/cache';
+
+const prisma = new PrismaClient();
+
+// Rebuild search collections behind their aliases: rebuild-search-index.ts [collection...]
+async function main() {
+  const requested = process.argv.slice(2);
+  const invalid = requested.filter(name => !isSearchCollection(name));
+
+  if (invalid.length > 0) {
+    console.error(`Usage: search:rebuild [${SEARCH_COLLECTIONS.join('|')}...]  (unknown: ${invalid.join(', ')})`);
+    process.exit(1);
+  }
+
+  const collections = requested.length > 0 ? requested.filter(isSearchCollection) : SEARCH_COLLECTIONS;
+  const concurrency = parseInt(process.env.SEARCH_REBUILD_CONCURRENCY || '4');
+  const batchSize = parseInt(process.env.SEARCH_REBUILD_BATCH_SIZE || '1000');
+
+  // Lets the products rebuild drop cached search results
+  cache.initialize(redis);
+
+  try {
+    for (const collection of collections) {
+      console.log(`🔄 Rebuilding ${collection}...`);
+      const result = await rebuildSearchIndex(prisma, collection, {
+        concurrency,
+        batchSize,
+        onProgress: indexed => {
+          if (indexed % (batchSize * 10) < batchSize) {
+            console.log(`  Indexed ${indexed} ${collection}...`);
+          }
+        }
+      });
+
+      console.log(`✅ ${collection} -> ${result.version}: ${result.documents} documents${result.dropped.length ? `, dropped ${result.dropped.join(', ')}` : ''}`);
+    }
+
+    if (collections.includes('products')) {
+      await SearchIndexQueue.requestWarmup(queueRedis);
+      console.log('🔥 Search cache warmup queued');
+    }
+  } catch (error) {
+    console.error('❌ Rebuild failed:', error);
+    process.exit(1);
+  } finally {
+    await prisma.$disconnect();
+    redis.disconnect();
+    queueRedis.disconnect();
+  }
+}
+
+main();
@@ -15,7 +15,7 @@ import {
 import { TypesenseClient } from './integrations/typesense/client';
 import { config } from './config/environment';
 import { prisma, auditPrisma } from './config/database';
-import { redis } from './config/redis';
+import { redis, queueRedis } from './config/redis';
 import { 
   contextMiddleware, 
   loggingMiddleware, 
@@ -25,7 +25,17 @@ import {
 import { healthRoutes } from './routes/health.routes';
 import { HealthService } from './services/health.service';
 import { FraudDetectionService } from './services/fraud-detection.service';
+import { AnalyticsRollupService } from './services/analytics-rollup.service';
+import { FlashSaleStockService } from './services/flash-sale-stock.service';
+import { PromotionEngine } from './services/promotion-engine.service';
+import { ReportExportQueue } from './queues/report-export.queue';
+import { SearchIndexQueue } from './queues/search-index.queue';
+import { RepositoryRegistry, getRepositoryRegistry } from './repositories/registry';
 import { logger } from './utils/logger';
+import { cache, tryLock, unlock } from './utils/cache';
+import { invalidateCategoryHierarchy } from './utils/category-hierarchy';
+import { analyticsIngest } from './utils/analytics-ingest';
+import { autocomplete } from './utils/autocomplete';
 
 export async function buildApp(): Promise<FastifyInstance> {
   const app = Fastify({
@@ -172,9 +182,31 @@ export async function buildApp(): Promise<FastifyInstance> {
   app.register(performanceMiddleware);
 
   // Initialize services
+  cache.initialize(redis, { local: config.cache.local, codec: config.cache.codec });
+  analyticsIngest.initialize(prisma, redis, config.analytics.ingest);
+  autocomplete.initialize(prisma, redis, config.typesense.autocomplete);
   const typesense = TypesenseClient.getInstance();
   const healthService = new HealthService(prisma, auditPrisma, redis, typesense);
   const fraudService = new FraudDetectionService(prisma, redis);
+  const analyticsRollup = new AnalyticsRollupService(prisma, redis, {
+    interval: config.analytics.rollup.interval,
+    settle: config.analytics.rollup.settle
+  });
+  if (config.analytics.rollup.enabled) {
+    analyticsRollup.start();
+  }
+  const flashSaleStock = new FlashSaleStockService(prisma, redis, config.flashSales.stock);
+  flashSaleStock.start();
+  const promotionEngine = new PromotionEngine(prisma, redis, config.promotions.engine);
+  promotionEngine.start();
+  const reportExports = new ReportExportQueue(prisma, redis, queueRedis, config.reports.export);
+  const searchIndex = new SearchIndexQueue(prisma, queueRedis, typesense.getClient(), {
+    ...config.typesense.index,
+    warmup: async () => {
+      const { ProductService } = await import('./services/product.service');
+      return new ProductService(app).warmSearchCache();
+    }
+  });
 
   // Decorate fastify instance with services
   app.decorate('prisma', prisma);
@@ -183,6 +215,30 @@ export async function buildApp(): Promise<FastifyInstance> {
   app.decorate('typesense', typesense);
   app.decorate('healthService', healthService);
   app.decorate('fraudService', fraudService);
+  app.decorate('flashSaleStock', flashSaleStock);
+  app.decorate('promotionEngine', promotionEngine);
+  app.decorate('reportExports', reportExports);
+  app.decorate('searchIndex', searchIndex);
+  app.decorate('repositories', getRepositoryRegistry(prisma, redis, logger));
+
+  // Databases created before category_closure get it backfilled once
+  const closureLock = await tryLock(redis, 'category-closure:backfill', 60000);
+  if (closureLock) {
+    try {
+      const rows = await app.repositories.category.ensureClosure();
+      if (rows > 0) {
+        await invalidateCategoryHierarchy(redis);
+        logger.info({ rows }, 'Backfilled category closure');
+      }
+    } catch (error) {
+      logger.error({ error }, 'Failed to backfill category closure');
+    } finally {
+      await unlock(redis, 'category-closure:backfill', closureLock);
+    }
+  }
+
+  // A fresh deploy starts with the hot searches already cached
+  await searchIndex.warmup();
 
   // Register routes
   try {
@@ -546,8 +602,16 @@ export async function buildApp(): Promise<FastifyInstance> {
     
     try {
       await app.close();
+      await analyticsIngest.close();
+      await autocomplete.close();
+      await analyticsRollup.stop();
+      await flashSaleStock.stop();
+      await promotionEngine.stop();
+      await reportExports.close();
+      await searchIndex.close();
       await prisma.$disconnect();
       await auditPrisma.$disconnect();
+      await cache.close();
       redis.disconnect();
       logger.info('All connections closed');
       process.exit(0);
@@ -571,5 +635,10 @@ declare module 'fastify' {
     typesense: TypesenseClient;
     healthService: HealthService;
     fraudService: FraudDetectionService;
+    flashSaleStock: FlashSaleStockService;
+    promotionEngine: PromotionEngine;
+    reportExports: ReportExportQueue;
+    searchIndex: SearchIndexQueue;
+    repositories: RepositoryRegistry;
   }
 }
@@ -34,6 +34,12 @@ const envSchema = z.object({
   TYPESENSE_PORT: z.string().transform(Number).default('8108'),
   TYPESENSE_PROTOCOL: z.string().default('http'),
   TYPESENSE_API_KEY: z.string(),
+
+  // Search indexing (outbox drain)
+  SEARCH_INDEX_BATCH_SIZE: z.string().transform(Number).default('250'),
+  SEARCH_INDEX_DEBOUNCE: z.string().transform(Number).default('250'),
+  SEARCH_INDEX_SWEEP_INTERVAL: z.string().transform(Number).default('30000'),
+  SEARCH_INDEX_ATTEMPTS: z.string().transform(Number).default('8'),
   
   // CORS
   ALLOWED_ORIGINS: z.string().transform((val) => val.split(',')),
@@ -77,6 +83,7 @@ const envSchema = z.object({
   AWS_SECRET_ACCESS_KEY: z.string().optional(),
   AWS_REGION: z.string().default('us-east-1'),
   AWS_BUCKET: z.string().optional(),
+  AWS_PRIVATE_BUCKET: z.string().optional(),
   
   // CDN
   CDN_URL: z.string().url().optional(),
@@ -102,6 +109,54 @@ const envSchema = z.object({
   CACHE_TTL_MEDIUM: z.string().transform(Number).default('300'),
   CACHE_TTL_LONG: z.string().transform(Number).default('3600'),
   CACHE_TTL_VERY_LONG: z.string().transform(Number).default('86400'),
+
+  // In-process L1 cache in front of Redis
+  CACHE_LOCAL_ENABLED: z.string().transform(val => val === 'true').default('false'),
+  CACHE_LOCAL_MAX_ENTRIES: z.string().transform(Number).default('10000'),
+  CACHE_LOCAL_MAX_BYTES: z.string().transform(Number).default('67108864'),
+  CACHE_LOCAL_MAX_TTL: z.string().transform(Number).default('30'),
+  CACHE_LOCAL_PREFIXES: z.string().default('categories:tree:'),
+
+  // Cache value encoding
+  CACHE_FORMAT: z.enum(['json', 'msgpack']).default('json'),
+  CACHE_COMPRESS_THRESHOLD: z.string().transform(Number).default('16384'),
+
+  // Product search result cache
+  SEARCH_CACHE_TTL: z.string().transform(Number).default('60'),
+  SEARCH_WARMUP_QUERIES: z.string().transform(Number).default('200'),
+  SEARCH_WARMUP_DAYS: z.string().transform(Number).default('7'),
+
+  // In-process autocomplete index
+  AUTOCOMPLETE_ENABLED: z.string().transform(val => val === 'true').default('true'),
+  AUTOCOMPLETE_REBUILD_INTERVAL: z.string().transform(Number).default('900'),
+  AUTOCOMPLETE_QUERY_DAYS: z.string().transform(Number).default('30'),
+  AUTOCOMPLETE_MAX_QUERIES: z.string().transform(Number).default('50000'),
+  AUTOCOMPLETE_MAX_DELTAS: z.string().transform(Number).default('10000'),
+
+  // Analytics rollup aggregator
+  ANALYTICS_ROLLUP_ENABLED: z.string().transform(val => val === 'true').default('true'),
+  ANALYTICS_ROLLUP_INTERVAL: z.string().transform(Number).default('60'),
+  ANALYTICS_ROLLUP_SETTLE: z.string().transform(Number).default('30'),
+
+  // Analytics event ingestion buffer
+  ANALYTICS_INGEST_MAX_BUFFER: z.string().transform(Number).default('10000'),
+  ANALYTICS_INGEST_BATCH_SIZE: z.string().transform(Number).default('500'),
+  ANALYTICS_INGEST_FLUSH_INTERVAL: z.string().transform(Number).default('1000'),
+
+  // Flash sale stock reservations
+  FLASH_SALE_HOLD_TTL: z.string().transform(Number).default('600'),
+  FLASH_SALE_RECONCILE_INTERVAL: z.string().transform(Number).default('2000'),
+  FLASH_SALE_RECONCILE_BATCH_SIZE: z.string().transform(Number).default('500'),
+
+  // Promotion engine
+  PROMOTION_USAGE_SYNC_INTERVAL: z.string().transform(Number).default('2000'),
+  PROMOTION_USAGE_BATCH_SIZE: z.string().transform(Number).default('500'),
+  PROMOTION_RULES_REFRESH_INTERVAL: z.string().transform(Number).default('300'),
+
+  // Report exports
+  REPORT_EXPORT_DIR: z.string().default('./exports'),
+  REPORT_EXPORT_CONCURRENCY: z.string().transform(Number).default('2'),
+  REPORT_EXPORT_BATCH_SIZE: z.string().transform(Number).default('1000'),
   
   // API Keys
   INTERNAL_API_KEY: z.string().optional()
@@ -186,7 +241,20 @@ export const config = {
     host: env.TYPESENSE_HOST,
     port: env.TYPESENSE_PORT,
     protocol: env.TYPESENSE_PROTOCOL,
-    apiKey: env.TYPESENSE_API_KEY
+    apiKey: env.TYPESENSE_API_KEY,
+    index: {
+      batchSize: env.SEARCH_INDEX_BATCH_SIZE,
+      debounce: env.SEARCH_INDEX_DEBOUNCE,
+      sweepInterval: env.SEARCH_INDEX_SWEEP_INTERVAL,
+      attempts: env.SEARCH_INDEX_ATTEMPTS
+    },
+    autocomplete: {
+      enabled: env.AUTOCOMPLETE_ENABLED,
+      rebuildInterval: env.AUTOCOMPLETE_REBUILD_INTERVAL,
+      queryDays: env.AUTOCOMPLETE_QUERY_DAYS,
+      maxQueries: env.AUTOCOMPLETE_MAX_QUERIES,
+      maxDeltas: env.AUTOCOMPLETE_MAX_DELTAS
+    }
   },
   cors: {
     origins: env.ALLOWED_ORIGINS
@@ -220,7 +288,8 @@ export const config = {
       accessKeyId: env.AWS_ACCESS_KEY_ID,
       secretAccessKey: env.AWS_SECRET_ACCESS_KEY,
       region: env.AWS_REGION,
-      bucket: env.AWS_BUCKET
+      bucket: env.AWS_BUCKET,
+      privateBucket: env.AWS_PRIVATE_BUCKET
     }
   },
   payment: {
@@ -245,6 +314,55 @@ export const config = {
       medium: env.CACHE_TTL_MEDIUM,
       long: env.CACHE_TTL_LONG,
       veryLong: env.CACHE_TTL_VERY_LONG
+    },
+    local: {
+      enabled: env.CACHE_LOCAL_ENABLED,
+      maxEntries: env.CACHE_LOCAL_MAX_ENTRIES,
+      maxBytes: env.CACHE_LOCAL_MAX_BYTES,
+      maxTTL: env.CACHE_LOCAL_MAX_TTL,
+      prefixes: env.CACHE_LOCAL_PREFIXES.split(',').map(p => p.trim()).filter(Boolean)
+    },
+    codec: {
+      format: env.CACHE_FORMAT,
+      compressThreshold: env.CACHE_COMPRESS_THRESHOLD
+    },
+    search: {
+      ttl: env.SEARCH_CACHE_TTL,
+      warmupQueries: env.SEARCH_WARMUP_QUERIES,
+      warmupDays: env.SEARCH_WARMUP_DAYS
+    }
+  },
+  analytics: {
+    rollup: {
+      enabled: env.ANALYTICS_ROLLUP_ENABLED,
+      interval: env.ANALYTICS_ROLLUP_INTERVAL,
+      settle: env.ANALYTICS_ROLLUP_SETTLE
+    },
+    ingest: {
+      maxBuffer: env.ANALYTICS_INGEST_MAX_BUFFER,
+      batchSize: env.ANALYTICS_INGEST_BATCH_SIZE,
+      flushInterval: env.ANALYTICS_INGEST_FLUSH_INTERVAL
+    }
+  },
+  flashSales: {
+    stock: {
+      holdTTL: env.FLASH_SALE_HOLD_TTL,
+      interval: env.FLASH_SALE_RECONCILE_INTERVAL,
+      batchSize: env.FLASH_SALE_RECONCILE_BATCH_SIZE
+    }
+  },
+  promotions: {
+    engine: {
+      interval: env.PROMOTION_USAGE_SYNC_INTERVAL,
+      batchSize: env.PROMOTION_USAGE_BATCH_SIZE,
+      refreshInterval: env.PROMOTION_RULES_REFRESH_INTERVAL
+    }
+  },
+  reports: {
+    export: {
+      dir: env.REPORT_EXPORT_DIR,
+      concurrency: env.REPORT_EXPORT_CONCURRENCY,
+      batchSize: env.REPORT_EXPORT_BATCH_SIZE
     }
   },
   commission: {
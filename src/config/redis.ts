@@ -1,5 +1,6 @@
 import Redis from 'ioredis';
 import { logger } from '../utils/logger';
+import { scanDelete, readThrough, tryLock, CacheEnvelope, ReadThroughOptions } from '../utils/cache';
 
 // Create Redis client with configuration
 export const redis = new Redis({
@@ -94,15 +95,11 @@ export async function cacheSet(
 }
 
 /**
- * Cache delete
+ * Cache delete (incremental SCAN, never KEYS)
  */
 export async function cacheDel(pattern: string): Promise<number> {
   try {
-    const keys = await redis.keys(pattern);
-    if (keys.length > 0) {
-      return await redis.del(...keys);
-    }
-    return 0;
+    return await scanDelete(redis, pattern);
   } catch (_error) { logger.error({ error: _error, pattern }, 'Cache delete error');
     return 0;
   }
@@ -121,26 +118,21 @@ export async function invalidateCache(patterns: string[]): Promise<void> {
 }
 
 /**
- * Get or set cache
+ * Get or set cache, with single-flight misses and the optional lock, early
+ * refresh and stale-while-revalidate modes of readThrough
  */
 export async function cacheGetOrSet<T>(
   key: string,
   factory: () => Promise<T>,
-  ttl?: number
+  ttl?: number,
+  options: Omit<ReadThroughOptions, 'ttl'> = {}
 ): Promise<T> {
-  // Try to get from cache
-  const cached = await cacheGet<T>(key);
-  if (cached !== null) {
-    return cached;
-  }
-
-  // Generate value
-  const value = await factory();
-  
-  // Store in cache
-  await cacheSet(key, value, ttl);
-  
-  return value;
+  return readThrough<T>({
+    redis,
+    key,
+    read: () => cacheGet<CacheEnvelope<T>>(key),
+    write: (envelope, physicalTTL) => cacheSet(key, envelope, physicalTTL)
+  }, factory, { ...options, ttl });
 }
 
 /**
@@ -150,11 +142,7 @@ export async function acquireLock(
   key: string,
   ttl: number = 5000
 ): Promise<boolean> {
-  const lockKey = `lock:${key}`;
-  const identifier = Date.now().toString();
-  
-  const result = await redis.set(lockKey, identifier, 'PX', ttl, 'NX');
-  return result === 'OK';
+  return (await tryLock(redis, key, ttl)) !== null;
 }
 
 export async function releaseLock(key: string): Promise<void> {
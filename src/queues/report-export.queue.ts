@@ -0,0 +1,183 @@
+import { Queue, Worker, Job } from 'bullmq';
+import { PrismaClient } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { createWriteStream } from 'fs';
+import { mkdir, rm } from 'fs/promises';
+import { join } from 'path';
+import { nanoid } from 'nanoid';
+import { logger } from '../utils/logger';
+import { EXPORT_CONTENT_TYPES, ExportFormat } from '../utils/report-export';
+import { deleteFromS3, uploadLocalFileToS3 } from '../utils/storage';
+import { ReportExportService, ReportType } from '../services/report-export.service';
+
+export interface ReportExportJobData {
+  type: ReportType;
+  format: ExportFormat;
+  startDate: string;
+  endDate: string;
+  requestedBy: string;
+}
+
+export interface ReportExportProgress {
+  rows: number;
+  total: number;
+  percent: number;
+}
+
+export interface ReportExportResult {
+  key: string; // Key of the finished file in private storage
+  rows: number;
+}
+
+interface ReportExportCleanupData {
+  key: string;
+}
+
+export interface ReportExportStatus {
+  id: string;
+  state: string;
+  progress: ReportExportProgress | null;
+  result: ReportExportResult | null;
+  error: string | null;
+  data: ReportExportJobData;
+}
+
+export interface ReportExportQueueOptions {
+  dir: string; // Scratch space for exports before they are uploaded
+  concurrency?: number;
+  batchSize?: number;
+}
+
+const QUEUE_NAME = 'report-export';
+const CLEANUP_JOB = 'cleanup';
+const STORAGE_PREFIX = 'exports';
+
+// Finished exports are kept for a day, failed ones for a week
+const KEEP_COMPLETED_SECONDS = 24 * 60 * 60;
+const KEEP_FAILED_SECONDS = 7 * 24 * 60 * 60;
+
+/**
+ * Background report exports: each job streams one report to a scratch
+ * file, uploads it to private storage under an unguessable key so any
+ * instance can serve it through the admin download route, and reports
+ * rows written as job progress. The stored file is deleted when the job
+ * record expires.
+ */
+export class ReportExportQueue {
+  private queue: Queue<ReportExportJobData | ReportExportCleanupData, ReportExportResult | null>;
+  private worker: Worker<ReportExportJobData | ReportExportCleanupData, ReportExportResult | null>;
+  private exporter: ReportExportService;
+  private options: ReportExportQueueOptions;
+
+  constructor(prisma: PrismaClient, redis: Redis, queueRedis: Redis, options: ReportExportQueueOptions) {
+    this.options = options;
+    this.exporter = new ReportExportService(prisma, redis);
+
+    this.queue = new Queue(QUEUE_NAME, {
+      connection: queueRedis,
+      defaultJobOptions: {
+        attempts: 1,
+        removeOnComplete: { age: KEEP_COMPLETED_SECONDS },
+        removeOnFail: { age: KEEP_FAILED_SECONDS }
+      }
+    });
+
+    this.worker = new Worker(QUEUE_NAME, async (job: Job<ReportExportJobData | ReportExportCleanupData, ReportExportResult | null>) => {
+      if (job.name === CLEANUP_JOB) {
+        await deleteFromS3((job.data as ReportExportCleanupData).key, { private: true }).catch(() => undefined);
+        return null;
+      }
+      return this.processExportJob(job as Job<ReportExportJobData, ReportExportResult>);
+    }, {
+      connection: queueRedis,
+      concurrency: options.concurrency ?? 2
+    });
+
+    this.setupEventListeners();
+  }
+
+  async enqueue(data: ReportExportJobData): Promise<string> {
+    const job = await this.queue.add('export', data);
+    return job.id!;
+  }
+
+  async getStatus(jobId: string): Promise<ReportExportStatus | null> {
+    const job = await this.queue.getJob(jobId) as Job<ReportExportJobData, ReportExportResult> | undefined;
+    if (!job || job.name === CLEANUP_JOB) {
+      return null;
+    }
+
+    const progress = job.progress && typeof job.progress === 'object'
+      ? job.progress as ReportExportProgress
+      : null;
+
+    return {
+      id: job.id!,
+      state: await job.getState(),
+      progress,
+      result: job.returnvalue || null,
+      error: job.failedReason || null,
+      data: job.data
+    };
+  }
+
+  private async processExportJob(job: Job<ReportExportJobData, ReportExportResult>): Promise<ReportExportResult> {
+    const { type, format, startDate, endDate } = job.data;
+    const range = { startDate: new Date(startDate), endDate: new Date(endDate) };
+
+    await mkdir(this.options.dir, { recursive: true });
+    const name = `${type}-${job.id}.${format}`;
+    const partial = join(this.options.dir, `${name}.part`);
+    // Job ids are sequential; the key must not be
+    const key = `${STORAGE_PREFIX}/${nanoid(32)}/${name}`;
+
+    const total = await this.exporter.count(type, range);
+    await job.updateProgress({ rows: 0, total, percent: 0 });
+
+    try {
+      const rows = await this.exporter.exportTo(type, format, range, createWriteStream(partial), {
+        batchSize: this.options.batchSize,
+        onProgress: rows => job.updateProgress({
+          rows,
+          total,
+          percent: total > 0 ? Math.min(Math.round((rows / total) * 100), 100) : 100
+        })
+      });
+
+      // Only complete files are ever uploaded
+      await uploadLocalFileToS3(partial, key, EXPORT_CONTENT_TYPES[format], { private: true });
+      await this.scheduleCleanup(job.id!, key);
+      await job.updateProgress({ rows, total: Math.max(total, rows), percent: 100 });
+
+      logger.info({ jobId: job.id, type, format, rows }, 'Report export completed');
+      return { key, rows };
+    } catch (error) {
+      logger.error({ jobId: job.id, type, format, error }, 'Report export failed');
+      throw error;
+    } finally {
+      await rm(partial, { force: true });
+    }
+  }
+
+  // Delete the stored file once the completed job record has expired
+  private async scheduleCleanup(jobId: string, key: string): Promise<void> {
+    await this.queue.add(CLEANUP_JOB, { key }, {
+      jobId: `${CLEANUP_JOB}-${jobId}`,
+      delay: KEEP_COMPLETED_SECONDS * 1000,
+      attempts: 3,
+      backoff: { type: 'exponential', delay: 60000 },
+      removeOnComplete: true
+    });
+  }
+
+  private setupEventListeners() {
+    this.worker.on('failed', (job, error) => {
+      logger.error({ jobId: job?.id, error }, 'Report export job failed');
+    });
+  }
+
+  async close() {
+    await this.worker.close();
+    await this.queue.close();
+  }
+}
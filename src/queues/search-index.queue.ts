@@ -0,0 +1,145 @@
+import { Queue, Worker, Job } from 'bullmq';
+import { PrismaClient } from '@prisma/client';
+import { Redis } from 'ioredis';
+import type { Client } from 'typesense';
+import { logger } from '../utils/logger';
+import { DrainResult, SearchIndexLag, SearchIndexService, SearchIndexStats } from '../services/search-index.service';
+
+export interface SearchIndexQueueOptions {
+  batchSize?: number;
+  debounce?: number; // Milliseconds to gather changes before draining
+  sweepInterval?: number; // Milliseconds between safety drains
+  attempts?: number; // Tries per drain, with exponential backoff
+  warmup?: () => Promise<number>; // Re-computes hot searches; returns queries warmed
+}
+
+const QUEUE_NAME = 'search-index';
+
+// A single job id: notifications that arrive while one is queued fold into it
+const DRAIN_JOB_ID = 'drain';
+const WARMUP_JOB_ID = 'warmup';
+
+/**
+ * Runs search outbox drains on a BullMQ queue. Writers call notify() after
+ * committing; a periodic sweep catches anything whose notification was lost.
+ * The same queue runs search cache warmups, after a deploy or a reindex.
+ */
+export class SearchIndexQueue {
+  private queue: Queue<Record<string, never>, DrainResult | null>;
+  private worker: Worker<Record<string, never>, DrainResult | null>;
+  private indexer: SearchIndexService;
+  private debounce: number;
+  private attempts: number;
+  private warmupFn?: () => Promise<number>;
+
+  constructor(prisma: PrismaClient, queueRedis: Redis, client: Client, options: SearchIndexQueueOptions = {}) {
+    this.indexer = new SearchIndexService(prisma, client, { batchSize: options.batchSize });
+    this.debounce = options.debounce ?? 250;
+    this.attempts = options.attempts ?? 8;
+    this.warmupFn = options.warmup;
+
+    this.queue = new Queue(QUEUE_NAME, {
+      connection: queueRedis,
+      defaultJobOptions: {
+        removeOnComplete: true,
+        removeOnFail: true
+      }
+    });
+
+    // One drain at a time across every instance, so an older read of a
+    // document can never be imported after a newer one
+    this.queue.setGlobalConcurrency(1).catch(error => {
+      logger.error({ error }, 'Failed to limit search index concurrency');
+    });
+
+    this.worker = new Worker(QUEUE_NAME, async (job: Job<Record<string, never>, DrainResult | null>) => {
+      if (job.name === WARMUP_JOB_ID) {
+        const warmed = await this.warmupFn?.();
+        logger.info({ jobId: job.id, warmed }, 'Search cache warmup finished');
+        return null;
+      }
+
+      const result = await this.indexer.drain();
+      if (result.failed.length > 0) {
+        throw new Error(`Search indexing failed for: ${result.failed.join(', ')}`);
+      }
+      return result;
+    }, {
+      connection: queueRedis,
+      concurrency: 1
+    });
+
+    this.queue.add('sweep', {}, {
+      repeat: { every: options.sweepInterval ?? 30000 },
+      jobId: 'sweep'
+    }).catch(error => {
+      logger.error({ error }, 'Failed to schedule search index sweep');
+    });
+
+    this.setupEventListeners();
+  }
+
+  /**
+   * Ask for a drain soon. Never throws: the change is already in the outbox.
+   */
+  async notify(): Promise<void> {
+    try {
+      await this.queue.add('drain', {}, {
+        jobId: DRAIN_JOB_ID,
+        delay: this.debounce,
+        attempts: this.attempts,
+        backoff: { type: 'exponential', delay: 1000 }
+      });
+    } catch (error) {
+      logger.warn({ error }, 'Failed to queue search index drain, the sweep will pick it up');
+    }
+  }
+
+  /**
+   * Queue a search cache warmup; one is enough however many are requested
+   */
+  async warmup(): Promise<void> {
+    try {
+      await this.queue.add(WARMUP_JOB_ID, {}, { jobId: WARMUP_JOB_ID });
+    } catch (error) {
+      logger.warn({ error }, 'Failed to queue search cache warmup');
+    }
+  }
+
+  /**
+   * Queue a warmup from outside the app, e.g. from a reindex script
+   */
+  static async requestWarmup(queueRedis: Redis): Promise<void> {
+    const queue = new Queue(QUEUE_NAME, { connection: queueRedis });
+    try {
+      await queue.add(WARMUP_JOB_ID, {}, { jobId: WARMUP_JOB_ID, removeOnComplete: true, removeOnFail: true });
+    } finally {
+      await queue.close();
+    }
+  }
+
+  getLag(): Promise<SearchIndexLag> {
+    return this.indexer.getLag();
+  }
+
+  getStats(): SearchIndexStats {
+    return this.indexer.getStats();
+  }
+
+  private setupEventListeners() {
+    this.worker.on('completed', (job, result) => {
+      if (result && (result.upserted > 0 || result.deleted > 0)) {
+        logger.debug({ jobId: job.id, ...result }, 'Search index drained');
+      }
+    });
+
+    this.worker.on('failed', (job, error) => {
+      logger.error({ jobId: job?.id, attempt: job?.attemptsMade, error }, 'Search index drain failed');
+    });
+  }
+
+  async close() {
+    await this.worker.close();
+    await this.queue.close();
+  }
+}
@@ -1,6 +1,9 @@
 import { PrismaClient, Prisma } from '@prisma/client';
 import { Redis } from 'ioredis';
 import { Logger } from 'pino';
+import { createHash } from 'crypto';
+import { tagKey, addToTagSets, deleteTagSets } from '../utils/cache';
+import { TotalsMode, findPage } from '../utils/pagination';
 
 export interface FindOptions {
   where?: any;
@@ -19,6 +22,8 @@ export type MergeWhereOptions = FindOptionsWithoutWhere & { where?: any };
 export interface BatchOptions {
   batchSize?: number;
   onBatch?: (items: any[]) => Promise<void>;
+  select?: any; // Must include id when set; the cursor is keyed on it
+  include?: any;
 }
 
 export abstract class BaseRepository<T, CreateInput, UpdateInput> {
@@ -77,7 +82,7 @@ export abstract class BaseRepository<T, CreateInput, UpdateInput> {
 
   // Find by ID
   async findById(id: string, options?: Omit<FindOptions, 'where'>): Promise<T | null> {
-    const cacheKey = `${this.cachePrefix}:${id}`;
+    const cacheKey = this.entityCacheKey(id, options);
     
     try {
       // Check cache first
@@ -92,7 +97,10 @@ export abstract class BaseRepository<T, CreateInput, UpdateInput> {
       });
 
       if (result) {
-        await this.redis.setex(cacheKey, this.cacheTTL, JSON.stringify(result));
+        const pipeline = this.redis.pipeline();
+        pipeline.setex(cacheKey, this.cacheTTL, JSON.stringify(result));
+        addToTagSets(pipeline, [this.modelTag(), this.entityTag(id)], cacheKey, this.cacheTTL);
+        await pipeline.exec();
       }
 
       return result;
@@ -102,6 +110,55 @@ export abstract class BaseRepository<T, CreateInput, UpdateInput> {
     }
   }
 
+  // Find by IDs: one MGET, one findMany for the misses, one pipeline to back-fill.
+  // Results follow the order of ids, with null for ids that do not exist.
+  async findByIds(ids: string[], options?: Omit<FindOptions, 'where'>): Promise<(T | null)[]> {
+    if (ids.length === 0) {
+      return [];
+    }
+
+    const uniqueIds = [...new Set(ids)];
+    const cacheKeys = uniqueIds.map(id => this.entityCacheKey(id, options));
+    const found = new Map<string, T>();
+
+    try {
+      const cached = await this.redis.mget(...cacheKeys);
+      const missIds = uniqueIds.filter((id, i) => {
+        const value = cached[i];
+        if (value) {
+          found.set(id, JSON.parse(value));
+          return false;
+        }
+        return true;
+      });
+
+      if (missIds.length > 0) {
+        // The id is needed to match rows back to keys
+        const query = options?.select ? { ...options, select: { ...options.select, id: true } } : options;
+        const results: any[] = await (this.prisma as any)[this.modelName].findMany({
+          ...query,
+          where: { id: { in: missIds } }
+        });
+
+        if (results.length > 0) {
+          const pipeline = this.redis.pipeline();
+          for (const result of results) {
+            const cacheKey = this.entityCacheKey(result.id, options);
+            pipeline.setex(cacheKey, this.cacheTTL, JSON.stringify(result));
+            addToTagSets(pipeline, [this.modelTag(), this.entityTag(result.id)], cacheKey, this.cacheTTL);
+            found.set(result.id, result);
+          }
+          await pipeline.exec();
+        }
+      }
+
+      return ids.map(id => found.get(id) ?? null);
+    } catch (error) {
+      this.logger.error({ error, modelName: this.modelName, count: ids.length }, 'Find by IDs failed');
+      throw error;
+    }
+  }
+
   // Find unique
   async findUnique(where: any, options?: Omit<FindOptions, 'where'>): Promise<T | null> {
     try {
@@ -139,32 +196,32 @@ export abstract class BaseRepository<T, CreateInput, UpdateInput> {
   async findWithPagination(
     page: number = 1,
     limit: number = 20,
-    options?: FindOptions
+    options?: FindOptions,
+    totals: TotalsMode = 'exact'
   ): Promise<{
     data: T[];
-    total: number;
+    total: number | null;
     page: number;
-    totalPages: number;
+    totalPages: number | null;
+    hasMore: boolean;
+    estimated: boolean;
   }> {
     try {
       const skip = (page - 1) * limit;
       
-      const [data, total] = await Promise.all([
-        (this.prisma as any)[this.modelName].findMany({
-          ...options,
-          skip,
-          take: limit
-        }),
-        (this.prisma as any)[this.modelName].count({
-          where: options?.where
-        })
-      ]);
+      const { items, total, hasMore, estimated } = await findPage<T>(this.prisma, this.modelName, {
+        ...options,
+        skip,
+        take: limit
+      }, totals);
 
       return {
-        data,
+        data: items,
         total,
         page,
-        totalPages: Math.ceil(total / limit)
+        totalPages: total === null ? null : Math.ceil(total / limit),
+        hasMore,
+        estimated
       };
     } catch (error) {
       this.logger.error({ error, modelName: this.modelName }, 'Find with pagination failed');
@@ -307,6 +364,8 @@ export abstract class BaseRepository<T, CreateInput, UpdateInput> {
   }> {
     try {
       const results = await (this.prisma as any)[this.modelName].findMany({
+        // Cursor pages are only stable over a total order
+        orderBy: { id: 'asc' },
         ...options,
         take: limit + 1,
         ...(cursor && {
@@ -315,10 +374,11 @@ export abstract class BaseRepository<T, CreateInput, UpdateInput> {
         })
       });
 
+      // The extra row only signals another page; the cursor is the last row returned
       let nextCursor = null;
       if (results.length > limit) {
-        const nextItem = results.pop();
-        nextCursor = nextItem.id;
+        results.pop();
+        nextCursor = results[results.length - 1].id;
       }
 
       return {
@@ -336,28 +396,15 @@ export abstract class BaseRepository<T, CreateInput, UpdateInput> {
     where: any,
     batchOptions: BatchOptions
   ): Promise<number> {
-    const { batchSize = 100, onBatch } = batchOptions;
+    const { onBatch } = batchOptions;
     let processed = 0;
-    let cursor: string | undefined;
 
     try {
-      while (true) {
-        const { data, nextCursor } = await this.findManyWithCursor(
-          cursor,
-          batchSize,
-          { where }
-        );
-
-        if (data.length === 0) break;
-
+      for await (const data of this.iterateBatches(where, batchOptions)) {
         if (onBatch) {
           await onBatch(data);
         }
-
         processed += data.length;
-        cursor = nextCursor || undefined;
-
-        if (!nextCursor) break;
       }
 
       return processed;
@@ -367,6 +414,32 @@ export abstract class BaseRepository<T, CreateInput, UpdateInput> {
     }
   }
 
+  /**
+   * Keyset-paginated batches in id order. The next batch is only read once
+   * the consumer asks for it, so memory stays at one batch.
+   */
+  async *iterateBatches(
+    where: any,
+    batchOptions: Omit<BatchOptions, 'onBatch'> = {}
+  ): AsyncGenerator<T[]> {
+    const { batchSize = 100, select, include } = batchOptions;
+    let cursor: string | undefined;
+
+    while (true) {
+      const { data, nextCursor } = await this.findManyWithCursor(
+        cursor,
+        batchSize,
+        { where, ...(select && { select }), ...(include && { include }) }
+      );
+
+      if (data.length > 0) {
+        yield data;
+      }
+      if (!nextCursor) break;
+      cursor = nextCursor;
+    }
+  }
+
   // Transaction wrapper
   async transaction<R>(
     fn: (tx: Omit<PrismaClient, "$connect" | "$disconnect" | "$on" | "$transaction" | "$use" | "$extends">) => Promise<R>
@@ -379,17 +452,35 @@ export abstract class BaseRepository<T, CreateInput, UpdateInput> {
     }
   }
 
+  // Cache key for an entity; include/select variants get their own key
+  protected entityCacheKey(id: string, options?: Omit<FindOptions, 'where'>): string {
+    if (!options || Object.keys(options).length === 0) {
+      return `${this.cachePrefix}:${id}`;
+    }
+    const variant = createHash('sha1').update(JSON.stringify(options)).digest('hex').substring(0, 12);
+    return `${this.cachePrefix}:${id}:${variant}`;
+  }
+
+  // Tag set holding every cached key of this model
+  protected modelTag(): string {
+    return tagKey(this.cachePrefix);
+  }
+
+  // Tag set holding every cached variant of one entity
+  protected entityTag(id: string): string {
+    return tagKey(`${this.cachePrefix}:${id}`);
+  }
+
   // Cache invalidation
   protected async invalidateCache(id?: string): Promise<void> {
     try {
       if (id) {
-        await this.redis.del(`${this.cachePrefix}:${id}`);
+        await deleteTagSets(this.redis, [this.entityTag(id)]);
+        // Entries written before tagging existed
+        await this.redis.unlink(`${this.cachePrefix}:${id}`);
       } else {
         // Invalidate all cache for this model
-        const keys = await this.redis.keys(`${this.cachePrefix}:*`);
-        if (keys.length > 0) {
-          await this.redis.del(...keys);
-        }
+        await deleteTagSets(this.redis, [this.modelTag()]);
       }
     } catch (error) {
       this.logger.warn({ error, modelName: this.modelName }, 'Cache invalidation failed');
@@ -103,18 +103,124 @@ export class CategoryRepository extends BaseRepository<
     });
   }
 
-  async getFullPath(categoryId: string): Promise<Category[]> {
-    const path: Category[] = [];
-    let currentId: string | null = categoryId;
+  // Drop the cached row after a write made outside this repository
+  async invalidate(categoryId: string): Promise<void> {
+    await this.invalidateCache(categoryId);
+  }
+
+  // Closure table maintenance - call inside the transaction that changes parentId
+
+  async insertClosure(
+    categoryId: string,
+    parentId: string | null,
+    tx: Prisma.TransactionClient = this.prisma
+  ): Promise<void> {
+    await tx.$executeRaw`
+      INSERT INTO "category_closure" ("ancestorId", "descendantId", "depth")
+      SELECT ${categoryId}, ${categoryId}, 0
+      UNION ALL
+      SELECT "ancestorId", ${categoryId}, "depth" + 1
+      FROM "category_closure"
+      WHERE "descendantId" = ${parentId}
+    `;
+  }
+
+  async moveClosure(
+    categoryId: string,
+    newParentId: string | null,
+    tx: Prisma.TransactionClient = this.prisma
+  ): Promise<void> {
+    // Detach the subtree from its old ancestors, keeping links inside it
+    await tx.$executeRaw`
+      DELETE FROM "category_closure" link
+      USING "category_closure" sub
+      WHERE sub."ancestorId" = ${categoryId}
+        AND link."descendantId" = sub."descendantId"
+        AND link."ancestorId" NOT IN (
+          SELECT "descendantId" FROM "category_closure" WHERE "ancestorId" = ${categoryId}
+        )
+    `;
+
+    if (newParentId) {
+      // Link every node of the subtree to every ancestor of the new parent
+      await tx.$executeRaw`
+        INSERT INTO "category_closure" ("ancestorId", "descendantId", "depth")
+        SELECT anc."ancestorId", sub."descendantId", anc."depth" + sub."depth" + 1
+        FROM "category_closure" anc
+        CROSS JOIN "category_closure" sub
+        WHERE anc."descendantId" = ${newParentId}
+          AND sub."ancestorId" = ${categoryId}
+      `;
+    }
+  }
+
+  // Recompute the closure table from parentId, e.g. after a bulk import
+  async rebuildClosure(): Promise<number> {
+    return this.prisma.$transaction(async (tx) => {
+      await tx.$executeRaw`DELETE FROM "category_closure"`;
+      return tx.$executeRaw`
+        WITH RECURSIVE tree AS (
+          SELECT "id" AS "ancestorId", "id" AS "descendantId", 0 AS "depth" FROM "categories"
+          UNION ALL
+          SELECT tree."ancestorId", c."id", tree."depth" + 1
+          FROM tree
+          JOIN "categories" c ON c."parentId" = tree."descendantId"
+          WHERE tree."depth" < 64
+        )
+        INSERT INTO "category_closure" ("ancestorId", "descendantId", "depth")
+        SELECT "ancestorId", "descendantId", "depth" FROM tree
+        ON CONFLICT DO NOTHING
+      `;
+    });
+  }
+
+  // Backfill on startup for databases created before the closure table
+  async ensureClosure(): Promise<number> {
+    const [links, categories] = await Promise.all([
+      this.prisma.categoryClosure.count(),
+      this.prisma.category.count()
+    ]);
+    if (links > 0 || categories === 0) return 0;
+    return this.rebuildClosure();
+  }
 
-    while (currentId) {
-      const category = await this.findById(currentId);
-      if (!category) break;
-      
-      path.unshift(category);
-      currentId = category.parentId;
+  async isAncestor(ancestorId: string, categoryId: string): Promise<boolean> {
+    const links = await this.prisma.categoryClosure.findMany({
+      where: {
+        descendantId: categoryId,
+        ancestorId: { in: [ancestorId, categoryId] }
+      },
+      select: { ancestorId: true }
+    });
+    if (links.some(link => link.ancestorId === ancestorId)) return true;
+    // Every category links to itself, so no self link means the closure
+    // has not been built for it yet; walk parentId instead
+    if (links.length > 0) return false;
+    return this.isAncestorByParent(ancestorId, categoryId);
+  }
+
+  private async isAncestorByParent(ancestorId: string, categoryId: string): Promise<boolean> {
+    const seen = new Set<string>();
+    let currentId: string | null = categoryId;
+    while (currentId && !seen.has(currentId)) {
+      if (currentId === ancestorId) return true;
+      seen.add(currentId);
+      const current: { parentId: string | null } | null = await this.prisma.category.findUnique({
+        where: { id: currentId },
+        select: { parentId: true }
+      });
+      currentId = current?.parentId ?? null;
     }
+    return false;
+  }
 
-    return path;
+  // Number of ancestors; 0 for a root category
+  async getDepth(categoryId: string): Promise<number> {
+    const deepest = await this.prisma.categoryClosure.findFirst({
+      where: { descendantId: categoryId },
+      select: { depth: true },
+      orderBy: { depth: 'desc' }
+    });
+    return deepest?.depth ?? 0;
   }
 }
\ No newline at end of file
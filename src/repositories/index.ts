@@ -1,4 +1,6 @@
-// Export all repositories
+// Export all repositories. Loading this barrel loads every repository, so
+// application code imports repository modules directly (or uses
+// app.repositories); this is for scripts and tooling only.
 export * from './user.repository';
 export * from './product.repository';
 export * from './order.repository';
@@ -82,3 +84,7 @@ export * from './stock-locations.repository';
 export * from './inventory-reservations.repository';
 export * from './low-stock-alerts.repository';
 export * from './audit-log.repository';
+
+// Lazy, memoized access to every repository (generated)
+export { RepositoryRegistry, getRepositoryRegistry } from './registry';
+export type { RepositoryMap, RepositoryName } from './registry';
@@ -5,6 +5,17 @@ import { PrismaClient } from '@prisma/client';
 import { Redis } from 'ioredis';
 import { Logger } from 'pino';
 
+export interface CategoryProductStats {
+  categoryId: string;
+  productCount: number;
+  activeCount: number;
+  outOfStockCount: number;
+  recentCount: number;
+  priceSum: number;
+  minPrice: number | null;
+  maxPrice: number | null;
+}
+
 export class ProductRepository extends BaseRepository<
   Product,
   Prisma.ProductCreateInput,
@@ -100,6 +111,43 @@ export class ProductRepository extends BaseRepository<
     return this.update(productId, { searchScore: score } as any);
   }
 
+  // Per-category product counts and price stats in one grouped scan
+  async aggregateByCategory(categoryIds: string[], recentSince: Date): Promise<CategoryProductStats[]> {
+    if (categoryIds.length === 0) {
+      return [];
+    }
+
+    return this.prisma.$queryRaw<CategoryProductStats[]>`
+      SELECT
+        "categoryId",
+        COUNT(*)::int AS "productCount",
+        COUNT(*) FILTER (WHERE "status" = 'PUBLISHED')::int AS "activeCount",
+        COUNT(*) FILTER (WHERE "quantity" = 0)::int AS "outOfStockCount",
+        COUNT(*) FILTER (WHERE "createdAt" >= ${recentSince})::int AS "recentCount",
+        COALESCE(SUM("price"), 0)::float8 AS "priceSum",
+        MIN("price")::float8 AS "minPrice",
+        MAX("price")::float8 AS "maxPrice"
+      FROM "products"
+      WHERE "categoryId" = ANY(${categoryIds}::text[])
+      GROUP BY "categoryId"
+    `;
+  }
+
+  async findTopByOrders(categoryIds: string[], take: number = 10) {
+    return this.prisma.product.findMany({
+      where: { categoryId: { in: categoryIds } },
+      select: {
+        id: true,
+        name: true,
+        price: true,
+        viewCount: true,
+        _count: { select: { orderItems: true } }
+      },
+      orderBy: { orderItems: { _count: 'desc' } },
+      take
+    });
+  }
+
   async incrementView(productId: string): Promise<Product> {
     const product = await this.findById(productId);
     if (!product) throw new Error('Product not found');
@@ -0,0 +1,1095 @@
+// Auto-generated by scripts/generate-repository-registry.ts - do not edit.
+// Run "npm run generate:repository-registry" after adding or removing a repository.
+/* eslint-disable @typescript-eslint/no-var-requires */
+import { PrismaClient } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { Logger } from 'pino';
+import type { AbTestAssignmentRepository } from './ab-test-assignment.repository';
+import type { AbTestRepository } from './ab-test.repository';
+import type { AbandonedBrowseRepository } from './abandoned-browse.repository';
+import type { AbandonedCheckoutRepository } from './abandoned-checkout.repository';
+import type { AccountDeletionRepository } from './account-deletion.repository';
+import type { AddressRepository } from './address.repository';
+import type { AffiliateClickRepository } from './affiliate-click.repository';
+import type { AffiliateRepository } from './affiliate.repository';
+import type { AnalyticsEventRepository } from './analytics-event.repository';
+import type { AnalyticsRepository } from './analytics.repository';
+import type { ApiKeyRepository } from './api-key.repository';
+import type { ApiRequestLogRepository } from './api-request-log.repository';
+import type { AppInstallationRepository } from './app-installation.repository';
+import type { AuditLogRepository } from './audit-log.repository';
+import type { BackupRepository } from './backup.repository';
+import type { BannedItemRepository } from './banned-item.repository';
+import type { BlockedEmailRepository } from './blocked-email.repository';
+import type { BlockedIpRepository } from './blocked-ip.repository';
+import type { BlogCategoryRepository } from './blog-category.repository';
+import type { BlogPostRepository } from './blog-post.repository';
+import type { BrandRepository } from './brand.repository';
+import type { BundleItemRepository } from './bundle-item.repository';
+import type { CartAbandonmentRepository } from './cart-abandonment.repository';
+import type { CartItemRepository } from './cart-item.repository';
+import type { CartRepository } from './cart.repository';
+import type { CategoryRepository } from './category.repository';
+import type { CollectionProductRepository } from './collection-product.repository';
+import type { CommissionRepository } from './commission.repository';
+import type { ComparisonListRepository } from './comparison-list.repository';
+import type { ContentRepository } from './content.repository';
+import type { ConversationRepository } from './conversation.repository';
+import type { CouponUseRepository } from './coupon-use.repository';
+import type { CouponRepository } from './coupon.repository';
+import type { CurrencyExchangeRateRepository } from './currency-exchange-rate.repository';
+import type { CustomerGroupMemberRepository } from './customer-group-member.repository';
+import type { CustomerGroupRepository } from './customer-group.repository';
+import type { CustomsDeclarationRepository } from './customs-declaration.repository';
+import type { DashboardWidgetRepository } from './dashboard-widget.repository';
+import type { DataExportRepository } from './data-export.repository';
+import type { EmailTemplateRepository } from './email-template.repository';
+import type { EventRepository } from './event.repository';
+import type { FaqRepository } from './faq.repository';
+import type { FeatureFlagRepository } from './feature-flag.repository';
+import type { FileUploadRepository } from './file-upload.repository';
+import type { FlashSaleItemRepository } from './flash-sale-item.repository';
+import type { FlashSaleRepository } from './flash-sale.repository';
+import type { FraudAlertRepository } from './fraud-alert.repository';
+import type { FraudCheckRepository } from './fraud-check.repository';
+import type { FraudRuleRepository } from './fraud-rule.repository';
+import type { GeolocationRepository } from './geolocation.repository';
+import type { GiftCardRepository } from './gift-card.repository';
+import type { InventoryItemsRepository } from './inventory-items.repository';
+import type { InventoryLogRepository } from './inventory-log.repository';
+import type { InventoryMovementsRepository } from './inventory-movements.repository';
+import type { InventoryReservationsRepository } from './inventory-reservations.repository';
+import type { JobQueueRepository } from './job-queue.repository';
+import type { LanguageRepository } from './language.repository';
+import type { LiveStreamRepository } from './live-stream.repository';
+import type { LowStockAlertsRepository } from './low-stock-alerts.repository';
+import type { LoyaltyPointsRepository } from './loyalty-points.repository';
+import type { MarketingCampaignRepository } from './marketing-campaign.repository';
+import type { MembershipRepository } from './membership.repository';
+import type { MenuItemRepository } from './menu-item.repository';
+import type { MenuRepository } from './menu.repository';
+import type { MessageRepository } from './message.repository';
+import type { NewsletterSubscriberRepository } from './newsletter-subscriber.repository';
+import type { NotificationPreferenceRepository } from './notification-preference.repository';
+import type { NotificationRepository } from './notification.repository';
+import type { OrderHistoryRepository } from './order-history.repository';
+import type { OrderItemRepository } from './order-item.repository';
+import type { OrderRepository } from './order.repository';
+import type { PageRepository } from './page.repository';
+import type { PartnerRepository } from './partner.repository';
+import type { PaymentLogRepository } from './payment-log.repository';
+import type { PaymentRepository } from './payment.repository';
+import type { PayoutRepository } from './payout.repository';
+import type { PickupLocationRepository } from './pickup-location.repository';
+import type { PlatformAnalyticsRepository } from './platform-analytics.repository';
+import type { PriceHistoryRepository } from './price-history.repository';
+import type { PriceRuleRepository } from './price-rule.repository';
+import type { ProductAlertRepository } from './product-alert.repository';
+import type { ProductAnalyticsRepository } from './product-analytics.repository';
+import type { ProductAttributeRepository } from './product-attribute.repository';
+import type { ProductBundleRepository } from './product-bundle.repository';
+import type { ProductCollectionRepository } from './product-collection.repository';
+import type { ProductImageRepository } from './product-image.repository';
+import type { ProductImportRepository } from './product-import.repository';
+import type { ProductQuestionRepository } from './product-question.repository';
+import type { ProductRecommendationRepository } from './product-recommendation.repository';
+import type { ProductTagRepository } from './product-tag.repository';
+import type { ProductVariantRepository } from './product-variant.repository';
+import type { ProductViewRepository } from './product-view.repository';
+import type { ProductRepository } from './product.repository';
+import type { PromotionRepository } from './promotion.repository';
+import type { PurchaseOrderRepository } from './purchase-order.repository';
+import type { QuickOrderRepository } from './quick-order.repository';
+import type { RedirectRepository } from './redirect.repository';
+import type { ReferralRepository } from './referral.repository';
+import type { RefundRepository } from './refund.repository';
+import type { ReportRepository } from './report.repository';
+import type { ReturnRequestRepository } from './return-request.repository';
+import type { ReviewResponseRepository } from './review-response.repository';
+import type { ReviewVoteRepository } from './review-vote.repository';
+import type { ReviewRepository } from './review.repository';
+import type { ScriptTagRepository } from './script-tag.repository';
+import type { SearchLogRepository } from './search-log.repository';
+import type { SecurityLogRepository } from './security-log.repository';
+import type { SellerAnalyticsRepository } from './seller-analytics.repository';
+import type { SellerBadgeAssignmentRepository } from './seller-badge-assignment.repository';
+import type { SellerBadgeRepository } from './seller-badge.repository';
+import type { SellerDocumentRepository } from './seller-document.repository';
+import type { SellerOrderRepository } from './seller-order.repository';
+import type { SellerReviewRepository } from './seller-review.repository';
+import type { SellerRepository } from './seller.repository';
+import type { SeoMetadataRepository } from './seo-metadata.repository';
+import type { SessionRepository } from './session.repository';
+import type { ShipmentRepository } from './shipment.repository';
+import type { ShippingClassRepository } from './shipping-class.repository';
+import type { ShippingZoneMethodRepository } from './shipping-zone-method.repository';
+import type { ShippingZoneRepository } from './shipping-zone.repository';
+import type { SmsTemplateRepository } from './sms-template.repository';
+import type { SocialMediaLinkRepository } from './social-media-link.repository';
+import type { StockLocationsRepository } from './stock-locations.repository';
+import type { StockTransferRepository } from './stock-transfer.repository';
+import type { StoreCreditRepository } from './store-credit.repository';
+import type { StoreLocationRepository } from './store-location.repository';
+import type { StoreSettingRepository } from './store-setting.repository';
+import type { SubscriptionRepository } from './subscription.repository';
+import type { SupportTicketRepository } from './support-ticket.repository';
+import type { SurveyResponseRepository } from './survey-response.repository';
+import type { SurveyRepository } from './survey.repository';
+import type { SystemHealthRepository } from './system-health.repository';
+import type { TaxRuleRepository } from './tax-rule.repository';
+import type { TestimonialRepository } from './testimonial.repository';
+import type { ThemeRepository } from './theme.repository';
+import type { TicketMessageRepository } from './ticket-message.repository';
+import type { TranslationRepository } from './translation.repository';
+import type { UserActivityLogRepository } from './user-activity-log.repository';
+import type { UserAnalyticsRepository } from './user-analytics.repository';
+import type { UserConsentRepository } from './user-consent.repository';
+import type { UserSearchPreferenceRepository } from './user-search-preference.repository';
+import type { UserRepository } from './user.repository';
+import type { VendorRepository } from './vendor.repository';
+import type { WalletTransactionRepository } from './wallet-transaction.repository';
+import type { WalletRepository } from './wallet.repository';
+import type { WebhookLogRepository } from './webhook-log.repository';
+import type { WebhookRepository } from './webhook.repository';
+import type { WishlistRepository } from './wishlist.repository';
+
+type RepositoryConstructor<R> = new (prisma: PrismaClient, redis: Redis, logger: Logger) => R;
+
+export interface RepositoryMap {
+  abTestAssignment: AbTestAssignmentRepository;
+  abTest: AbTestRepository;
+  abandonedBrowse: AbandonedBrowseRepository;
+  abandonedCheckout: AbandonedCheckoutRepository;
+  accountDeletion: AccountDeletionRepository;
+  address: AddressRepository;
+  affiliateClick: AffiliateClickRepository;
+  affiliate: AffiliateRepository;
+  analyticsEvent: AnalyticsEventRepository;
+  analytics: AnalyticsRepository;
+  apiKey: ApiKeyRepository;
+  apiRequestLog: ApiRequestLogRepository;
+  appInstallation: AppInstallationRepository;
+  auditLog: AuditLogRepository;
+  backup: BackupRepository;
+  bannedItem: BannedItemRepository;
+  blockedEmail: BlockedEmailRepository;
+  blockedIp: BlockedIpRepository;
+  blogCategory: BlogCategoryRepository;
+  blogPost: BlogPostRepository;
+  brand: BrandRepository;
+  bundleItem: BundleItemRepository;
+  cartAbandonment: CartAbandonmentRepository;
+  cartItem: CartItemRepository;
+  cart: CartRepository;
+  category: CategoryRepository;
+  collectionProduct: CollectionProductRepository;
+  commission: CommissionRepository;
+  comparisonList: ComparisonListRepository;
+  content: ContentRepository;
+  conversation: ConversationRepository;
+  couponUse: CouponUseRepository;
+  coupon: CouponRepository;
+  currencyExchangeRate: CurrencyExchangeRateRepository;
+  customerGroupMember: CustomerGroupMemberRepository;
+  customerGroup: CustomerGroupRepository;
+  customsDeclaration: CustomsDeclarationRepository;
+  dashboardWidget: DashboardWidgetRepository;
+  dataExport: DataExportRepository;
+  emailTemplate: EmailTemplateRepository;
+  event: EventRepository;
+  faq: FaqRepository;
+  featureFlag: FeatureFlagRepository;
+  fileUpload: FileUploadRepository;
+  flashSaleItem: FlashSaleItemRepository;
+  flashSale: FlashSaleRepository;
+  fraudAlert: FraudAlertRepository;
+  fraudCheck: FraudCheckRepository;
+  fraudRule: FraudRuleRepository;
+  geolocation: GeolocationRepository;
+  giftCard: GiftCardRepository;
+  inventoryItems: InventoryItemsRepository;
+  inventoryLog: InventoryLogRepository;
+  inventoryMovements: InventoryMovementsRepository;
+  inventoryReservations: InventoryReservationsRepository;
+  jobQueue: JobQueueRepository;
+  language: LanguageRepository;
+  liveStream: LiveStreamRepository;
+  lowStockAlerts: LowStockAlertsRepository;
+  loyaltyPoints: LoyaltyPointsRepository;
+  marketingCampaign: MarketingCampaignRepository;
+  membership: MembershipRepository;
+  menuItem: MenuItemRepository;
+  menu: MenuRepository;
+  message: MessageRepository;
+  newsletterSubscriber: NewsletterSubscriberRepository;
+  notificationPreference: NotificationPreferenceRepository;
+  notification: NotificationRepository;
+  orderHistory: OrderHistoryRepository;
+  orderItem: OrderItemRepository;
+  order: OrderRepository;
+  page: PageRepository;
+  partner: PartnerRepository;
+  paymentLog: PaymentLogRepository;
+  payment: PaymentRepository;
+  payout: PayoutRepository;
+  pickupLocation: PickupLocationRepository;
+  platformAnalytics: PlatformAnalyticsRepository;
+  priceHistory: PriceHistoryRepository;
+  priceRule: PriceRuleRepository;
+  productAlert: ProductAlertRepository;
+  productAnalytics: ProductAnalyticsRepository;
+  productAttribute: ProductAttributeRepository;
+  productBundle: ProductBundleRepository;
+  productCollection: ProductCollectionRepository;
+  productImage: ProductImageRepository;
+  productImport: ProductImportRepository;
+  productQuestion: ProductQuestionRepository;
+  productRecommendation: ProductRecommendationRepository;
+  productTag: ProductTagRepository;
+  productVariant: ProductVariantRepository;
+  productView: ProductViewRepository;
+  product: ProductRepository;
+  promotion: PromotionRepository;
+  purchaseOrder: PurchaseOrderRepository;
+  quickOrder: QuickOrderRepository;
+  redirect: RedirectRepository;
+  referral: ReferralRepository;
+  refund: RefundRepository;
+  report: ReportRepository;
+  returnRequest: ReturnRequestRepository;
+  reviewResponse: ReviewResponseRepository;
+  reviewVote: ReviewVoteRepository;
+  review: ReviewRepository;
+  scriptTag: ScriptTagRepository;
+  searchLog: SearchLogRepository;
+  securityLog: SecurityLogRepository;
+  sellerAnalytics: SellerAnalyticsRepository;
+  sellerBadgeAssignment: SellerBadgeAssignmentRepository;
+  sellerBadge: SellerBadgeRepository;
+  sellerDocument: SellerDocumentRepository;
+  sellerOrder: SellerOrderRepository;
+  sellerReview: SellerReviewRepository;
+  seller: SellerRepository;
+  seoMetadata: SeoMetadataRepository;
+  session: SessionRepository;
+  shipment: ShipmentRepository;
+  shippingClass: ShippingClassRepository;
+  shippingZoneMethod: ShippingZoneMethodRepository;
+  shippingZone: ShippingZoneRepository;
+  smsTemplate: SmsTemplateRepository;
+  socialMediaLink: SocialMediaLinkRepository;
+  stockLocations: StockLocationsRepository;
+  stockTransfer: StockTransferRepository;
+  storeCredit: StoreCreditRepository;
+  storeLocation: StoreLocationRepository;
+  storeSetting: StoreSettingRepository;
+  subscription: SubscriptionRepository;
+  supportTicket: SupportTicketRepository;
+  surveyResponse: SurveyResponseRepository;
+  survey: SurveyRepository;
+  systemHealth: SystemHealthRepository;
+  taxRule: TaxRuleRepository;
+  testimonial: TestimonialRepository;
+  theme: ThemeRepository;
+  ticketMessage: TicketMessageRepository;
+  translation: TranslationRepository;
+  userActivityLog: UserActivityLogRepository;
+  userAnalytics: UserAnalyticsRepository;
+  userConsent: UserConsentRepository;
+  userSearchPreference: UserSearchPreferenceRepository;
+  user: UserRepository;
+  vendor: VendorRepository;
+  walletTransaction: WalletTransactionRepository;
+  wallet: WalletRepository;
+  webhookLog: WebhookLogRepository;
+  webhook: WebhookRepository;
+  wishlist: WishlistRepository;
+}
+
+// Repository modules are required on first access only; type imports above are erased
+const loaders: { [K in keyof RepositoryMap]: () => RepositoryConstructor<RepositoryMap[K]> } = {
+  abTestAssignment: () => require('./ab-test-assignment.repository').AbTestAssignmentRepository,
+  abTest: () => require('./ab-test.repository').AbTestRepository,
+  abandonedBrowse: () => require('./abandoned-browse.repository').AbandonedBrowseRepository,
+  abandonedCheckout: () => require('./abandoned-checkout.repository').AbandonedCheckoutRepository,
+  accountDeletion: () => require('./account-deletion.repository').AccountDeletionRepository,
+  address: () => require('./address.repository').AddressRepository,
+  affiliateClick: () => require('./affiliate-click.repository').AffiliateClickRepository,
+  affiliate: () => require('./affiliate.repository').AffiliateRepository,
+  analyticsEvent: () => require('./analytics-event.repository').AnalyticsEventRepository,
+  analytics: () => require('./analytics.repository').AnalyticsRepository,
+  apiKey: () => require('./api-key.repository').ApiKeyRepository,
+  apiRequestLog: () => require('./api-request-log.repository').ApiRequestLogRepository,
+  appInstallation: () => require('./app-installation.repository').AppInstallationRepository,
+  auditLog: () => require('./audit-log.repository').AuditLogRepository,
+  backup: () => require('./backup.repository').BackupRepository,
+  bannedItem: () => require('./banned-item.repository').BannedItemRepository,
+  blockedEmail: () => require('./blocked-email.repository').BlockedEmailRepository,
+  blockedIp: () => require('./blocked-ip.repository').BlockedIpRepository,
+  blogCategory: () => require('./blog-category.repository').BlogCategoryRepository,
+  blogPost: () => require('./blog-post.repository').BlogPostRepository,
+  brand: () => require('./brand.repository').BrandRepository,
+  bundleItem: () => require('./bundle-item.repository').BundleItemRepository,
+  cartAbandonment: () => require('./cart-abandonment.repository').CartAbandonmentRepository,
+  cartItem: () => require('./cart-item.repository').CartItemRepository,
+  cart: () => require('./cart.repository').CartRepository,
+  category: () => require('./category.repository').CategoryRepository,
+  collectionProduct: () => require('./collection-product.repository').CollectionProductRepository,
+  commission: () => require('./commission.repository').CommissionRepository,
+  comparisonList: () => require('./comparison-list.repository').ComparisonListRepository,
+  content: () => require('./content.repository').ContentRepository,
+  conversation: () => require('./conversation.repository').ConversationRepository,
+  couponUse: () => require('./coupon-use.repository').CouponUseRepository,
+  coupon: () => require('./coupon.repository').CouponRepository,
+  currencyExchangeRate: () => require('./currency-exchange-rate.repository').CurrencyExchangeRateRepository,
+  customerGroupMember: () => require('./customer-group-member.repository').CustomerGroupMemberRepository,
+  customerGroup: () => require('./customer-group.repository').CustomerGroupRepository,
+  customsDeclaration: () => require('./customs-declaration.repository').CustomsDeclarationRepository,
+  dashboardWidget: () => require('./dashboard-widget.repository').DashboardWidgetRepository,
+  dataExport: () => require('./data-export.repository').DataExportRepository,
+  emailTemplate: () => require('./email-template.repository').EmailTemplateRepository,
+  event: () => require('./event.repository').EventRepository,
+  faq: () => require('./faq.repository').FaqRepository,
+  featureFlag: () => require('./feature-flag.repository').FeatureFlagRepository,
+  fileUpload: () => require('./file-upload.repository').FileUploadRepository,
+  flashSaleItem: () => require('./flash-sale-item.repository').FlashSaleItemRepository,
+  flashSale: () => require('./flash-sale.repository').FlashSaleRepository,
+  fraudAlert: () => require('./fraud-alert.repository').FraudAlertRepository,
+  fraudCheck: () => require('./fraud-check.repository').FraudCheckRepository,
+  fraudRule: () => require('./fraud-rule.repository').FraudRuleRepository,
+  geolocation: () => require('./geolocation.repository').GeolocationRepository,
+  giftCard: () => require('./gift-card.repository').GiftCardRepository,
+  inventoryItems: () => require('./inventory-items.repository').InventoryItemsRepository,
+  inventoryLog: () => require('./inventory-log.repository').InventoryLogRepository,
+  inventoryMovements: () => require('./inventory-movements.repository').InventoryMovementsRepository,
+  inventoryReservations: () => require('./inventory-reservations.repository').InventoryReservationsRepository,
+  jobQueue: () => require('./job-queue.repository').JobQueueRepository,
+  language: () => require('./language.repository').LanguageRepository,
+  liveStream: () => require('./live-stream.repository').LiveStreamRepository,
+  lowStockAlerts: () => require('./low-stock-alerts.repository').LowStockAlertsRepository,
+  loyaltyPoints: () => require('./loyalty-points.repository').LoyaltyPointsRepository,
+  marketingCampaign: () => require('./marketing-campaign.repository').MarketingCampaignRepository,
+  membership: () => require('./membership.repository').MembershipRepository,
+  menuItem: () => require('./menu-item.repository').MenuItemRepository,
+  menu: () => require('./menu.repository').MenuRepository,
+  message: () => require('./message.repository').MessageRepository,
+  newsletterSubscriber: () => require('./newsletter-subscriber.repository').NewsletterSubscriberRepository,
+  notificationPreference: () => require('./notification-preference.repository').NotificationPreferenceRepository,
+  notification: () => require('./notification.repository').NotificationRepository,
+  orderHistory: () => require('./order-history.repository').OrderHistoryRepository,
+  orderItem: () => require('./order-item.repository').OrderItemRepository,
+  order: () => require('./order.repository').OrderRepository,
+  page: () => require('./page.repository').PageRepository,
+  partner: () => require('./partner.repository').PartnerRepository,
+  paymentLog: () => require('./payment-log.repository').PaymentLogRepository,
+  payment: () => require('./payment.repository').PaymentRepository,
+  payout: () => require('./payout.repository').PayoutRepository,
+  pickupLocation: () => require('./pickup-location.repository').PickupLocationRepository,
+  platformAnalytics: () => require('./platform-analytics.repository').PlatformAnalyticsRepository,
+  priceHistory: () => require('./price-history.repository').PriceHistoryRepository,
+  priceRule: () => require('./price-rule.repository').PriceRuleRepository,
+  productAlert: () => require('./product-alert.repository').ProductAlertRepository,
+  productAnalytics: () => require('./product-analytics.repository').ProductAnalyticsRepository,
+  productAttribute: () => require('./product-attribute.repository').ProductAttributeRepository,
+  productBundle: () => require('./product-bundle.repository').ProductBundleRepository,
+  productCollection: () => require('./product-collection.repository').ProductCollectionRepository,
+  productImage: () => require('./product-image.repository').ProductImageRepository,
+  productImport: () => require('./product-import.repository').ProductImportRepository,
+  productQuestion: () => require('./product-question.repository').ProductQuestionRepository,
+  productRecommendation: () => require('./product-recommendation.repository').ProductRecommendationRepository,
+  productTag: () => require('./product-tag.repository').ProductTagRepository,
+  productVariant: () => require('./product-variant.repository').ProductVariantRepository,
+  productView: () => require('./product-view.repository').ProductViewRepository,
+  product: () => require('./product.repository').ProductRepository,
+  promotion: () => require('./promotion.repository').PromotionRepository,
+  purchaseOrder: () => require('./purchase-order.repository').PurchaseOrderRepository,
+  quickOrder: () => require('./quick-order.repository').QuickOrderRepository,
+  redirect: () => require('./redirect.repository').RedirectRepository,
+  referral: () => require('./referral.repository').ReferralRepository,
+  refund: () => require('./refund.repository').RefundRepository,
+  report: () => require('./report.repository').ReportRepository,
+  returnRequest: () => require('./return-request.repository').ReturnRequestRepository,
+  reviewResponse: () => require('./review-response.repository').ReviewResponseRepository,
+  reviewVote: () => require('./review-vote.repository').ReviewVoteRepository,
+  review: () => require('./review.repository').ReviewRepository,
+  scriptTag: () => require('./script-tag.repository').ScriptTagRepository,
+  searchLog: () => require('./search-log.repository').SearchLogRepository,
+  securityLog: () => require('./security-log.repository').SecurityLogRepository,
+  sellerAnalytics: () => require('./seller-analytics.repository').SellerAnalyticsRepository,
+  sellerBadgeAssignment: () => require('./seller-badge-assignment.repository').SellerBadgeAssignmentRepository,
+  sellerBadge: () => require('./seller-badge.repository').SellerBadgeRepository,
+  sellerDocument: () => require('./seller-document.repository').SellerDocumentRepository,
+  sellerOrder: () => require('./seller-order.repository').SellerOrderRepository,
+  sellerReview: () => require('./seller-review.repository').SellerReviewRepository,
+  seller: () => require('./seller.repository').SellerRepository,
+  seoMetadata: () => require('./seo-metadata.repository').SeoMetadataRepository,
+  session: () => require('./session.repository').SessionRepository,
+  shipment: () => require('./shipment.repository').ShipmentRepository,
+  shippingClass: () => require('./shipping-class.repository').ShippingClassRepository,
+  shippingZoneMethod: () => require('./shipping-zone-method.repository').ShippingZoneMethodRepository,
+  shippingZone: () => require('./shipping-zone.repository').ShippingZoneRepository,
+  smsTemplate: () => require('./sms-template.repository').SmsTemplateRepository,
+  socialMediaLink: () => require('./social-media-link.repository').SocialMediaLinkRepository,
+  stockLocations: () => require('./stock-locations.repository').StockLocationsRepository,
+  stockTransfer: () => require('./stock-transfer.repository').StockTransferRepository,
+  storeCredit: () => require('./store-credit.repository').StoreCreditRepository,
+  storeLocation: () => require('./store-location.repository').StoreLocationRepository,
+  storeSetting: () => require('./store-setting.repository').StoreSettingRepository,
+  subscription: () => require('./subscription.repository').SubscriptionRepository,
+  supportTicket: () => require('./support-ticket.repository').SupportTicketRepository,
+  surveyResponse: () => require('./survey-response.repository').SurveyResponseRepository,
+  survey: () => require('./survey.repository').SurveyRepository,
+  systemHealth: () => require('./system-health.repository').SystemHealthRepository,
+  taxRule: () => require('./tax-rule.repository').TaxRuleRepository,
+  testimonial: () => require('./testimonial.repository').TestimonialRepository,
+  theme: () => require('./theme.repository').ThemeRepository,
+  ticketMessage: () => require('./ticket-message.repository').TicketMessageRepository,
+  translation: () => require('./translation.repository').TranslationRepository,
+  userActivityLog: () => require('./user-activity-log.repository').UserActivityLogRepository,
+  userAnalytics: () => require('./user-analytics.repository').UserAnalyticsRepository,
+  userConsent: () => require('./user-consent.repository').UserConsentRepository,
+  userSearchPreference: () => require('./user-search-preference.repository').UserSearchPreferenceRepository,
+  user: () => require('./user.repository').UserRepository,
+  vendor: () => require('./vendor.repository').VendorRepository,
+  walletTransaction: () => require('./wallet-transaction.repository').WalletTransactionRepository,
+  wallet: () => require('./wallet.repository').WalletRepository,
+  webhookLog: () => require('./webhook-log.repository').WebhookLogRepository,
+  webhook: () => require('./webhook.repository').WebhookRepository,
+  wishlist: () => require('./wishlist.repository').WishlistRepository,
+};
+
+export type RepositoryName = keyof RepositoryMap;
+
+export class RepositoryRegistry {
+  private instances: Partial<RepositoryMap> = {};
+
+  constructor(
+    private readonly prisma: PrismaClient,
+    private readonly redis: Redis,
+    private readonly logger: Logger
+  ) {}
+
+  // Load the repository module and construct it once per registry
+  get<K extends RepositoryName>(name: K): RepositoryMap[K] {
+    let instance = this.instances[name];
+    if (!instance) {
+      const Repository = loaders[name]();
+      instance = new Repository(this.prisma, this.redis, this.logger);
+      this.instances[name] = instance;
+    }
+    return instance as RepositoryMap[K];
+  }
+
+  // Names of the repositories constructed so far
+  loaded(): RepositoryName[] {
+    return Object.keys(this.instances) as RepositoryName[];
+  }
+
+  get abTestAssignment(): AbTestAssignmentRepository {
+    return this.get('abTestAssignment');
+  }
+
+  get abTest(): AbTestRepository {
+    return this.get('abTest');
+  }
+
+  get abandonedBrowse(): AbandonedBrowseRepository {
+    return this.get('abandonedBrowse');
+  }
+
+  get abandonedCheckout(): AbandonedCheckoutRepository {
+    return this.get('abandonedCheckout');
+  }
+
+  get accountDeletion(): AccountDeletionRepository {
+    return this.get('accountDeletion');
+  }
+
+  get address(): AddressRepository {
+    return this.get('address');
+  }
+
+  get affiliateClick(): AffiliateClickRepository {
+    return this.get('affiliateClick');
+  }
+
+  get affiliate(): AffiliateRepository {
+    return this.get('affiliate');
+  }
+
+  get analyticsEvent(): AnalyticsEventRepository {
+    return this.get('analyticsEvent');
+  }
+
+  get analytics(): AnalyticsRepository {
+    return this.get('analytics');
+  }
+
+  get apiKey(): ApiKeyRepository {
+    return this.get('apiKey');
+  }
+
+  get apiRequestLog(): ApiRequestLogRepository {
+    return this.get('apiRequestLog');
+  }
+
+  get appInstallation(): AppInstallationRepository {
+    return this.get('appInstallation');
+  }
+
+  get auditLog(): AuditLogRepository {
+    return this.get('auditLog');
+  }
+
+  get backup(): BackupRepository {
+    return this.get('backup');
+  }
+
+  get bannedItem(): BannedItemRepository {
+    return this.get('bannedItem');
+  }
+
+  get blockedEmail(): BlockedEmailRepository {
+    return this.get('blockedEmail');
+  }
+
+  get blockedIp(): BlockedIpRepository {
+    return this.get('blockedIp');
+  }
+
+  get blogCategory(): BlogCategoryRepository {
+    return this.get('blogCategory');
+  }
+
+  get blogPost(): BlogPostRepository {
+    return this.get('blogPost');
+  }
+
+  get brand(): BrandRepository {
+    return this.get('brand');
+  }
+
+  get bundleItem(): BundleItemRepository {
+    return this.get('bundleItem');
+  }
+
+  get cartAbandonment(): CartAbandonmentRepository {
+    return this.get('cartAbandonment');
+  }
+
+  get cartItem(): CartItemRepository {
+    return this.get('cartItem');
+  }
+
+  get cart(): CartRepository {
+    return this.get('cart');
+  }
+
+  get category(): CategoryRepository {
+    return this.get('category');
+  }
+
+  get collectionProduct(): CollectionProductRepository {
+    return this.get('collectionProduct');
+  }
+
+  get commission(): CommissionRepository {
+    return this.get('commission');
+  }
+
+  get comparisonList(): ComparisonListRepository {
+    return this.get('comparisonList');
+  }
+
+  get content(): ContentRepository {
+    return this.get('content');
+  }
+
+  get conversation(): ConversationRepository {
+    return this.get('conversation');
+  }
+
+  get couponUse(): CouponUseRepository {
+    return this.get('couponUse');
+  }
+
+  get coupon(): CouponRepository {
+    return this.get('coupon');
+  }
+
+  get currencyExchangeRate(): CurrencyExchangeRateRepository {
+    return this.get('currencyExchangeRate');
+  }
+
+  get customerGroupMember(): CustomerGroupMemberRepository {
+    return this.get('customerGroupMember');
+  }
+
+  get customerGroup(): CustomerGroupRepository {
+    return this.get('customerGroup');
+  }
+
+  get customsDeclaration(): CustomsDeclarationRepository {
+    return this.get('customsDeclaration');
+  }
+
+  get dashboardWidget(): DashboardWidgetRepository {
+    return this.get('dashboardWidget');
+  }
+
+  get dataExport(): DataExportRepository {
+    return this.get('dataExport');
+  }
+
+  get emailTemplate(): EmailTemplateRepository {
+    return this.get('emailTemplate');
+  }
+
+  get event(): EventRepository {
+    return this.get('event');
+  }
+
+  get faq(): FaqRepository {
+    return this.get('faq');
+  }
+
+  get featureFlag(): FeatureFlagRepository {
+    return this.get('featureFlag');
+  }
+
+  get fileUpload(): FileUploadRepository {
+    return this.get('fileUpload');
+  }
+
+  get flashSaleItem(): FlashSaleItemRepository {
+    return this.get('flashSaleItem');
+  }
+
+  get flashSale(): FlashSaleRepository {
+    return this.get('flashSale');
+  }
+
+  get fraudAlert(): FraudAlertRepository {
+    return this.get('fraudAlert');
+  }
+
+  get fraudCheck(): FraudCheckRepository {
+    return this.get('fraudCheck');
+  }
+
+  get fraudRule(): FraudRuleRepository {
+    return this.get('fraudRule');
+  }
+
+  get geolocation(): GeolocationRepository {
+    return this.get('geolocation');
+  }
+
+  get giftCard(): GiftCardRepository {
+    return this.get('giftCard');
+  }
+
+  get inventoryItems(): InventoryItemsRepository {
+    return this.get('inventoryItems');
+  }
+
+  get inventoryLog(): InventoryLogRepository {
+    return this.get('inventoryLog');
+  }
+
+  get inventoryMovements(): InventoryMovementsRepository {
+    return this.get('inventoryMovements');
+  }
+
+  get inventoryReservations(): InventoryReservationsRepository {
+    return this.get('inventoryReservations');
+  }
+
+  get jobQueue(): JobQueueRepository {
+    return this.get('jobQueue');
+  }
+
+  get language(): LanguageRepository {
+    return this.get('language');
+  }
+
+  get liveStream(): LiveStreamRepository {
+    return this.get('liveStream');
+  }
+
+  get lowStockAlerts(): LowStockAlertsRepository {
+    return this.get('lowStockAlerts');
+  }
+
+  get loyaltyPoints(): LoyaltyPointsRepository {
+    return this.get('loyaltyPoints');
+  }
+
+  get marketingCampaign(): MarketingCampaignRepository {
+    return this.get('marketingCampaign');
+  }
+
+  get membership(): MembershipRepository {
+    return this.get('membership');
+  }
+
+  get menuItem(): MenuItemRepository {
+    return this.get('menuItem');
+  }
+
+  get menu(): MenuRepository {
+    return this.get('menu');
+  }
+
+  get message(): MessageRepository {
+    return this.get('message');
+  }
+
+  get newsletterSubscriber(): NewsletterSubscriberRepository {
+    return this.get('newsletterSubscriber');
+  }
+
+  get notificationPreference(): NotificationPreferenceRepository {
+    return this.get('notificationPreference');
+  }
+
+  get notification(): NotificationRepository {
+    return this.get('notification');
+  }
+
+  get orderHistory(): OrderHistoryRepository {
+    return this.get('orderHistory');
+  }
+
+  get orderItem(): OrderItemRepository {
+    return this.get('orderItem');
+  }
+
+  get order(): OrderRepository {
+    return this.get('order');
+  }
+
+  get page(): PageRepository {
+    return this.get('page');
+  }
+
+  get partner(): PartnerRepository {
+    return this.get('partner');
+  }
+
+  get paymentLog(): PaymentLogRepository {
+    return this.get('paymentLog');
+  }
+
+  get payment(): PaymentRepository {
+    return this.get('payment');
+  }
+
+  get payout(): PayoutRepository {
+    return this.get('payout');
+  }
+
+  get pickupLocation(): PickupLocationRepository {
+    return this.get('pickupLocation');
+  }
+
+  get platformAnalytics(): PlatformAnalyticsRepository {
+    return this.get('platformAnalytics');
+  }
+
+  get priceHistory(): PriceHistoryRepository {
+    return this.get('priceHistory');
+  }
+
+  get priceRule(): PriceRuleRepository {
+    return this.get('priceRule');
+  }
+
+  get productAlert(): ProductAlertRepository {
+    return this.get('productAlert');
+  }
+
+  get productAnalytics(): ProductAnalyticsRepository {
+    return this.get('productAnalytics');
+  }
+
+  get productAttribute(): ProductAttributeRepository {
+    return this.get('productAttribute');
+  }
+
+  get productBundle(): ProductBundleRepository {
+    return this.get('productBundle');
+  }
+
+  get productCollection(): ProductCollectionRepository {
+    return this.get('productCollection');
+  }
+
+  get productImage(): ProductImageRepository {
+    return this.get('productImage');
+  }
+
+  get productImport(): ProductImportRepository {
+    return this.get('productImport');
+  }
+
+  get productQuestion(): ProductQuestionRepository {
+    return this.get('productQuestion');
+  }
+
+  get productRecommendation(): ProductRecommendationRepository {
+    return this.get('productRecommendation');
+  }
+
+  get productTag(): ProductTagRepository {
+    return this.get('productTag');
+  }
+
+  get productVariant(): ProductVariantRepository {
+    return this.get('productVariant');
+  }
+
+  get productView(): ProductViewRepository {
+    return this.get('productView');
+  }
+
+  get product(): ProductRepository {
+    return this.get('product');
+  }
+
+  get promotion(): PromotionRepository {
+    return this.get('promotion');
+  }
+
+  get purchaseOrder(): PurchaseOrderRepository {
+    return this.get('purchaseOrder');
+  }
+
+  get quickOrder(): QuickOrderRepository {
+    return this.get('quickOrder');
+  }
+
+  get redirect(): RedirectRepository {
+    return this.get('redirect');
+  }
+
+  get referral(): ReferralRepository {
+    return this.get('referral');
+  }
+
+  get refund(): RefundRepository {
+    return this.get('refund');
+  }
+
+  get report(): ReportRepository {
+    return this.get('report');
+  }
+
+  get returnRequest(): ReturnRequestRepository {
+    return this.get('returnRequest');
+  }
+
+  get reviewResponse(): ReviewResponseRepository {
+    return this.get('reviewResponse');
+  }
+
+  get reviewVote(): ReviewVoteRepository {
+    return this.get('reviewVote');
+  }
+
+  get review(): ReviewRepository {
+    return this.get('review');
+  }
+
+  get scriptTag(): ScriptTagRepository {
+    return this.get('scriptTag');
+  }
+
+  get searchLog(): SearchLogRepository {
+    return this.get('searchLog');
+  }
+
+  get securityLog(): SecurityLogRepository {
+    return this.get('securityLog');
+  }
+
+  get sellerAnalytics(): SellerAnalyticsRepository {
+    return this.get('sellerAnalytics');
+  }
+
+  get sellerBadgeAssignment(): SellerBadgeAssignmentRepository {
+    return this.get('sellerBadgeAssignment');
+  }
+
+  get sellerBadge(): SellerBadgeRepository {
+    return this.get('sellerBadge');
+  }
+
+  get sellerDocument(): SellerDocumentRepository {
+    return this.get('sellerDocument');
+  }
+
+  get sellerOrder(): SellerOrderRepository {
+    return this.get('sellerOrder');
+  }
+
+  get sellerReview(): SellerReviewRepository {
+    return this.get('sellerReview');
+  }
+
+  get seller(): SellerRepository {
+    return this.get('seller');
+  }
+
+  get seoMetadata(): SeoMetadataRepository {
+    return this.get('seoMetadata');
+  }
+
+  get session(): SessionRepository {
+    return this.get('session');
+  }
+
+  get shipment(): ShipmentRepository {
+    return this.get('shipment');
+  }
+
+  get shippingClass(): ShippingClassRepository {
+    return this.get('shippingClass');
+  }
+
+  get shippingZoneMethod(): ShippingZoneMethodRepository {
+    return this.get('shippingZoneMethod');
+  }
+
+  get shippingZone(): ShippingZoneRepository {
+    return this.get('shippingZone');
+  }
+
+  get smsTemplate(): SmsTemplateRepository {
+    return this.get('smsTemplate');
+  }
+
+  get socialMediaLink(): SocialMediaLinkRepository {
+    return this.get('socialMediaLink');
+  }
+
+  get stockLocations(): StockLocationsRepository {
+    return this.get('stockLocations');
+  }
+
+  get stockTransfer(): StockTransferRepository {
+    return this.get('stockTransfer');
+  }
+
+  get storeCredit(): StoreCreditRepository {
+    return this.get('storeCredit');
+  }
+
+  get storeLocation(): StoreLocationRepository {
+    return this.get('storeLocation');
+  }
+
+  get storeSetting(): StoreSettingRepository {
+    return this.get('storeSetting');
+  }
+
+  get subscription(): SubscriptionRepository {
+    return this.get('subscription');
+  }
+
+  get supportTicket(): SupportTicketRepository {
+    return this.get('supportTicket');
+  }
+
+  get surveyResponse(): SurveyResponseRepository {
+    return this.get('surveyResponse');
+  }
+
+  get survey(): SurveyRepository {
+    return this.get('survey');
+  }
+
+  get systemHealth(): SystemHealthRepository {
+    return this.get('systemHealth');
+  }
+
+  get taxRule(): TaxRuleRepository {
+    return this.get('taxRule');
+  }
+
+  get testimonial(): TestimonialRepository {
+    return this.get('testimonial');
+  }
+
+  get theme(): ThemeRepository {
+    return this.get('theme');
+  }
+
+  get ticketMessage(): TicketMessageRepository {
+    return this.get('ticketMessage');
+  }
+
+  get translation(): TranslationRepository {
+    return this.get('translation');
+  }
+
+  get userActivityLog(): UserActivityLogRepository {
+    return this.get('userActivityLog');
+  }
+
+  get userAnalytics(): UserAnalyticsRepository {
+    return this.get('userAnalytics');
+  }
+
+  get userConsent(): UserConsentRepository {
+    return this.get('userConsent');
+  }
+
+  get userSearchPreference(): UserSearchPreferenceRepository {
+    return this.get('userSearchPreference');
+  }
+
+  get user(): UserRepository {
+    return this.get('user');
+  }
+
+  get vendor(): VendorRepository {
+    return this.get('vendor');
+  }
+
+  get walletTransaction(): WalletTransactionRepository {
+    return this.get('walletTransaction');
+  }
+
+  get wallet(): WalletRepository {
+    return this.get('wallet');
+  }
+
+  get webhookLog(): WebhookLogRepository {
+    return this.get('webhookLog');
+  }
+
+  get webhook(): WebhookRepository {
+    return this.get('webhook');
+  }
+
+  get wishlist(): WishlistRepository {
+    return this.get('wishlist');
+  }
+}
+
+const registries = new WeakMap<PrismaClient, RepositoryRegistry>();
+
+// One registry per Prisma client, so each process builds each repository once
+export function getRepositoryRegistry(
+  prisma: PrismaClient,
+  redis: Redis,
+  logger: Logger
+): RepositoryRegistry {
+  let registry = registries.get(prisma);
+  if (!registry) {
+    registry = new RepositoryRegistry(prisma, redis, logger);
+    registries.set(prisma, registry);
+  }
+  return registry;
+}
@@ -1,8 +1,11 @@
 import { FastifyInstance, FastifyReply, FastifyRequest } from 'fastify';
-import { AnalyticsService } from '../services/analytics.service';
+import { AnalyticsService, ReportExportOptions } from '../services/analytics.service';
+import { REPORT_TYPES } from '../services/report-export.service';
+import { EXPORT_CONTENT_TYPES, EXPORT_FORMATS } from '../utils/report-export';
 import { authenticate } from '../middleware/auth.middleware';
 import { authorize } from '../middleware/rbac';
 import { logger } from '../utils/logger';
+import { downloadFromS3 } from '../utils/storage';
 
 export default async function analyticsRoutes(fastify: FastifyInstance) {
   const analyticsService = new AnalyticsService(fastify);
@@ -44,6 +47,164 @@ export default async function analyticsRoutes(fastify: FastifyInstance) {
     }
   });
 
+  const exportParamsSchema = {
+    type: 'object',
+    required: ['type'],
+    properties: {
+      type: { type: 'string', enum: REPORT_TYPES }
+    }
+  };
+
+  const exportQuerySchema = {
+    type: 'object',
+    properties: {
+      format: { type: 'string', enum: EXPORT_FORMATS, default: 'csv' },
+      period: { type: 'string', enum: ['daily', 'weekly', 'monthly', 'yearly', 'custom'], default: 'monthly' },
+      startDate: { type: 'string', format: 'date-time' },
+      endDate: { type: 'string', format: 'date-time' }
+    }
+  };
+
+  type ExportRequest = FastifyRequest<{
+    Params: { type: ReportExportOptions['type'] };
+    Querystring: { format: ReportExportOptions['format']; period: ReportExportOptions['period']; startDate?: string; endDate?: string };
+  }>;
+
+  const exportOptions = (request: ExportRequest): ReportExportOptions => {
+    const { format, period, startDate, endDate } = request.query;
+    return {
+      type: request.params.type,
+      format,
+      period,
+      dateRange: startDate && endDate
+        ? { startDate: new Date(startDate), endDate: new Date(endDate) }
+        : undefined
+    };
+  };
+
+  /**
+   * Stream a report export straight to the response
+   */
+  fastify.get('/reports/:type/export', {
+    schema: {
+      description: 'Stream a report as CSV or NDJSON, row by row (requires admin role)',
+      summary: 'Export report',
+      tags: ['PlatformAnalytics'],
+      params: exportParamsSchema,
+      querystring: exportQuerySchema
+    },
+    preHandler: [authenticate, authorize(['ADMIN', 'SUPER_ADMIN'])]
+  }, async (request: ExportRequest, reply: FastifyReply) => {
+    const options = exportOptions(request);
+    const result = await analyticsService.exportReport(options);
+    if (!result.success) {
+      return reply.code(result.error!.statusCode).send({ error: result.error });
+    }
+
+    const stream = result.data!;
+    stream.on('error', error => {
+      logger.error({ error, traceId: request.traceId, reportType: options.type }, 'Report export stream failed');
+    });
+
+    return reply
+      .type(EXPORT_CONTENT_TYPES[options.format])
+      .header('Content-Disposition', `attachment; filename="${options.type}-report.${options.format}"`)
+      .send(stream);
+  });
+
+  /**
+   * Queue a report export to run in the background
+   */
+  fastify.post('/reports/:type/export-jobs', {
+    schema: {
+      description: 'Queue a large report export; poll the job for progress (requires admin role)',
+      summary: 'Queue report export',
+      tags: ['PlatformAnalytics'],
+      params: exportParamsSchema,
+      querystring: exportQuerySchema
+    },
+    preHandler: [authenticate, authorize(['ADMIN', 'SUPER_ADMIN'])]
+  }, async (request: ExportRequest, reply: FastifyReply) => {
+    const result = await analyticsService.startReportExport(exportOptions(request), request.user!.userId);
+    if (!result.success) {
+      return reply.code(result.error!.statusCode).send({ error: result.error });
+    }
+
+    return reply.status(202).send(result);
+  });
+
+  /**
+   * Report export job status and progress
+   */
+  fastify.get<{ Params: { jobId: string } }>('/reports/export-jobs/:jobId', {
+    schema: {
+      description: 'Get the state and progress of a queued report export (requires admin role)',
+      summary: 'Get report export job',
+      tags: ['PlatformAnalytics'],
+      params: {
+        type: 'object',
+        required: ['jobId'],
+        properties: {
+          jobId: { type: 'string' }
+        }
+      }
+    },
+    preHandler: [authenticate, authorize(['ADMIN', 'SUPER_ADMIN'])]
+  }, async (request, reply) => {
+    const result = await analyticsService.getReportExport(request.params.jobId);
+    if (!result.success) {
+      return reply.code(result.error!.statusCode).send({ error: result.error });
+    }
+
+    const { result: output, ...status } = result.data!;
+    return reply.send({ success: true, data: { ...status, rows: output?.rows ?? null } });
+  });
+
+  /**
+   * Download a finished report export
+   */
+  fastify.get<{ Params: { jobId: string } }>('/reports/export-jobs/:jobId/download', {
+    schema: {
+      description: 'Download the file produced by a completed report export (requires admin role)',
+      summary: 'Download report export',
+      tags: ['PlatformAnalytics'],
+      params: {
+        type: 'object',
+        required: ['jobId'],
+        properties: {
+          jobId: { type: 'string' }
+        }
+      }
+    },
+    preHandler: [authenticate, authorize(['ADMIN', 'SUPER_ADMIN'])]
+  }, async (request, reply) => {
+    const result = await analyticsService.getReportExport(request.params.jobId);
+    if (!result.success) {
+      return reply.code(result.error!.statusCode).send({ error: result.error });
+    }
+
+    const status = result.data!;
+    if (status.state !== 'completed' || !status.result) {
+      return reply.status(409).send({
+        success: false,
+        error: { code: 'EXPORT_NOT_READY', message: `Report export is ${status.state}`, statusCode: 409 }
+      });
+    }
+
+    const file = await downloadFromS3(status.result.key, { private: true });
+    if (!file) {
+      return reply.status(410).send({
+        success: false,
+        error: { code: 'EXPORT_EXPIRED', message: 'Report export file has expired', statusCode: 410 }
+      });
+    }
+
+    return reply
+      .type(EXPORT_CONTENT_TYPES[status.data.format])
+      .header('Content-Disposition', `attachment; filename="${status.data.type}-report.${status.data.format}"`)
+      .send(file);
+  });
+
   /**
    * Get analytics by ID
    */
@@ -4,6 +4,10 @@ import {
   updateFlashSaleSchema,
   flashSaleParamsSchema,
   flashSaleQuerySchema,
+  flashSaleItemParamsSchema,
+  flashSaleReservationParamsSchema,
+  reserveFlashSaleItemSchema,
+  commitFlashSaleReservationSchema,
 } from '../schemas/flash-sale.schemas';
 import { FlashSaleService } from '../services/flash-sale.service';
 import { authenticate } from '../middleware/auth.middleware';
@@ -27,6 +31,19 @@ type GetFlashSalesRequest = FastifyRequest<{
   Querystring: z.infer<typeof flashSaleQuerySchema>;
 }>;
 
+type ReserveFlashSaleItemRequest = FastifyRequest<{
+  Body: z.infer<typeof reserveFlashSaleItemSchema>;
+  Params: z.infer<typeof flashSaleItemParamsSchema>;
+}>;
+
+type ReleaseFlashSaleReservationRequest = FastifyRequest<{
+  Params: z.infer<typeof flashSaleReservationParamsSchema>;
+}>;
+
+type CommitFlashSaleReservationRequest = FastifyRequest<{
+  Body: z.infer<typeof commitFlashSaleReservationSchema>;
+  Params: z.infer<typeof flashSaleReservationParamsSchema>;
+}>;
 
 export default async function flashSaleRoutes(fastify: FastifyInstance) {
   const flashSaleService = new FlashSaleService(fastify);
@@ -117,4 +134,83 @@ export default async function flashSaleRoutes(fastify: FastifyInstance) {
       reply.code(204).send();
     }
   );
+
+  // Stock holds are served from Redis; see FlashSaleStockService
+
+  fastify.post(
+    '/:id/items/:itemId/reservations',
+    {
+      preHandler: [authenticate],
+      schema: {
+        params: flashSaleItemParamsSchema,
+        body: reserveFlashSaleItemSchema,
+      },
+    },
+    async (request: ReserveFlashSaleItemRequest, reply) => {
+      const result = await fastify.flashSaleStock.reserve(
+        request.params.id,
+        request.params.itemId,
+        request.user!.userId,
+        request.body.quantity
+      );
+      if (!result.success) {
+        return reply.code(result.error!.statusCode).send({ error: result.error });
+      }
+      return reply.code(201).send(result.data);
+    }
+  );
+
+  fastify.delete(
+    '/:id/items/:itemId/reservations/:reservationId',
+    {
+      preHandler: [authenticate],
+      schema: {
+        params: flashSaleReservationParamsSchema,
+      },
+    },
+    async (request: ReleaseFlashSaleReservationRequest, reply) => {
+      const result = await fastify.flashSaleStock.release(
+        request.params.id,
+        request.params.itemId,
+        request.params.reservationId,
+        request.user!.userId
+      );
+      if (!result.success) {
+        return reply.code(result.error!.statusCode).send({ error: result.error });
+      }
+      return reply.code(204).send();
+    }
+  );
+
+  fastify.post(
+    '/:id/items/:itemId/reservations/:reservationId/commit',
+    {
+      preHandler: [authenticate],
+      schema: {
+        params: flashSaleReservationParamsSchema,
+        body: commitFlashSaleReservationSchema,
+      },
+    },
+    async (request: CommitFlashSaleReservationRequest, reply) => {
+      const order = await fastify.prisma.order.findFirst({
+        where: { id: request.body.orderId, userId: request.user!.userId },
+        select: { id: true }
+      });
+      if (!order) {
+        return reply.code(404).send({ message: 'Order not found' });
+      }
+
+      const result = await fastify.flashSaleStock.commit(
+        request.params.id,
+        request.params.itemId,
+        request.params.reservationId,
+        request.user!.userId,
+        order.id
+      );
+      if (!result.success) {
+        return reply.code(result.error!.statusCode).send({ error: result.error });
+      }
+      return reply.send({ quantity: result.data });
+    }
+  );
 }
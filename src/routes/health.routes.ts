@@ -1,6 +1,9 @@
 import { FastifyInstance, FastifyRequest, FastifyReply } from 'fastify';
 import { HealthService } from '../services/health.service';
 import { logger } from '../utils/logger';
+import { cache } from '../utils/cache';
+import { analyticsIngest } from '../utils/analytics-ingest';
+import { autocomplete } from '../utils/autocomplete';
 
 export async function healthRoutes(
   fastify: FastifyInstance,
@@ -195,6 +198,14 @@ export async function healthRoutes(
   }, async (_request: FastifyRequest, reply: FastifyReply) => {
     try {
       const health = await healthService.getHealth();
+      const localCache = cache.getLocalStats();
+      const codecStats = Object.entries(cache.getCodecStats());
+      const ingest = analyticsIngest.getStats();
+      const searchIndex = fastify.searchIndex.getStats();
+      const searchLag = await fastify.searchIndex.getLag().catch(() => null);
+      const suggestions = autocomplete.getStats();
+      const flashSales = await fastify.flashSaleStock.getStats();
+      const promotions = await fastify.promotionEngine.getStats();
       
       // Convert to Prometheus format
       const metrics = [
@@ -238,7 +249,108 @@ export async function healthRoutes(
         
         `# HELP ordendirecta_disk_usage_percent Disk usage percentage`,
         `# TYPE ordendirecta_disk_usage_percent gauge`,
-        `ordendirecta_disk_usage_percent ${health.system.disk.percentage}`
+        `ordendirecta_disk_usage_percent ${health.system.disk.percentage}`,
+
+        ...(localCache ? [
+          `# HELP ordendirecta_cache_local_requests_total L1 cache lookups by result`,
+          `# TYPE ordendirecta_cache_local_requests_total counter`,
+          `ordendirecta_cache_local_requests_total{result="hit"} ${localCache.hits}`,
+          `ordendirecta_cache_local_requests_total{result="miss"} ${localCache.misses}`,
+          `# HELP ordendirecta_cache_local_evictions_total L1 cache entries evicted for space`,
+          `# TYPE ordendirecta_cache_local_evictions_total counter`,
+          `ordendirecta_cache_local_evictions_total ${localCache.evictions}`,
+          `# HELP ordendirecta_cache_local_entries L1 cache entries`,
+          `# TYPE ordendirecta_cache_local_entries gauge`,
+          `ordendirecta_cache_local_entries ${localCache.entries}`,
+          `# HELP ordendirecta_cache_local_bytes Approximate L1 cache size in bytes`,
+          `# TYPE ordendirecta_cache_local_bytes gauge`,
+          `ordendirecta_cache_local_bytes ${localCache.bytes}`
+        ] : []),
+
+        `# HELP ordendirecta_cache_codec_bytes_total Cache payload bytes by key prefix, before (raw) and after (stored) compression`,
+        `# TYPE ordendirecta_cache_codec_bytes_total counter`,
+        ...codecStats.flatMap(([prefix, s]) => [
+          `ordendirecta_cache_codec_bytes_total{prefix="${prefix}",stage="raw"} ${s.rawBytes}`,
+          `ordendirecta_cache_codec_bytes_total{prefix="${prefix}",stage="stored"} ${s.storedBytes}`
+        ]),
+        `# HELP ordendirecta_cache_codec_operations_total Cache values encoded, decoded and compressed by key prefix`,
+        `# TYPE ordendirecta_cache_codec_operations_total counter`,
+        ...codecStats.flatMap(([prefix, s]) => [
+          `ordendirecta_cache_codec_operations_total{prefix="${prefix}",op="encode"} ${s.encoded}`,
+          `ordendirecta_cache_codec_operations_total{prefix="${prefix}",op="decode"} ${s.decoded}`,
+          `ordendirecta_cache_codec_operations_total{prefix="${prefix}",op="compress"} ${s.compressed}`
+        ]),
+        `# HELP ordendirecta_cache_codec_seconds_total Time spent encoding and decoding cache values by key prefix`,
+        `# TYPE ordendirecta_cache_codec_seconds_total counter`,
+        ...codecStats.flatMap(([prefix, s]) => [
+          `ordendirecta_cache_codec_seconds_total{prefix="${prefix}",op="encode"} ${(s.encodeMs / 1000).toFixed(6)}`,
+          `ordendirecta_cache_codec_seconds_total{prefix="${prefix}",op="decode"} ${(s.decodeMs / 1000).toFixed(6)}`
+        ]),
+
+        `# HELP ordendirecta_analytics_events_total Analytics events by ingestion outcome`,
+        `# TYPE ordendirecta_analytics_events_total counter`,
+        `ordendirecta_analytics_events_total{outcome="accepted"} ${ingest.accepted}`,
+        `ordendirecta_analytics_events_total{outcome="written"} ${ingest.flushed}`,
+        `ordendirecta_analytics_events_total{outcome="shed"} ${ingest.shed}`,
+        `ordendirecta_analytics_events_total{outcome="failed"} ${ingest.failed}`,
+        `# HELP ordendirecta_analytics_events_buffered Analytics events waiting to be written`,
+        `# TYPE ordendirecta_analytics_events_buffered gauge`,
+        `ordendirecta_analytics_events_buffered ${ingest.buffered}`,
+
+        `# HELP ordendirecta_search_index_documents_total Documents written to the search index by operation`,
+        `# TYPE ordendirecta_search_index_documents_total counter`,
+        `ordendirecta_search_index_documents_total{op="upsert"} ${searchIndex.upserted}`,
+        `ordendirecta_search_index_documents_total{op="delete"} ${searchIndex.deleted}`,
+        `# HELP ordendirecta_search_index_failures_total Search index batches that failed and were left for retry`,
+        `# TYPE ordendirecta_search_index_failures_total counter`,
+        `ordendirecta_search_index_failures_total ${searchIndex.failures}`,
+        ...(searchLag ? [
+          `# HELP ordendirecta_search_index_pending Changes in the search outbox not yet indexed`,
+          `# TYPE ordendirecta_search_index_pending gauge`,
+          `ordendirecta_search_index_pending ${searchLag.pending}`,
+          `# HELP ordendirecta_search_index_lag_seconds Age of the oldest change not yet indexed`,
+          `# TYPE ordendirecta_search_index_lag_seconds gauge`,
+          `ordendirecta_search_index_lag_seconds ${searchLag.lagSeconds.toFixed(3)}`
+        ] : []),
+
+        `# HELP ordendirecta_autocomplete_entries Entries in this node's autocomplete index`,
+        `# TYPE ordendirecta_autocomplete_entries gauge`,
+        `ordendirecta_autocomplete_entries ${suggestions.entries}`,
+        `# HELP ordendirecta_autocomplete_deltas Index changes applied on top of the last autocomplete build`,
+        `# TYPE ordendirecta_autocomplete_deltas gauge`,
+        `ordendirecta_autocomplete_deltas ${suggestions.deltas}`,
+        `# HELP ordendirecta_autocomplete_lookups_total Autocomplete lookups served from the index`,
+        `# TYPE ordendirecta_autocomplete_lookups_total counter`,
+        `ordendirecta_autocomplete_lookups_total ${suggestions.lookups}`,
+        `# HELP ordendirecta_autocomplete_fallbacks_total Autocomplete lookups with no match, left to Typesense`,
+        `# TYPE ordendirecta_autocomplete_fallbacks_total counter`,
+        `ordendirecta_autocomplete_fallbacks_total ${suggestions.fallbacks}`,
+
+        `# HELP ordendirecta_flash_sale_reservations_total Flash sale reservations on this node by outcome`,
+        `# TYPE ordendirecta_flash_sale_reservations_total counter`,
+        `ordendirecta_flash_sale_reservations_total{outcome="reserved"} ${flashSales.reserved}`,
+        `ordendirecta_flash_sale_reservations_total{outcome="rejected"} ${flashSales.rejected}`,
+        `ordendirecta_flash_sale_reservations_total{outcome="released"} ${flashSales.released}`,
+        `ordendirecta_flash_sale_reservations_total{outcome="committed"} ${flashSales.committed}`,
+        `ordendirecta_flash_sale_reservations_total{outcome="reconciled"} ${flashSales.reconciled}`,
+        `# HELP ordendirecta_flash_sale_reconcile_backlog Committed flash sale reservations not yet written to Postgres`,
+        `# TYPE ordendirecta_flash_sale_reconcile_backlog gauge`,
+        `ordendirecta_flash_sale_reconcile_backlog ${flashSales.backlog}`,
+
+        `# HELP ordendirecta_promotion_rules Coupons and promotions compiled on this node`,
+        `# TYPE ordendirecta_promotion_rules gauge`,
+        `ordendirecta_promotion_rules{kind="coupon"} ${promotions.coupons}`,
+        `ordendirecta_promotion_rules{kind="promotion"} ${promotions.promotions}`,
+        `# HELP ordendirecta_promotion_evaluations_total Carts evaluated against compiled promotion rules on this node`,
+        `# TYPE ordendirecta_promotion_evaluations_total counter`,
+        `ordendirecta_promotion_evaluations_total ${promotions.evaluations}`,
+        `# HELP ordendirecta_coupon_redemptions_total Coupon redemptions on this node by stage`,
+        `# TYPE ordendirecta_coupon_redemptions_total counter`,
+        `ordendirecta_coupon_redemptions_total{stage="redeemed"} ${promotions.redeemed}`,
+        `ordendirecta_coupon_redemptions_total{stage="synced"} ${promotions.synced}`,
+        `# HELP ordendirecta_coupon_usage_backlog Coupon redemptions not yet written to Postgres`,
+        `# TYPE ordendirecta_coupon_usage_backlog gauge`,
+        `ordendirecta_coupon_usage_backlog ${promotions.backlog}`
       ].filter(line => line).join('\n');
       
       return reply
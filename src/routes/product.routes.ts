@@ -4,6 +4,8 @@ import { authenticate } from '../middleware/auth.middleware';
 import { authorize } from '../middleware/rbac';
 import { jsonSchemas } from '../utils/json-schemas';
 import { logger } from '../utils/logger';
+import { getSearchSuggestions } from '../utils/search';
+import { MAX_SUGGESTIONS } from '../utils/autocomplete';
 
 export async function productRoutes(fastify: FastifyInstance) {
   const productService = new ProductService(fastify);
@@ -83,7 +85,12 @@ export async function productRoutes(fastify: FastifyInstance) {
     }
   }, async (request: FastifyRequest, reply: FastifyReply) => {
     try {
-      const products = await productService.search((request.query as any));
+      const { q, categoryId, ...filters } = request.query as any;
+      const products = await productService.search({
+        ...filters,
+        query: q,
+        categoryIds: categoryId ? [categoryId] : undefined
+      });
       return reply.send(products);
     } catch (error: any) {
       logger.error({ error, traceId: (request as any).traceId }, 'Product search failed');
@@ -91,6 +98,24 @@ export async function productRoutes(fastify: FastifyInstance) {
     }
   });
 
+  /**
+   * Autocomplete suggestions
+   */
+  fastify.get('/suggestions', {
+    schema: {
+      description: 'Autocomplete suggestions for a partial search query', summary: 'Search suggestions', tags: ['Products'], querystring: {
+        type: 'object', required: ['q'], properties: {
+          q: { type: 'string', minLength: 1, maxLength: 100 },
+          limit: { type: 'integer', minimum: 1, maximum: MAX_SUGGESTIONS, default: 5 }
+        }
+      }
+    }
+  }, async (request: FastifyRequest, reply: FastifyReply) => {
+    const { q, limit } = request.query as { q: string; limit: number };
+    const suggestions = await getSearchSuggestions(q, 'products', limit);
+    return reply.send({ suggestions });
+  });
+
   /**
    * Update product
    */
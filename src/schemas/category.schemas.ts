@@ -28,6 +28,7 @@ export const updateCategorySchema = {
   body: z.object({
     name: z.string().optional(),
     description: z.string().optional(),
+    parentId: z.string().nullable().optional(),
   }),
 };
 
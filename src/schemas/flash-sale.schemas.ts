@@ -32,3 +32,20 @@ export const flashSaleQuerySchema = z.object({
   limit: z.number().int().min(1).max(100).optional(),
   search: z.string().optional(),
 });
+
+export const flashSaleItemParamsSchema = z.object({
+  id: z.string(),
+  itemId: z.string(),
+});
+
+export const flashSaleReservationParamsSchema = flashSaleItemParamsSchema.extend({
+  reservationId: z.string(),
+});
+
+export const reserveFlashSaleItemSchema = z.object({
+  quantity: z.number().int().min(1).max(100).default(1),
+});
+
+export const commitFlashSaleReservationSchema = z.object({
+  orderId: z.string(),
+});
@@ -2,7 +2,7 @@ import { Address, Prisma } from '@prisma/client';
 import { ServiceResult, PaginatedResult } from '../types';
 import { ApiError } from '../utils/errors';
 import { logger } from '../utils/logger';
-import { AddressRepository } from '../repositories';
+import { AddressRepository } from '../repositories/address.repository';
 import { cacheGet, cacheSet } from '../config/redis';
 import { nanoid } from 'nanoid';
 
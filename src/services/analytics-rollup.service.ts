@@ -0,0 +1,454 @@
+import { PrismaClient, Prisma } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { logger } from '../utils/logger';
+import { tryLock, unlock } from '../utils/cache';
+
+export type RollupGranularity = 'hour' | 'day';
+export type RollupScope = 'platform' | 'seller' | 'product' | 'category';
+
+// scopeId of the single platform-wide series
+export const PLATFORM_SCOPE_ID = '';
+
+export interface RollupTotals {
+  revenue: number;
+  orders: number;
+  units: number;
+  views: number;
+  cartAdds: number;
+}
+
+export interface RollupPoint extends RollupTotals {
+  bucket: Date;
+}
+
+export interface RollupRank extends RollupTotals {
+  scopeId: string;
+}
+
+export interface RollupWindow {
+  granularity: RollupGranularity;
+  gte?: Date;
+  lt?: Date;
+}
+
+export interface RollupRange {
+  startDate: Date;
+  endDate: Date; // Inclusive, like AnalyticsDateRange
+}
+
+export interface RollupOptions {
+  interval?: number; // Seconds between incremental runs
+  settle?: number; // Seconds a row must age before it is rolled up, so late commits are not skipped
+}
+
+const HOUR_MS = 60 * 60 * 1000;
+const DAY_MS = 24 * HOUR_MS;
+
+// Hours recomputed per transaction during incremental runs and backfills
+const CHUNK_HOURS = 24;
+
+const LOCK_KEY = 'analytics:rollup';
+
+const WATERMARK_ORDERS = 'orders';
+const WATERMARK_EVENTS = 'events';
+
+const floorTo = (time: number, unit: number) => Math.floor(time / unit) * unit;
+const ceilTo = (time: number, unit: number) => Math.ceil(time / unit) * unit;
+
+/**
+ * Buckets covering a range: whole days from the daily rollup and the
+ * ragged ends from the hourly one. No range means all daily buckets.
+ */
+export function rollupWindows(range?: RollupRange): RollupWindow[] {
+  if (!range) {
+    return [{ granularity: 'day' }];
+  }
+
+  const hourFrom = floorTo(range.startDate.getTime(), HOUR_MS);
+  const hourTo = ceilTo(range.endDate.getTime() + 1, HOUR_MS);
+  const dayFrom = ceilTo(hourFrom, DAY_MS);
+  const dayTo = floorTo(hourTo, DAY_MS);
+
+  if (hourFrom >= hourTo) {
+    return [];
+  }
+  if (dayFrom >= dayTo) {
+    return [{ granularity: 'hour', gte: new Date(hourFrom), lt: new Date(hourTo) }];
+  }
+
+  const windows: RollupWindow[] = [];
+  if (hourFrom < dayFrom) {
+    windows.push({ granularity: 'hour', gte: new Date(hourFrom), lt: new Date(dayFrom) });
+  }
+  windows.push({ granularity: 'day', gte: new Date(dayFrom), lt: new Date(dayTo) });
+  if (dayTo < hourTo) {
+    windows.push({ granularity: 'hour', gte: new Date(dayTo), lt: new Date(hourTo) });
+  }
+  return windows;
+}
+
+/**
+ * Collapse sorted bucket starts into contiguous [from, to) spans of at most maxBuckets
+ */
+export function coalesceBuckets(starts: number[], unit: number, maxBuckets: number): Array<{ from: Date; to: Date }> {
+  const sorted = [...new Set(starts)].sort((a, b) => a - b);
+  const spans: Array<{ from: number; to: number }> = [];
+
+  for (const start of sorted) {
+    const last = spans[spans.length - 1];
+    if (last && last.to === start && (last.to - last.from) / unit < maxBuckets) {
+      last.to += unit;
+    } else {
+      spans.push({ from: start, to: start + unit });
+    }
+  }
+
+  return spans.map(span => ({ from: new Date(span.from), to: new Date(span.to) }));
+}
+
+/**
+ * Hourly and daily aggregates per platform, seller, product and category.
+ *
+ * Hours are always recomputed whole from the source tables, so a run is
+ * idempotent and order status changes are picked up by re-rolling the hour
+ * the order was placed in. Orders are tracked by updatedAt and events by
+ * receivedAt, each behind its own watermark, so a late write still re-rolls
+ * the hour it belongs to; days are re-summed from hours.
+ *
+ * Revenue follows the dashboards it replaces: platform revenue is the total
+ * of paid orders, seller/product/category revenue is delivered item value.
+ */
+export class AnalyticsRollupService {
+  private timer: NodeJS.Timeout | null = null;
+  private running: Promise<number> | null = null;
+  private readonly interval: number;
+  private readonly settle: number;
+
+  constructor(
+    private prisma: PrismaClient,
+    private redis: Redis,
+    options: RollupOptions = {}
+  ) {
+    this.interval = options.interval ?? 60;
+    this.settle = options.settle ?? 30;
+  }
+
+  start(): void {
+    if (this.timer) return;
+
+    this.timer = setInterval(() => {
+      this.tick();
+    }, this.interval * 1000);
+    this.timer.unref();
+    this.tick();
+  }
+
+  async stop(): Promise<void> {
+    if (this.timer) {
+      clearInterval(this.timer);
+      this.timer = null;
+    }
+    if (this.running) {
+      await this.running.catch(() => undefined);
+    }
+  }
+
+  /**
+   * Roll up everything that changed since the watermarks. Only one node
+   * runs at a time; returns the number of hours recomputed.
+   */
+  async runIncremental(): Promise<number> {
+    const token = await tryLock(this.redis, LOCK_KEY, this.interval * 2000);
+    if (!token) {
+      return 0;
+    }
+
+    try {
+      const upTo = new Date(Date.now() - this.settle * 1000);
+      const [ordersFrom, eventsFrom] = await Promise.all([
+        this.getWatermark(WATERMARK_ORDERS, upTo),
+        this.getWatermark(WATERMARK_EVENTS, upTo)
+      ]);
+
+      // An order can change status long after it was placed, and an event can be
+      // written long after it was tracked; re-roll the hour either belongs to
+      const [orderHours, eventHours] = await Promise.all([
+        this.prisma.$queryRaw<{ bucket: Date }[]>`
+          SELECT DISTINCT date_trunc('hour', "createdAt") AS bucket
+          FROM "orders"
+          WHERE "updatedAt" > ${ordersFrom} AND "updatedAt" <= ${upTo}
+        `,
+        this.prisma.$queryRaw<{ bucket: Date }[]>`
+          SELECT DISTINCT date_trunc('hour', "createdAt") AS bucket
+          FROM "analytics_events"
+          WHERE "receivedAt" > ${eventsFrom} AND "receivedAt" <= ${upTo}
+        `
+      ]);
+
+      const hours = [...new Set([...orderHours, ...eventHours].map(row => row.bucket.getTime()))];
+      await this.recompute(hours);
+
+      await Promise.all([
+        this.setWatermark(WATERMARK_ORDERS, upTo),
+        this.setWatermark(WATERMARK_EVENTS, upTo)
+      ]);
+
+      if (hours.length > 0) {
+        logger.debug({ hours: hours.length, upTo }, 'Analytics rollups updated');
+      }
+      return hours.length;
+    } finally {
+      await unlock(this.redis, LOCK_KEY, token);
+    }
+  }
+
+  /**
+   * Recompute every hour and day in a historical range. Safe to run
+   * alongside the incremental job; returns the number of hours written.
+   */
+  async backfill(from: Date, to: Date): Promise<number> {
+    const start = floorTo(from.getTime(), HOUR_MS);
+    const end = ceilTo(to.getTime(), HOUR_MS);
+    const hours: number[] = [];
+
+    for (let hour = start; hour < end; hour += HOUR_MS) {
+      hours.push(hour);
+    }
+
+    await this.recompute(hours);
+    logger.info({ from, to, hours: hours.length }, 'Analytics rollups backfilled');
+    return hours.length;
+  }
+
+  async getTotals(scope: RollupScope, scopeId: string, range?: RollupRange): Promise<RollupTotals> {
+    const where = this.whereFor(scope, range);
+    if (!where) {
+      return emptyTotals();
+    }
+
+    const result = await this.prisma.analyticsRollup.aggregate({
+      where: { ...where, scopeId },
+      _sum: { revenue: true, orders: true, units: true, views: true, cartAdds: true }
+    });
+    return toTotals(result._sum);
+  }
+
+  async getSeries(
+    scope: RollupScope,
+    scopeId: string,
+    granularity: RollupGranularity,
+    range: RollupRange
+  ): Promise<RollupPoint[]> {
+    const rows = await this.prisma.analyticsRollup.findMany({
+      where: {
+        granularity,
+        scope,
+        scopeId,
+        bucket: { gte: range.startDate, lte: range.endDate }
+      },
+      orderBy: { bucket: 'asc' }
+    });
+
+    return rows.map(row => ({ bucket: row.bucket, ...toTotals(row) }));
+  }
+
+  /**
+   * Totals per scopeId, best revenue first; optionally limited to some ids
+   */
+  async getTop(
+    scope: RollupScope,
+    range: RollupRange | undefined,
+    take: number,
+    scopeIds?: string[]
+  ): Promise<RollupRank[]> {
+    const where = this.whereFor(scope, range);
+    if (!where || (scopeIds && scopeIds.length === 0)) {
+      return [];
+    }
+
+    const rows = await this.prisma.analyticsRollup.groupBy({
+      by: ['scopeId'],
+      where: scopeIds ? { ...where, scopeId: { in: scopeIds } } : where,
+      _sum: { revenue: true, orders: true, units: true, views: true, cartAdds: true },
+      orderBy: { _sum: { revenue: 'desc' } },
+      take
+    });
+
+    return rows.map(row => ({ scopeId: row.scopeId, ...toTotals(row._sum) }));
+  }
+
+  private tick(): void {
+    if (this.running) return;
+
+    this.running = this.runIncremental()
+      .catch(error => {
+        logger.error({ error }, 'Analytics rollup run failed');
+        return 0;
+      })
+      .finally(() => {
+        this.running = null;
+      });
+  }
+
+  private whereFor(scope: RollupScope, range?: RollupRange): Prisma.AnalyticsRollupWhereInput | null {
+    const windows = rollupWindows(range);
+    if (windows.length === 0) {
+      return null;
+    }
+
+    return {
+      scope,
+      OR: windows.map(window => ({
+        granularity: window.granularity,
+        ...(window.gte || window.lt ? { bucket: { gte: window.gte, lt: window.lt } } : {})
+      }))
+    };
+  }
+
+  private async recompute(hours: number[]): Promise<void> {
+    for (const span of coalesceBuckets(hours, HOUR_MS, CHUNK_HOURS)) {
+      await this.recomputeHours(span.from, span.to);
+    }
+
+    const days = hours.map(hour => floorTo(hour, DAY_MS));
+    for (const span of coalesceBuckets(days, DAY_MS, 1)) {
+      await this.recomputeDays(span.from, span.to);
+    }
+  }
+
+  // Rebuild hourly rows for [from, to) from orders and events
+  private async recomputeHours(from: Date, to: Date): Promise<void> {
+    await this.prisma.$transaction([
+      this.prisma.$executeRaw`
+        DELETE FROM "analytics_rollups"
+        WHERE "granularity" = 'hour' AND "bucket" >= ${from} AND "bucket" < ${to}
+      `,
+      this.prisma.$executeRaw`
+        INSERT INTO "analytics_rollups"
+          ("granularity", "scope", "scopeId", "bucket", "revenue", "orders", "units", "views", "cartAdds", "updatedAt")
+        SELECT 'hour', "scope", "scopeId", "bucket",
+          SUM("revenue"), SUM("orders"), SUM("units"), SUM("views"), SUM("cartAdds"), now()
+        FROM (
+          SELECT 'platform'::text AS "scope", ${PLATFORM_SCOPE_ID}::text AS "scopeId",
+            date_trunc('hour', o."createdAt") AS "bucket",
+            COALESCE(SUM(o."totalAmount") FILTER (WHERE o."paymentStatus" = 'PAID'), 0)::numeric AS "revenue",
+            COUNT(*) AS "orders", 0::bigint AS "units", 0::bigint AS "views", 0::bigint AS "cartAdds"
+          FROM "orders" o
+          WHERE o."createdAt" >= ${from} AND o."createdAt" < ${to}
+          GROUP BY 3
+
+          UNION ALL
+          SELECT 'seller', p."sellerId", date_trunc('hour', o."createdAt"),
+            SUM(oi."price" * oi."quantity"), COUNT(DISTINCT o."id"), SUM(oi."quantity"), 0, 0
+          FROM "order_items" oi
+          JOIN "orders" o ON o."id" = oi."orderId"
+          JOIN "products" p ON p."id" = oi."productId"
+          WHERE o."status" = 'DELIVERED' AND o."createdAt" >= ${from} AND o."createdAt" < ${to}
+          GROUP BY 2, 3
+
+          UNION ALL
+          SELECT 'product', oi."productId", date_trunc('hour', o."createdAt"),
+            SUM(oi."price" * oi."quantity"), COUNT(DISTINCT o."id"), SUM(oi."quantity"), 0, 0
+          FROM "order_items" oi
+          JOIN "orders" o ON o."id" = oi."orderId"
+          WHERE o."status" = 'DELIVERED' AND o."createdAt" >= ${from} AND o."createdAt" < ${to}
+          GROUP BY 2, 3
+
+          UNION ALL
+          SELECT 'category', p."categoryId", date_trunc('hour', o."createdAt"),
+            SUM(oi."price" * oi."quantity"), COUNT(DISTINCT o."id"), SUM(oi."quantity"), 0, 0
+          FROM "order_items" oi
+          JOIN "orders" o ON o."id" = oi."orderId"
+          JOIN "products" p ON p."id" = oi."productId"
+          WHERE o."status" = 'DELIVERED' AND o."createdAt" >= ${from} AND o."createdAt" < ${to}
+          GROUP BY 2, 3
+
+          UNION ALL
+          SELECT s."scope", s."scopeId", date_trunc('hour', e."createdAt"), 0, 0, 0,
+            COUNT(*) FILTER (WHERE e."type" = 'PRODUCT_VIEW'),
+            COUNT(*) FILTER (WHERE e."type" = 'ADD_TO_CART')
+          FROM "analytics_events" e
+          LEFT JOIN "products" p ON p."id" = e."productId"
+          CROSS JOIN LATERAL (VALUES
+            ('platform', ${PLATFORM_SCOPE_ID}::text),
+            ('seller', COALESCE(e."sellerId", p."sellerId")),
+            ('product', e."productId"),
+            ('category', p."categoryId")
+          ) AS s("scope", "scopeId")
+          WHERE e."type" IN ('PRODUCT_VIEW', 'ADD_TO_CART')
+            AND e."createdAt" >= ${from} AND e."createdAt" < ${to}
+            AND s."scopeId" IS NOT NULL
+          GROUP BY 1, 2, 3
+        ) facts
+        GROUP BY "scope", "scopeId", "bucket"
+        ON CONFLICT ("granularity", "scope", "scopeId", "bucket") DO UPDATE SET
+          "revenue" = EXCLUDED."revenue",
+          "orders" = EXCLUDED."orders",
+          "units" = EXCLUDED."units",
+          "views" = EXCLUDED."views",
+          "cartAdds" = EXCLUDED."cartAdds",
+          "updatedAt" = EXCLUDED."updatedAt"
+      `
+    ]);
+  }
+
+  // Re-sum daily rows for [from, to) from the hourly ones
+  private async recomputeDays(from: Date, to: Date): Promise<void> {
+    await this.prisma.$transaction([
+      this.prisma.$executeRaw`
+        DELETE FROM "analytics_rollups"
+        WHERE "granularity" = 'day' AND "bucket" >= ${from} AND "bucket" < ${to}
+      `,
+      this.prisma.$executeRaw`
+        INSERT INTO "analytics_rollups"
+          ("granularity", "scope", "scopeId", "bucket", "revenue", "orders", "units", "views", "cartAdds", "updatedAt")
+        SELECT 'day', "scope", "scopeId", date_trunc('day', "bucket"),
+          SUM("revenue"), SUM("orders"), SUM("units"), SUM("views"), SUM("cartAdds"), now()
+        FROM "analytics_rollups"
+        WHERE "granularity" = 'hour' AND "bucket" >= ${from} AND "bucket" < ${to}
+        GROUP BY 2, 3, 4
+        ON CONFLICT ("granularity", "scope", "scopeId", "bucket") DO UPDATE SET
+          "revenue" = EXCLUDED."revenue",
+          "orders" = EXCLUDED."orders",
+          "units" = EXCLUDED."units",
+          "views" = EXCLUDED."views",
+          "cartAdds" = EXCLUDED."cartAdds",
+          "updatedAt" = EXCLUDED."updatedAt"
+      `
+    ]);
+  }
+
+  // A source seen for the first time starts at today; older history is backfilled explicitly
+  private async getWatermark(source: string, upTo: Date): Promise<Date> {
+    const watermark = await this.prisma.analyticsWatermark.findUnique({ where: { source } });
+    return watermark?.position ?? new Date(floorTo(upTo.getTime(), DAY_MS));
+  }
+
+  private async setWatermark(source: string, position: Date): Promise<void> {
+    await this.prisma.analyticsWatermark.upsert({
+      where: { source },
+      create: { source, position },
+      update: { position }
+    });
+  }
+}
+
+function emptyTotals(): RollupTotals {
+  return { revenue: 0, orders: 0, units: 0, views: 0, cartAdds: 0 };
+}
+
+function toTotals(row: {
+  revenue: Prisma.Decimal | null;
+  orders: number | null;
+  units: number | null;
+  views: number | null;
+  cartAdds: number | null;
+}): RollupTotals {
+  return {
+    revenue: Number(row.revenue || 0),
+    orders: row.orders || 0,
+    units: row.units || 0,
+    views: row.views || 0,
+    cartAdds: row.cartAdds || 0
+  };
+}
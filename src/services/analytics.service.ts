@@ -1,16 +1,18 @@
 import { AnalyticsEvent, Prisma, Currency } from '@prisma/client';
 import { FastifyInstance } from 'fastify';
+import { Readable } from 'stream';
 import { CrudService } from './crud.service';
-import { 
-  AnalyticsEventRepository,
-  OrderRepository,
-  PaymentRepository,
-  UserRepository
-} from "../repositories";
+import { UserRepository } from "../repositories/user.repository";
 import { ServiceResult } from '../types';
 import { cache } from '../utils/cache';
 import { ApiError } from '../utils/errors';
+import { analyticsIngest } from '../utils/analytics-ingest';
 import { OrderStatus } from '../utils/constants';
+import { getCategoryHierarchy } from '../utils/category-hierarchy';
+import { AnalyticsRollupService, PLATFORM_SCOPE_ID } from './analytics-rollup.service';
+import { ReportExportService, ReportType, isReportType } from './report-export.service';
+import { EXPORT_FORMATS, ExportFormat } from '../utils/report-export';
+import { ReportExportStatus } from '../queues/report-export.queue';
 
 interface CreateAnalyticsEventData {
   type: string;
@@ -132,7 +134,7 @@ interface ProductAnalyticsData {
 }
 
 interface ReportOptions {
-  type: 'sales' | 'users' | 'products' | 'sellers' | 'traffic' | 'financial';
+  type: ReportType;
   format: 'json' | 'csv' | 'pdf';
   period: 'daily' | 'weekly' | 'monthly' | 'yearly' | 'custom';
   dateRange?: AnalyticsDateRange;
@@ -141,44 +143,49 @@ interface ReportOptions {
   metrics?: string[];
 }
 
+export interface ReportExportOptions {
+  type: ReportType;
+  format: ExportFormat;
+  period: ReportOptions['period'];
+  dateRange?: AnalyticsDateRange;
+}
+
 export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.AnalyticsEventCreateInput, Prisma.AnalyticsEventUpdateInput> {
   modelName = 'analyticsEvent' as const;
 
-  private analyticsEventRepo: AnalyticsEventRepository;
-  private orderRepo: OrderRepository;
-  private paymentRepo: PaymentRepository;
   private userRepo: UserRepository;
+  private rollups: AnalyticsRollupService;
+  private reportExporter: ReportExportService;
 
   constructor(app: FastifyInstance) {
     super(app);
-    this.analyticsEventRepo = new AnalyticsEventRepository(app.prisma, app.redis, this.logger);
-    this.orderRepo = new OrderRepository(app.prisma, app.redis, this.logger);
-    this.paymentRepo = new PaymentRepository(app.prisma, app.redis, this.logger);
     this.userRepo = new UserRepository(app.prisma, app.redis, this.logger);
+    this.rollups = new AnalyticsRollupService(app.prisma, app.redis);
+    this.reportExporter = new ReportExportService(app.prisma, app.redis);
   }
 
   // Event Tracking
   async trackEvent(data: CreateAnalyticsEventData): Promise<ServiceResult<AnalyticsEvent>> {
     try {
-      const event = await this.analyticsEventRepo.trackEvent({
+      // Buffered and written in batches; aggregate counters are coalesced until the next flush
+      const event = await analyticsIngest.track({
         type: data.type,
         userId: data.userId,
         productId: data.productId,
         sellerId: data.sellerId,
-        data: data.data
+        data: data.data as Prisma.InputJsonValue
       });
 
       if (!event) {
         return {
           success: false,
-          error: new ApiError('Failed to create analytics event', 500)
+          error: new ApiError('Analytics ingestion is overloaded', 503, 'ANALYTICS_OVERLOADED')
         };
       }
 
-      // Process event for real-time analytics updates
-      await this.processEventForAnalytics(event);
+      this.processEventForAnalytics(event);
 
-      this.logger.info({ 
+      this.logger.debug({ 
         eventId: event.id, 
         eventType: data.type, 
         userId: data.userId 
@@ -231,8 +238,8 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
         geographicData
       };
 
-      // Cache for 15 minutes
-      await cache.set(cacheKey, dashboardData, { ttl: 900 });
+      // Rollups move every minute, so only absorb bursts
+      await cache.set(cacheKey, dashboardData, { ttl: 60 });
 
       return {
         success: true,
@@ -312,24 +319,21 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
 
       const [
         basicMetrics,
-        topProducts,
-        revenueByCategory
+        productBreakdown
       ] = await Promise.all([
         this.getSellerBasicMetrics(sellerId, dateRange),
-        this.getSellerTopProducts(sellerId, dateRange),
-        this.getSellerRevenueByCategory(sellerId, dateRange)
+        this.getSellerProductBreakdown(sellerId, dateRange)
       ]);
 
       const sellerAnalytics = {
         sellerId,
         period,
         ...basicMetrics,
-        topProducts,
-        revenueByCategory
+        ...productBreakdown
       } as SellerAnalyticsData;
 
-      // Cache for 30 minutes
-      await cache.set(cacheKey, sellerAnalytics, { ttl: 1800 });
+      // Rollups move every minute, so only absorb bursts
+      await cache.set(cacheKey, sellerAnalytics, { ttl: 60 });
 
       return {
         success: true,
@@ -358,7 +362,7 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
         interactions
       ] = await Promise.all([
         this.getProductBasicMetrics(productId, dateRange),
-        this.getProductInteractions(productId, dateRange)
+        this.getProductInteractions(productId)
       ]);
 
       const productAnalytics = {
@@ -367,8 +371,8 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
         ...interactions
       } as ProductAnalyticsData;
 
-      // Cache for 30 minutes
-      await cache.set(cacheKey, productAnalytics, { ttl: 1800 });
+      // Rollups move every minute, so only absorb bursts
+      await cache.set(cacheKey, productAnalytics, { ttl: 60 });
 
       return {
         success: true,
@@ -441,110 +445,120 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
     }
   }
 
-  // Private helper methods
-  private async processEventForAnalytics(event: AnalyticsEvent): Promise<void> {
-    // Update user analytics
-    if (event.userId) {
-      await this.updateUserAnalytics(event);
+  // Streaming Report Export
+  async exportReport(options: ReportExportOptions): Promise<ServiceResult<Readable>> {
+    const invalid = this.validateReportExport(options);
+    if (invalid) {
+      return { success: false, error: invalid };
     }
 
-    // Update seller analytics
-    if (event.sellerId) {
-      await this.updateSellerAnalytics(event);
-    }
+    const range = options.dateRange || this.getDefaultDateRange(options.period);
+    this.logger.info({ reportType: options.type, format: options.format }, 'Report export streaming');
 
-    // Update product analytics
-    if (event.productId) {
-      await this.updateProductAnalytics(event);
-    }
+    return {
+      success: true,
+      data: this.reportExporter.stream(options.type, options.format, range)
+    };
   }
 
-  private async updateUserAnalytics(event: AnalyticsEvent): Promise<void> {
-    if (!event.userId) return;
-
+  async startReportExport(options: ReportExportOptions, requestedBy: string): Promise<ServiceResult<{ jobId: string }>> {
     try {
-      // Update user engagement metrics in cache for real-time access
-      const cacheKey = `user:analytics:${event.userId}:${new Date().toISOString().split('T')[0]}`;
-      const existing = await this.app.redis.get(cacheKey);
-      const metrics = existing ? JSON.parse(existing) : { events: 0, pageViews: 0, lastActivity: null };
+      const invalid = this.validateReportExport(options);
+      if (invalid) {
+        return { success: false, error: invalid };
+      }
 
-      metrics.events += 1;
-      if (event.type === 'PAGE_VIEW') metrics.pageViews += 1;
-      metrics.lastActivity = event.createdAt;
+      const range = options.dateRange || this.getDefaultDateRange(options.period);
+      const jobId = await this.app.reportExports.enqueue({
+        type: options.type,
+        format: options.format,
+        startDate: range.startDate.toISOString(),
+        endDate: range.endDate.toISOString(),
+        requestedBy
+      });
 
-      await this.app.redis.setex(cacheKey, 86400, JSON.stringify(metrics)); // Cache for 24 hours
+      this.logger.info({ jobId, reportType: options.type, format: options.format }, 'Report export queued');
+
+      return {
+        success: true,
+        data: { jobId }
+      };
     } catch (error) {
-      this.logger.warn({ error, userId: event.userId }, 'Failed to update user analytics cache');
+      this.logger.error({ error }, 'Failed to queue report export');
+      return {
+        success: false,
+        error: error instanceof ApiError ? error : new ApiError('Failed to queue report export', 500)
+      };
     }
   }
 
-  private async updateSellerAnalytics(event: AnalyticsEvent): Promise<void> {
-    if (!event.sellerId) return;
-
+  async getReportExport(jobId: string): Promise<ServiceResult<ReportExportStatus>> {
     try {
-      // Update seller metrics in cache for real-time dashboard
-      const cacheKey = `seller:analytics:${event.sellerId}:${new Date().toISOString().split('T')[0]}`;
-      const existing = await this.app.redis.get(cacheKey);
-      const metrics = existing ? JSON.parse(existing) : { views: 0, orders: 0, revenue: 0 };
-
-      if (event.type === 'PRODUCT_VIEW') metrics.views += 1;
-      if (event.type === 'PURCHASE' && event.data && typeof event.data === 'object' && 'value' in event.data) {
-        metrics.orders += 1;
-        metrics.revenue += parseFloat(String(event.data.value));
+      const status = await this.app.reportExports.getStatus(jobId);
+      if (!status) {
+        return {
+          success: false,
+          error: new ApiError('Report export not found', 404, 'EXPORT_NOT_FOUND')
+        };
       }
 
-      await this.app.redis.setex(cacheKey, 86400, JSON.stringify(metrics)); // Cache for 24 hours
+      return {
+        success: true,
+        data: status
+      };
     } catch (error) {
-      this.logger.warn({ error, sellerId: event.sellerId }, 'Failed to update seller analytics cache');
+      this.logger.error({ error, jobId }, 'Failed to get report export');
+      return {
+        success: false,
+        error: error instanceof ApiError ? error : new ApiError('Failed to get report export', 500)
+      };
     }
   }
 
-  private async updateProductAnalytics(event: AnalyticsEvent): Promise<void> {
-    if (!event.productId) return;
+  // Private helper methods
+  private processEventForAnalytics(event: AnalyticsEvent): void {
+    const day = event.createdAt.toISOString().split('T')[0];
 
-    try {
-      // Update product metrics in cache for real-time analytics
-      const cacheKey = `product:analytics:${event.productId}:${new Date().toISOString().split('T')[0]}`;
-      const existing = await this.app.redis.get(cacheKey);
-      const metrics = existing ? JSON.parse(existing) : { 
-        views: 0, 
-        cartAdditions: 0, 
-        orders: 0, 
-        revenue: 0 
-      };
+    // Daily engagement counters per user, seller and product
+    if (event.userId) {
+      const key = `user:analytics:${event.userId}:${day}`;
+      analyticsIngest.increment(key, 'events');
+      if (event.type === 'PAGE_VIEW') analyticsIngest.increment(key, 'pageViews');
+      analyticsIngest.setField(key, 'lastActivity', event.createdAt.toISOString());
+    }
+
+    const value = event.type === 'PURCHASE' && event.data && typeof event.data === 'object' && 'value' in event.data
+      ? parseFloat(String(event.data.value))
+      : NaN;
+    const purchaseValue = Number.isFinite(value) ? value : null;
 
-      if (event.type === 'PRODUCT_VIEW') metrics.views += 1;
-      if (event.type === 'ADD_TO_CART') metrics.cartAdditions += 1;
-      if (event.type === 'PURCHASE' && event.data && typeof event.data === 'object' && 'value' in event.data) {
-        metrics.orders += 1;
-        metrics.revenue += parseFloat(String(event.data.value));
+    if (event.sellerId) {
+      const key = `seller:analytics:${event.sellerId}:${day}`;
+      if (event.type === 'PRODUCT_VIEW') analyticsIngest.increment(key, 'views');
+      if (purchaseValue !== null) {
+        analyticsIngest.increment(key, 'orders');
+        analyticsIngest.incrementFloat(key, 'revenue', purchaseValue);
       }
+    }
 
-      await this.app.redis.setex(cacheKey, 86400, JSON.stringify(metrics)); // Cache for 24 hours
-    } catch (error) {
-      this.logger.warn({ error, productId: event.productId }, 'Failed to update product analytics cache');
+    if (event.productId) {
+      const key = `product:analytics:${event.productId}:${day}`;
+      if (event.type === 'PRODUCT_VIEW') analyticsIngest.increment(key, 'views');
+      if (event.type === 'ADD_TO_CART') analyticsIngest.increment(key, 'cartAdditions');
+      if (purchaseValue !== null) {
+        analyticsIngest.increment(key, 'orders');
+        analyticsIngest.incrementFloat(key, 'revenue', purchaseValue);
+      }
     }
   }
 
   private async getOverviewMetrics(dateRange?: AnalyticsDateRange): Promise<DashboardAnalytics['overview']> {
     const [
-      revenueData,
-      ordersData,
+      platformTotals,
       usersData,
       sellersData
     ] = await Promise.all([
-      this.paymentRepo.aggregate({
-        where: dateRange ? {
-          status: 'PAID',
-          createdAt: { gte: dateRange.startDate, lte: dateRange.endDate }
-        } : { status: 'PAID' },
-        _sum: { amount: true },
-      }),
-      this.orderRepo.count(dateRange ? {
-        where: {
-          createdAt: { gte: dateRange.startDate, lte: dateRange.endDate }
-        }
-      } : {}),
+      this.rollups.getTotals('platform', PLATFORM_SCOPE_ID, dateRange),
       this.userRepo.count(dateRange ? {
         where: {
           createdAt: { gte: dateRange.startDate, lte: dateRange.endDate }
@@ -557,8 +571,8 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
       } : undefined)
     ]);
 
-    const totalRevenue = Number(revenueData._sum.amount || 0);
-    const totalOrders = ordersData;
+    const totalRevenue = platformTotals.revenue;
+    const totalOrders = platformTotals.orders;
     const avgOrderValue = totalOrders > 0 ? totalRevenue / totalOrders : 0;
 
     return {
@@ -573,15 +587,13 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
 
   private async getRevenueChart(): Promise<DashboardAnalytics['revenueChart']> {
     try {
-      // Get revenue chart data from analytics repository
-      const { AnalyticsRepository } = require('../repositories/analytics.repository');
-      const analyticsRepo = new AnalyticsRepository(
-        this.prisma, 
-        this.app.redis, 
-        this.logger
-      );
-      
-      return await analyticsRepo.getRevenueChart('month');
+      const series = await this.rollups.getSeries('platform', PLATFORM_SCOPE_ID, 'day', this.lastDays(30));
+
+      return series.map(point => ({
+        date: point.bucket.toISOString().split('T')[0],
+        revenue: point.revenue,
+        orders: point.orders
+      }));
     } catch (error) {
       this.logger.error({ error }, 'Failed to get revenue chart data');
       return [];
@@ -590,63 +602,22 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
 
   private async getTopProducts(): Promise<DashboardAnalytics['topProducts']> {
     try {
-      const thirtyDaysAgo = new Date(Date.now() - 30 * 24 * 60 * 60 * 1000);
-      
-      // Get top products based on order performance
-      const topProducts = await this.prisma.product.findMany({
-        include: {
-          orderItems: {
-            where: {
-              order: {
-                status: 'DELIVERED',
-                createdAt: { gte: thirtyDaysAgo }
-              }
-            },
-            select: {
-              quantity: true,
-              price: true
-            }
-          }
-        },
-        take: 20 // Get more initially, then filter
-      });
+      const ranked = (await this.rollups.getTop('product', this.lastDays(30), 10))
+        .filter(rank => rank.revenue > 0); // Only products with sales
 
-      // Get view counts separately
-      const productIds = topProducts.map(p => p.id);
-      const viewCounts = await this.prisma.analyticsEvent.groupBy({
-        by: ['productId'],
-        where: {
-          productId: { in: productIds },
-          type: 'PRODUCT_VIEW',
-          createdAt: { gte: thirtyDaysAgo }
-        },
-        _count: { id: true }
+      const products = await this.prisma.product.findMany({
+        where: { id: { in: ranked.map(rank => rank.scopeId) } },
+        select: { id: true, name: true }
       });
-
-      // Create view count map
-      const viewCountMap = new Map(
-        viewCounts.map(vc => [vc.productId, vc._count.id || 0])
-      );
-
-      const productsWithMetrics = topProducts.map((product: any) => {
-        const revenue = product.orderItems.reduce((sum: number, item: any) => 
-          sum + (Number(item.price) * item.quantity), 0);
-        const orders = product.orderItems.length;
-        const views = viewCountMap.get(product.id) || 0;
-
-        return {
-          productId: product.id,
-          name: product.name,
-          revenue,
-          orders,
-          views
-        };
-      })
-      .filter(p => p.revenue > 0) // Only products with sales
-      .sort((a, b) => b.revenue - a.revenue)
-      .slice(0, 10); // Top 10
-
-      return productsWithMetrics;
+      const names = new Map(products.map(product => [product.id, product.name]));
+
+      return ranked.map(rank => ({
+        productId: rank.scopeId,
+        name: names.get(rank.scopeId) || '',
+        revenue: rank.revenue,
+        orders: rank.orders,
+        views: rank.views
+      }));
     } catch (error) {
       this.logger.error({ error }, 'Failed to get top products');
       return [];
@@ -655,57 +626,36 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
 
   private async getTopSellers(): Promise<DashboardAnalytics['topSellers']> {
     try {
-      // Get top sellers based on order performance
-      const topSellers = await this.prisma.seller.findMany({
-        include: {
-          products: {
-            include: {
-              orderItems: {
-                where: {
-                  order: {
-                    status: 'DELIVERED',
-                    createdAt: {
-                      gte: new Date(Date.now() - 30 * 24 * 60 * 60 * 1000) // Last 30 days
-                    }
-                  }
-                },
-                select: {
-                  quantity: true,
-                  price: true
-                }
-              }
-            }
-          }
-        },
-        take: 10
-      });
+      const ranked = (await this.rollups.getTop('seller', this.lastDays(30), 10))
+        .filter(rank => rank.revenue > 0);
 
-      return topSellers.map((seller: any) => {
-        let revenue = 0;
-        let orders = 0;
-
-        seller.products.forEach((product: any) => {
-          product.orderItems.forEach((item: any) => {
-            revenue += Number(item.price) * item.quantity;
-            orders += 1;
-          });
-        });
-
-        return {
-          sellerId: seller.id,
-          storeName: seller.businessName,
-          revenue,
-          orders
-        };
-      })
-      .filter(seller => seller.revenue > 0)
-      .sort((a, b) => b.revenue - a.revenue);
+      const sellers = await this.prisma.seller.findMany({
+        where: { id: { in: ranked.map(rank => rank.scopeId) } },
+        select: { id: true, businessName: true }
+      });
+      const names = new Map(sellers.map(seller => [seller.id, seller.businessName]));
+
+      return ranked.map(rank => ({
+        sellerId: rank.scopeId,
+        storeName: names.get(rank.scopeId) || '',
+        revenue: rank.revenue,
+        orders: rank.orders
+      }));
     } catch (error) {
       this.logger.error({ error }, 'Failed to get top sellers');
       return [];
     }
   }
 
+  // Rollup range for the trailing N days up to now
+  private lastDays(days: number): AnalyticsDateRange {
+    const endDate = new Date();
+    return {
+      startDate: new Date(endDate.getTime() - days * 24 * 60 * 60 * 1000),
+      endDate
+    };
+  }
+
   private async getUserMetrics(): Promise<DashboardAnalytics['userMetrics']> {
     try {
       const now = new Date();
@@ -922,61 +872,32 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
     }
   }
 
-  private async getSellerBasicMetrics(sellerId: string, _dateRange?: AnalyticsDateRange): Promise<Partial<SellerAnalyticsData>> {
+  private async getSellerBasicMetrics(sellerId: string, dateRange?: AnalyticsDateRange): Promise<Partial<SellerAnalyticsData>> {
     try {
-      // Get seller's orders and revenue
-      const orders = await this.prisma.order.findMany({
-        where: {
-          items: {
-            some: {
-              product: {
-                sellerId
-              }
-            }
-          },
-          status: { in: [OrderStatus.DELIVERED] }
-        },
-        include: {
-          items: {
-            where: {
-              product: {
-                sellerId
-              }
-            }
-          }
-        }
-      });
-
-      // Calculate metrics
-      const revenue = orders.reduce((sum, order: any) => {
-        const sellerRevenue = order.items.reduce((itemSum: number, item: any) => {
-          return itemSum + (Number(item.price) * item.quantity);
-        }, 0);
-        return sum + sellerRevenue;
-      }, 0);
-
-      const orderCount = orders.length;
-      const avgOrderValue = orderCount > 0 ? revenue / orderCount : 0;
-
-      // Get unique customers
-      const uniqueCustomers = new Set(orders.map(order => order.userId)).size;
-
-      // Get product views (from analytics events)
-      const viewEvents = await this.prisma.analyticsEvent.count({
-        where: {
-          sellerId,
-          type: 'PRODUCT_VIEW'
-        }
-      });
+      const dateFilter = dateRange
+        ? Prisma.sql`AND o."createdAt" >= ${dateRange.startDate} AND o."createdAt" <= ${dateRange.endDate}`
+        : Prisma.empty;
+
+      // Distinct customers don't add up across buckets, so they are counted directly
+      const [totals, customerRows] = await Promise.all([
+        this.rollups.getTotals('seller', sellerId, dateRange),
+        this.prisma.$queryRaw<{ customers: number }[]>`
+          SELECT COUNT(DISTINCT o."userId")::int AS customers
+          FROM "products" p
+          JOIN "order_items" oi ON oi."productId" = p."id"
+          JOIN "orders" o ON o."id" = oi."orderId"
+          WHERE p."sellerId" = ${sellerId} AND o."status" = 'DELIVERED' ${dateFilter}
+        `
+      ]);
 
-      // Calculate conversion rate
-      const conversionRate = viewEvents > 0 ? (orderCount / viewEvents) * 100 : 0;
+      const avgOrderValue = totals.orders > 0 ? totals.revenue / totals.orders : 0;
+      const conversionRate = totals.views > 0 ? (totals.orders / totals.views) * 100 : 0;
 
       return {
-        revenue,
-        orders: orderCount,
-        customers: uniqueCustomers,
-        views: viewEvents,
+        revenue: totals.revenue,
+        orders: totals.orders,
+        customers: customerRows[0]?.customers || 0,
+        views: totals.views,
         conversionRate,
         avgOrderValue
       };
@@ -993,151 +914,75 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
     }
   }
 
-  private async getSellerTopProducts(sellerId: string, _dateRange?: AnalyticsDateRange): Promise<SellerAnalyticsData['topProducts']> {
+  private async getSellerProductBreakdown(
+    sellerId: string,
+    dateRange?: AnalyticsDateRange
+  ): Promise<Pick<SellerAnalyticsData, 'topProducts' | 'revenueByCategory'>> {
     try {
-      // Get seller's products with order counts
       const products = await this.prisma.product.findMany({
-        where: {
-          sellerId,
-          status: 'PUBLISHED'
-        },
-        include: {
-          orderItems: {
-            where: {
-              order: {
-                status: { in: [OrderStatus.DELIVERED] }
-              }
-            },
-            select: {
-              quantity: true,
-              price: true
-            }
-          }
-        }
+        where: { sellerId },
+        select: { id: true, name: true, status: true, categoryId: true }
       });
 
-      // Calculate revenue and order count for each product
-      const productStats = products.map((product: any) => {
-        const stats = product.orderItems.reduce((acc: any, item: any) => ({
-          revenue: acc.revenue + (Number(item.price) * item.quantity),
-          orders: acc.orders + 1
-        }), { revenue: 0, orders: 0 });
+      const [ranked, hierarchy] = await Promise.all([
+        this.rollups.getTop('product', dateRange, products.length, products.map(product => product.id)),
+        getCategoryHierarchy(this.prisma, this.app.redis)
+      ]);
+      const totalsByProduct = new Map(ranked.map(rank => [rank.scopeId, rank]));
 
-        return {
+      const topProducts = products
+        .filter(product => product.status === 'PUBLISHED')
+        .map(product => ({
           productId: product.id,
           name: product.name,
-          revenue: stats.revenue,
-          orders: stats.orders
-        };
-      });
-
-      // Sort by revenue and return top 10
-      return productStats
+          revenue: totalsByProduct.get(product.id)?.revenue || 0,
+          orders: totalsByProduct.get(product.id)?.orders || 0
+        }))
         .sort((a, b) => b.revenue - a.revenue)
         .slice(0, 10);
-    } catch (error) {
-      this.logger.error({ error, sellerId }, 'Failed to get seller top products');
-      return [];
-    }
-  }
-
-  private async getSellerRevenueByCategory(sellerId: string, _dateRange?: AnalyticsDateRange): Promise<SellerAnalyticsData['revenueByCategory']> {
-    try {
-      // Get seller's orders grouped by category
-      const orderItems = await this.prisma.orderItem.findMany({
-        where: {
-          product: {
-            sellerId
-          },
-          order: {
-            status: { in: [OrderStatus.DELIVERED] }
-          }
-        },
-        include: {
-          product: {
-            include: {
-              category: {
-                select: {
-                  id: true,
-                  name: true
-                }
-              }
-            }
-          }
-        }
-      });
 
-      // Group revenue by category
-      const categoryMap = new Map<string, { name: string; revenue: number }>();
-      
-      for (const item of orderItems) {
-        if (item.product?.category) {
-          const catId = item.product.category.id;
-          const catName = item.product.category.name;
-          const itemRevenue = Number(item.price) * item.quantity;
-          
-          if (categoryMap.has(catId)) {
-            categoryMap.get(catId)!.revenue += itemRevenue;
-          } else {
-            categoryMap.set(catId, { name: catName, revenue: itemRevenue });
-          }
+      const categoryRevenue = new Map<string, number>();
+      for (const product of products) {
+        const revenue = totalsByProduct.get(product.id)?.revenue;
+        if (revenue) {
+          categoryRevenue.set(product.categoryId, (categoryRevenue.get(product.categoryId) || 0) + revenue);
         }
       }
 
-      // Convert to array and sort by revenue
-      return Array.from(categoryMap.entries())
-        .map(([categoryId, data]) => ({
+      const revenueByCategory = Array.from(categoryRevenue.entries())
+        .map(([categoryId, revenue]) => ({
           categoryId,
-          categoryName: data.name,
-          revenue: data.revenue
+          categoryName: hierarchy.get(categoryId)?.name || '',
+          revenue
         }))
         .sort((a, b) => b.revenue - a.revenue);
+
+      return { topProducts, revenueByCategory };
     } catch (error) {
-      this.logger.error({ error, sellerId }, 'Failed to get seller revenue by category');
-      return [];
+      this.logger.error({ error, sellerId }, 'Failed to get seller product breakdown');
+      return { topProducts: [], revenueByCategory: [] };
     }
   }
 
-  private async getProductBasicMetrics(productId: string, _dateRange?: AnalyticsDateRange): Promise<Partial<ProductAnalyticsData>> {
+  private async getProductBasicMetrics(productId: string, dateRange?: AnalyticsDateRange): Promise<Partial<ProductAnalyticsData>> {
     try {
-      // Get product views from analytics events
-      const views = await this.prisma.analyticsEvent.count({
-        where: {
-          productId,
-          type: 'PRODUCT_VIEW'
-        }
-      });
-
-      // Get orders and revenue
-      const orderItems = await this.prisma.orderItem.findMany({
-        where: {
-          productId,
-          order: {
-            status: { in: [OrderStatus.DELIVERED] }
-          }
-        },
-        select: {
-          quantity: true,
-          price: true
-        }
-      });
-
-      const orders = orderItems.length;
-      const revenue = orderItems.reduce((sum, item) => sum + (Number(item.price) * item.quantity), 0);
-      const conversionRate = views > 0 ? (orders / views) * 100 : 0;
+      const [totals, reviews] = await Promise.all([
+        this.rollups.getTotals('product', productId, dateRange),
+        this.prisma.review.aggregate({
+          where: { productId },
+          _count: true,
+          _avg: { rating: true }
+        })
+      ]);
 
-      // Get reviews
-      const reviews = await this.prisma.review.aggregate({
-        where: { productId },
-        _count: true,
-        _avg: { rating: true }
-      });
+      const conversionRate = totals.views > 0 ? (totals.orders / totals.views) * 100 : 0;
 
       return {
-        views,
-        orders,
-        revenue,
+        views: totals.views,
+        orders: totals.orders,
+        revenue: totals.revenue,
         conversionRate,
+        cartAdditions: totals.cartAdds,
         avgRating: reviews._avg.rating || 0,
         reviewCount: reviews._count,
         searchRanking: 0 // Would need search analytics to calculate
@@ -1149,6 +994,7 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
         orders: 0,
         revenue: 0,
         conversionRate: 0,
+        cartAdditions: 0,
         avgRating: 0,
         reviewCount: 0,
         searchRanking: 0
@@ -1156,17 +1002,8 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
     }
   }
 
-  private async getProductInteractions(productId: string, _dateRange?: AnalyticsDateRange): Promise<Partial<ProductAnalyticsData>> {
+  private async getProductInteractions(productId: string): Promise<Partial<ProductAnalyticsData>> {
     try {
-      // Get cart additions from analytics events
-      const cartAdditions = await this.prisma.analyticsEvent.count({
-        where: {
-          productId,
-          type: 'ADD_TO_CART'
-        }
-      });
-
-      // Get wishlist additions
       const wishlistAdditions = await this.prisma.wishlist.count({
         where: {
           productId
@@ -1174,13 +1011,11 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
       });
 
       return {
-        cartAdditions,
         wishlistAdditions
       };
     } catch (error) {
       this.logger.error({ error, productId }, 'Failed to get product interactions');
       return {
-        cartAdditions: 0,
         wishlistAdditions: 0
       };
     }
@@ -1371,6 +1206,19 @@ export class AnalyticsService extends CrudService<AnalyticsEvent, Prisma.Analyti
   }
 
   // Helper methods for report generation
+  private validateReportExport(options: ReportExportOptions): ApiError | null {
+    if (!isReportType(options.type)) {
+      return new ApiError('Invalid report type', 400, 'INVALID_REPORT_TYPE');
+    }
+    if (!EXPORT_FORMATS.includes(options.format)) {
+      return new ApiError('Invalid export format', 400, 'INVALID_EXPORT_FORMAT');
+    }
+    if (options.dateRange && options.dateRange.startDate > options.dateRange.endDate) {
+      return new ApiError('startDate must be before endDate', 400, 'INVALID_DATE_RANGE');
+    }
+    return null;
+  }
+
   private getDefaultDateRange(period: string): AnalyticsDateRange {
     const endDate = new Date();
     const startDate = new Date();
@@ -11,6 +11,7 @@ import { UserRepository } from '../repositories/user.repository';
 import { SessionRepository } from '../repositories/session.repository';
 import { UserActivityLogRepository } from '../repositories/user-activity-log.repository';
 import { emailService } from '../utils/email';
+import { FraudFeatureStore } from './fraud-feature-store.service';
 
 export interface RegisterData {
   email: string;
@@ -59,6 +60,7 @@ export class AuthService {
   private userRepo: UserRepository;
   private sessionRepo: SessionRepository;
   private activityLogRepo: UserActivityLogRepository;
+  private fraudFeatures: FraudFeatureStore;
 
   constructor(
     private prisma: PrismaClient,
@@ -68,6 +70,7 @@ export class AuthService {
     this.userRepo = new UserRepository(prisma, redis, logger);
     this.sessionRepo = new SessionRepository(prisma, redis, logger);
     this.activityLogRepo = new UserActivityLogRepository(prisma, redis, logger);
+    this.fraudFeatures = new FraudFeatureStore(prisma, redis);
   }
 
   /**
@@ -119,6 +122,9 @@ export class AuthService {
 
     // Log registration
     await this.logActivity(user.id, 'USER_REGISTERED');
+    await this.fraudFeatures.recordAccount(user.id, user.createdAt).catch(error => {
+      logger.warn({ error, userId: user.id }, 'Failed to seed fraud features');
+    });
 
     return { user, tokens };
   }
@@ -2,7 +2,7 @@ import { Brand, Prisma } from '@prisma/client';
 import { ServiceResult, PaginatedResult } from '../types';
 import { ApiError } from '../utils/errors';
 import { logger } from '../utils/logger';
-import { BrandRepository } from '../repositories';
+import { BrandRepository } from '../repositories/brand.repository';
 import { cacheGet, cacheSet } from '../config/redis';
 import { nanoid } from 'nanoid';
 
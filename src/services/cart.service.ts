@@ -1,10 +1,15 @@
-import { Cart, CartItem, Wishlist, Prisma, Currency, ProductStatus } from '@prisma/client';
+import { Cart, CartItem, Wishlist, Prisma, Currency, Product, ProductStatus, ProductVariant } from '@prisma/client';
 import { FastifyInstance } from 'fastify';
 import { CrudService } from './crud.service';
 import { ServiceResult } from '../types';
 import { ApiError } from '../utils/errors';
-import { cache } from '../utils/cache';
-import { CartRepository, CartItemRepository, ProductRepository, ProductVariantRepository, WishlistRepository } from '../repositories';
+import { cache, cacheTags } from '../utils/cache';
+import { CartRepository } from '../repositories/cart.repository';
+import { ProductRepository } from '../repositories/product.repository';
+import { ProductVariantRepository } from '../repositories/product-variant.repository';
+import { WishlistRepository } from '../repositories/wishlist.repository';
+import { CartSnapshotStore } from '../utils/cart-snapshot';
+import { CartLineChange, availableQuantity, loadCartCatalog, reviewCartLines } from '../utils/cart-validation';
 
 // Define missing types
 
@@ -131,6 +136,8 @@ interface WishlistItemWithDetails extends Wishlist {
 
 interface CartValidationResult {
   isValid: boolean;
+  changes: CartLineChange[]; // Every difference between the cart and the catalog
+  applied: boolean; // Whether the cart was updated to match
   errors: Array<{
     itemId: string;
     productId: string;
@@ -144,27 +151,44 @@ interface CartValidationResult {
   }>;
 }
 
+interface CartValidationOptions {
+  apply?: boolean; // Clamp quantities, refresh prices and drop lines that cannot be bought
+}
+
 interface CartMergeOptions {
   strategy: 'replace' | 'add' | 'keep_latest';
   preserveGuestCart: boolean;
 }
 
+type CartLineSource = CartItem & {
+  product: Product & { seller?: { businessName: string } | null };
+  variant?: ProductVariant | null;
+};
+
+const TAX_RATE = 0.08; // Simplified flat sales tax, would use actual tax rules
+
+// Seconds a cart snapshot lives without being written
+const CART_SNAPSHOT_TTL = 600;
+
+function roundMoney(amount: number): number {
+  return Math.round(amount * 100) / 100;
+}
+
 export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prisma.CartUpdateInput> {
-  cartAbandonmentRepo: any;
-  cartItemRepo: CartItemRepository;
   cartRepo: CartRepository;
   productRepo: ProductRepository;
   productVariantRepo: ProductVariantRepository;
   wishlistRepo: WishlistRepository;
+  snapshots: CartSnapshotStore<CartWithDetails>;
   modelName = 'cart' as const;
 
   constructor(app: FastifyInstance) {
     super(app);
     this.cartRepo = new CartRepository(this.prisma, this.app.redis, this.logger);
-    this.cartItemRepo = new CartItemRepository(this.prisma, this.app.redis, this.logger);
     this.productRepo = new ProductRepository(this.prisma, this.app.redis, this.logger);
     this.productVariantRepo = new ProductVariantRepository(this.prisma, this.app.redis, this.logger);
     this.wishlistRepo = new WishlistRepository(this.prisma, this.app.redis, this.logger);
+    this.snapshots = new CartSnapshotStore(this.app.redis, CART_SNAPSHOT_TTL);
   }
 
   async createCart(data: { userId: string }): Promise<ServiceResult<Cart>> {
@@ -212,7 +236,10 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
   async addToCart(userId: string | null, data: AddToCartData): Promise<ServiceResult<CartWithDetails>> {
     try {
       // Validate product and variant
-      const product = await this.productRepo.findById(data.productId);
+      const product = await this.prisma.product.findUnique({
+        where: { id: data.productId },
+        include: { seller: { select: { businessName: true } } }
+      });
       if (!product || product.status !== ProductStatus.PUBLISHED) {
         return {
           success: false,
@@ -249,47 +276,47 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
         };
       }
 
-      // Check if item already exists in cart
-      const existingItem = await this.prisma.cartItem.findFirst({
-        where: {
-          cartId: cart.id,
-          productId: data.productId,
-          variantId: data.variantId
-        }
-      });
+      const { item, version } = await this.prisma.$transaction(async (tx) => {
+        // Check if item already exists in cart
+        const existingItem = await tx.cartItem.findFirst({
+          where: {
+            cartId: cart!.id,
+            productId: data.productId,
+            variantId: data.variantId ?? null
+          }
+        });
 
-      let updatedCart;
-      if (existingItem) {
-        // Update existing item
-        const newQuantity = existingItem.quantity + data.quantity;
-        if (newQuantity > availableStock) {
-          return {
-            success: false,
-            error: new ApiError('Cannot add more items - insufficient stock', 400, 'INSUFFICIENT_STOCK')
-          };
-        }
+        let item: CartItem;
+        if (existingItem) {
+          // Update existing item
+          const newQuantity = existingItem.quantity + data.quantity;
+          if (newQuantity > availableStock) {
+            throw new ApiError('Cannot add more items - insufficient stock', 400, 'INSUFFICIENT_STOCK');
+          }
 
-        await this.cartItemRepo.update(existingItem.id, {
-          quantity: newQuantity,
-        });
-      } else {
-        // Create new cart item
-        await this.cartItemRepo.create({
-          cart: { connect: { id: cart.id } },
-          product: { connect: { id: data.productId } },
-          variant: data.variantId ? { connect: { id: data.variantId } } : undefined,
-          quantity: data.quantity,
-          price: variant?.price ?? product.price,
-        });
-      }
+          item = await tx.cartItem.update({
+            where: { id: existingItem.id },
+            data: { quantity: newQuantity }
+          });
+        } else {
+          // Create new cart item
+          item = await tx.cartItem.create({
+            data: {
+              cartId: cart!.id,
+              productId: data.productId,
+              variantId: data.variantId,
+              quantity: data.quantity,
+              price: variant?.price ?? product.price
+            }
+          });
+        }
 
-      // Update cart timestamp
-      await this.cartRepo.update(cart.id, {
-        updatedAt: new Date()
+        return { item, version: await this.bumpCartVersion(tx, cart!.id) };
       });
 
-      // Get updated cart with details
-      updatedCart = await this.getCartWithDetails(cart.id);
+      const updatedCart = await this.applyCartChange(cart, version, snapshot => {
+        this.upsertLine(snapshot, this.toCartLine({ ...item, product, variant }));
+      });
 
       // Track analytics event
       this.app.events?.emit('cart.item.added', {
@@ -301,9 +328,6 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
         value: Number(variant?.price ?? product.price)
       });
 
-      // Clear cache
-      await cache.invalidatePattern(`cart:${userId || cart.id}:*`);
-
       this.logger.info({ 
         userId, 
         cartId: cart.id, 
@@ -313,7 +337,7 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
 
       return {
         success: true,
-        data: updatedCart!
+        data: await this.withPromotions(updatedCart)
       };
     } catch (error) {
       this.logger.error({ error }, 'Failed to add item to cart');
@@ -326,7 +350,10 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
 
   async updateCartItem(userId: string | null, data: UpdateCartItemData): Promise<ServiceResult<CartWithDetails>> {
     try {
-      const cartItem = await this.cartItemRepo.findById(data.cartItemId);
+      const cartItem = await this.prisma.cartItem.findUnique({
+        where: { id: data.cartItemId },
+        include: { cart: true }
+      });
       if (!cartItem) {
         return {
           success: false,
@@ -335,27 +362,37 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
       }
 
       // Verify ownership
-      const cart = await this.cartRepo.findById(cartItem.cartId);
-      if (!cart || (userId && cart.userId !== userId)) {
+      const cart = cartItem.cart;
+      if (userId && cart.userId !== userId) {
         return {
           success: false,
           error: new ApiError('Cart not found or access denied', 404, 'CART_NOT_FOUND')
         };
       }
 
+      let updatedCart: CartWithDetails;
       if (data.quantity <= 0) {
         // Remove item if quantity is 0 or negative
-        await this.cartItemRepo.delete(cartItem.id);
+        const version = await this.prisma.$transaction(async (tx) => {
+          await tx.cartItem.deleteMany({ where: { id: cartItem.id } });
+          return this.bumpCartVersion(tx, cart.id);
+        });
+        updatedCart = await this.applyCartChange(cart, version, snapshot => {
+          this.removeLine(snapshot, cartItem.id);
+        });
       } else {
         // Validate stock availability
-        const product = await this.productRepo.findById(cartItem.productId);
+        const product = await this.prisma.product.findUnique({
+          where: { id: cartItem.productId },
+          include: { seller: { select: { businessName: true } } }
+        });
         let variant = null;
         if (cartItem.variantId) {
           variant = await this.productVariantRepo.findById(cartItem.variantId);
         }
 
         const availableStock = variant?.quantity ?? product?.quantity ?? 0;
-        if (availableStock < data.quantity) {
+        if (!product || availableStock < data.quantity) {
           return {
             success: false,
             error: new ApiError('Insufficient stock available', 400, 'INSUFFICIENT_STOCK')
@@ -363,19 +400,18 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
         }
 
         // Update cart item
-        await this.cartItemRepo.update(cartItem.id, {
-          quantity: data.quantity,
+        const { item, version } = await this.prisma.$transaction(async (tx) => {
+          const item = await tx.cartItem.update({
+            where: { id: cartItem.id },
+            data: { quantity: data.quantity }
+          });
+          return { item, version: await this.bumpCartVersion(tx, cart.id) };
+        });
+        updatedCart = await this.applyCartChange(cart, version, snapshot => {
+          this.upsertLine(snapshot, this.toCartLine({ ...item, product, variant }));
         });
       }
 
-      // Update cart timestamp
-      await this.cartRepo.update(cart.id, {
-        updatedAt: new Date()
-      });
-
-      // Get updated cart
-      const updatedCart = await this.getCartWithDetails(cart.id);
-
       // Track analytics event
       this.app.events?.emit('cart.item.updated', {
         userId,
@@ -386,9 +422,6 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
         newQuantity: data.quantity
       });
 
-      // Clear cache
-      await cache.invalidatePattern(`cart:${userId || cart.id}:*`);
-
       this.logger.info({ 
         userId, 
         cartId: cart.id, 
@@ -398,7 +431,7 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
 
       return {
         success: true,
-        data: updatedCart!
+        data: await this.withPromotions(updatedCart)
       };
     } catch (error) {
       this.logger.error({ error }, 'Failed to update cart item');
@@ -411,7 +444,10 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
 
   async removeFromCart(userId: string | null, cartItemId: string): Promise<ServiceResult<CartWithDetails>> {
     try {
-      const cartItem = await this.cartItemRepo.findById(cartItemId);
+      const cartItem = await this.prisma.cartItem.findUnique({
+        where: { id: cartItemId },
+        include: { cart: true }
+      });
       if (!cartItem) {
         return {
           success: false,
@@ -420,8 +456,8 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
       }
 
       // Verify ownership
-      const cart = await this.cartRepo.findById(cartItem.cartId);
-      if (!cart || (userId && cart.userId !== userId)) {
+      const cart = cartItem.cart;
+      if (userId && cart.userId !== userId) {
         return {
           success: false,
           error: new ApiError('Cart not found or access denied', 404, 'CART_NOT_FOUND')
@@ -429,15 +465,14 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
       }
 
       // Remove cart item
-      await this.cartItemRepo.delete(cartItem.id);
-
-      // Update cart timestamp
-      await this.cartRepo.update(cart.id, {
-        updatedAt: new Date()
+      const version = await this.prisma.$transaction(async (tx) => {
+        await tx.cartItem.deleteMany({ where: { id: cartItem.id } });
+        return this.bumpCartVersion(tx, cart.id);
       });
 
-      // Get updated cart
-      const updatedCart = await this.getCartWithDetails(cart.id);
+      const updatedCart = await this.applyCartChange(cart, version, snapshot => {
+        this.removeLine(snapshot, cartItem.id);
+      });
 
       // Track analytics event
       this.app.events?.emit('cart.item.removed', {
@@ -448,9 +483,6 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
         quantity: cartItem.quantity
       });
 
-      // Clear cache
-      await cache.invalidatePattern(`cart:${userId || cart.id}:*`);
-
       this.logger.info({ 
         userId, 
         cartId: cart.id, 
@@ -459,7 +491,7 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
 
       return {
         success: true,
-        data: updatedCart!
+        data: await this.withPromotions(updatedCart)
       };
     } catch (error) {
       this.logger.error({ error }, 'Failed to remove item from cart');
@@ -496,13 +528,14 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
       }
 
       // Delete all cart items
-      await this.cartItemRepo.deleteMany({
-        where: { cartId: cart.id }
+      const version = await this.prisma.$transaction(async (tx) => {
+        await tx.cartItem.deleteMany({ where: { cartId: cart!.id } });
+        return this.bumpCartVersion(tx, cart!.id);
       });
 
-      // Update cart timestamp
-      await this.cartRepo.update(cart.id, {
-        updatedAt: new Date()
+      await this.applyCartChange(cart, version, snapshot => {
+        snapshot.items = [];
+        snapshot.calculation = this.calculateCartTotals(0);
       });
 
       // Track analytics event
@@ -511,9 +544,6 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
         cartId: cart.id
       });
 
-      // Clear cache
-      await cache.invalidatePattern(`cart:${userId || cart.id}:*`);
-
       this.logger.info({ userId, cartId: cart.id }, 'Cart cleared');
 
       return {
@@ -529,21 +559,21 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
     }
   }
 
+  /**
+   * The cart as its snapshot has it: one Redis read for a user's cart. The
+   * snapshot is only built from the database when there is none.
+   */
   async getCart(userId: string | null, cartId?: string): Promise<ServiceResult<CartWithDetails>> {
     try {
-      const cacheKey = `cart:${userId || cartId}:details`;
-      const cached = await cache.get<CartWithDetails>(cacheKey);
-      if (cached) {
-        return { success: true, data: cached };
+      let owner = userId;
+      if (!owner && cartId) {
+        const cart = await this.prisma.cart.findUnique({ where: { id: cartId }, select: { userId: true } });
+        owner = cart?.userId ?? null;
       }
 
-      let cart;
-      if (cartId) {
-        cart = await this.cartRepo.findById(cartId);
-      } else if (userId) {
-        const carts = await this.cartRepo.findByUserId(userId);
-        cart = carts[0];
-      }
+      const cart = owner
+        ? (await this.snapshots.get(owner)) ?? (await this.rebuildSnapshot({ userId: owner }))
+        : null;
 
       if (!cart) {
         return {
@@ -553,27 +583,16 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
       }
 
       // Verify ownership
-      if (userId && cart.userId !== userId) {
+      if (cartId && cart.id !== cartId) {
         return {
           success: false,
           error: new ApiError('Access denied', 403, 'ACCESS_DENIED')
         };
       }
 
-      const cartWithDetails = await this.getCartWithDetails(cart.id);
-      if (!cartWithDetails) {
-        return {
-          success: false,
-          error: new ApiError('Failed to load cart details', 500, 'CART_LOAD_ERROR')
-        };
-      }
-
-      // Cache for 10 minutes
-      await cache.set(cacheKey, cartWithDetails, { ttl: 600 });
-
       return {
         success: true,
-        data: cartWithDetails
+        data: await this.withPromotions(cart)
       };
     } catch (error) {
       this.logger.error({ error }, 'Failed to get cart');
@@ -584,84 +603,132 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
     }
   }
 
-  async validateCart(userId: string | null, cartId?: string): Promise<ServiceResult<CartValidationResult>> {
+  /**
+   * Check every line against current products, variants and stock. The
+   * catalog is loaded in a fixed number of set-based queries and compared in
+   * memory, so the cost does not grow with the number of lines.
+   */
+  async validateCart(
+    userId: string | null,
+    cartId?: string,
+    options: CartValidationOptions = {}
+  ): Promise<ServiceResult<CartValidationResult>> {
     try {
-      const cartResult = await this.getCart(userId, cartId);
-      if (!cartResult.success) {
+      const where: Prisma.CartWhereUniqueInput | null = cartId ? { id: cartId } : userId ? { userId } : null;
+      const cart = where
+        ? await this.prisma.cart.findUnique({ where, include: { items: true } })
+        : null;
+
+      if (!cart) {
         return {
           success: false,
-          error: cartResult.error
+          error: new ApiError('Cart not found', 404, 'CART_NOT_FOUND')
         };
       }
 
-      const cart = cartResult.data;
-      if(!cart) {
+      // Verify ownership
+      if (userId && cart.userId !== userId) {
         return {
           success: false,
-          error: new ApiError('Cart not found', 404, 'CART_NOT_FOUND')
+          error: new ApiError('Access denied', 403, 'ACCESS_DENIED')
         };
       }
+
+      const catalog = await loadCartCatalog(this.prisma, cart.items);
+      const reviews = reviewCartLines(cart.items, catalog);
+
       const errors: CartValidationResult['errors'] = [];
       const warnings: CartValidationResult['warnings'] = [];
 
-      for (const item of cart.items) {
-        // Check product availability
-        if (!item.product.isActive) {
-          errors.push({
-            itemId: item.id,
-            productId: item.productId,
-            error: 'Product is no longer available',
-            suggestion: 'Remove this item from your cart'
-          });
-          continue;
-        }
-
-        // Check stock availability
-        if (item.stockStatus === 'out_of_stock') {
-          errors.push({
-            itemId: item.id,
-            productId: item.productId,
-            error: 'Product is out of stock',
-            suggestion: 'Remove this item or check back later'
-          });
-        } else if (item.quantity > item.availableQuantity) {
-          errors.push({
-            itemId: item.id,
-            productId: item.productId,
-            error: `Only ${item.availableQuantity} items available`,
-            suggestion: `Reduce quantity to ${item.availableQuantity}`
-          });
-        } else if (item.stockStatus === 'low_stock') {
-          warnings.push({
-            itemId: item.id,
-            productId: item.productId,
-            warning: `Only ${item.availableQuantity} items left in stock`
-          });
+      for (const review of reviews) {
+        const { line } = review;
+        for (const change of review.changes) {
+          switch (change.type) {
+            case 'unavailable':
+              errors.push({
+                itemId: line.id,
+                productId: line.productId,
+                error: 'Product is no longer available',
+                suggestion: 'Remove this item from your cart'
+              });
+              break;
+            case 'variant_unavailable':
+              errors.push({
+                itemId: line.id,
+                productId: line.productId,
+                error: 'Selected variant is no longer available',
+                suggestion: 'Choose a different variant or remove this item'
+              });
+              break;
+            case 'out_of_stock':
+              errors.push({
+                itemId: line.id,
+                productId: line.productId,
+                error: 'Product is out of stock',
+                suggestion: 'Remove this item or check back later'
+              });
+              break;
+            case 'quantity_clamped':
+              errors.push({
+                itemId: line.id,
+                productId: line.productId,
+                error: `Only ${review.available} items available`,
+                suggestion: `Reduce quantity to ${review.available}`
+              });
+              break;
+            case 'price_changed':
+              warnings.push({
+                itemId: line.id,
+                productId: line.productId,
+                warning: `Price has changed from ${change.from} to ${change.to}`
+              });
+              break;
+          }
         }
 
-        // Check price changes
-        const currentPrice = Number(item.variant?.price ?? item.product.price);
-        if (Math.abs(currentPrice - Number(item.price)) > 0.01) {
+        const product = catalog.products.get(line.productId);
+        if (review.quantity > 0 && review.quantity === line.quantity && product && review.available <= product.lowStockAlert) {
           warnings.push({
-            itemId: item.id,
-            productId: item.productId,
-            warning: `Price has changed from ${item.price} to ${currentPrice}`
+            itemId: line.id,
+            productId: line.productId,
+            warning: `Only ${review.available} items left in stock`
           });
         }
+      }
 
-        // Check variant availability
-        if (item.variantId && item.variant && !item.variant.isActive) {
-          errors.push({
-            itemId: item.id,
-            productId: item.productId,
-            error: 'Selected variant is no longer available',
-            suggestion: 'Choose a different variant or remove this item'
-          });
-        }
+      const changes = reviews.flatMap(review => review.changes);
+      let applied = false;
+
+      if (options.apply && changes.length > 0) {
+        const removed = reviews.filter(review => review.quantity === 0).map(review => review.line.id);
+        const adjusted = reviews.filter(review => review.quantity > 0 && review.changes.length > 0);
+
+        await this.prisma.$transaction([
+          this.prisma.cartItem.deleteMany({ where: { id: { in: removed } } }),
+          ...adjusted.map(review => this.prisma.cartItem.update({
+            where: { id: review.line.id },
+            data: { quantity: review.quantity, price: review.price }
+          })),
+          this.prisma.cart.update({
+            where: { id: cart.id },
+            data: { version: { increment: 1 } }
+          })
+        ]);
+        await this.rebuildSnapshot({ id: cart.id });
+        applied = true;
+
+        this.logger.info({
+          userId,
+          cartId: cart.id,
+          removed: removed.length,
+          adjusted: adjusted.length
+        }, 'Cart brought in line with catalog');
       }
 
       const result: CartValidationResult = {
         isValid: errors.length === 0,
+        changes,
+        applied,
         errors,
         warnings
       };
@@ -681,11 +748,10 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
 
   async mergeCart(userId: string, guestCartId: string, options: CartMergeOptions): Promise<ServiceResult<CartWithDetails>> {
     try {
-      const [userCarts, guestCart] = await Promise.all([
-        this.cartRepo.findByUserId(userId),
-        this.cartRepo.findById(guestCartId)
+      const [userCart, guestCart] = await Promise.all([
+        this.prisma.cart.findUnique({ where: { userId }, include: { items: true } }),
+        this.prisma.cart.findUnique({ where: { id: guestCartId }, include: { items: true } })
       ]);
-      const userCart = userCarts[0];
 
       if (!guestCart) {
         return {
@@ -696,72 +762,79 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
 
       // If user has no cart, just assign the guest cart
       if (!userCart) {
-        await this.cartRepo.update(guestCart.id, {
-          user: { connect: { id: userId } },
+        await this.prisma.cart.update({
+          where: { id: guestCart.id },
+          data: { user: { connect: { id: userId } }, version: { increment: 1 } }
         });
+        await this.snapshots.delete(guestCart.userId);
 
-        const updatedCart = await this.getCartWithDetails(guestCart.id);
+        const updatedCart = await this.rebuildSnapshot({ id: guestCart.id });
         return {
           success: true,
           data: updatedCart!
         };
       }
 
-      // Merge cart items based on strategy
-      const guestItems = await this.cartItemRepo.findMany({
-        where: { cartId: guestCart.id }
-      });
-
-      for (const guestItem of guestItems) {
-        const existingItem = await this.prisma.cartItem.findFirst({
-          where: {
-            cartId: userCart.id,
-            productId: guestItem.productId,
-            variantId: guestItem.variantId
-          }
-        });
+      // Match guest lines to user lines in memory rather than one lookup each
+      const lineKey = (item: CartItem) => `${item.productId}:${item.variantId ?? ''}`;
+      const userItems = new Map(userCart.items.map(item => [lineKey(item), item]));
+      const conflicts = guestCart.items.filter(item => userItems.has(lineKey(item)));
+      const moved = guestCart.items.filter(item => !userItems.has(lineKey(item))).map(item => item.id);
+
+      const catalog = await loadCartCatalog(this.prisma, conflicts);
+      const updates: Array<{ id: string; quantity: number; price: Prisma.Decimal }> = [];
+
+      for (const guestItem of conflicts) {
+        const existingItem = userItems.get(lineKey(guestItem))!;
+        let merged: { quantity: number; price: Prisma.Decimal } | null = null;
+
+        switch (options.strategy) {
+          case 'add':
+            merged = { quantity: existingItem.quantity + guestItem.quantity, price: existingItem.price };
+            break;
+          case 'replace':
+            merged = { quantity: guestItem.quantity, price: guestItem.price };
+            break;
+          case 'keep_latest':
+            if (guestItem.updatedAt > existingItem.updatedAt) {
+              merged = { quantity: guestItem.quantity, price: guestItem.price };
+            }
+            break;
+        }
 
-        if (existingItem) {
-          switch (options.strategy) {
-            case 'add':
-              await this.cartItemRepo.update(existingItem.id, {
-                quantity: existingItem.quantity + guestItem.quantity
-              });
-              break;
-            case 'replace':
-              await this.cartItemRepo.update(existingItem.id, {
-                quantity: guestItem.quantity,
-                price: guestItem.price,
-              });
-              break;
-            case 'keep_latest':
-              if (guestItem.updatedAt > existingItem.updatedAt) {
-                await this.cartItemRepo.update(existingItem.id, {
-                  quantity: guestItem.quantity,
-                  price: guestItem.price,
-                });
-              }
-              break;
-          }
-        } else {
-          // Move item to user cart
-          await this.cartItemRepo.update(guestItem.id, {
-            cart: { connect: { id: userCart.id } }
-          });
+        if (merged) {
+          // Never merge a line past what can be sold; lines that cannot be
+          // bought at all are left for validateCart to report
+          const available = availableQuantity(catalog, existingItem);
+          const quantity = available > 0 ? Math.min(merged.quantity, available) : merged.quantity;
+          updates.push({ id: existingItem.id, quantity, price: merged.price });
         }
       }
 
+      await this.prisma.$transaction([
+        ...updates.map(update => this.prisma.cartItem.update({
+          where: { id: update.id },
+          data: { quantity: update.quantity, price: update.price }
+        })),
+        // Move the remaining items to user cart
+        this.prisma.cartItem.updateMany({
+          where: { id: { in: moved } },
+          data: { cartId: userCart.id }
+        }),
+        // Several lines changed at once: bump the version and snapshot the result
+        this.prisma.cart.update({
+          where: { id: userCart.id },
+          data: { version: { increment: 1 } }
+        })
+      ]);
+
       // Clean up guest cart if not preserving
       if (!options.preserveGuestCart) {
         await this.cartRepo.delete(guestCart.id);
       }
+      await this.snapshots.delete(guestCart.userId);
 
-      // Update user cart timestamp
-      await this.cartRepo.update(userCart.id, {
-        updatedAt: new Date()
-      });
-
-      const mergedCart = await this.getCartWithDetails(userCart.id);
+      const mergedCart = await this.rebuildSnapshot({ id: userCart.id });
 
       // Track analytics event
       this.app.events?.emit('cart.merged', {
@@ -771,9 +844,6 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
         strategy: options.strategy
       });
 
-      // Clear cache
-      await cache.invalidatePattern(`cart:${userId}:*`);
-
       this.logger.info({ 
         userId, 
         userCartId: userCart.id, 
@@ -832,7 +902,7 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
       });
 
       // Clear cache
-      await cache.invalidatePattern(`wishlist:${userId}:*`);
+      await cache.invalidateTags([cacheTags.wishlist(userId)]);
 
       // Return updated wishlist
       const wishlist = await this.getWishlist(userId);
@@ -873,7 +943,7 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
       });
 
       // Clear cache
-      await cache.invalidatePattern(`wishlist:${userId}:*`);
+      await cache.invalidateTags([cacheTags.wishlist(userId)]);
 
       // Return updated wishlist
       const wishlist = await this.getWishlist(userId);
@@ -971,7 +1041,7 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
         totalItems: items.length
       };
 
-      await cache.set(cacheKey, wishlist, { ttl: 300 });
+      await cache.set(cacheKey, wishlist, { ttl: 300, tags: [cacheTags.wishlist(userId)] });
 
       return {
         success: true,
@@ -1028,15 +1098,12 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
       });
 
       // Clear caches
-      await cache.invalidatePattern(`wishlist:${userId}:*`);
+      await cache.invalidateTags([cacheTags.wishlist(userId)]);
 
       // Get updated data
-      const [cartResult, wishlistResult] = await Promise.all([
-        this.getCartWithDetails(addToCartResult.data!.id),
-        this.getWishlist(userId)
-      ]);
+      const wishlistResult = await this.getWishlist(userId);
 
-      if (!cartResult || !wishlistResult.success) {
+      if (!wishlistResult.success) {
         return {
           success: false,
           error: new ApiError('Failed to retrieve updated data', 500, 'DATA_RETRIEVAL_ERROR')
@@ -1046,7 +1113,7 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
       return {
         success: true,
         data: {
-          cart: cartResult,
+          cart: addToCartResult.data!,
           wishlist: wishlistResult.data!
         }
       };
@@ -1079,8 +1146,77 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
     return null;
   }
 
-  private async getCartWithDetails(cartId: string): Promise<CartWithDetails | null> {
-    const cart = await this.cartRepo.findById(cartId, {
+  private async bumpCartVersion(tx: Prisma.TransactionClient, cartId: string): Promise<number> {
+    const cart = await tx.cart.update({
+      where: { id: cartId },
+      data: { version: { increment: 1 } },
+      select: { version: true }
+    });
+    return cart.version;
+  }
+
+  /**
+   * Bring the snapshot to the version a mutation just committed. When it is
+   * exactly one version behind the change is applied to it in place;
+   * otherwise (missing, expired, or other writes in between) it is rebuilt
+   * from the database.
+   */
+  private async applyCartChange(
+    cart: { id: string; userId: string },
+    version: number,
+    change: (snapshot: CartWithDetails) => void
+  ): Promise<CartWithDetails> {
+    const snapshot = await this.snapshots.get(cart.userId);
+    if (snapshot && snapshot.id === cart.id && snapshot.version === version - 1) {
+      change(snapshot);
+      snapshot.version = version;
+      snapshot.updatedAt = new Date();
+      await this.snapshots.put(cart.userId, snapshot);
+      return snapshot;
+    }
+
+    const rebuilt = await this.rebuildSnapshot({ id: cart.id });
+    if (!rebuilt) {
+      throw new ApiError('Cart not found', 404, 'CART_NOT_FOUND');
+    }
+    return rebuilt;
+  }
+
+  // Lines are replaced whole and totals adjusted by the difference, so
+  // applying the same change twice leaves the snapshot unchanged
+  private upsertLine(cart: CartWithDetails, line: CartItemWithDetails): void {
+    const index = cart.items.findIndex(item => item.id === line.id);
+    const previous = index === -1 ? 0 : cart.items[index].lineTotal;
+    if (index === -1) {
+      cart.items.push(line);
+    } else {
+      cart.items[index] = line;
+    }
+    cart.calculation = this.calculateCartTotals(cart.calculation.subtotal - previous + line.lineTotal);
+  }
+
+  private removeLine(cart: CartWithDetails, cartItemId: string): void {
+    const index = cart.items.findIndex(item => item.id === cartItemId);
+    if (index === -1) {
+      return;
+    }
+    const [removed] = cart.items.splice(index, 1);
+    cart.calculation = this.calculateCartTotals(cart.calculation.subtotal - removed.lineTotal);
+  }
+
+  private async rebuildSnapshot(where: Prisma.CartWhereUniqueInput): Promise<CartWithDetails | null> {
+    const cart = await this.getCartWithDetails(where);
+    if (cart) {
+      await this.snapshots.put(cart.userId, cart);
+    }
+    return cart;
+  }
+
+  private async getCartWithDetails(where: Prisma.CartWhereUniqueInput): Promise<CartWithDetails | null> {
+    // The cart row, and so its version, is read before its items: a
+    // snapshot may be ahead of its version but never behind it
+    const cart = await this.prisma.cart.findUnique({
+      where,
       include: {
         items: {
           include: {
@@ -1102,50 +1238,17 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
     if (!cart) return null;
 
     // Enrich cart items with calculated data
-    const enrichedItems: CartItemWithDetails[] = [];
-    const cartItems = (cart as any).items || [];
-    for (const item of cartItems) {
-      const currentPrice = Number(item.variant?.price ?? item.product.price);
-      const availableStock = item.variant?.quantity ?? item.product.quantity ?? 0;
-      
-      let stockStatus: CartItemWithDetails['stockStatus'] = 'in_stock';
-      if (item.product.status !== ProductStatus.PUBLISHED) {
-        stockStatus = 'discontinued';
-      } else if (availableStock === 0) {
-        stockStatus = 'out_of_stock';
-      } else if (availableStock < 10) {
-        stockStatus = 'low_stock';
-      }
-
-      enrichedItems.push({
-        ...item,
-        product: {
-          ...item.product,
-          inStock: availableStock > 0,
-          stockQuantity: availableStock,
-          price: Number(item.product.price),
-          seller: {
-            storeName: item.product.seller?.businessName || '',
-            isVerified: true
-          }
-        },
-        variant: item.variant ? {
-          ...item.variant,
-          price: Number(item.variant.price),
-        } : undefined,
-        calculatedPrice: currentPrice,
-        lineTotal: currentPrice * item.quantity,
-        availableQuantity: availableStock,
-        stockStatus
-      });
-    }
+    const enrichedItems = cart.items.map(item => this.toCartLine(item));
 
     // Calculate cart totals
-    const calculation = await this.calculateCartTotals(enrichedItems);
+    const calculation = this.calculateCartTotals(
+      enrichedItems.reduce((subtotal, item) => subtotal + item.lineTotal, 0)
+    );
 
     // Check for cart abandonment
-    const abandonment = await this.cartAbandonmentRepo.findOne({
-      where: { cartId }
+    const abandonment = await this.prisma.cartAbandonment.findFirst({
+      where: { userId: cart.userId },
+      orderBy: { abandonedAt: 'desc' }
     });
 
     return {
@@ -1154,31 +1257,93 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
       calculation,
       abandonment: abandonment ? {
         abandonedAt: abandonment.abandonedAt,
-        remindersSent: abandonment.remindersSent,
-        recovered: abandonment.recovered
+        remindersSent: abandonment.reminderSent ? 1 : 0,
+        recovered: abandonment.recoveredAt !== null
       } : undefined
     };
   }
 
+  private toCartLine(item: CartLineSource): CartItemWithDetails {
+    const currentPrice = Number(item.variant?.price ?? item.product.price);
+    const availableStock = item.variant?.quantity ?? item.product.quantity ?? 0;
+
+    let stockStatus: CartItemWithDetails['stockStatus'] = 'in_stock';
+    if (item.product.status !== ProductStatus.PUBLISHED) {
+      stockStatus = 'discontinued';
+    } else if (availableStock === 0) {
+      stockStatus = 'out_of_stock';
+    } else if (availableStock < 10) {
+      stockStatus = 'low_stock';
+    }
 
-  private async calculateCartTotals(items: CartItemWithDetails[]): Promise<CartCalculation> {
-    let subtotal = 0;
-    let taxAmount = 0;
-    let discountAmount = 0;
-    const shippingAmount = 0; // Would be calculated based on shipping rules
+    return {
+      ...item,
+      product: {
+        ...item.product,
+        isActive: item.product.status === ProductStatus.PUBLISHED,
+        inStock: availableStock > 0,
+        stockQuantity: availableStock,
+        price: Number(item.product.price),
+        seller: {
+          storeName: item.product.seller?.businessName || '',
+          isVerified: true
+        }
+      },
+      variant: item.variant ? {
+        ...item.variant,
+        price: Number(item.variant.price),
+        stockQuantity: item.variant.quantity,
+        isActive: true
+      } : undefined,
+      calculatedPrice: currentPrice,
+      lineTotal: roundMoney(currentPrice * item.quantity),
+      availableQuantity: availableStock,
+      stockStatus
+    } as CartItemWithDetails;
+  }
 
-    // Calculate subtotal
-    for (const item of items) {
-      subtotal += item.lineTotal;
+  /**
+   * Promotions change independently of the cart version, so snapshots hold
+   * undiscounted totals and live promotions are applied as the cart is
+   * returned. Without the engine the cart is priced undiscounted.
+   */
+  private async withPromotions(cart: CartWithDetails): Promise<CartWithDetails> {
+    if (cart.items.length === 0) {
+      return cart;
+    }
+
+    try {
+      const evaluation = await this.app.promotionEngine.evaluate({
+        lines: cart.items.map(item => ({
+          productId: item.productId,
+          sellerId: item.product.sellerId,
+          quantity: item.quantity,
+          price: item.calculatedPrice
+        })),
+        subtotal: cart.calculation.subtotal
+      }, { userId: cart.userId });
+
+      if (evaluation.discountTotal === 0) {
+        return cart;
+      }
+      return { ...cart, calculation: this.calculateCartTotals(cart.calculation.subtotal, evaluation.discountTotal) };
+    } catch (error) {
+      this.logger.warn({ error, cartId: cart.id }, 'Failed to apply promotions to cart');
+      return cart;
     }
+  }
 
-    // Calculate tax (simplified - would use actual tax rules)
-    taxAmount = subtotal * 0.08; // 8% tax rate
+  // Totals follow from the subtotal alone, so a line change updates them in O(1)
+  private calculateCartTotals(subtotal: number, discount: number = 0): CartCalculation {
+    const amount = roundMoney(subtotal);
+    const discountAmount = roundMoney(Math.min(discount, amount));
+    const taxAmount = roundMoney((amount - discountAmount) * TAX_RATE);
+    const shippingAmount = 0; // Would be calculated based on shipping rules
 
-    const total = subtotal + taxAmount + shippingAmount - discountAmount;
+    const total = roundMoney(amount + taxAmount + shippingAmount - discountAmount);
 
     return {
-      subtotal,
+      subtotal: amount,
       taxAmount,
       discountAmount,
       shippingAmount,
@@ -1187,7 +1352,7 @@ export class CartService extends CrudService<Cart, Prisma.CartCreateInput, Prism
       appliedCoupons: [], // Would calculate from applied coupons
       taxBreakdown: [{
         taxName: 'Sales Tax',
-        rate: 8,
+        rate: TAX_RATE * 100,
         amount: taxAmount
       }]
     };
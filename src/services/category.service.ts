@@ -1,14 +1,13 @@
 import { Category, Prisma } from '@prisma/client';
 import { FastifyInstance } from 'fastify';
 import { CrudService } from './crud.service';
-import { 
-  CategoryRepository,
-  ProductRepository
-} from "../repositories";
+import { CategoryRepository } from "../repositories/category.repository";
+import { ProductRepository } from "../repositories/product.repository";
 import { ServiceResult, PaginatedResult } from '../types';
 import { cache } from '../utils/cache';
+import { getCategoryHierarchy, invalidateCategoryHierarchy } from '../utils/category-hierarchy';
 import { ApiError } from '../utils/errors';
-import { updateSearchIndex } from '../utils/search';
+import { recordSearchChange } from '../utils/search';
 import { deleteFromS3 } from '../utils/storage';
 
 interface CreateCategoryData {
@@ -34,6 +33,9 @@ interface CreateCategoryData {
 }
 
 
+// parentId: null moves the category to the root
+type UpdateCategoryData = Partial<Omit<CreateCategoryData, 'parentId'>> & { parentId?: string | null };
+
 interface CategorySearchParams {
   query?: string;
   parentId?: string;
@@ -128,23 +130,17 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
           }
         });
 
+        await this.categoryRepo.insertClosure(category.id, category.parentId, tx);
+        await recordSearchChange(tx, 'categories', category.id);
+
         return category;
       });
 
-      // Update search index
-      await updateSearchIndex('categories', {
-        id: category.id,
-        name: category.name,
-        slug: category.slug,
-        description: category.description,
-        parentId: category.parentId,
-        isActive: category.isActive,
-        level: await this.getCategoryLevel(category.id),
-        createdAt: category.createdAt.getTime()
-      });
+      await this.app.searchIndex.notify();
 
       // Invalidate category cache
-      await cache.invalidatePattern('categories:*');
+      await cache.invalidateTags(['categories']);
+      await invalidateCategoryHierarchy(this.app.redis);
 
       this.logger.info({ 
         categoryId: category.id, 
@@ -165,7 +161,7 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
     }
   }
 
-  async update(categoryId: string, data: Partial<CreateCategoryData>): Promise<ServiceResult<Category>> {
+  async update(categoryId: string, data: UpdateCategoryData): Promise<ServiceResult<Category>> {
     try {
       const existingCategory = await this.categoryRepo.findById(categoryId);
       if (!existingCategory) {
@@ -189,7 +185,8 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
         }
       }
 
-      // Validate parent category if changing
+      // Validate parent category if changing. The cached row may predate a
+      // recent move, so the closure decision is made again inside the transaction
       if (data.parentId && data.parentId !== existingCategory.parentId) {
         if (data.parentId === categoryId) {
           return {
@@ -217,6 +214,12 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
       }
 
       const category = await this.prisma.$transaction(async (tx) => {
+        const current = await tx.category.findUnique({
+          where: { id: categoryId },
+          select: { parentId: true }
+        });
+        const parentChanged = data.parentId !== undefined && data.parentId !== current?.parentId;
+
         // Update category
         const updatedSlug = data.slug || (data.name ? this.generateSlug(data.name) : undefined);
         
@@ -233,22 +236,21 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
           }
         });
 
+        if (parentChanged) {
+          await this.categoryRepo.moveClosure(categoryId, data.parentId ?? null, tx);
+        }
+
+        await recordSearchChange(tx, 'categories', category.id);
+
         return category;
       });
 
-      // Update search index
-      await updateSearchIndex('categories', {
-        id: category.id,
-        name: category.name,
-        slug: category.slug,
-        description: category.description,
-        parentId: category.parentId,
-        isActive: category.isActive,
-        level: await this.getCategoryLevel(category.id)
-      });
+      await this.app.searchIndex.notify();
 
       // Invalidate category cache
-      await cache.invalidatePattern('categories:*');
+      await this.categoryRepo.invalidate(categoryId);
+      await cache.invalidateTags(['categories']);
+      await invalidateCategoryHierarchy(this.app.redis);
 
       this.logger.info({ categoryId: category.id }, 'Category updated');
 
@@ -304,10 +306,10 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
         await tx.category.delete({
           where: { id: categoryId }
         });
+        await recordSearchChange(tx, 'categories', categoryId, 'DELETE');
       });
 
-      // Delete from search index
-      await updateSearchIndex('categories', null);
+      await this.app.searchIndex.notify();
 
       // Delete images if they exist
       if (category.imageUrl) {
@@ -315,7 +317,9 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
       }
 
       // Invalidate category cache
-      await cache.invalidatePattern('categories:*');
+      await this.categoryRepo.invalidate(categoryId);
+      await cache.invalidateTags(['categories']);
+      await invalidateCategoryHierarchy(this.app.redis);
 
       this.logger.info({ categoryId }, 'Category deleted');
 
@@ -383,7 +387,7 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
       }
 
       // Cache for 30 minutes
-      await cache.set(cacheKey, category, { ttl: 1800 });
+      await cache.set(cacheKey, category, { ttl: 1800, tags: ['categories'] });
 
       return {
         success: true,
@@ -449,7 +453,7 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
       }
 
       // Cache for 30 minutes
-      await cache.set(cacheKey, category, { ttl: 1800 });
+      await cache.set(cacheKey, category, { ttl: 1800, tags: ['categories'] });
 
       return {
         success: true,
@@ -560,7 +564,7 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
       };
 
       // Cache for 10 minutes
-      await cache.set(cacheKey, result, { ttl: 600 });
+      await cache.set(cacheKey, result, { ttl: 600, tags: ['categories'] });
 
       return { success: true, data: result };
     } catch (error) {
@@ -575,25 +579,21 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
   async getCategoryTree(language?: string): Promise<ServiceResult<CategoryTreeNode[]>> {
     try {
       const cacheKey = `categories:tree:${language || 'default'}`;
-      const cached = await cache.get<CategoryTreeNode[]>(cacheKey);
-      if (cached) {
-        return { success: true, data: cached };
-      }
 
-      const categories = await this.categoryRepo.findMany({
-        where: { isActive: true },
-        include: {
-          _count: {
-            select: { products: true }
-          }
-        },
-        orderBy: { sortOrder: 'asc' }
-      });
-
-      const tree = this.buildCategoryTree(categories);
+      // Cache for 1 hour; serve the old tree for up to 5 minutes while one node rebuilds it
+      const tree = await cache.cached(cacheKey, async () => {
+        const categories = await this.categoryRepo.findMany({
+          where: { isActive: true },
+          include: {
+            _count: {
+              select: { products: true }
+            }
+          },
+          orderBy: { sortOrder: 'asc' }
+        });
 
-      // Cache for 1 hour
-      await cache.set(cacheKey, tree, { ttl: 3600 });
+        return this.buildCategoryTree(categories);
+      }, { ttl: 3600, staleTTL: 300, earlyRefresh: 1, lock: true, tags: ['categories'] });
 
       return { success: true, data: tree };
     } catch (error) {
@@ -607,33 +607,16 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
 
   async getCategoryPath(categoryId: string): Promise<ServiceResult<CategoryPathNode[]>> {
     try {
-      const cacheKey = `categories:path:${categoryId}`;
-      const cached = await cache.get<CategoryPathNode[]>(cacheKey);
-      if (cached) {
-        return { success: true, data: cached };
-      }
-
-      const path: CategoryPathNode[] = [];
-      let currentId: string | null = categoryId;
-      let level = 0;
-
-      while (currentId) {
-        const category = await this.categoryRepo.findById(currentId);
-        if (!category) break;
+      const hierarchy = await getCategoryHierarchy(this.prisma, this.app.redis);
+      const ancestors = hierarchy.path(categoryId);
 
-        path.unshift({
-          id: category.id,
-          name: category.name,
-          slug: category.slug,
-          level
-        });
-
-        currentId = category.parentId;
-        level++;
-      }
-
-      // Cache for 1 hour
-      await cache.set(cacheKey, path, { ttl: 3600 });
+      // Root first; level counts up from the category itself
+      const path: CategoryPathNode[] = ancestors.map((category, i) => ({
+        id: category.id,
+        name: category.name,
+        slug: category.slug,
+        level: ancestors.length - 1 - i
+      }));
 
       return { success: true, data: path };
     } catch (error) {
@@ -655,36 +638,9 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
       .trim();
   }
 
-  private async getCategoryLevel(categoryId: string): Promise<number> {
-    let level = 0;
-    let currentId: string | null = categoryId;
-
-    while (currentId) {
-      const category = await this.categoryRepo.findById(currentId);
-      if (!category || !category.parentId) break;
-      
-      currentId = category.parentId;
-      level++;
-    }
-
-    return level;
-  }
-
+  // The new parent must not be inside the category's own subtree
   private async checkCircularReference(categoryId: string, parentId: string): Promise<boolean> {
-    let currentId: string | null = parentId;
-
-    while (currentId) {
-      if (currentId === categoryId) {
-        return true;
-      }
-
-      const category = await this.categoryRepo.findById(currentId);
-      if (!category) break;
-
-      currentId = category.parentId;
-    }
-
-    return false;
+    return this.categoryRepo.isAncestor(categoryId, parentId);
   }
 
   private buildCategoryTree(categories: any[], parentId: string | null = null, level: number = 0): CategoryTreeNode[] {
@@ -736,93 +692,73 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
         };
       }
 
-      // Get all descendant category IDs
-      const descendantIds = await this.getAllDescendantIds(categoryId);
+      // Hierarchy from the in-memory snapshot, product stats from one grouped query
+      const hierarchy = await getCategoryHierarchy(this.prisma, this.app.redis);
+      const descendantIds = hierarchy.descendantIds(categoryId);
       const allCategoryIds = [categoryId, ...descendantIds];
 
-      // Get product statistics
-      const products = await this.productRepo.findMany({
-        where: {
-          categoryId: { in: allCategoryIds }
-        },
-        include: {
-          _count: {
-            select: {
-              orderItems: true,
-              views: true
-            }
-          }
-        }
-      });
-
-      const directProducts = products.filter(p => p.categoryId === categoryId);
-      const activeProducts = products.filter(p => p.status === 'PUBLISHED');
-      const outOfStockProducts = products.filter(p => p.quantity === 0);
-
-      // Price analytics
-      const prices = products.map(p => parseFloat(p.price.toString()));
-      const averagePrice = prices.length > 0 ? prices.reduce((a, b) => a + b, 0) / prices.length : 0;
-      const minPrice = prices.length > 0 ? Math.min(...prices) : 0;
-      const maxPrice = prices.length > 0 ? Math.max(...prices) : 0;
-
-      // Recently added products (last 30 days)
       const thirtyDaysAgo = new Date();
       thirtyDaysAgo.setDate(thirtyDaysAgo.getDate() - 30);
-      const recentProducts = products.filter(p => p.createdAt >= thirtyDaysAgo);
 
-      // Top products by order count
-      const topProducts = products
-        .sort((a, b) => (b as any)._count.orderItems - (a as any)._count.orderItems)
-        .slice(0, 10)
-        .map(p => ({
-          id: p.id,
-          name: p.name,
-          price: parseFloat(p.price.toString()),
-          viewCount: (p as any)._count.views,
-          orderCount: (p as any)._count.orderItems
-        }));
+      const [stats, top] = await Promise.all([
+        this.productRepo.aggregateByCategory(allCategoryIds, thirtyDaysAgo),
+        this.productRepo.findTopByOrders(allCategoryIds, 10)
+      ]);
+      const statsByCategory = new Map(stats.map(row => [row.categoryId, row]));
+
+      const totals = stats.reduce((acc, row) => ({
+        productCount: acc.productCount + row.productCount,
+        activeCount: acc.activeCount + row.activeCount,
+        outOfStockCount: acc.outOfStockCount + row.outOfStockCount,
+        recentCount: acc.recentCount + row.recentCount,
+        priceSum: acc.priceSum + row.priceSum,
+        minPrice: row.minPrice === null ? acc.minPrice : Math.min(acc.minPrice, row.minPrice),
+        maxPrice: row.maxPrice === null ? acc.maxPrice : Math.max(acc.maxPrice, row.maxPrice)
+      }), { productCount: 0, activeCount: 0, outOfStockCount: 0, recentCount: 0, priceSum: 0, minPrice: Infinity, maxPrice: -Infinity });
+
+      const averagePrice = totals.productCount > 0 ? totals.priceSum / totals.productCount : 0;
+
+      const topProducts = top.map(p => ({
+        id: p.id,
+        name: p.name,
+        price: parseFloat(p.price.toString()),
+        viewCount: p.viewCount,
+        orderCount: p._count.orderItems
+      }));
 
-      // Subcategory breakdown
-      const directSubcategories = await this.categoryRepo.findMany({
-        where: { parentId: categoryId },
-        include: {
-          _count: {
-            select: { products: true }
-          }
+      // Subcategory breakdown: roll each direct child's subtree up in memory
+      const directSubcategoryIds = hierarchy.childIds(categoryId);
+      const subcategoryBreakdown = directSubcategoryIds.map(subcatId => {
+        const subtree = [subcatId, ...hierarchy.descendantIds(subcatId)];
+        let productCount = 0;
+        let activeProductCount = 0;
+        for (const id of subtree) {
+          const row = statsByCategory.get(id);
+          productCount += row?.productCount ?? 0;
+          activeProductCount += row?.activeCount ?? 0;
         }
-      });
-
-      const subcategoryBreakdown = await Promise.all(
-        directSubcategories.map(async (subcat) => {
-          const subcatDescendants = await this.getAllDescendantIds(subcat.id);
-          const subcatAllIds = [subcat.id, ...subcatDescendants];
-          
-          const subcatProducts = await this.productRepo.findMany({
-            where: { categoryId: { in: subcatAllIds } }
-          });
 
-          return {
-            id: subcat.id,
-            name: subcat.name,
-            productCount: subcatProducts.length,
-            activeProductCount: subcatProducts.filter(p => p.status === 'PUBLISHED').length
-          };
-        })
-      );
+        return {
+          id: subcatId,
+          name: hierarchy.get(subcatId)!.name,
+          productCount,
+          activeProductCount
+        };
+      });
 
       return {
         success: true,
         data: {
           category,
-          productCount: products.length,
-          directProductCount: directProducts.length,
-          subcategoryCount: directSubcategories.length,
+          productCount: totals.productCount,
+          directProductCount: statsByCategory.get(categoryId)?.productCount ?? 0,
+          subcategoryCount: directSubcategoryIds.length,
           totalSubcategoryCount: descendantIds.length,
           averageProductPrice: Math.round(averagePrice * 100) / 100,
-          priceRange: { min: minPrice, max: maxPrice },
-          activeProductCount: activeProducts.length,
-          outOfStockCount: outOfStockProducts.length,
-          recentlyAddedProducts: recentProducts.length,
+          priceRange: totals.productCount > 0 ? { min: totals.minPrice, max: totals.maxPrice } : { min: 0, max: 0 },
+          activeProductCount: totals.activeCount,
+          outOfStockCount: totals.outOfStockCount,
+          recentlyAddedProducts: totals.recentCount,
           topProducts,
           subcategoryBreakdown
         }
@@ -869,23 +805,24 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
       const totalProducts = allCategories.reduce((sum, c) => sum + (c as any)._count.products, 0);
       const averageProductsPerCategory = allCategories.length > 0 ? totalProducts / allCategories.length : 0;
 
+      // Levels come from the in-memory hierarchy, not one query per category
+      const hierarchy = await getCategoryHierarchy(this.prisma, this.app.redis);
+
       // Most popular categories by product count
-      const mostPopularCategories = await Promise.all(
-        allCategories
-          .sort((a, b) => (b as any)._count.products - (a as any)._count.products)
-          .slice(0, 10)
-          .map(async (cat) => ({
-            id: cat.id,
-            name: cat.name,
-            productCount: (cat as any)._count.products,
-            level: await this.getCategoryLevel(cat.id)
-          }))
-      );
+      const mostPopularCategories = allCategories
+        .sort((a, b) => (b as any)._count.products - (a as any)._count.products)
+        .slice(0, 10)
+        .map(cat => ({
+          id: cat.id,
+          name: cat.name,
+          productCount: (cat as any)._count.products,
+          level: hierarchy.depth(cat.id)
+        }));
 
       // Category depth distribution
       const depthDistribution: Record<number, number> = {};
       for (const category of allCategories) {
-        const level = await this.getCategoryLevel(category.id);
+        const level = hierarchy.depth(category.id);
         depthDistribution[level] = (depthDistribution[level] || 0) + 1;
       }
 
@@ -1099,21 +1036,7 @@ export class CategoryService extends CrudService<Category, Prisma.CategoryCreate
   }
 
   private async getAllDescendantIds(categoryId: string): Promise<string[]> {
-    const descendants: string[] = [];
-    const queue = [categoryId];
-
-    while (queue.length > 0) {
-      const currentId = queue.shift()!;
-      const children = await this.categoryRepo.findMany({
-        where: { parentId: currentId }
-      });
-
-      for (const child of children) {
-        descendants.push(child.id);
-        queue.push(child.id);
-      }
-    }
-
-    return descendants;
+    const hierarchy = await getCategoryHierarchy(this.prisma, this.app.redis);
+    return hierarchy.descendantIds(categoryId);
   }
 }
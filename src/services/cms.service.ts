@@ -2,6 +2,7 @@ import { FastifyInstance } from 'fastify';
 import { Prisma, Page } from '@prisma/client';
 import { ServiceResult, CreatePageData, UpdatePageData, PageWithDetails, CreateBlogPostData, UpdateBlogPostData } from '../types';
 import { logger } from '../utils/logger';
+import { scanDelete } from '../utils/cache';
 import { CrudService } from './crud.service';
 import { ApiError } from '../utils/errors';
 
@@ -867,22 +868,14 @@ export class CMSService extends CrudService<Page, Prisma.PageCreateInput, Prisma
 
   private async clearPageCache(): Promise<void> {
     try {
-      const pattern = 'pages:*';
-      const keys = await this.redis.keys(pattern);
-      if (keys.length > 0) {
-        await this.redis.del(...keys);
-      }
+      await scanDelete(this.redis, 'pages:*');
     } catch (error) { logger.error({ error }, 'Error clearing page cache');
     }
   }
 
   private async clearBlogCache(): Promise<void> {
     try {
-      const pattern = 'blog:*';
-      const keys = await this.redis.keys(pattern);
-      if (keys.length > 0) {
-        await this.redis.del(...keys);
-      }
+      await scanDelete(this.redis, 'blog:*');
     } catch (error) { logger.error({ error }, 'Error clearing blog cache');
     }
   }
@@ -1,10 +1,12 @@
 import { FastifyInstance } from 'fastify';
-import { Prisma, Coupon, CouponStatus } from '@prisma/client';
+import { Prisma, Coupon } from '@prisma/client';
 import { ServiceResult, CreateCouponData, UpdateCouponData, CouponWithDetails, ValidateCouponData, ApplyCouponData, CreateFlashSaleData, FlashSaleWithDetails, CouponAnalyticsData } from '../types';
 import { logger } from '../utils/logger';
 import { CrudService } from './crud.service';
 import { ApiError } from '../utils/errors';
 import { Redis } from 'ioredis';
+import { analyticsIngest } from '../utils/analytics-ingest';
+import { CompiledCoupon, CouponRejection } from '../utils/promotion-rules';
 
 export class CouponService extends CrudService<Coupon> {
   modelName = 'coupon' as const;
@@ -15,6 +17,10 @@ export class CouponService extends CrudService<Coupon> {
     this.redis = fastify.redis;
   }
 
+  protected async afterWrite(): Promise<void> {
+    await this.app.promotionEngine.invalidate();
+  }
+
   // Coupon Management
 
   async createCoupon(data: CreateCouponData): Promise<ServiceResult<CouponWithDetails>> {
@@ -55,6 +61,7 @@ export class CouponService extends CrudService<Coupon> {
       // Clear cache
       await this.redis.del('coupons:active');
       await this.redis.del(`coupon:${coupon.code}`);
+      await this.app.promotionEngine.invalidate();
 
       // Track analytics
       await this.prisma.analyticsEvent.create({
@@ -145,6 +152,7 @@ export class CouponService extends CrudService<Coupon> {
       if (data.code) {
         await this.redis.del(`coupon:${data.code.toUpperCase()}`);
       }
+      await this.app.promotionEngine.invalidate();
 
       logger.info({
         couponId: coupon.id,
@@ -207,6 +215,7 @@ export class CouponService extends CrudService<Coupon> {
       // Clear cache
       await this.redis.del('coupons:active');
       await this.redis.del(`coupon:${coupon.code}`);
+      await this.app.promotionEngine.invalidate();
 
       logger.info({
         couponId,
@@ -323,68 +332,12 @@ export class CouponService extends CrudService<Coupon> {
 
   async validateCoupon(data: ValidateCouponData): Promise<ServiceResult<any>> {
     try {
-      const couponResult = await this.getCouponByCode(data.code);
-      if (!couponResult.success) {
-        return couponResult;
-      }
-
-      const coupon = couponResult.data!;
-
-      // Check if coupon is active
-      if (coupon.status !== CouponStatus.ACTIVE) {
-        throw new ApiError('Coupon is not active', 400);
-      }
-
-      // Check date validity
-      const now = new Date();
-      if (coupon.validFrom && now < coupon.validFrom) {
-        throw new ApiError('Coupon is not yet valid', 400);
-      }
-
-      if (coupon.validTo && now > coupon.validTo) {
-        throw new ApiError('Coupon has expired', 400);
-      }
-
-      // Check usage limits
-      if (coupon.usageLimit && coupon.usageCount >= coupon.usageLimit) {
-        throw new ApiError('Coupon usage limit reached', 400);
-      }
-
-      // Check user-specific usage limit
-      if (data.userId && coupon.userLimit) {
-        const userUsageCount = await this.prisma.couponUse.count({
-          where: {
-            couponId: coupon.id,
-            userId: data.userId
-          }
-        });
-
-        if (userUsageCount >= coupon.userLimit) {
-          throw new ApiError('User has reached the usage limit for this coupon', 400);
-        }
-      }
-
-      // Check minimum order amount
-      if (coupon.minimumPurchase && data.orderAmount < Number(coupon.minimumPurchase)) {
-        throw new ApiError(`Minimum order amount of ${coupon.minimumPurchase} required`, 400);
+      const checked = await this.checkCoupon(data);
+      if ('error' in checked) {
+        return { success: false, error: checked.error };
       }
 
-      // Check currency compatibility
-      if ((coupon as any).currency && data.currency && (coupon as any).currency !== data.currency) {
-        throw new ApiError('Coupon currency does not match order currency', 400);
-      }
-
-      // Check product/category applicability
-      if (data.productIds && (coupon.productIds.length > 0 || coupon.categoryIds.length > 0)) {
-        const isApplicable = await this.checkCouponApplicability(coupon, data.productIds);
-        if (!isApplicable) {
-          throw new ApiError('Coupon is not applicable to the items in your cart', 400);
-        }
-      }
-
-      // Calculate discount
-      const discountCalculation = await this.calculateDiscount(coupon, data);
-
+      const { coupon, discount } = checked;
       return {
         success: true,
         data: {
@@ -396,14 +349,11 @@ export class CouponService extends CrudService<Coupon> {
             discountType: coupon.type,
             discountValue: coupon.value
           },
-          discount: discountCalculation
+          discount
         }
       };
     } catch (error) {
       logger.error({ error, data }, 'Error validating coupon');
-      if (error instanceof ApiError) {
-        return { success: false, error: { code: error.code, message: error.message, statusCode: error.statusCode } };
-      }
       return {
         success: false,
         error: {
@@ -417,63 +367,43 @@ export class CouponService extends CrudService<Coupon> {
 
   async applyCoupon(data: ApplyCouponData): Promise<ServiceResult<any>> {
     try {
-      // First validate the coupon
-      const validationResult = await this.validateCoupon({
-        code: data.code,
-        userId: data.userId,
-        orderAmount: data.orderAmount,
-        currency: data.currency,
-        productIds: data.productIds
-      });
-
-      if (!validationResult.success) {
-        return validationResult;
+      const checked = await this.checkCoupon(data);
+      if ('error' in checked) {
+        return { success: false, error: checked.error };
       }
 
-      const { coupon, discount } = validationResult.data!;
+      const { coupon, discount } = checked;
 
-      // Create coupon usage record
-      const usage = await this.prisma.couponUse.create({
-        data: {
-          couponId: coupon.id,
-          userId: data.userId,
-          orderId: data.orderId,
-          discount: discount.amount
-        }
-      });
+      // Counted against the limits in Redis; the use reaches coupon_uses in the next sync
+      const rejection = await this.app.promotionEngine.redeemCoupon(coupon, data.userId, data.orderId, discount.amount);
+      if (rejection) {
+        return { success: false, error: rejection };
+      }
 
-      // Update coupon usage count
-      await this.prisma.coupon.update({
-        where: { id: coupon.id },
-        data: {
-          usageCount: {
-            increment: 1
-          }
-        }
-      });
+      const usage = {
+        couponId: coupon.id,
+        userId: data.userId,
+        orderId: data.orderId,
+        discount: discount.amount
+      };
 
       // Track analytics
-      await this.prisma.analyticsEvent.create({
+      await analyticsIngest.track({
+        type: 'coupon_used',
+        userId: data.userId,
         data: {
-          type: 'coupon_used',
-          userId: data.userId,
-          data: {
-            eventCategory: 'promotion',
-            eventAction: 'apply',
-            eventLabel: coupon.code,
-            orderId: data.orderId,
-            value: discount.amount,
-            currency: data.currency,
-            couponId: coupon.id,
-            discountAmount: discount.amount,
-            originalAmount: data.orderAmount
-          }
+          eventCategory: 'promotion',
+          eventAction: 'apply',
+          eventLabel: coupon.code,
+          orderId: data.orderId,
+          value: discount.amount,
+          currency: data.currency,
+          couponId: coupon.id,
+          discountAmount: discount.amount,
+          originalAmount: data.orderAmount
         }
       });
 
-      // Clear cache
-      await this.redis.del(`coupon:${coupon.code}`);
-
       logger.info({
         couponId: coupon.id,
         code: coupon.code,
@@ -487,14 +417,17 @@ export class CouponService extends CrudService<Coupon> {
         data: {
           usage,
           discount,
-          appliedCoupon: coupon
+          appliedCoupon: {
+            id: coupon.id,
+            code: coupon.code,
+            description: coupon.description,
+            discountType: coupon.type,
+            discountValue: coupon.value
+          }
         }
       };
     } catch (error) {
       logger.error({ error, data }, 'Error applying coupon');
-      if (error instanceof ApiError) {
-        return { success: false, error: { code: error.code, message: error.message, statusCode: error.statusCode } };
-      }
       return {
         success: false,
         error: {
@@ -775,58 +708,40 @@ export class CouponService extends CrudService<Coupon> {
     }
   }
 
-  private async checkCouponApplicability(coupon: Coupon, productIds: string[]): Promise<boolean> {
-    // If no restrictions, applicable to all products
-    if (coupon.productIds.length === 0 && coupon.categoryIds.length === 0) {
-      return true;
-    }
-
-    // Check direct product applicability
-    if (coupon.productIds.some((id: string) => productIds.includes(id))) {
-      return true;
-    }
-
-    // Check category applicability
-    if (coupon.categoryIds.length > 0) {
-      const products = await this.prisma.product.findMany({
-        where: { id: { in: productIds } },
-        select: { categoryId: true }
-      });
-
-      const productCategoryIds = products.map((p: any) => p.categoryId).filter(Boolean);
-
-      if (coupon.categoryIds.some((id: string) => productCategoryIds.includes(id))) {
-        return true;
-      }
-    }
-
-    return false;
-  }
-
-  private async calculateDiscount(coupon: Coupon, data: ValidateCouponData): Promise<any> {
-    let discountAmount = 0;
-
-    if (coupon.type === 'PERCENTAGE') {
-      discountAmount = (data.orderAmount * coupon.value.toNumber()) / 100;
-    } else if (coupon.type === 'FIXED_AMOUNT') {
-      discountAmount = coupon.value.toNumber();
-    }
-
-    // Apply maximum discount limit
-    if ((coupon as any).maxDiscountAmount && discountAmount > (coupon as any).maxDiscountAmount.toNumber()) {
-      discountAmount = (coupon as any).maxDiscountAmount.toNumber();
-    }
-
-    // Ensure discount doesn't exceed order amount
-    if (discountAmount > data.orderAmount) {
-      discountAmount = data.orderAmount;
+  /**
+   * Check a coupon against the compiled rules and its usage counters; no
+   * database queries
+   */
+  private async checkCoupon(data: ValidateCouponData): Promise<
+    | { coupon: CompiledCoupon; discount: { amount: number; percentage: number; finalAmount: number } }
+    | { error: CouponRejection }
+  > {
+    const engine = this.app.promotionEngine;
+    const rules = await engine.getRules();
+    const coupon = rules.getCoupon(data.code);
+    const usage = coupon ? await engine.getCouponUsage(coupon, data.userId) : undefined;
+
+    // Only the coupon is checked; lines carry no prices, the order amount is the subtotal
+    const evaluation = rules.evaluate(
+      {
+        lines: (data.productIds ?? []).map(productId => ({ productId, quantity: 1, price: 0 })),
+        subtotal: data.orderAmount
+      },
+      data.code,
+      usage
+    );
+    if (!coupon || !evaluation.coupon) {
+      return { error: evaluation.couponError! };
     }
 
+    const amount = evaluation.coupon.amount;
     return {
-      amount: discountAmount,
-      percentage: coupon.type === 'PERCENTAGE' ? coupon.value.toNumber() :
-        (discountAmount / data.orderAmount) * 100,
-      finalAmount: data.orderAmount - discountAmount
+      coupon,
+      discount: {
+        amount,
+        percentage: coupon.type === 'PERCENTAGE' ? coupon.value : (amount / data.orderAmount) * 100,
+        finalAmount: data.orderAmount - amount
+      }
     };
   }
 }
\ No newline at end of file
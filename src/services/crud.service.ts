@@ -3,6 +3,7 @@ import { PrismaClient, Prisma } from '@prisma/client';
 import { BaseService } from './base.service';
 import { PaginatedResult, ServiceResult } from '../types';
 import { ApiError } from '../utils/errors';
+import { TotalsMode, findPage } from '../utils/pagination';
 
 export interface CrudQuery {
   page?: number;
@@ -10,6 +11,7 @@ export interface CrudQuery {
   search?: string;
   sortBy?: string;
   sortOrder?: 'asc' | 'desc';
+  totals?: TotalsMode;
   [key: string]: any;
 }
 
@@ -26,7 +28,7 @@ export abstract class CrudService<
 
   async findMany(query: CrudQuery = {}): Promise<ServiceResult<PaginatedResult<T>>> {
     try {
-      const { page = 1, limit = 20, search, sortBy = 'createdAt', sortOrder = 'desc', ...filters } = query;
+      const { page = 1, limit = 20, search, sortBy = 'createdAt', sortOrder = 'desc', totals = 'exact', ...filters } = query;
       const skip = (page - 1) * limit;
 
       const where: any = {};
@@ -39,16 +41,13 @@ export abstract class CrudService<
 
       Object.assign(where, this.buildWhereClause(filters));
 
-      const [items, total] = await this.prisma.$transaction([
-        (this.prisma[this.modelName] as any).findMany({
-          where,
-          skip,
-          take: limit,
-          orderBy: { [sortBy]: sortOrder },
-          include: this.getDefaultIncludes()
-        }),
-        (this.prisma[this.modelName] as any).count({ where })
-      ]);
+      const { items, total, hasMore, estimated } = await findPage<T>(this.prisma, String(this.modelName), {
+        where,
+        skip,
+        take: limit,
+        orderBy: { [sortBy]: sortOrder },
+        include: this.getDefaultIncludes()
+      }, totals);
 
       return {
         success: true,
@@ -58,7 +57,9 @@ export abstract class CrudService<
             total,
             page,
             limit,
-            totalPages: Math.ceil(total / limit)
+            totalPages: total === null ? null : Math.ceil(total / limit),
+            hasMore,
+            ...(estimated && { estimated })
           }
         }
       };
@@ -88,6 +89,7 @@ export abstract class CrudService<
         data,
         include: this.getDefaultIncludes()
       });
+      await this.afterWrite();
 
       return { success: true, data: item };
     } catch (error) {
@@ -103,6 +105,7 @@ export abstract class CrudService<
         data,
         include: this.getDefaultIncludes()
       });
+      await this.afterWrite();
 
       return { success: true, data: item };
     } catch (error) {
@@ -116,6 +119,7 @@ export abstract class CrudService<
       await (this.prisma[this.modelName] as any).delete({
         where: { id }
       });
+      await this.afterWrite();
       return { success: true, data: undefined };
     } catch (error) {
       this.handleError(error, 'delete');
@@ -123,6 +127,13 @@ export abstract class CrudService<
     }
   }
 
+  /**
+   * Runs after a successful create, update or delete (override to drop derived state)
+   */
+  protected async afterWrite(): Promise<void> {
+    // Override in child classes if needed
+  }
+
   protected getSearchableFields(): string[] {
     return ['name', 'title', 'description'];
   }
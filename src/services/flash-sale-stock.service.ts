@@ -0,0 +1,658 @@
+import { PrismaClient } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { nanoid } from 'nanoid';
+import { ServiceResult } from '../types';
+import { ApiError } from '../utils/errors';
+import { logger } from '../utils/logger';
+import { tryLock, unlock } from '../utils/cache';
+import { DEFAULT_STOCK_LOCATION } from '../utils/cart-validation';
+
+export interface FlashSaleStockOptions {
+  holdTTL?: number; // Seconds a reservation is held before it returns to stock
+  interval?: number; // Milliseconds between load, sweep and reconcile runs
+  batchSize?: number; // Committed reservations written per transaction
+}
+
+export interface FlashSaleHold {
+  reservationId: string;
+  itemId: string;
+  quantity: number;
+  remaining: number; // Units of the item left for other buyers
+  expiresAt: Date;
+}
+
+export interface FlashSaleStockStats {
+  reserved: number;
+  rejected: number;
+  released: number;
+  committed: number;
+  reconciled: number;
+  backlog: number; // Committed reservations not yet written to Postgres
+}
+
+interface FlashSaleCommit {
+  id: string;
+  itemId: string;
+  productId: string;
+  orderId: string;
+  userId: string;
+  quantity: number;
+}
+
+const ITEMS_KEY = 'flash:items';
+const COMMITS_KEY = 'flash:commits';
+const LOCK_KEY = 'flash:reconcile';
+const LOCK_TTL = 60000;
+
+// Marks flash reservations in inventory_reservations apart from checkout ones
+const RESERVATION_PREFIX = 'flash_';
+
+// Sales are loaded this long before they start, so the first second is served from Redis
+const PRELOAD_LEAD_MS = 5 * 60 * 1000;
+
+// Counters outlive the sale long enough for late commits to be reconciled
+const RETENTION_MS = 24 * 60 * 60 * 1000;
+
+// Expired holds returned to stock by each script call, ahead of its own work
+const SWEEP_BATCH = 100;
+
+// Batches written per reconcile run before yielding to the next tick
+const MAX_BATCHES = 20;
+
+const itemKeys = (itemId: string) => [
+  `flash:item:${itemId}`,
+  `flash:item:${itemId}:users`,
+  `flash:item:${itemId}:holds`,
+  `flash:item:${itemId}:expiry`
+];
+
+// Shared prelude. KEYS: item hash (stock, limit, product, sale, starts,
+// ends, expires), units held per user, holds by reservation id ("user:qty") and
+// hold expiries; ARGV[1] is the current time in ms. Expired holds go back
+// to stock before anything else, so stock is never short for a lapsed hold.
+const SWEEP = `
+local function release(id)
+  local hold = redis.call('hget', KEYS[3], id)
+  redis.call('zrem', KEYS[4], id)
+  if not hold then
+    return nil
+  end
+  local user, qty = string.match(hold, '^(.*):(%d+)$')
+  qty = tonumber(qty)
+  redis.call('hdel', KEYS[3], id)
+  if redis.call('exists', KEYS[1]) == 1 then
+    redis.call('hincrby', KEYS[1], 'stock', qty)
+  end
+  if redis.call('hincrby', KEYS[2], user, -qty) <= 0 then
+    redis.call('hdel', KEYS[2], user)
+  end
+  return user
+end
+for _, id in ipairs(redis.call('zrangebyscore', KEYS[4], '-inf', ARGV[1], 'LIMIT', 0, ${SWEEP_BATCH})) do
+  release(id)
+end
+`;
+
+// KEYS[1] item hash, KEYS[2] loaded item set. Stock is only set on first
+// load; later loads refresh the window and limit but never reset the counter.
+const LOAD_SCRIPT = `
+local exists = redis.call('exists', KEYS[1]) == 1
+if exists then
+  redis.call('hset', KEYS[1], 'limit', ARGV[3], 'sale', ARGV[8], 'starts', ARGV[5], 'ends', ARGV[6], 'expires', ARGV[7])
+else
+  redis.call('hset', KEYS[1], 'stock', ARGV[2], 'limit', ARGV[3], 'product', ARGV[4], 'sale', ARGV[8],
+    'starts', ARGV[5], 'ends', ARGV[6], 'expires', ARGV[7])
+end
+redis.call('pexpireat', KEYS[1], ARGV[7])
+redis.call('sadd', KEYS[2], ARGV[1])
+return exists and 0 or 1`;
+
+const SWEEP_SCRIPT = `${SWEEP}
+return redis.call('exists', KEYS[1])`;
+
+// ARGV: now, reservation id, user id, quantity, hold expiry, sale id.
+// Returns the units left, or -1 not loaded, -2 outside the sale window,
+// -3 over the per-user limit, -4 not enough stock, -5 item of another sale.
+const RESERVE_SCRIPT = `${SWEEP}
+local sale = redis.call('hmget', KEYS[1], 'stock', 'limit', 'starts', 'ends', 'expires', 'sale')
+if not sale[1] then
+  return -1
+end
+if sale[6] and sale[6] ~= ARGV[6] then
+  return -5
+end
+local now = tonumber(ARGV[1])
+if now < tonumber(sale[3]) or now >= tonumber(sale[4]) then
+  return -2
+end
+local qty = tonumber(ARGV[4])
+local limit = tonumber(sale[2])
+if limit > 0 and tonumber(redis.call('hget', KEYS[2], ARGV[3]) or '0') + qty > limit then
+  return -3
+end
+if tonumber(sale[1]) < qty then
+  return -4
+end
+local left = redis.call('hincrby', KEYS[1], 'stock', -qty)
+redis.call('hincrby', KEYS[2], ARGV[3], qty)
+redis.call('hset', KEYS[3], ARGV[2], ARGV[3] .. ':' .. qty)
+redis.call('zadd', KEYS[4], ARGV[5], ARGV[2])
+for i = 2, 4 do
+  redis.call('pexpireat', KEYS[i], sale[5])
+end
+return left`;
+
+// ARGV: now, reservation id, user id, sale id. Returns 1 released, 0
+// unknown or expired, -1 held by someone else, -2 item of another sale.
+const RELEASE_SCRIPT = `${SWEEP}
+local owner = redis.call('hget', KEYS[1], 'sale')
+if owner and owner ~= ARGV[4] then
+  return -2
+end
+local hold = redis.call('hget', KEYS[3], ARGV[2])
+if not hold then
+  return 0
+end
+if string.match(hold, '^(.*):%d+$') ~= ARGV[3] then
+  return -1
+end
+release(ARGV[2])
+return 1`;
+
+// KEYS[5] commit list. ARGV: now, reservation id, user id, order id, item
+// id, sale id. The units stay sold and count towards the user's limit; the
+// reservation is queued for Postgres. Returns the quantity, 0 unknown or
+// expired, -1 held by someone else, -2 item of another sale.
+const COMMIT_SCRIPT = `${SWEEP}
+local owner = redis.call('hget', KEYS[1], 'sale')
+if owner and owner ~= ARGV[6] then
+  return -2
+end
+local hold = redis.call('hget', KEYS[3], ARGV[2])
+if not hold then
+  return 0
+end
+local user, qty = string.match(hold, '^(.*):(%d+)$')
+if user ~= ARGV[3] then
+  return -1
+end
+redis.call('hdel', KEYS[3], ARGV[2])
+redis.call('zrem', KEYS[4], ARGV[2])
+redis.call('rpush', KEYS[5], cjson.encode({
+  id = ARGV[2],
+  itemId = ARGV[5],
+  productId = redis.call('hget', KEYS[1], 'product'),
+  orderId = ARGV[4],
+  userId = user,
+  quantity = tonumber(qty)
+}))
+return tonumber(qty)`;
+
+/**
+ * Flash-sale stock kept in Redis counters instead of Postgres rows.
+ *
+ * Each sale item is loaded once into a Redis hash; reserve, release and
+ * commit are single Lua scripts, so a hot item takes thousands of
+ * reservations a second without row locks and can never go below zero.
+ * Holds expire unless committed and their units go back to stock.
+ * Committed reservations are queued and written to inventory_reservations,
+ * inventory_movements and flash_sale_items.sold in batches by one node at
+ * a time, taking over the units checkout already reserved for the order;
+ * a batch is skipped where already written, so replays are safe.
+ */
+export class FlashSaleStockService {
+  private timer: NodeJS.Timeout | null = null;
+  private running: Promise<void> | null = null;
+  private readonly holdTTL: number;
+  private readonly interval: number;
+  private readonly batchSize: number;
+  private stats = { reserved: 0, rejected: 0, released: 0, committed: 0, reconciled: 0 };
+
+  constructor(
+    private prisma: PrismaClient,
+    private redis: Redis,
+    options: FlashSaleStockOptions = {}
+  ) {
+    this.holdTTL = options.holdTTL ?? 600;
+    this.interval = options.interval ?? 2000;
+    this.batchSize = options.batchSize ?? 500;
+  }
+
+  start(): void {
+    if (this.timer) return;
+
+    this.timer = setInterval(() => {
+      this.tick();
+    }, this.interval);
+    this.timer.unref();
+    this.tick();
+  }
+
+  async stop(): Promise<void> {
+    if (this.timer) {
+      clearInterval(this.timer);
+      this.timer = null;
+    }
+    if (this.running) {
+      await this.running;
+    }
+  }
+
+  /**
+   * Hold units of a sale item for a user until the hold expires or is
+   * committed to an order. Items of another sale are not found.
+   */
+  async reserve(saleId: string, itemId: string, userId: string, quantity: number): Promise<ServiceResult<FlashSaleHold>> {
+    try {
+      const reservationId = `${RESERVATION_PREFIX}${nanoid()}`;
+      const expiresAt = new Date(Date.now() + this.holdTTL * 1000);
+
+      let result = await this.runReserve(saleId, itemId, reservationId, userId, quantity, expiresAt);
+      if (result === -1) {
+        const loaded = await this.loadItem(saleId, itemId);
+        if (loaded) {
+          return loaded;
+        }
+        result = await this.runReserve(saleId, itemId, reservationId, userId, quantity, expiresAt);
+      }
+
+      if (result < 0) {
+        this.stats.rejected++;
+        return { success: false, error: reserveError(result) };
+      }
+
+      this.stats.reserved++;
+      return {
+        success: true,
+        data: { reservationId, itemId, quantity, remaining: result, expiresAt }
+      };
+    } catch (error) {
+      logger.error({ error, saleId, itemId, userId, quantity }, 'Failed to reserve flash sale stock');
+      return {
+        success: false,
+        error: new ApiError('Failed to reserve flash sale stock', 500, 'FLASH_SALE_RESERVE_FAILED')
+      };
+    }
+  }
+
+  /**
+   * Give held units back before the hold expires, e.g. when the item is
+   * removed from the cart
+   */
+  async release(saleId: string, itemId: string, reservationId: string, userId: string): Promise<ServiceResult<boolean>> {
+    try {
+      const result = await this.redis.eval(
+        RELEASE_SCRIPT,
+        4,
+        ...itemKeys(itemId),
+        Date.now(),
+        reservationId,
+        userId,
+        saleId
+      ) as number;
+
+      if (result === -2) {
+        return { success: false, error: new ApiError('Flash sale item not found', 404, 'FLASH_SALE_ITEM_NOT_FOUND') };
+      }
+      if (result === -1) {
+        return { success: false, error: new ApiError('Reservation not found', 404, 'RESERVATION_NOT_FOUND') };
+      }
+      if (result === 1) {
+        this.stats.released++;
+      }
+      return { success: true, data: result === 1 };
+    } catch (error) {
+      logger.error({ error, saleId, itemId, reservationId }, 'Failed to release flash sale reservation');
+      return {
+        success: false,
+        error: new ApiError('Failed to release reservation', 500, 'FLASH_SALE_RELEASE_FAILED')
+      };
+    }
+  }
+
+  /**
+   * Turn a hold into a sale once its order exists. The units are final in
+   * Redis at once; Postgres catches up on the next reconcile run.
+   */
+  async commit(saleId: string, itemId: string, reservationId: string, userId: string, orderId: string): Promise<ServiceResult<number>> {
+    try {
+      const result = await this.redis.eval(
+        COMMIT_SCRIPT,
+        5,
+        ...itemKeys(itemId),
+        COMMITS_KEY,
+        Date.now(),
+        reservationId,
+        userId,
+        orderId,
+        itemId,
+        saleId
+      ) as number;
+
+      if (result === -2) {
+        return { success: false, error: new ApiError('Flash sale item not found', 404, 'FLASH_SALE_ITEM_NOT_FOUND') };
+      }
+      if (result === 0) {
+        return { success: false, error: new ApiError('Reservation expired', 410, 'RESERVATION_EXPIRED') };
+      }
+      if (result === -1) {
+        return { success: false, error: new ApiError('Reservation not found', 404, 'RESERVATION_NOT_FOUND') };
+      }
+
+      this.stats.committed++;
+      return { success: true, data: result };
+    } catch (error) {
+      logger.error({ error, saleId, itemId, reservationId, orderId }, 'Failed to commit flash sale reservation');
+      return {
+        success: false,
+        error: new ApiError('Failed to commit reservation', 500, 'FLASH_SALE_COMMIT_FAILED')
+      };
+    }
+  }
+
+  /**
+   * Load the items of every sale that is running or about to start.
+   * Items already in Redis keep their counters.
+   */
+  async loadActive(): Promise<number> {
+    const now = Date.now();
+    const items = await this.prisma.flashSaleItem.findMany({
+      where: {
+        flashSale: {
+          isActive: true,
+          startsAt: { lte: new Date(now + PRELOAD_LEAD_MS) },
+          endsAt: { gt: new Date(now) }
+        }
+      },
+      include: { flashSale: true }
+    });
+    if (items.length === 0) {
+      return 0;
+    }
+
+    const pipeline = this.redis.pipeline();
+    for (const item of items) {
+      this.queueLoad(pipeline, item);
+    }
+    const results = await pipeline.exec();
+    return (results ?? []).filter(([, loaded]) => loaded === 1).length;
+  }
+
+  /**
+   * Return lapsed holds to stock on every loaded item, so stock shows up
+   * again even when nobody is reserving. Items whose keys expired are
+   * forgotten.
+   */
+  async sweep(): Promise<void> {
+    const itemIds = await this.redis.smembers(ITEMS_KEY);
+    if (itemIds.length === 0) {
+      return;
+    }
+
+    const now = Date.now();
+    const pipeline = this.redis.pipeline();
+    for (const itemId of itemIds) {
+      pipeline.eval(SWEEP_SCRIPT, 4, ...itemKeys(itemId), now);
+    }
+    const results = await pipeline.exec();
+
+    const gone = itemIds.filter((_, i) => results?.[i]?.[1] === 0);
+    if (gone.length > 0) {
+      await this.redis.srem(ITEMS_KEY, ...gone);
+    }
+  }
+
+  /**
+   * Write committed reservations to Postgres. Only one node runs at a time;
+   * returns the number of reservations written.
+   */
+  async reconcile(): Promise<number> {
+    const token = await tryLock(this.redis, LOCK_KEY, LOCK_TTL);
+    if (!token) {
+      return 0;
+    }
+
+    try {
+      let written = 0;
+      for (let batch = 0; batch < MAX_BATCHES; batch++) {
+        const entries = await this.redis.lrange(COMMITS_KEY, 0, this.batchSize - 1);
+        if (entries.length === 0) {
+          break;
+        }
+
+        written += await this.writeBatch(entries.map(entry => JSON.parse(entry) as FlashSaleCommit));
+        await this.redis.ltrim(COMMITS_KEY, entries.length, -1);
+
+        if (entries.length < this.batchSize) {
+          break;
+        }
+      }
+
+      this.stats.reconciled += written;
+      if (written > 0) {
+        logger.debug({ written }, 'Flash sale reservations reconciled');
+      }
+      return written;
+    } finally {
+      await unlock(this.redis, LOCK_KEY, token);
+    }
+  }
+
+  async getStats(): Promise<FlashSaleStockStats> {
+    const backlog = await this.redis.llen(COMMITS_KEY).catch(() => 0);
+    return { ...this.stats, backlog };
+  }
+
+  private tick(): void {
+    if (this.running) return;
+
+    this.running = (async () => {
+      await this.loadActive();
+      await this.sweep();
+      await this.reconcile();
+    })()
+      .catch(error => {
+        logger.error({ error }, 'Flash sale stock run failed');
+      })
+      .finally(() => {
+        this.running = null;
+      });
+  }
+
+  private runReserve(saleId: string, itemId: string, reservationId: string, userId: string, quantity: number, expiresAt: Date): Promise<number> {
+    return this.redis.eval(
+      RESERVE_SCRIPT,
+      4,
+      ...itemKeys(itemId),
+      Date.now(),
+      reservationId,
+      userId,
+      quantity,
+      expiresAt.getTime(),
+      saleId
+    ) as Promise<number>;
+  }
+
+  /**
+   * Load a single item on its first reservation. Returns an error when the
+   * item cannot be sold at all.
+   */
+  private async loadItem(saleId: string, itemId: string): Promise<ServiceResult<FlashSaleHold> | null> {
+    const item = await this.prisma.flashSaleItem.findUnique({
+      where: { id: itemId },
+      include: { flashSale: true }
+    });
+    if (!item || item.flashSaleId !== saleId) {
+      return { success: false, error: new ApiError('Flash sale item not found', 404, 'FLASH_SALE_ITEM_NOT_FOUND') };
+    }
+    if (!item.flashSale.isActive || item.flashSale.endsAt.getTime() <= Date.now()) {
+      return { success: false, error: reserveError(-2) };
+    }
+
+    const pipeline = this.redis.pipeline();
+    this.queueLoad(pipeline, item);
+    await pipeline.exec();
+    return null;
+  }
+
+  private queueLoad(
+    pipeline: ReturnType<Redis['pipeline']>,
+    item: { id: string; flashSaleId: string; productId: string; quantity: number; sold: number; maxQuantityPerUser: number | null; flashSale: { startsAt: Date; endsAt: Date } }
+  ): void {
+    const ends = item.flashSale.endsAt.getTime();
+    pipeline.eval(
+      LOAD_SCRIPT,
+      2,
+      itemKeys(item.id)[0],
+      ITEMS_KEY,
+      item.id,
+      Math.max(item.quantity - item.sold, 0),
+      item.maxQuantityPerUser ?? 0,
+      item.productId,
+      item.flashSale.startsAt.getTime(),
+      ends,
+      ends + RETENTION_MS,
+      item.flashSaleId
+    );
+  }
+
+  /**
+   * One transaction per batch. Reservations already written are skipped and
+   * ones whose order does not exist are dropped, so a batch can always be
+   * retried and never blocks the queue.
+   */
+  private async writeBatch(commits: FlashSaleCommit[]): Promise<number> {
+    return this.prisma.$transaction(async (tx) => {
+      const existing = await tx.inventory_reservations.findMany({
+        where: { id: { in: commits.map(commit => commit.id) } },
+        select: { id: true }
+      });
+      const written = new Set(existing.map(row => row.id));
+      const pending = commits.filter(commit => !written.has(commit.id));
+      if (pending.length === 0) {
+        return 0;
+      }
+
+      const orders = await tx.order.findMany({
+        where: { id: { in: [...new Set(pending.map(commit => commit.orderId))] } },
+        select: { id: true }
+      });
+      const orderIds = new Set(orders.map(order => order.id));
+      const orphaned = pending.filter(commit => !orderIds.has(commit.orderId));
+      if (orphaned.length > 0) {
+        logger.warn({ reservations: orphaned }, 'Dropping flash sale reservations for unknown orders');
+      }
+      const fresh = pending.filter(commit => orderIds.has(commit.orderId));
+      if (fresh.length === 0) {
+        return 0;
+      }
+
+      const productIds = [...new Set(fresh.map(commit => commit.productId))];
+      const inventoryItems = await tx.inventory_items.findMany({
+        where: { product_id: { in: productIds }, location_id: DEFAULT_STOCK_LOCATION },
+        select: { id: true, product_id: true },
+        orderBy: { id: 'asc' }
+      });
+      const inventoryByProduct = new Map<string, string>();
+      for (const row of inventoryItems) {
+        if (!inventoryByProduct.has(row.product_id)) {
+          inventoryByProduct.set(row.product_id, row.id);
+        }
+      }
+
+      // Checkout already reserved the order's units; each flash reservation
+      // takes its units over from those rows, oldest first, so the order
+      // keeps one reservation per unit. Only units checkout did not reserve
+      // are reserved again.
+      const reserved = await tx.inventory_reservations.findMany({
+        where: {
+          order_id: { in: [...new Set(fresh.map(commit => commit.orderId))] },
+          product_id: { in: productIds },
+          NOT: { id: { startsWith: RESERVATION_PREFIX } }
+        },
+        select: { id: true, order_id: true, product_id: true, quantity: true },
+        orderBy: [{ created_at: 'asc' }, { id: 'asc' }]
+      });
+      const reservedByLine = new Map<string, Array<{ id: string; quantity: number; taken: number }>>();
+      for (const row of reserved) {
+        const line = `${row.order_id}:${row.product_id}`;
+        const rows = reservedByLine.get(line) ?? [];
+        rows.push({ id: row.id, quantity: row.quantity, taken: 0 });
+        reservedByLine.set(line, rows);
+      }
+
+      const uncovered = new Map<string, number>();
+      for (const commit of fresh) {
+        let needed = commit.quantity;
+        for (const row of reservedByLine.get(`${commit.orderId}:${commit.productId}`) ?? []) {
+          const take = Math.min(row.quantity - row.taken, needed);
+          row.taken += take;
+          needed -= take;
+          if (needed === 0) break;
+        }
+        uncovered.set(commit.id, needed);
+      }
+
+      const taken = [...reservedByLine.values()].flat().filter(row => row.taken > 0);
+      const emptied = taken.filter(row => row.taken === row.quantity).map(row => row.id);
+      if (emptied.length > 0) {
+        await tx.inventory_reservations.deleteMany({ where: { id: { in: emptied } } });
+      }
+      for (const row of taken.filter(row => row.taken < row.quantity)) {
+        await tx.inventory_reservations.update({
+          where: { id: row.id },
+          data: { quantity: row.quantity - row.taken }
+        });
+      }
+
+      await tx.inventory_reservations.createMany({
+        data: fresh.map(commit => ({
+          id: commit.id,
+          product_id: commit.productId,
+          order_id: commit.orderId,
+          quantity: commit.quantity
+        }))
+      });
+
+      const movements = fresh.filter(commit => uncovered.get(commit.id)! > 0 && inventoryByProduct.has(commit.productId));
+      if (movements.length > 0) {
+        await tx.inventory_movements.createMany({
+          data: movements.map(commit => ({
+            id: nanoid(),
+            product_id: commit.productId,
+            inventory_item_id: inventoryByProduct.get(commit.productId)!,
+            type: 'RESERVED',
+            quantity: uncovered.get(commit.id)!
+          }))
+        });
+      }
+
+      // One increment per item per batch, in id order
+      const soldByItem = new Map<string, number>();
+      for (const commit of fresh) {
+        soldByItem.set(commit.itemId, (soldByItem.get(commit.itemId) ?? 0) + commit.quantity);
+      }
+      for (const [itemId, sold] of [...soldByItem].sort(([a], [b]) => a.localeCompare(b))) {
+        await tx.flashSaleItem.updateMany({
+          where: { id: itemId },
+          data: { sold: { increment: sold } }
+        });
+      }
+
+      return fresh.length;
+    });
+  }
+}
+
+function reserveError(code: number): ApiError {
+  switch (code) {
+    case -2:
+      return new ApiError('Flash sale is not active', 409, 'FLASH_SALE_NOT_ACTIVE');
+    case -3:
+      return new ApiError('Flash sale limit per customer reached', 409, 'FLASH_SALE_LIMIT_EXCEEDED');
+    case -4:
+      return new ApiError('Flash sale item sold out', 409, 'FLASH_SALE_SOLD_OUT');
+    default:
+      return new ApiError('Flash sale item not found', 404, 'FLASH_SALE_ITEM_NOT_FOUND');
+  }
+}
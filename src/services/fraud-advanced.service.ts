@@ -3,24 +3,30 @@ import { PrismaClient } from '@prisma/client';
 import { ServiceResult, FraudRiskAssessmentData, FraudAlertData, FraudRuleData } from '../types';
 import { logger } from '../utils/logger';
 import { ApiError } from '../utils/errors';
+import { FraudFeatures, fraudRuleSet } from '../utils/fraud-rule-engine';
+import { FraudFeatureStore } from './fraud-feature-store.service';
 
 export class AdvancedFraudService {
   private prisma: PrismaClient;
   private redis: any;
+  private features: FraudFeatureStore;
 
   constructor(fastify: FastifyInstance) {
     this.prisma = fastify.prisma;
     this.redis = fastify.redis;
+    this.features = new FraudFeatureStore(fastify.prisma, fastify.redis);
   }
 
   // ML-Based Risk Assessment
 
   async assessRisk(data: FraudRiskAssessmentData): Promise<ServiceResult<any>> {
     try {
-      const riskFactors = await this.calculateRiskFactors(data);
-      const mlScore = await this.getMachineLearningScore(data);
-      const behaviorScore = await this.analyzeBehaviorPattern(data);
-      const velocityScore = await this.analyzeTransactionVelocity(data);
+      // User history comes from the feature store, not per-factor queries
+      const features = data.userId ? await this.features.get(data.userId) : null;
+      const riskFactors = await this.calculateRiskFactors(data, features);
+      const mlScore = this.getMachineLearningScore(features);
+      const behaviorScore = this.analyzeBehaviorPattern(features);
+      const velocityScore = this.analyzeTransactionVelocity(features);
       const deviceScore = await this.analyzeDeviceFingerprint(data);
 
       const totalRiskScore = this.calculateCompositeRiskScore({
@@ -314,14 +320,15 @@ export class AdvancedFraudService {
         data: {
           name: data.name,
           description: data.description,
-          conditions: data.conditions,
+          // Type and actions are kept with the conditions the rule engine compiles
+          conditions: { ...data.conditions, ruleType: data.type, actions: data.actions },
           weight: 1.0, // Default weight
           isActive: data.isActive ?? true
         }
       });
 
-      // Compile and cache rule for faster execution
-      await this.compileAndCacheRule(rule);
+      // Recompile the rule set on every node
+      await fraudRuleSet.invalidate(this.prisma, this.redis);
 
       // Event model fields not available - analytics tracked in logs only
       // await this.prisma.event.create({
@@ -357,23 +364,9 @@ export class AdvancedFraudService {
 
   async evaluateRules(context: any): Promise<ServiceResult<any>> {
     try {
-      const activeRules = await this.getActiveRules();
-      const triggeredRules = [];
-      const actions = [];
-
-      for (const rule of activeRules) {
-        const isTriggered = await this.evaluateRule(rule, context);
-
-        if (isTriggered) {
-          triggeredRules.push(rule);
-          actions.push(...rule.actions);
-
-          // FraudRuleExecution model not available - logging only
-          // await this.prisma.fraudRuleExecution.create({
-          //   data: {}
-          // });
-        }
-      }
+      const rules = await fraudRuleSet.get(this.prisma, this.redis);
+      const triggeredRules = rules.match(context);
+      const actions = triggeredRules.flatMap(rule => rule.actions);
 
       // Execute actions
       const executionResults = await this.executeRuleActions(actions, context);
@@ -482,34 +475,28 @@ export class AdvancedFraudService {
 
   // Helper Methods
 
-  private async calculateRiskFactors(data: FraudRiskAssessmentData): Promise<any[]> {
+  private async calculateRiskFactors(data: FraudRiskAssessmentData, features: FraudFeatures | null): Promise<any[]> {
     const factors = [];
 
     // Account age risk
-    if (data.userId) {
-      const user = await this.prisma.user.findUnique({
-        where: { id: data.userId }
-      });
+    if (features?.accountCreatedAt) {
+      const accountAge = Date.now() - features.accountCreatedAt;
+      const daysSinceRegistration = accountAge / (1000 * 60 * 60 * 24);
 
-      if (user) {
-        const accountAge = Date.now() - user.createdAt.getTime();
-        const daysSinceRegistration = accountAge / (1000 * 60 * 60 * 24);
-
-        if (daysSinceRegistration < 1) {
-          factors.push({
-            type: 'ACCOUNT_AGE',
-            description: 'New account (less than 1 day old)',
-            riskLevel: 'HIGH',
-            score: 0.8
-          });
-        } else if (daysSinceRegistration < 7) {
-          factors.push({
-            type: 'ACCOUNT_AGE',
-            description: 'Recent account (less than 1 week old)',
-            riskLevel: 'MEDIUM',
-            score: 0.5
-          });
-        }
+      if (daysSinceRegistration < 1) {
+        factors.push({
+          type: 'ACCOUNT_AGE',
+          description: 'New account (less than 1 day old)',
+          riskLevel: 'HIGH',
+          score: 0.8
+        });
+      } else if (daysSinceRegistration < 7) {
+        factors.push({
+          type: 'ACCOUNT_AGE',
+          description: 'Recent account (less than 1 week old)',
+          riskLevel: 'MEDIUM',
+          score: 0.5
+        });
       }
     }
 
@@ -528,7 +515,7 @@ export class AdvancedFraudService {
 
     // Transaction amount risk
     if (data.amount && data.currency) {
-      const amountRisk = await this.analyzeTransactionAmount(data.amount, data.currency, data.userId);
+      const amountRisk = this.analyzeTransactionAmount(data.amount, data.currency, features);
       if (amountRisk.isUnusual) {
         factors.push({
           type: 'TRANSACTION_AMOUNT',
@@ -555,15 +542,16 @@ export class AdvancedFraudService {
     return factors;
   }
 
-  private async getMachineLearningScore(data: FraudRiskAssessmentData): Promise<number> {
+  private getMachineLearningScore(userFeatures: FraudFeatures | null): number {
     // Simplified ML scoring - in production, this would call an actual ML model
     let score = 0;
 
     // Feature engineering
     const features = {
-      accountAge: await this.getAccountAge(data.userId),
-      transactionCount: await this.getUserTransactionCount(data.userId),
-      avgTransactionAmount: await this.getUserAvgTransactionAmount(data.userId),
+      accountAge: userFeatures?.accountCreatedAt
+        ? Math.floor((Date.now() - userFeatures.accountCreatedAt) / (1000 * 60 * 60 * 24))
+        : 0,
+      transactionCount: userFeatures?.orderCount ?? 0,
       hourOfDay: new Date().getHours(),
       dayOfWeek: new Date().getDay(),
       isWeekend: new Date().getDay() === 0 || new Date().getDay() === 6
@@ -578,35 +566,23 @@ export class AdvancedFraudService {
     return Math.min(score, 1.0);
   }
 
-  private async analyzeBehaviorPattern(data: FraudRiskAssessmentData): Promise<number> {
-    if (!data.userId) return 0;
-
-    const recentOrders = await this.prisma.order.findMany({
-      where: {
-        userId: data.userId,
-        createdAt: {
-          gte: new Date(Date.now() - 30 * 24 * 60 * 60 * 1000) // Last 30 days
-        }
-      },
-      orderBy: { createdAt: 'desc' },
-      take: 50
-    });
+  private analyzeBehaviorPattern(features: FraudFeatures | null): number {
+    if (!features) return 0;
 
+    // Last 30 days, oldest first
+    const recentOrders = features.recentOrders;
     let behaviorScore = 0;
 
     // Rapid succession orders
-    const rapidOrders = recentOrders.filter((order, index) => {
-      if (index === 0) return false;
-      const timeDiff = order.createdAt.getTime() - recentOrders[index - 1].createdAt.getTime();
-      return timeDiff < 10 * 60 * 1000; // Less than 10 minutes apart
-    });
+    const rapidOrders = recentOrders.filter((order, index) =>
+      index > 0 && order.at - recentOrders[index - 1].at < 10 * 60 * 1000 // Less than 10 minutes apart
+    );
 
     if (rapidOrders.length > 3) behaviorScore += 0.4;
 
     // Unusual order patterns
     if (recentOrders.length > 10) {
-    // @ts-ignore - TS2339: Temporary fix
-      const amounts = recentOrders.map(o => o.total);
+      const amounts = recentOrders.map(o => o.amount);
       const avgAmount = amounts.reduce((a, b) => a + b, 0) / amounts.length;
       const stdDev = Math.sqrt(amounts.reduce((sq, n) => sq + Math.pow(n - avgAmount, 2), 0) / amounts.length);
       
@@ -616,27 +592,12 @@ export class AdvancedFraudService {
     return Math.min(behaviorScore, 1.0);
   }
 
-  private async analyzeTransactionVelocity(data: FraudRiskAssessmentData): Promise<number> {
-    if (!data.userId) return 0;
+  private analyzeTransactionVelocity(features: FraudFeatures | null): number {
+    if (!features) return 0;
 
-    const now = new Date();
-    const oneHourAgo = new Date(now.getTime() - 60 * 60 * 1000);
-    const oneDayAgo = new Date(now.getTime() - 24 * 60 * 60 * 1000);
-
-    const [hourlyTransactions, dailyTransactions] = await Promise.all([
-      this.prisma.order.count({
-        where: {
-          userId: data.userId,
-          createdAt: { gte: oneHourAgo }
-        }
-      }),
-      this.prisma.order.count({
-        where: {
-          userId: data.userId,
-          createdAt: { gte: oneDayAgo }
-        }
-      })
-    ]);
+    const now = Date.now();
+    const hourlyTransactions = features.recentOrders.filter(order => order.at >= now - 60 * 60 * 1000).length;
+    const dailyTransactions = features.recentOrders.filter(order => order.at >= now - 24 * 60 * 60 * 1000).length;
 
     let velocityScore = 0;
 
@@ -928,17 +889,14 @@ export class AdvancedFraudService {
     };
   }
 
-  private async analyzeTransactionAmount(amount: number, currency: string, userId?: string): Promise<any> {
+  private analyzeTransactionAmount(amount: number, currency: string, features: FraudFeatures | null): any {
     // Simplified transaction amount analysis
     const highRiskThreshold = currency === 'USD' ? 1000 : 900; // Example thresholds
     const isHighAmount = amount > highRiskThreshold;
     
-    // Check user's average transaction if userId provided
-    let isUnusualForUser = false;
-    if (userId) {
-      const avgTransaction = await this.getUserAverageTransaction(userId);
-      isUnusualForUser = amount > avgTransaction * 3; // 3x average is unusual
-    }
+    // Check against the user's average transaction when they have history
+    const avgTransaction = features?.orderCount ? features.orderTotal / features.orderCount : 0;
+    const isUnusualForUser = avgTransaction > 0 && amount > avgTransaction * 3; // 3x average is unusual
     
     const isUnusual = isHighAmount || isUnusualForUser;
     
@@ -974,42 +932,6 @@ export class AdvancedFraudService {
     };
   }
 
-  private async getAccountAge(userId?: string): Promise<number> {
-    if (!userId) return 0;
-    
-    const user = await this.prisma.user.findUnique({
-      where: { id: userId },
-      select: { createdAt: true }
-    });
-
-    if (!user) return 0;
-
-    return Math.floor((Date.now() - user.createdAt.getTime()) / (1000 * 60 * 60 * 24));
-  }
-
-  private async getUserTransactionCount(userId?: string): Promise<number> {
-    if (!userId) return 0;
-    
-    return await this.prisma.order.count({
-      where: { userId }
-    });
-  }
-
-  private async getUserAvgTransactionAmount(userId?: string): Promise<number> {
-    if (!userId) return 0;
-
-    const result = await this.prisma.order.aggregate({
-      where: { userId },
-      _avg: { totalAmount: true }
-    });
-
-    return result._avg?.totalAmount?.toNumber() || 0;
-  }
-
-  private async getUserAverageTransaction(userId: string): Promise<number> {
-    return this.getUserAvgTransactionAmount(userId);
-  }
-
   private async getUserPrimaryCountry(userId: string): Promise<string | null> {
     try {
       // addresses relation not available
@@ -1020,48 +942,6 @@ export class AdvancedFraudService {
     }
   }
 
-  private async getActiveRules(): Promise<any[]> {
-    return await this.prisma.fraudRule.findMany({
-      where: { isActive: true },
-      orderBy: { createdAt: 'desc' }
-    });
-  }
-
-  private async evaluateRule(rule: any, context: any): Promise<boolean> {
-    // Simplified rule evaluation
-    try {
-      const conditions = rule.conditions;
-      
-      // Example simple rule evaluation based on context
-      for (const condition of conditions) {
-        const { field, operator, value } = condition;
-        const contextValue = context[field];
-        
-        switch (operator) {
-          case 'equals':
-            if (contextValue !== value) return false;
-            break;
-          case 'greater_than':
-            if (contextValue <= value) return false;
-            break;
-          case 'less_than':
-            if (contextValue >= value) return false;
-            break;
-          case 'contains':
-            if (!contextValue?.includes(value)) return false;
-            break;
-          default:
-            return false;
-        }
-      }
-      
-      return true; // All conditions passed
-    } catch (error) {
-      logger.error({ error, ruleId: rule.id }, 'Error evaluating fraud rule');
-      return false;
-    }
-  }
-
   private async executeRuleActions(actions: string[], context: any): Promise<any[]> {
     const results = [];
 
@@ -1105,12 +985,6 @@ export class AdvancedFraudService {
     return results;
   }
 
-  private async compileAndCacheRule(rule: any): Promise<void> {
-    // Cache compiled rule for faster execution
-    const cacheKey = `fraud_rule:${rule.id}`;
-    await this.redis.setex(cacheKey, 3600, JSON.stringify(rule));
-  }
-
   private async notifyFraudTeam(alert: any): Promise<void> {
     // Send notifications to fraud team
     logger.info({ alertId: alert.id }, 'Fraud team notification sent');
@@ -1,6 +1,10 @@
-import { PrismaClient, FraudRule, Order, Payment, User } from '@prisma/client';
+import { PrismaClient, Order, Payment, User } from '@prisma/client';
 import { Redis } from 'ioredis';
 import { logger } from '../utils/logger';
+import { fraudRuleSet, RuleCheckResult } from '../utils/fraud-rule-engine';
+import { FraudFeatureStore } from './fraud-feature-store.service';
+
+export type { RuleCheckResult } from '../utils/fraud-rule-engine';
 
 export interface FraudCheckResult {
   id: string;
@@ -12,14 +16,6 @@ export interface FraudCheckResult {
   blockedReason?: string;
 }
 
-export interface RuleCheckResult {
-  ruleId: string;
-  ruleName: string;
-  passed: boolean;
-  score: number;
-  reason?: string;
-}
-
 export interface FraudContext {
   user: User & {
     orders?: Order[];
@@ -30,6 +26,7 @@ export interface FraudContext {
     payment?: Payment;
   };
   payment?: Payment;
+  amount?: number; // For checks made before the order exists
   ipAddress: string;
   userAgent: string;
   sessionId?: string;
@@ -40,65 +37,60 @@ export class FraudDetectionService {
   private static readonly FRAUD_THRESHOLD = 0.7;
   private static readonly REVIEW_THRESHOLD = 0.5;
 
+  private features: FraudFeatureStore;
+
   constructor(
     private prisma: PrismaClient,
     private redis: Redis
-  ) {}
+  ) {
+    this.features = new FraudFeatureStore(prisma, redis);
+  }
 
   /**
-   * Perform comprehensive fraud check
+   * Score a transaction against the compiled fraud rules and the user's
+   * precomputed features. Only Redis is read on this path; the check is
+   * written to Postgres after the result is returned.
    */
   async checkFraud(context: FraudContext): Promise<FraudCheckResult> {
     const checkId = this.generateCheckId();
     const startTime = Date.now();
 
     try {
-      // Get active fraud rules
-      const rules = await this.getActiveFraudRules();
-
-      // Run all rules in parallel
-      const ruleResults = await Promise.all(
-        rules.map(rule => this.evaluateRule(rule, context))
+      const [rules, features, country] = await Promise.all([
+        fraudRuleSet.get(this.prisma, this.redis),
+        this.features.get(context.user.id, startTime),
+        this.getCountryFromIP(context.ipAddress)
+      ]);
+
+      const evaluation = rules.evaluate(
+        {
+          amount: Number(context.amount ?? context.order?.totalAmount ?? context.payment?.amount ?? 0),
+          country,
+          paymentMethod: context.payment?.method
+        },
+        { ...features, accountCreatedAt: features.accountCreatedAt ?? context.user.createdAt.getTime() },
+        startTime
       );
 
-      // Calculate overall fraud score
-      const totalScore = ruleResults.reduce((sum, result) => sum + result.score, 0);
-      const maxPossibleScore = rules.reduce((sum, rule) => sum + rule.weight, 0);
-      const normalizedScore = maxPossibleScore > 0 ? totalScore / maxPossibleScore : 0;
-
       // Determine if fraud check passed
+      const normalizedScore = evaluation.score;
       const passed = normalizedScore < FraudDetectionService.FRAUD_THRESHOLD;
       const requiresManualReview = normalizedScore >= FraudDetectionService.REVIEW_THRESHOLD &&
         normalizedScore < FraudDetectionService.FRAUD_THRESHOLD;
 
-      // Generate recommendations
-      const recommendations = this.generateRecommendations(ruleResults, normalizedScore);
-
-      // Check for immediate blocks
-      const blockedRule = ruleResults.find(r => !r.passed && r.score >= 1.0);
-      const blockedReason = blockedRule?.reason;
-
-      // Store fraud check result
       const result: FraudCheckResult = {
         id: checkId,
         score: normalizedScore,
         passed,
-        rules: ruleResults,
-        recommendations,
+        rules: evaluation.rules,
+        recommendations: this.generateRecommendations(evaluation.rules, normalizedScore),
         requiresManualReview,
-        blockedReason
+        blockedReason: evaluation.blockedReason
       };
 
-      // Save to database
-      await this.saveFraudCheck(context, result, Date.now() - startTime);
-
-      // Cache result
-      await this.cacheResult(checkId, result);
-
-      // If fraud detected, trigger alerts
-      if (!passed) {
-        await this.triggerFraudAlert(context, result);
-      }
+      this.recordCheck(context, result, Date.now() - startTime).catch(error => {
+        logger.error({ error, checkId }, 'Failed to record fraud check');
+      });
 
       return result;
     } catch (error) {
@@ -116,6 +108,32 @@ export class FraudDetectionService {
     }
   }
 
+  /**
+   * Feed an order into the user's fraud features
+   */
+  async recordOrder(order: Pick<Order, 'id' | 'userId' | 'totalAmount' | 'createdAt'>): Promise<void> {
+    try {
+      await this.features.recordOrder(order.userId, order.id, Number(order.totalAmount), order.createdAt.getTime());
+    } catch (error) {
+      logger.warn({ error, orderId: order.id }, 'Failed to record order fraud features');
+    }
+  }
+
+  async recordFailedPayment(userId: string, paymentId: string): Promise<void> {
+    try {
+      await this.features.recordFailedPayment(userId, paymentId);
+    } catch (error) {
+      logger.warn({ error, paymentId }, 'Failed to record failed payment fraud features');
+    }
+  }
+
+  /**
+   * Drop the compiled rules on every node after a rule changes
+   */
+  async invalidateRules(): Promise<void> {
+    await fraudRuleSet.invalidate(this.prisma, this.redis);
+  }
+
   /**
    * Check specific fraud indicators
    */
@@ -220,192 +238,6 @@ export class FraudDetectionService {
 
   // Private methods
 
-  private async getActiveFraudRules(): Promise<FraudRule[]> {
-    return this.prisma.fraudRule.findMany({
-      where: { isActive: true },
-      orderBy: { weight: 'desc' }
-    });
-  }
-
-  private async evaluateRule(rule: FraudRule, context: FraudContext): Promise<RuleCheckResult> {
-    try {
-      let passed = true;
-      let score = 0;
-      let reason: string | undefined;
-
-      // Since rule.type doesn't exist in schema, use name to determine type
-      const ruleType = this.determineRuleType(rule.name);
-      switch (ruleType) {
-        case 'VELOCITY':
-          const velocityResult = await this.checkVelocityRule(rule, context);
-          passed = velocityResult.passed;
-          score = velocityResult.score;
-          reason = velocityResult.reason;
-          break;
-
-        case 'AMOUNT':
-          const amountResult = this.checkAmountRule(rule, context);
-          passed = amountResult.passed;
-          score = amountResult.score;
-          reason = amountResult.reason;
-          break;
-
-        case 'LOCATION':
-          const locationResult = await this.checkLocationRule(rule, context);
-          passed = locationResult.passed;
-          score = locationResult.score;
-          reason = locationResult.reason;
-          break;
-
-        case 'PATTERN':
-          const patternResult = await this.checkPatternRule(rule, context);
-          passed = patternResult.passed;
-          score = patternResult.score;
-          reason = patternResult.reason;
-          break;
-
-        case 'DEVICE':
-          const deviceResult = this.checkDeviceRule(rule, context);
-          passed = deviceResult.passed;
-          score = deviceResult.score;
-          reason = deviceResult.reason;
-          break;
-
-        case 'CUSTOM':
-          const customResult = await this.evaluateCustomRule(rule, context);
-          passed = customResult.passed;
-          score = customResult.score;
-          reason = customResult.reason;
-          break;
-      }
-
-      return {
-        ruleId: rule.id,
-        ruleName: rule.name,
-        passed,
-        score: passed ? 0 : score * rule.weight,
-        reason
-      };
-    } catch (error) {
-      logger.error({ error, ruleId: rule.id }, 'Rule evaluation failed');
-
-      // If rule fails, don't block transaction
-      return {
-        ruleId: rule.id,
-        ruleName: rule.name,
-        passed: true,
-        score: 0,
-        reason: 'Rule evaluation error'
-      };
-    }
-  }
-
-  private async checkVelocityRule(rule: FraudRule, context: FraudContext) {
-    const config = rule.conditions as any;
-    const timeWindow = config.timeWindow || 3600;
-    const maxCount = config.maxCount || 5;
-    const type = config.type || 'order';
-
-    const count = await this.checkVelocity(context.user.id, type, timeWindow);
-    const passed = count <= maxCount;
-
-    return {
-      passed,
-      score: passed ? 0 : 1,
-      reason: passed ? undefined : `Too many ${type}s: ${count} in ${timeWindow}s`
-    };
-  }
-
-  private checkAmountRule(rule: FraudRule, context: FraudContext) {
-    const config = rule.conditions as any;
-    const maxAmount = config.maxAmount || 1000;
-    const amount = context.order?.totalAmount || context.payment?.amount || 0;
-
-    const passed = Number(amount) <= maxAmount;
-
-    return {
-      passed,
-      score: passed ? 0 : Math.min(Number(amount) / maxAmount, 2),
-      reason: passed ? undefined : `Amount ${amount} exceeds limit ${maxAmount}`
-    };
-  }
-
-  private async checkLocationRule(rule: FraudRule, context: FraudContext) {
-    const config = rule.conditions as any;
-    const allowedCountries = config.allowedCountries || [];
-    const blockedCountries = config.blockedCountries || [];
-
-    // Get country from IP
-    const country = await this.getCountryFromIP(context.ipAddress);
-
-    let passed = true;
-    let reason: string | undefined;
-
-    if (allowedCountries.length > 0 && !allowedCountries.includes(country)) {
-      passed = false;
-      reason = `Country ${country} not in allowed list`;
-    }
-
-    if (blockedCountries.includes(country)) {
-      passed = false;
-      reason = `Country ${country} is blocked`;
-    }
-
-    return {
-      passed,
-      score: passed ? 0 : 1,
-      reason
-    };
-  }
-
-  private async checkPatternRule(_rule: FraudRule, context: FraudContext) {
-    // const config = rule.conditions as any;
-
-    // Check for suspicious patterns
-    const patterns = {
-      multipleFailedPayments: await this.checkMultipleFailedPayments(context.user.id),
-      rapidAccountChanges: await this.checkRapidAccountChanges(context.user.id),
-      unusualOrderPattern: await this.checkUnusualOrderPattern(context.user.id)
-    };
-
-    const suspiciousPatterns = Object.entries(patterns)
-      .filter(([_, value]) => value)
-      .map(([key]) => key);
-
-    const passed = suspiciousPatterns.length === 0;
-
-    return {
-      passed,
-      score: passed ? 0 : suspiciousPatterns.length * 0.3,
-      reason: passed ? undefined : `Suspicious patterns: ${suspiciousPatterns.join(', ')}`
-    };
-  }
-
-  private checkDeviceRule(_rule: FraudRule, _context: FraudContext) {
-    // const config = rule.conditions as any;
-
-    // Simple device fingerprinting based on user agent
-    // const deviceFingerprint = this.generateDeviceFingerprint(context.userAgent);
-
-    // Check if device has been used for fraud before
-    // This is simplified - in production you'd want more sophisticated fingerprinting
-
-    return {
-      passed: true,
-      score: 0,
-      reason: undefined
-    };
-  }
-
-  private async evaluateCustomRule(_rule: FraudRule, _context: FraudContext) {
-    // Custom rules would be implemented based on specific business logic
-    return {
-      passed: true,
-      score: 0,
-      reason: undefined
-    };
-  }
-
   private generateRecommendations(results: RuleCheckResult[], score: number): string[] {
     const recommendations: string[] = [];
 
@@ -440,6 +272,15 @@ export class FraudDetectionService {
     return [...new Set(recommendations)]; // Remove duplicates
   }
 
+  private async recordCheck(context: FraudContext, result: FraudCheckResult, processingTime: number) {
+    await Promise.all([
+      this.saveFraudCheck(context, result, processingTime),
+      this.cacheResult(result.id, result),
+      // If fraud detected, trigger alerts
+      result.passed ? undefined : this.triggerFraudAlert(context, result)
+    ]);
+  }
+
   private async saveFraudCheck(context: FraudContext, result: FraudCheckResult, processingTime: number) {
     await this.prisma.fraudCheck.create({
       data: {
@@ -498,70 +339,4 @@ export class FraudDetectionService {
     // For now, return a default
     return 'US';
   }
-
-  private async checkMultipleFailedPayments(_userId: string): Promise<boolean> {
-    const failedPayments = await this.prisma.payment.count({
-      where: {
-        // userId field not available in Payment
-        status: 'FAILED',
-        createdAt: {
-          gte: new Date(Date.now() - 24 * 60 * 60 * 1000) // Last 24 hours
-        }
-      }
-    });
-
-    return failedPayments >= 3;
-  }
-
-  private async checkRapidAccountChanges(userId: string): Promise<boolean> {
-    // Check for rapid email/phone changes
-    const recentChanges = await this.prisma.userActivityLog.count({
-      where: {
-        userId,
-        // action field not available in UserActivityLog
-        activity: {
-          in: ['email_changed', 'phone_changed', 'password_changed']
-        },
-        createdAt: {
-          gte: new Date(Date.now() - 60 * 60 * 1000) // Last hour
-        }
-      }
-    });
-
-    return recentChanges >= 2;
-  }
-
-  private async checkUnusualOrderPattern(userId: string): Promise<boolean> {
-    // Check for unusual order patterns
-    const recentOrders = await this.prisma.order.findMany({
-      where: {
-        userId,
-        createdAt: {
-          gte: new Date(Date.now() - 7 * 24 * 60 * 60 * 1000) // Last week
-        }
-      },
-      select: {
-        totalAmount: true,
-        createdAt: true
-      },
-      orderBy: { createdAt: 'desc' }
-    });
-
-    if (recentOrders.length < 2) return false;
-
-    // Check for sudden spike in order amounts
-    const avgAmount = recentOrders.reduce((sum, order) => sum + order.totalAmount.toNumber(), 0) / recentOrders.length;
-    const latestAmount = recentOrders[0].totalAmount.toNumber();
-
-    return latestAmount > avgAmount * 3; // 3x spike is suspicious
-  }
-
-  private determineRuleType(ruleName: string): string {
-    // Determine rule type based on name since rule.type doesn't exist in schema
-    if (ruleName.toLowerCase().includes('velocity')) return 'VELOCITY';
-    if (ruleName.toLowerCase().includes('amount')) return 'AMOUNT';
-    if (ruleName.toLowerCase().includes('frequency')) return 'FREQUENCY';
-    if (ruleName.toLowerCase().includes('geolocation')) return 'GEOLOCATION';
-    return 'UNKNOWN';
-  }
-}
\ No newline at end of file
+}
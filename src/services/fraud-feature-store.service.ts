@@ -0,0 +1,203 @@
+import { PrismaClient } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { FraudFeatures } from '../utils/fraud-rule-engine';
+import { logger } from '../utils/logger';
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+// Orders kept per user, by age and by count
+const ORDER_HORIZON_MS = 30 * DAY_MS;
+const ORDER_CAP = 100;
+
+// Failed payments kept per user
+const FAILURE_HORIZON_MS = DAY_MS;
+
+// Idle users drop out and are seeded again from Postgres on their next check
+const FEATURE_TTL = 30 * 24 * 60 * 60;
+
+const featureKey = (userId: string) => `fraud:features:${userId}`;
+const ordersKey = (userId: string) => `fraud:features:${userId}:orders`;
+const failuresKey = (userId: string) => `fraud:features:${userId}:failures`;
+
+// KEYS: features hash, orders zset. ARGV: created at, order count, order
+// total, ttl, then score and member pairs. Only the first seed is written,
+// so a seed racing another one cannot double count.
+const SEED_SCRIPT = `
+if redis.call('hsetnx', KEYS[1], 'seeded', 1) == 0 then
+  return 0
+end
+redis.call('hset', KEYS[1], 'createdAt', ARGV[1], 'orders', ARGV[2], 'total', ARGV[3])
+for i = 5, #ARGV, 2 do
+  redis.call('zadd', KEYS[2], ARGV[i], ARGV[i + 1])
+end
+redis.call('expire', KEYS[1], ARGV[4])
+redis.call('expire', KEYS[2], ARGV[4])
+return 1`;
+
+// KEYS: features hash, orders zset. ARGV: member, amount, time, horizon,
+// cap, ttl. Unseeded users are skipped, the seed reads the order from
+// Postgres; recording the same order twice counts it once.
+const RECORD_ORDER_SCRIPT = `
+if redis.call('hexists', KEYS[1], 'seeded') == 0 then
+  return 0
+end
+if redis.call('zadd', KEYS[2], 'NX', ARGV[3], ARGV[1]) == 1 then
+  redis.call('hincrby', KEYS[1], 'orders', 1)
+  redis.call('hincrbyfloat', KEYS[1], 'total', ARGV[2])
+end
+redis.call('zremrangebyscore', KEYS[2], '-inf', '(' .. ARGV[4])
+redis.call('zremrangebyrank', KEYS[2], 0, -(tonumber(ARGV[5]) + 1))
+redis.call('expire', KEYS[1], ARGV[6])
+redis.call('expire', KEYS[2], ARGV[6])
+return 1`;
+
+/**
+ * Per-user fraud features kept in Redis so scoring needs no queries.
+ *
+ * Accounts, orders and failed payments are recorded as they happen. Users
+ * without features (registered before the store, or idle past the TTL) are
+ * seeded from Postgres the first time they are scored, and that check waits
+ * for the seed so a returning buyer is never scored as one with no orders.
+ */
+export class FraudFeatureStore {
+  private seeding = new Map<string, Promise<void>>();
+
+  constructor(
+    private prisma: PrismaClient,
+    private redis: Redis
+  ) {}
+
+  /**
+   * One round trip for seeded users; unseeded users are seeded first
+   */
+  async get(userId: string, at: number = Date.now()): Promise<FraudFeatures> {
+    const warm = await this.read(userId, at);
+    if (warm.seeded) {
+      return warm.features;
+    }
+
+    await this.seed(userId);
+    return (await this.read(userId, at)).features;
+  }
+
+  private async read(userId: string, at: number): Promise<{ seeded: boolean; features: FraudFeatures }> {
+    const results = await this.redis.pipeline()
+      .hmget(featureKey(userId), 'seeded', 'createdAt', 'orders', 'total')
+      .zrangebyscore(ordersKey(userId), at - ORDER_HORIZON_MS, '+inf', 'WITHSCORES')
+      .zcount(failuresKey(userId), at - FAILURE_HORIZON_MS, '+inf')
+      .exec();
+
+    if (!results || results.some(([error]) => error)) {
+      throw results?.find(([error]) => error)?.[0] ?? new Error('Fraud feature pipeline failed');
+    }
+
+    const [seeded, createdAt, orders, total] = results[0][1] as Array<string | null>;
+    const scored = results[1][1] as string[];
+    const failedPayments = results[2][1] as number;
+
+    const recentOrders: FraudFeatures['recentOrders'] = [];
+    for (let i = 0; i < scored.length; i += 2) {
+      // Members are orderId:amount
+      const member = scored[i];
+      recentOrders.push({ at: Number(scored[i + 1]), amount: Number(member.slice(member.lastIndexOf(':') + 1)) });
+    }
+
+    return {
+      seeded: Boolean(seeded),
+      features: {
+        accountCreatedAt: createdAt ? Number(createdAt) : null,
+        orderCount: Number(orders) || 0,
+        orderTotal: Number(total) || 0,
+        recentOrders,
+        failedPayments
+      }
+    };
+  }
+
+  /**
+   * New accounts start seeded, so their age is known from the first check
+   */
+  async recordAccount(userId: string, createdAt: Date): Promise<void> {
+    await this.redis.eval(SEED_SCRIPT, 2, featureKey(userId), ordersKey(userId), createdAt.getTime(), 0, 0, FEATURE_TTL);
+  }
+
+  async recordOrder(userId: string, orderId: string, amount: number, at: number = Date.now()): Promise<void> {
+    await this.redis.eval(
+      RECORD_ORDER_SCRIPT,
+      2,
+      featureKey(userId),
+      ordersKey(userId),
+      `${orderId}:${amount}`,
+      amount,
+      at,
+      at - ORDER_HORIZON_MS,
+      ORDER_CAP,
+      FEATURE_TTL
+    );
+  }
+
+  async recordFailedPayment(userId: string, paymentId: string, at: number = Date.now()): Promise<void> {
+    await this.redis.pipeline()
+      .zadd(failuresKey(userId), at, paymentId)
+      .zremrangebyscore(failuresKey(userId), '-inf', `(${at - FAILURE_HORIZON_MS}`)
+      .expire(failuresKey(userId), FEATURE_TTL)
+      .exec();
+  }
+
+  /**
+   * Concurrent checks for the same user share one seed; a failed seed is
+   * logged and the check goes on with whatever Redis holds
+   */
+  private seed(userId: string): Promise<void> {
+    const pending = this.seeding.get(userId);
+    if (pending) return pending;
+
+    const seeding = this.loadSeed(userId)
+      .catch(error => {
+        logger.warn({ error, userId }, 'Failed to seed fraud features');
+      })
+      .finally(() => {
+        this.seeding.delete(userId);
+      });
+    this.seeding.set(userId, seeding);
+    return seeding;
+  }
+
+  private async loadSeed(userId: string): Promise<void> {
+    const since = new Date(Date.now() - ORDER_HORIZON_MS);
+    const [user, totals, recent] = await Promise.all([
+      this.prisma.user.findUnique({
+        where: { id: userId },
+        select: { createdAt: true }
+      }),
+      this.prisma.order.aggregate({
+        where: { userId },
+        _count: { _all: true },
+        _sum: { totalAmount: true }
+      }),
+      this.prisma.order.findMany({
+        where: { userId, createdAt: { gte: since } },
+        select: { id: true, totalAmount: true, createdAt: true },
+        orderBy: { createdAt: 'desc' },
+        take: ORDER_CAP
+      })
+    ]);
+    if (!user) return;
+
+    const members = recent.flatMap(order => [
+      order.createdAt.getTime(),
+      `${order.id}:${order.totalAmount.toNumber()}`
+    ]);
+    await this.redis.eval(
+      SEED_SCRIPT,
+      2,
+      featureKey(userId),
+      ordersKey(userId),
+      user.createdAt.getTime(),
+      totals._count._all,
+      totals._sum.totalAmount?.toNumber() ?? 0,
+      FEATURE_TTL,
+      ...members
+    );
+  }
+}
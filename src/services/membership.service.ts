@@ -2,7 +2,7 @@ import { Membership, Prisma, MembershipTier } from '@prisma/client';
 import { ServiceResult, PaginatedResult } from '../types';
 import { ApiError } from '../utils/errors';
 import { logger } from '../utils/logger';
-import { MembershipRepository } from '../repositories';
+import { MembershipRepository } from '../repositories/membership.repository';
 import { cacheGet, cacheSet } from '../config/redis';
 import { nanoid } from 'nanoid';
 
@@ -2,7 +2,7 @@ import { OrderItem, Prisma } from '@prisma/client';
 import { ServiceResult, PaginatedResult } from '../types';
 import { ApiError } from '../utils/errors';
 import { logger } from '../utils/logger';
-import { OrderItemRepository } from '../repositories';
+import { OrderItemRepository } from '../repositories/order-item.repository';
 import { cacheGet, cacheSet } from '../config/redis';
 import { nanoid } from 'nanoid';
 
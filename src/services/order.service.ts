@@ -2,20 +2,19 @@ import { Order, OrderItem, OrderHistory, OrderStatus, PaymentStatus, ShippingMet
 import { FastifyInstance } from 'fastify';
 import { CrudService } from './crud.service';
 import { logger as appLogger } from '../utils/logger';
-import { 
-  OrderRepository,
-  OrderItemRepository,
-  OrderHistoryRepository,
-  UserRepository,
-  ProductRepository,
-  ProductVariantRepository,
-  AddressRepository
-} from "../repositories";
+import { OrderRepository } from "../repositories/order.repository";
+import { OrderItemRepository } from "../repositories/order-item.repository";
+import { OrderHistoryRepository } from "../repositories/order-history.repository";
+import { UserRepository } from "../repositories/user.repository";
+import { AddressRepository } from "../repositories/address.repository";
 import { ServiceResult, PaginatedResult } from '../types';
 import { cache } from '../utils/cache';
+import { cartSnapshotKey } from '../utils/cart-snapshot';
 import { ApiError } from '../utils/errors';
-import { updateSearchIndex } from '../utils/search';
+import { recordSearchChange } from '../utils/search';
+import { DEFAULT_STOCK_LOCATION } from '../utils/cart-validation';
 import { FraudDetectionService } from './fraud-detection.service';
+import { CompiledCoupon } from '../utils/promotion-rules';
 import { nanoid } from 'nanoid';
 
 interface CreateOrderData {
@@ -52,12 +51,26 @@ interface OrderSearchParams {
   sortBy?: 'newest' | 'oldest' | 'amount_asc' | 'amount_desc' | 'status';
 }
 
+// An order line with its product and variant resolved
+interface ResolvedOrderItem {
+  productId: string;
+  variantId?: string;
+  quantity: number;
+  price: number;
+  name: string;
+  sku: string;
+  trackInventory: boolean;
+  sellerId: string;
+  categoryId: string;
+}
+
 interface OrderCalculations {
   subtotal: number;
   taxAmount: number;
   shippingAmount: number;
   discountAmount: number;
   totalAmount: number;
+  coupon?: { rule: CompiledCoupon; amount: number }; // Redeemed once the order exists
 }
 
 interface OrderWithDetails extends Order {
@@ -83,8 +96,6 @@ export class OrderService extends CrudService<Order> {
   orderItemRepo: OrderItemRepository;
   orderHistoryRepo: OrderHistoryRepository;
   userRepo: UserRepository;
-  productRepo: ProductRepository;
-  productVariantRepo: ProductVariantRepository;
   addressRepo: AddressRepository;
   
   modelName: 'order' = 'order';
@@ -97,8 +108,6 @@ export class OrderService extends CrudService<Order> {
     this.orderItemRepo = new OrderItemRepository(app.prisma, app.redis, appLogger);
     this.orderHistoryRepo = new OrderHistoryRepository(app.prisma, app.redis, appLogger);
     this.userRepo = new UserRepository(app.prisma, app.redis, appLogger);
-    this.productRepo = new ProductRepository(app.prisma, app.redis, appLogger);
-    this.productVariantRepo = new ProductVariantRepository(app.prisma, app.redis, appLogger);
     this.addressRepo = new AddressRepository(app.prisma, app.redis, appLogger);
     this.fraudService = new FraudDetectionService(app.prisma, app.redis);
   }
@@ -125,7 +134,8 @@ export class OrderService extends CrudService<Order> {
         }
       }
 
-      // Validate items and calculate totals
+      // Validate items and calculate totals; products and variants are read
+      // once here and shared by validation, pricing and item creation
       const itemValidation = await this.validateOrderItems(data.items);
       if (!itemValidation.success) {
         return {
@@ -133,9 +143,11 @@ export class OrderService extends CrudService<Order> {
           error: itemValidation.error
         };
       }
+      const items = itemValidation.data!;
 
       const calculations = await this.calculateOrderTotals(
-        data.items,
+        data.userId,
+        items,
         data.shippingMethod,
         data.couponCode,
         data.currency || Currency.USD
@@ -144,6 +156,7 @@ export class OrderService extends CrudService<Order> {
       // Run fraud detection
       const fraudCheck = await this.fraudService.checkFraud({
         user,
+        amount: calculations.totalAmount,
         ipAddress: '0.0.0.0', // Would come from request
         userAgent: '' // Would come from request
       });
@@ -181,106 +194,21 @@ export class OrderService extends CrudService<Order> {
         });
 
         // Create order items
-        for (const item of data.items) {
-          const product = await tx.product.findUnique({
-            where: { id: item.productId },
-            include: { variants: true }
-          });
-
-          if (!product) {
-            throw new ApiError(`Product ${item.productId} not found`, 404);
-          }
-
-          const variant = item.variantId 
-            ? await this.productVariantRepo.findById(item.variantId)
-            : null;
-
-          const price = item.price || variant?.price || product.price;
-          const subtotal = Number(price) * item.quantity;
-
-          await tx.orderItem.create({
-            data: {
-              orderId: newOrder.id,
-              productId: item.productId,
-              variantId: item.variantId,
-              name: variant?.name || product.name,
-              sku: variant?.sku || product.sku,
-              price,
-              quantity: item.quantity,
-              subtotal
-            }
-          });
-
-          // Handle inventory reservation
-          if (product.trackInventory) {
-            // Default to main warehouse if no location specified
-            const defaultLocationId = 'main-warehouse'; // This should come from configuration
-            
-            try {
-              // Find inventory item
-              const inventoryItem = await tx.inventory_items.findFirst({
-                where: {
-                  product_id: item.productId,
-                  location_id: defaultLocationId
-                }
-              });
-
-              if (!inventoryItem) {
-                throw new ApiError(`No inventory found for product ${product.name}`, 400, 'NO_INVENTORY');
-              }
+        await tx.orderItem.createMany({
+          data: items.map(item => ({
+            orderId: newOrder.id,
+            productId: item.productId,
+            variantId: item.variantId,
+            name: item.name,
+            sku: item.sku,
+            price: item.price,
+            quantity: item.quantity,
+            subtotal: item.price * item.quantity
+          }))
+        });
 
-              // Check current reservations for this product
-              const currentReservations = await tx.inventory_reservations.aggregate({
-                where: {
-                  product_id: item.productId
-                },
-                _sum: { quantity: true }
-              });
-
-              const reservedQuantity = currentReservations._sum.quantity || 0;
-              const availableQuantity = inventoryItem.quantity - reservedQuantity;
-
-              if (item.quantity > availableQuantity) {
-                throw new ApiError(
-                  `Insufficient stock for ${product.name}. Available: ${availableQuantity}, Requested: ${item.quantity}`,
-                  400,
-                  'INSUFFICIENT_STOCK'
-                );
-              }
-
-              // Create inventory reservation
-              await tx.inventory_reservations.create({
-                data: {
-                  id: nanoid(),
-                  product_id: item.productId,
-                  order_id: newOrder.id,
-                  quantity: item.quantity
-                }
-              });
-
-              // Create inventory movement record
-              await tx.inventory_movements.create({
-                data: {
-                  id: nanoid(),
-                  product_id: item.productId,
-                  inventory_item_id: inventoryItem.id,
-                  type: 'RESERVED',
-                  quantity: item.quantity
-                }
-              });
-
-            } catch (inventoryError) {
-              this.logger.error({ 
-                error: inventoryError, 
-                productId: item.productId,
-                quantity: item.quantity 
-              }, 'Failed to reserve inventory for order item');
-              
-              // Re-throw inventory errors to cancel the order
-              throw inventoryError;
-            }
-          }
-        }
+        // Handle inventory reservation
+        await this.reserveInventory(tx, newOrder.id, items);
 
         // Create initial order history
         await tx.orderHistory.create({
@@ -292,24 +220,35 @@ export class OrderService extends CrudService<Order> {
           }
         });
 
+        await recordSearchChange(tx, 'orders', newOrder.id);
+
         return newOrder;
       });
 
-      // Update search index
-      await updateSearchIndex('orders', {
-        id: order.id,
-        orderNumber: order.orderNumber,
-        customerId: order.userId,
-        customerEmail: user.email,
-        customerName: `${user.firstName || ''} ${user.lastName || ''}`.trim(),
-        status: order.status,
-        totalAmount: Number(order.totalAmount),
-        currency: order.currency,
-        createdAt: order.createdAt.getTime()
-      });
+      // Counted in Redis only once the order has committed; an order whose
+      // coupon is refused at this point is cancelled rather than kept at the
+      // discounted price
+      if (calculations.coupon) {
+        const rejection = await this.app.promotionEngine
+          .redeemCoupon(calculations.coupon.rule, data.userId, order.id, calculations.coupon.amount)
+          .catch(error => {
+            this.logger.error({ error, orderId: order.id }, 'Failed to redeem coupon');
+            return { code: 'COUPON_REDEMPTION_FAILED', message: 'Failed to redeem coupon', statusCode: 500 };
+          });
+        if (rejection) {
+          await this.cancel(order.id, `Coupon ${calculations.coupon.rule.code} refused: ${rejection.message}`);
+          return {
+            success: false,
+            error: new ApiError(rejection.message, rejection.statusCode, rejection.code)
+          };
+        }
+      }
+
+      await this.app.searchIndex.notify();
+      await this.fraudService.recordOrder(order);
 
       // Clear user's cart cache
-      await cache.invalidatePattern(`cart:${data.userId}:*`);
+      await cache.del(cartSnapshotKey(data.userId));
 
       // Emit order created event
       this.app.events?.emit('order.created', {
@@ -401,22 +340,12 @@ export class OrderService extends CrudService<Order> {
           }
         }
 
+        await recordSearchChange(tx, 'orders', order.id);
+
         return order;
       });
 
-      // Update search index
-      const user = await this.userRepo.findById(updatedOrder.userId);
-      await updateSearchIndex('orders', {
-        id: updatedOrder.id,
-        orderNumber: updatedOrder.orderNumber,
-        customerId: updatedOrder.userId,
-        customerEmail: user?.email || '',
-        customerName: `${user?.firstName || ''} ${user?.lastName || ''}`.trim(),
-        status: updatedOrder.status,
-        totalAmount: Number(updatedOrder.totalAmount),
-        currency: updatedOrder.currency,
-        createdAt: updatedOrder.createdAt.getTime()
-      });
+      await this.app.searchIndex.notify();
 
       // Clear cache
       await cache.invalidatePattern(`orders:${updatedOrder.id}:*`);
@@ -753,7 +682,7 @@ export class OrderService extends CrudService<Order> {
     }
   }
 
-  private async validateOrderItems(items: CreateOrderData['items']): Promise<ServiceResult<void>> {
+  private async validateOrderItems(items: CreateOrderData['items']): Promise<ServiceResult<ResolvedOrderItem[]>> {
     if (!items.length) {
       return {
         success: false,
@@ -765,19 +694,32 @@ export class OrderService extends CrudService<Order> {
       };
     }
 
-    for (const item of items) {
-      if (item.quantity <= 0) {
-        return {
-          success: false,
-          error: {
-            code: 'INVALID_QUANTITY',
-            message: 'Item quantity must be positive',
-            statusCode: 400
-          }
-        };
-      }
+    if (items.some(item => item.quantity <= 0)) {
+      return {
+        success: false,
+        error: {
+          code: 'INVALID_QUANTITY',
+          message: 'Item quantity must be positive',
+          statusCode: 400
+        }
+      };
+    }
 
-      const product = await this.productRepo.findById(item.productId);
+    // Read straight from the database: prices charged must be current
+    const productIds = [...new Set(items.map(item => item.productId))];
+    const variantIds = [...new Set(items.filter(item => item.variantId).map(item => item.variantId!))];
+    const [products, variants] = await Promise.all([
+      this.prisma.product.findMany({ where: { id: { in: productIds } } }),
+      variantIds.length > 0
+        ? this.prisma.productVariant.findMany({ where: { id: { in: variantIds } } })
+        : Promise.resolve([])
+    ]);
+    const productsById = new Map(products.map(product => [product.id, product]));
+    const variantsById = new Map(variants.map(variant => [variant.id, variant]));
+
+    const resolved: ResolvedOrderItem[] = [];
+    for (const item of items) {
+      const product = productsById.get(item.productId);
       if (!product || product.status !== ProductStatus.PUBLISHED) {
         return {
           success: false,
@@ -789,8 +731,8 @@ export class OrderService extends CrudService<Order> {
         };
       }
 
+      const variant = item.variantId ? variantsById.get(item.variantId) : undefined;
       if (item.variantId) {
-        const variant = await this.productVariantRepo.findById(item.variantId);
         if (!variant) {
           return {
             success: false,
@@ -814,42 +756,133 @@ export class OrderService extends CrudService<Order> {
           };
         }
       }
+
+      resolved.push({
+        productId: item.productId,
+        variantId: item.variantId,
+        quantity: item.quantity,
+        price: Number(item.price || variant?.price || product.price),
+        name: variant?.name || product.name,
+        sku: variant?.sku || product.sku,
+        trackInventory: product.trackInventory,
+        sellerId: product.sellerId,
+        categoryId: product.categoryId
+      });
     }
 
-    return { success: true, data: undefined };
+    return { success: true, data: resolved };
   }
 
-  private async calculateOrderTotals(
-    items: CreateOrderData['items'],
-    shippingMethod: ShippingMethod,
-    couponCode?: string,
-    _currency: Currency = Currency.USD
-  ): Promise<OrderCalculations> {
-    let subtotal = 0;
+  /**
+   * Reserve stock for every tracked line in a fixed number of statements:
+   * the inventory rows are locked in one query, so concurrent checkouts of
+   * the same products queue up instead of both passing the check, and the
+   * reservations and movements are inserted with createMany.
+   */
+  private async reserveInventory(
+    tx: Prisma.TransactionClient,
+    orderId: string,
+    items: ResolvedOrderItem[]
+  ): Promise<void> {
+    const requested = new Map<string, { name: string; quantity: number }>();
+    for (const item of items.filter(item => item.trackInventory)) {
+      const line = requested.get(item.productId);
+      requested.set(item.productId, { name: line?.name ?? item.name, quantity: (line?.quantity ?? 0) + item.quantity });
+    }
+    if (requested.size === 0) {
+      return;
+    }
 
-    // Calculate subtotal
-    for (const item of items) {
-      const product = await this.productRepo.findById(item.productId);
-      const variant = item.variantId 
-        ? await this.productVariantRepo.findById(item.variantId)
-        : null;
+    const productIds = [...requested.keys()];
+    const inventoryItems = await tx.$queryRaw<Array<{ id: string; product_id: string; quantity: number }>>`
+      SELECT "id", "product_id", "quantity"
+      FROM "inventory_items"
+      WHERE "location_id" = ${DEFAULT_STOCK_LOCATION} AND "product_id" IN (${Prisma.join(productIds)})
+      ORDER BY "product_id", "id"
+      FOR UPDATE
+    `;
+    const reservations = await tx.inventory_reservations.groupBy({
+      by: ['product_id'],
+      where: { product_id: { in: productIds } },
+      _sum: { quantity: true }
+    });
+
+    const inventoryByProduct = new Map<string, { id: string; quantity: number }>();
+    for (const row of inventoryItems) {
+      if (!inventoryByProduct.has(row.product_id)) {
+        inventoryByProduct.set(row.product_id, row);
+      }
+    }
+    const reservedByProduct = new Map(reservations.map(row => [row.product_id, row._sum.quantity || 0]));
 
-      // SECURITY FIX: Validate that variant belongs to the product
-      if (variant && variant.productId !== item.productId) {
+    for (const [productId, line] of requested) {
+      const inventoryItem = inventoryByProduct.get(productId);
+      if (!inventoryItem) {
+        this.logger.error({ productId, quantity: line.quantity }, 'Failed to reserve inventory for order item');
+        throw new ApiError(`No inventory found for product ${line.name}`, 400, 'NO_INVENTORY');
+      }
+
+      const availableQuantity = inventoryItem.quantity - (reservedByProduct.get(productId) ?? 0);
+      if (line.quantity > availableQuantity) {
+        this.logger.error({ productId, quantity: line.quantity, availableQuantity }, 'Failed to reserve inventory for order item');
         throw new ApiError(
-          `Product variant ${item.variantId} does not belong to product ${item.productId}`,
+          `Insufficient stock for ${line.name}. Available: ${availableQuantity}, Requested: ${line.quantity}`,
           400,
-          'INVALID_PRODUCT_VARIANT'
+          'INSUFFICIENT_STOCK'
         );
       }
+    }
 
-      const price = item.price || variant?.price || product!.price;
-      subtotal += Number(price) * item.quantity;
+    await tx.inventory_reservations.createMany({
+      data: productIds.map(productId => ({
+        id: nanoid(),
+        product_id: productId,
+        order_id: orderId,
+        quantity: requested.get(productId)!.quantity
+      }))
+    });
+
+    await tx.inventory_movements.createMany({
+      data: productIds.map(productId => ({
+        id: nanoid(),
+        product_id: productId,
+        inventory_item_id: inventoryByProduct.get(productId)!.id,
+        type: 'RESERVED',
+        quantity: requested.get(productId)!.quantity
+      }))
+    });
+  }
+
+  private async calculateOrderTotals(
+    userId: string,
+    items: ResolvedOrderItem[],
+    shippingMethod: ShippingMethod,
+    couponCode?: string,
+    _currency: Currency = Currency.USD
+  ): Promise<OrderCalculations> {
+    // Calculate subtotal
+    const subtotal = items.reduce((sum, item) => sum + item.price * item.quantity, 0);
+
+    // Live promotions and the coupon, priced from the in-memory rules
+    const promotions = await this.app.promotionEngine.evaluate({
+      lines: items.map(item => ({
+        productId: item.productId,
+        categoryId: item.categoryId,
+        sellerId: item.sellerId,
+        quantity: item.quantity,
+        price: item.price
+      })),
+      subtotal
+    }, { userId, couponCode });
+    if (promotions.couponError) {
+      const { message, statusCode, code } = promotions.couponError;
+      throw new ApiError(message, statusCode, code);
     }
+    const discountAmount = Math.min(promotions.discountTotal, subtotal);
 
     // Calculate tax (simplified - would normally be based on location)
     const taxRate = 0.08; // 8% tax rate
-    const taxAmount = subtotal * taxRate;
+    const taxAmount = (subtotal - discountAmount) * taxRate;
 
     // Calculate shipping
     let shippingAmount = 0;
@@ -865,22 +898,23 @@ export class OrderService extends CrudService<Order> {
         break;
     }
 
-    // Calculate discount (simplified)
-    let discountAmount = 0;
-    if (couponCode) {
-      // This would normally validate the coupon and calculate discount
-      // For now, just a placeholder
-      discountAmount = 0;
+    if (promotions.freeShipping) {
+      shippingAmount = 0;
     }
 
     const totalAmount = subtotal + taxAmount + shippingAmount - discountAmount;
 
+    const rule = promotions.coupon && couponCode
+      ? (await this.app.promotionEngine.getRules()).getCoupon(couponCode)
+      : undefined;
+
     return {
       subtotal,
       taxAmount,
       shippingAmount,
       discountAmount,
-      totalAmount
+      totalAmount,
+      coupon: rule && promotions.coupon ? { rule, amount: promotions.coupon.amount } : undefined
     };
   }
 
@@ -229,6 +229,11 @@ export class PaymentService extends CrudService<
           PaymentStatus.FAILED,
           result.error
         );
+
+        const order = await this.orderRepo.findById(payment.orderId);
+        if (order) {
+          await this.app.fraudService.recordFailedPayment(order.userId, payment.id);
+        }
         
         return {
           success: false,
@@ -995,7 +1000,7 @@ export class PaymentService extends CrudService<
     const paymentId = paymentIntent.metadata.paymentId;
     if (!paymentId) return;
 
-    await this.prisma.$transaction(async (tx) => {
+    const failedOrder = await this.prisma.$transaction(async (tx) => {
       // Update payment status
       await tx.payment.update({
         where: { id: paymentId },
@@ -1015,19 +1020,24 @@ export class PaymentService extends CrudService<
         where: { id: paymentId }
       });
 
-      if (payment) {
-        await tx.order.update({
-          where: { id: payment.orderId },
-          data: {
-            paymentStatus: PaymentStatus.FAILED
-          }
-        });
+      if (!payment) return null;
 
-        // Release inventory reservations
-        await this.releaseOrderInventory(tx, payment.orderId);
-      }
+      const order = await tx.order.update({
+        where: { id: payment.orderId },
+        data: {
+          paymentStatus: PaymentStatus.FAILED
+        }
+      });
+
+      // Release inventory reservations
+      await this.releaseOrderInventory(tx, payment.orderId);
+      return order;
     });
 
+    if (failedOrder) {
+      await this.app.fraudService.recordFailedPayment(failedOrder.userId, paymentId);
+    }
+
     this.logger.info({ paymentId, paymentIntentId: paymentIntent.id }, 'Payment intent failed webhook processed');
   }
 
@@ -2,7 +2,7 @@ import { ProductImage, Prisma } from '@prisma/client';
 import { ServiceResult, PaginatedResult } from '../types';
 import { ApiError } from '../utils/errors';
 import { logger } from '../utils/logger';
-import { ProductImageRepository } from '../repositories';
+import { ProductImageRepository } from '../repositories/product-image.repository';
 import { cacheGet, cacheSet } from '../config/redis';
 import { nanoid } from 'nanoid';
 
@@ -472,8 +472,9 @@ export class ProductImageService {
   async reorderImages(productId: string, imagePositions: Array<{ id: string; position: number }>): Promise<ServiceResult<void>> {
     try {
       // PRODUCTION: Validate all images belong to the product
-      for (const item of imagePositions) {
-        const image = await this.imageRepo.findById(item.id);
+      const images = await this.imageRepo.findByIds(imagePositions.map(item => item.id));
+      for (const [i, item] of imagePositions.entries()) {
+        const image = images[i];
         if (!image || image.productId !== productId) {
           return {
             success: false,
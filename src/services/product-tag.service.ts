@@ -3,7 +3,7 @@ import { FastifyInstance } from 'fastify';
 import { CrudService } from './crud.service';
 import { ServiceResult, PaginatedResult } from '../types';
 import { ApiError } from '../utils/errors';
-import { cache } from '../utils/cache';
+import { cache, cacheTags } from '../utils/cache';
 import { nanoid } from 'nanoid';
 
 interface CreateProductTagData {
@@ -100,8 +100,7 @@ export class ProductTagService extends CrudService<ProductTag> {
       });
 
       // Clear caches
-      await cache.invalidatePattern(`product-tags:*`);
-      await cache.invalidatePattern(`products:${data.productId}:*`);
+      await cache.invalidateTags([cacheTags.productTags(), cacheTags.product(data.productId)]);
 
       // Emit event
       this.app.events?.emit('product.tag.added', {
@@ -145,8 +144,7 @@ export class ProductTagService extends CrudService<ProductTag> {
       });
 
       // Clear caches
-      await cache.invalidatePattern(`product-tags:*`);
-      await cache.invalidatePattern(`products:${productId}:*`);
+      await cache.invalidateTags([cacheTags.productTags(), cacheTags.product(productId)]);
 
       // Emit event
       this.app.events?.emit('product.tag.removed', {
@@ -180,7 +178,7 @@ export class ProductTagService extends CrudService<ProductTag> {
         orderBy: { tag: 'asc' }
       });
 
-      await cache.set(cacheKey, tags, { ttl: 600 });
+      await cache.set(cacheKey, tags, { ttl: 600, tags: [cacheTags.productTags(), cacheTags.product(productId)] });
       return { success: true, data: tags };
     } catch (error) {
       this.logger.error({ error, productId }, 'Failed to get product tags');
@@ -354,7 +352,7 @@ export class ProductTagService extends CrudService<ProductTag> {
         trending: trendingTags.has(tagCount.tag)
       }));
 
-      await cache.set(cacheKey, result, { ttl: 3600 });
+      await cache.set(cacheKey, result, { ttl: 3600, tags: [cacheTags.productTags()] });
       return { success: true, data: result };
     } catch (error) {
       this.logger.error({ error }, 'Failed to get popular tags');
@@ -482,7 +480,7 @@ export class ProductTagService extends CrudService<ProductTag> {
         }))
       };
 
-      await cache.set(cacheKey, stats, { ttl: 3600 });
+      await cache.set(cacheKey, stats, { ttl: 3600, tags: [cacheTags.productTags()] });
       return { success: true, data: stats };
     } catch (error) {
       this.logger.error({ error, tag }, 'Failed to get tag stats');
@@ -581,7 +579,7 @@ export class ProductTagService extends CrudService<ProductTag> {
         totalProducts
       };
 
-      await cache.set(cacheKey, tagCloud, { ttl: 3600 });
+      await cache.set(cacheKey, tagCloud, { ttl: 3600, tags: [cacheTags.productTags()] });
       return { success: true, data: tagCloud };
     } catch (error) {
       this.logger.error({ error }, 'Failed to generate tag cloud');
@@ -673,8 +671,7 @@ export class ProductTagService extends CrudService<ProductTag> {
 
       // Clear caches
       if (added > 0) {
-        await cache.invalidatePattern(`product-tags:*`);
-        await cache.invalidatePattern(`products:${productId}:*`);
+        await cache.invalidateTags([cacheTags.productTags(), cacheTags.product(productId)]);
       }
 
       return {
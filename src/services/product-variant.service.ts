@@ -2,7 +2,7 @@ import { ProductVariant, Prisma } from '@prisma/client';
 import { ServiceResult, PaginatedResult } from '../types';
 import { ApiError } from '../utils/errors';
 import { logger } from '../utils/logger';
-import { ProductVariantRepository } from '../repositories';
+import { ProductVariantRepository } from '../repositories/product-variant.repository';
 import { cacheGet, cacheSet } from '../config/redis';
 import { nanoid } from 'nanoid';
 
@@ -2,15 +2,14 @@ import { Product, Prisma, Currency, ProductStatus } from '@prisma/client';
 import { FastifyInstance } from 'fastify';
 import { CrudService } from './crud.service';
 import { ServiceResult, PaginatedResult } from '../types';
-import { cache } from '../utils/cache';
+import { cache, cacheKeys, cacheTags } from '../utils/cache';
 import { ApiError } from '../utils/errors';
 // import { uploadToS3, deleteFromS3, generateImageVariants } from '../utils/storage';
-import { updateSearchIndex, removeFromSearchIndex } from '../utils/search';
-import { searchProducts } from '../utils/search';
-import { 
-  ProductRepository, 
-  ProductImageRepository
-} from '../repositories';
+import { recordSearchChange, searchProducts } from '../utils/search';
+import { SEARCH_CACHE_TAG, normalizeSearchQuery, productSearchTag } from '../utils/search-cache';
+import { config } from '../config/environment';
+import { ProductRepository } from '../repositories/product.repository';
+import { ProductImageRepository } from '../repositories/product-image.repository';
 
 interface CreateProductData {
   sellerId: string;
@@ -96,6 +95,9 @@ interface ProductSearchParams {
 //   };
 // }
 
+// Searches currently running, keyed by cache key
+const searchesInFlight = new Map<string, Promise<PaginatedResult<Product>>>();
+
 export class ProductService extends CrudService<Product, any, any> {
   imageRepo: ProductImageRepository;
   productRepo: ProductRepository;
@@ -211,21 +213,12 @@ export class ProductService extends CrudService<Product, any, any> {
           }
         }
 
+        await recordSearchChange(tx, 'products', product.id);
+
         return product;
       });
 
-      // Update search index
-      try {
-        await updateSearchIndex('products', product);
-      } catch (searchError) {
-        this.logger.warn({ 
-          err: searchError, 
-          productId: product.id 
-        }, 'Failed to update search index, product still created successfully');
-      }
-
-      // Clear cache
-      await cache.invalidatePattern('products:*');
+      await this.app.searchIndex.notify();
 
       this.logger.info({ productId: product.id }, 'Product created successfully');
 
@@ -312,22 +305,15 @@ export class ProductService extends CrudService<Product, any, any> {
           }
         }
 
+        await recordSearchChange(tx, 'products', product.id);
+
         return product;
       });
 
-      // Update search index
-      try {
-        await updateSearchIndex('products', product);
-      } catch (searchError) {
-        this.logger.warn({ 
-          err: searchError, 
-          productId: product.id 
-        }, 'Failed to update search index, product still updated successfully');
-      }
+      await this.app.searchIndex.notify();
 
       // Clear cache
-      await cache.invalidatePattern(`products:${product.id}:*`);
-      await cache.invalidatePattern('products:list:*');
+      await cache.invalidateTags([cacheTags.product(product.id)]);
 
       this.logger.info({ productId: product.id }, 'Product updated successfully');
 
@@ -375,27 +361,21 @@ export class ProductService extends CrudService<Product, any, any> {
         };
       }
 
-      // Soft delete product by updating status
-      await this.prisma.product.update({
-        where: { id: productId },
-        data: {
-          status: 'ARCHIVED'
-        }
+      // Soft delete product by updating status, and drop it from search
+      await this.prisma.$transaction(async (tx) => {
+        await tx.product.update({
+          where: { id: productId },
+          data: {
+            status: 'ARCHIVED'
+          }
+        });
+        await recordSearchChange(tx, 'products', productId, 'DELETE');
       });
 
-      // Remove from search index
-      try {
-        await removeFromSearchIndex('products', productId);
-      } catch (searchError) {
-        this.logger.warn({ 
-          err: searchError, 
-          productId 
-        }, 'Failed to remove from search index, product still deleted successfully');
-      }
+      await this.app.searchIndex.notify();
 
       // Clear cache
-      await cache.invalidatePattern(`products:${productId}:*`);
-      await cache.invalidatePattern('products:list:*');
+      await cache.invalidateTags([cacheTags.product(productId)]);
 
       this.logger.info({ productId }, 'Product deleted successfully');
 
@@ -409,154 +389,219 @@ export class ProductService extends CrudService<Product, any, any> {
     }
   }
 
-  async search(params: ProductSearchParams): Promise<ServiceResult<PaginatedResult<Product>>> {
+  /**
+   * Search products. Results are cached under the canonical form of the
+   * request and tagged with the products they contain, so the search
+   * indexer can drop exactly the pages an update affects. First pages of
+   * text searches are logged unless log is false, as for cache warmups.
+   */
+  async search(
+    params: ProductSearchParams,
+    options: { log?: boolean } = {}
+  ): Promise<ServiceResult<PaginatedResult<Product>>> {
     try {
-      const cacheKey = `products:search:${JSON.stringify(params)}`;
-      const cached = await cache.get<PaginatedResult<Product>>(cacheKey);
-      if (cached) {
-        return { success: true, data: cached };
+      const request: ProductSearchParams = {
+        ...params,
+        query: normalizeSearchQuery(params.query),
+        page: params.page || 1,
+        limit: params.limit || 20,
+        sortBy: params.sortBy || 'relevance'
+      };
+      const cacheKey = cacheKeys.search({ ...request });
+
+      let result = await cache.get<PaginatedResult<Product>>(cacheKey);
+      if (!result) {
+        // Concurrent misses on a head query share one search
+        let pending = searchesInFlight.get(cacheKey);
+        if (!pending) {
+          pending = this.runSearch(request, cacheKey).finally(() => searchesInFlight.delete(cacheKey));
+          searchesInFlight.set(cacheKey, pending);
+        }
+        result = await pending;
       }
 
-      let result: PaginatedResult<Product>;
-
-      try {
-        // Try Typesense search first
-        const searchFilters = {
-          categories: params.categoryIds,
-          priceMin: params.minPrice,
-          priceMax: params.maxPrice,
-          tags: params.tags,
-          inStock: params.inStock
-        };
-
-        // Map sortBy parameter to Typesense format
-        let sortBy = '_text_match:desc';
-        if (params.sortBy) {
-          switch (params.sortBy) {
-            case 'price_asc':
-              sortBy = 'price:asc';
-              break;
-            case 'price_desc':
-              sortBy = 'price:desc';
-              break;
-            case 'newest':
-              sortBy = 'created_at:desc';
-              break;
-            case 'popular':
-              sortBy = 'total_reviews:desc,average_rating:desc';
-              break;
-            default:
-              sortBy = '_text_match:desc';
-          }
-        }
+      if (options.log !== false && request.page === 1 && request.query) {
+        this.prisma.searchLog.create({
+          data: { query: request.query, results: result.meta.total ?? 0 }
+        }).catch(error => this.logger.warn({ error }, 'Failed to log search'));
+      }
 
-        const searchResult = await searchProducts(
-          params.query || '*',
-          searchFilters,
-          params.page || 1,
-          params.limit || 20,
-          sortBy
-        );
+      return { success: true, data: result };
+    } catch (error) {
+      this.logger.error({ error }, 'Failed to search products');
+      return {
+        success: false,
+        error: error instanceof ApiError ? error : new ApiError('Failed to search products', 500)
+      };
+    }
+  }
 
-        // Extract products from search hits
-        const products = searchResult.hits.map(hit => hit.document) as Product[];
+  /**
+   * Pre-compute the most frequent recent searches, e.g. after a deploy or
+   * a reindex. Returns the number of queries warmed.
+   */
+  async warmSearchCache(
+    limit: number = config.cache.search.warmupQueries,
+    days: number = config.cache.search.warmupDays
+  ): Promise<number> {
+    const since = new Date(Date.now() - days * 24 * 60 * 60 * 1000);
+    const top = await this.prisma.searchLog.groupBy({
+      by: ['query'],
+      where: { createdAt: { gte: since } },
+      _count: { query: true },
+      orderBy: { _count: { query: 'desc' } },
+      take: limit
+    });
+
+    let warmed = 0;
+    for (const { query } of top) {
+      // Not logged, or every warmup would count the top queries again
+      const result = await this.search({ query }, { log: false });
+      if (result.success) {
+        warmed++;
+      }
+    }
 
-        result = {
-          data: products,
-          meta: {
-            total: searchResult.found,
-            page: params.page || 1,
-            limit: params.limit || 20,
-            totalPages: Math.ceil(searchResult.found / (params.limit || 20))
-          }
-        };
+    this.logger.info({ queries: top.length, warmed }, 'Search cache warmed');
+    return warmed;
+  }
 
-        this.logger.debug({ 
-          query: params.query, 
-          found: searchResult.found,
-          searchTime: searchResult.search_time_ms 
-        }, 'Typesense search completed');
+  private async runSearch(params: ProductSearchParams, cacheKey: string): Promise<PaginatedResult<Product>> {
+    let result: PaginatedResult<Product>;
 
-      } catch (searchError) {
-        // Fallback to database search if Typesense fails
-        this.logger.warn({ 
-          error: searchError,
-          query: params.query 
-        }, 'Typesense search failed, falling back to database search');
+    try {
+      // Try Typesense search first
+      const searchFilters = {
+        categories: params.categoryIds,
+        priceMin: params.minPrice,
+        priceMax: params.maxPrice,
+        tags: params.tags,
+        inStock: params.inStock
+      };
 
-        const where: Prisma.ProductWhereInput = {};
-        
-        if (params.query) {
-          where.OR = [
-            { name: { contains: params.query, mode: 'insensitive' } },
-            { description: { contains: params.query, mode: 'insensitive' } }
-          ];
-        }
-        
-        if (params.categoryIds?.length) {
-          where.categoryId = { in: params.categoryIds };
-        }
-        
-        if (params.minPrice || params.maxPrice) {
-          where.price = {};
-          if (params.minPrice) where.price.gte = params.minPrice;
-          if (params.maxPrice) where.price.lte = params.maxPrice;
+      // Map sortBy parameter to Typesense format
+      let sortBy = '_text_match:desc';
+      if (params.sortBy) {
+        switch (params.sortBy) {
+          case 'price_asc':
+            sortBy = 'price:asc';
+            break;
+          case 'price_desc':
+            sortBy = 'price:desc';
+            break;
+          case 'newest':
+            sortBy = 'created_at:desc';
+            break;
+          case 'popular':
+            sortBy = 'total_reviews:desc,average_rating:desc';
+            break;
+          default:
+            sortBy = '_text_match:desc';
         }
+      }
 
-        if (params.isActive !== undefined) {
-          where.status = params.isActive ? ProductStatus.PUBLISHED : { not: ProductStatus.PUBLISHED };
+      const searchResult = await searchProducts(
+        params.query || '*',
+        searchFilters,
+        params.page || 1,
+        params.limit || 20,
+        sortBy
+      );
+
+      // Extract products from search hits
+      const products = searchResult.hits.map(hit => hit.document) as Product[];
+
+      result = {
+        data: products,
+        meta: {
+          total: searchResult.found,
+          page: params.page || 1,
+          limit: params.limit || 20,
+          totalPages: Math.ceil(searchResult.found / (params.limit || 20))
         }
-        
-        // Apply sorting for database search
-        let orderBy: Prisma.ProductOrderByWithRelationInput = { createdAt: 'desc' };
-        if (params.sortBy) {
-          switch (params.sortBy) {
-            case 'price_asc':
-              orderBy = { price: 'asc' };
-              break;
-            case 'price_desc':
-              orderBy = { price: 'desc' };
-              break;
-            case 'newest':
-              orderBy = { createdAt: 'desc' };
-              break;
-            case 'popular':
-              orderBy = { name: 'asc' }; // Fallback since we don't have review counts in database
-              break;
-          }
-        }
-        
-        const products = await this.productRepo.findMany({
-          where,
-          orderBy,
-          take: params.limit || 20,
-          skip: ((params.page || 1) - 1) * (params.limit || 20)
-        });
-        
-        const total = await this.productRepo.count({ where });
+      };
 
-        result = {
-          data: products,
-          meta: {
-            total: total,
-            page: params.page || 1,
-            limit: params.limit || 20,
-            totalPages: Math.ceil(total / (params.limit || 20))
-          }
-        };
-      }
+      this.logger.debug({ 
+        query: params.query, 
+        found: searchResult.found,
+        searchTime: searchResult.search_time_ms 
+      }, 'Typesense search completed');
 
-      // Cache for 5 minutes
-      await cache.set(cacheKey, result, { ttl: 300 });
+    } catch (searchError) {
+      // Fallback to database search if Typesense fails
+      this.logger.warn({ 
+        error: searchError,
+        query: params.query 
+      }, 'Typesense search failed, falling back to database search');
 
-      return { success: true, data: result };
-    } catch (error) {
-      this.logger.error({ error }, 'Failed to search products');
-      return {
-        success: false,
-        error: error instanceof ApiError ? error : new ApiError('Failed to search products', 500)
+      const where: Prisma.ProductWhereInput = {};
+      
+      if (params.query) {
+        where.OR = [
+          { name: { contains: params.query, mode: 'insensitive' } },
+          { description: { contains: params.query, mode: 'insensitive' } }
+        ];
+      }
+      
+      if (params.categoryIds?.length) {
+        where.categoryId = { in: params.categoryIds };
+      }
+      
+      if (params.minPrice || params.maxPrice) {
+        where.price = {};
+        if (params.minPrice) where.price.gte = params.minPrice;
+        if (params.maxPrice) where.price.lte = params.maxPrice;
+      }
+
+      if (params.isActive !== undefined) {
+        where.status = params.isActive ? ProductStatus.PUBLISHED : { not: ProductStatus.PUBLISHED };
+      }
+      
+      // Apply sorting for database search
+      let orderBy: Prisma.ProductOrderByWithRelationInput = { createdAt: 'desc' };
+      if (params.sortBy) {
+        switch (params.sortBy) {
+          case 'price_asc':
+            orderBy = { price: 'asc' };
+            break;
+          case 'price_desc':
+            orderBy = { price: 'desc' };
+            break;
+          case 'newest':
+            orderBy = { createdAt: 'desc' };
+            break;
+          case 'popular':
+            orderBy = { name: 'asc' }; // Fallback since we don't have review counts in database
+            break;
+        }
+      }
+      
+      const products = await this.productRepo.findMany({
+        where,
+        orderBy,
+        take: params.limit || 20,
+        skip: ((params.page || 1) - 1) * (params.limit || 20)
+      });
+      
+      const total = await this.productRepo.count({ where });
+
+      result = {
+        data: products,
+        meta: {
+          total: total,
+          page: params.page || 1,
+          limit: params.limit || 20,
+          totalPages: Math.ceil(total / (params.limit || 20))
+        }
       };
     }
+
+    await cache.set(cacheKey, result, {
+      ttl: config.cache.search.ttl,
+      tags: [SEARCH_CACHE_TAG, ...result.data.map(product => productSearchTag(product.id))]
+    });
+
+    return result;
   }
 
   // PRODUCTION: Review Aggregation & Analytics
@@ -1044,7 +1089,7 @@ export class ProductService extends CrudService<Product, any, any> {
         averageRating: Math.round(averageRating * 100) / 100,
         totalReviews,
         lastUpdated: new Date()
-      }, { ttl: 3600 }); // Cache for 1 hour
+      }, { ttl: 3600, tags: [cacheTags.product(productId)] }); // Cache for 1 hour
 
       return {
         success: true,
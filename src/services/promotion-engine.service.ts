@@ -0,0 +1,495 @@
+import { PrismaClient, Promotion } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { logger } from '../utils/logger';
+import { tryLock, unlock } from '../utils/cache';
+import {
+  CartEvaluation,
+  CompiledCoupon,
+  CouponRejection,
+  CouponUsage,
+  PromotionCart,
+  PromotionConditions,
+  PromotionRuleSet
+} from '../utils/promotion-rules';
+
+export interface PromotionEngineOptions {
+  interval?: number; // Milliseconds between coupon usage syncs
+  batchSize?: number; // Coupon uses written per transaction
+  refreshInterval?: number; // Seconds between full rule rebuilds
+}
+
+export interface CouponRedemption {
+  couponId: string;
+  code: string;
+  userId: string;
+  orderId: string;
+  discount: number;
+}
+
+export interface PromotionEngineStats {
+  coupons: number;
+  promotions: number;
+  version: number;
+  evaluations: number;
+  redeemed: number;
+  synced: number;
+  backlog: number; // Coupon uses not yet written to Postgres
+}
+
+// Bumped on every coupon or promotion write; nodes at another version rebuild
+const VERSION_KEY = 'promotions:version';
+const USES_KEY = 'coupon-usage:queue';
+const LOCK_KEY = 'coupon-usage:sync';
+const LOCK_TTL = 60000;
+
+// How often a node compares its rules with the Redis version
+const VERSION_CHECK_MS = 5000;
+
+// Batches written per sync run before yielding to the next tick
+const MAX_BATCHES = 20;
+
+const usageKey = (couponId: string) => `coupon-usage:${couponId}`;
+const ordersKey = (couponId: string) => `coupon-usage:${couponId}:orders`;
+const userField = (userId: string) => `u:${userId}`;
+
+// Seed a coupon's counters from Postgres once; later builds leave them alone
+const SEED_SCRIPT = `
+if redis.call('hsetnx', KEYS[1], 'seeded', 1) == 0 then
+  return 0
+end
+for i = 1, #ARGV, 2 do
+  redis.call('hset', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1`;
+
+// KEYS: usage hash, redeemed order set, use queue. ARGV: usage limit,
+// per-user limit (0 for none), user field, order id, queued use, coupon
+// end in ms. The order set only guards against redeeming twice while the
+// coupon can be redeemed, so it expires with the coupon. Returns the new
+// total, or -1 usage limit, -2 user limit, -3 already redeemed on this
+// order.
+const REDEEM_SCRIPT = `
+if redis.call('sismember', KEYS[2], ARGV[4]) == 1 then
+  return -3
+end
+local total = tonumber(redis.call('hget', KEYS[1], 'total') or '0')
+if tonumber(ARGV[1]) > 0 and total >= tonumber(ARGV[1]) then
+  return -1
+end
+if tonumber(ARGV[2]) > 0 and tonumber(redis.call('hget', KEYS[1], ARGV[3]) or '0') >= tonumber(ARGV[2]) then
+  return -2
+end
+redis.call('hincrby', KEYS[1], 'total', 1)
+redis.call('hincrby', KEYS[1], ARGV[3], 1)
+redis.call('sadd', KEYS[2], ARGV[4])
+redis.call('pexpireat', KEYS[2], ARGV[6])
+redis.call('rpush', KEYS[3], ARGV[5])
+return total + 1`;
+
+// KEYS: usage hash, redeemed order set. ARGV: user field, order id. Gives
+// back a use that never reached Postgres; a no-op once it was released.
+const RELEASE_SCRIPT = `
+if redis.call('srem', KEYS[2], ARGV[2]) == 0 then
+  return 0
+end
+redis.call('hincrby', KEYS[1], 'total', -1)
+if redis.call('hincrby', KEYS[1], ARGV[1], -1) <= 0 then
+  redis.call('hdel', KEYS[1], ARGV[1])
+end
+return 1`;
+
+/**
+ * Coupon and promotion evaluation without per-request queries.
+ *
+ * Active coupons and promotions are compiled into a PromotionRuleSet held
+ * by each node. Writers call invalidate(), which bumps a version in Redis
+ * and rebuilds locally; other nodes pick the version up within
+ * VERSION_CHECK_MS. Rules are also rebuilt every refreshInterval so
+ * products moving between targeted categories are seen.
+ *
+ * Coupon usage is counted in Redis: redemptions are checked against the
+ * limits and counted in one script, then queued and written to coupon_uses
+ * and coupons.usageCount in batches by one node at a time.
+ */
+export class PromotionEngine {
+  private rules: PromotionRuleSet | null = null;
+  private building: Promise<PromotionRuleSet> | null = null;
+  private timer: NodeJS.Timeout | null = null;
+  private running: Promise<void> | null = null;
+  private checkedAt = 0;
+  private builtAt = 0;
+  private readonly interval: number;
+  private readonly batchSize: number;
+  private readonly refreshInterval: number;
+  private stats = { evaluations: 0, redeemed: 0, synced: 0 };
+
+  constructor(
+    private prisma: PrismaClient,
+    private redis: Redis,
+    options: PromotionEngineOptions = {}
+  ) {
+    this.interval = options.interval ?? 2000;
+    this.batchSize = options.batchSize ?? 500;
+    this.refreshInterval = options.refreshInterval ?? 300;
+  }
+
+  start(): void {
+    if (this.timer) return;
+
+    this.timer = setInterval(() => {
+      this.tick();
+    }, this.interval);
+    this.timer.unref();
+    this.tick();
+  }
+
+  async stop(): Promise<void> {
+    if (this.timer) {
+      clearInterval(this.timer);
+      this.timer = null;
+    }
+    if (this.running) {
+      await this.running;
+    }
+  }
+
+  async getRules(): Promise<PromotionRuleSet> {
+    const rules = this.rules;
+    if (!rules) {
+      return this.load();
+    }
+
+    const now = Date.now();
+    if (now - this.checkedAt >= VERSION_CHECK_MS) {
+      this.checkedAt = now;
+      this.checkVersion(rules);
+    }
+    return rules;
+  }
+
+  /**
+   * Call after changing coupons or promotions
+   */
+  async invalidate(): Promise<void> {
+    try {
+      await this.redis.incr(VERSION_KEY);
+    } catch (error) {
+      logger.warn({ error }, 'Failed to bump promotion version, other nodes will not rebuild');
+    }
+    await this.build(false).catch(error => {
+      logger.error({ error }, 'Failed to rebuild promotion rules');
+    });
+  }
+
+  /**
+   * Price a cart against every live promotion and, optionally, a coupon.
+   * The only I/O is one Redis read of the coupon's usage counters.
+   */
+  async evaluate(cart: PromotionCart, options: { userId?: string; couponCode?: string } = {}): Promise<CartEvaluation> {
+    const rules = await this.getRules();
+    const coupon = options.couponCode ? rules.getCoupon(options.couponCode) : undefined;
+    const usage = coupon ? await this.getCouponUsage(coupon, options.userId) : undefined;
+
+    this.stats.evaluations++;
+    return rules.evaluate(cart, options.couponCode, usage);
+  }
+
+  /**
+   * Uses of a coupon so far, overall and by one user. Coupons without
+   * limits are not counted and need no read.
+   */
+  async getCouponUsage(coupon: CompiledCoupon, userId?: string): Promise<CouponUsage | undefined> {
+    if (!coupon.usageLimit && !coupon.userLimit) {
+      return undefined;
+    }
+
+    const [total, user] = await this.redis.hmget(usageKey(coupon.id), 'total', userField(userId ?? ''));
+    return { total: Number(total) || 0, user: userId ? Number(user) || 0 : 0 };
+  }
+
+  /**
+   * Count a coupon use against its limits and queue it for Postgres
+   */
+  async redeemCoupon(coupon: CompiledCoupon, userId: string, orderId: string, discount: number): Promise<CouponRejection | null> {
+    const use: CouponRedemption = { couponId: coupon.id, code: coupon.code, userId, orderId, discount };
+    const result = await this.redis.eval(
+      REDEEM_SCRIPT,
+      3,
+      usageKey(coupon.id),
+      ordersKey(coupon.id),
+      USES_KEY,
+      coupon.usageLimit ?? 0,
+      coupon.userLimit ?? 0,
+      userField(userId),
+      orderId,
+      JSON.stringify(use),
+      coupon.validTo
+    ) as number;
+
+    switch (result) {
+      case -1:
+        return { code: 'COUPON_USAGE_LIMIT', message: 'Coupon usage limit reached', statusCode: 400 };
+      case -2:
+        return { code: 'COUPON_USER_LIMIT', message: 'User has reached the usage limit for this coupon', statusCode: 400 };
+      case -3:
+        return { code: 'COUPON_ALREADY_APPLIED', message: 'Coupon already applied to this order', statusCode: 409 };
+    }
+
+    this.stats.redeemed++;
+    return null;
+  }
+
+  /**
+   * Write queued coupon uses to Postgres. Only one node runs at a time;
+   * returns the number of uses written.
+   */
+  async syncUsage(): Promise<number> {
+    const token = await tryLock(this.redis, LOCK_KEY, LOCK_TTL);
+    if (!token) {
+      return 0;
+    }
+
+    try {
+      let written = 0;
+      for (let batch = 0; batch < MAX_BATCHES; batch++) {
+        const entries = await this.redis.lrange(USES_KEY, 0, this.batchSize - 1);
+        if (entries.length === 0) {
+          break;
+        }
+
+        const { count, dropped } = await this.writeBatch(entries.map(entry => JSON.parse(entry) as CouponRedemption));
+        await this.releaseUses(dropped);
+        await this.redis.ltrim(USES_KEY, entries.length, -1);
+        written += count;
+
+        if (entries.length < this.batchSize) {
+          break;
+        }
+      }
+
+      this.stats.synced += written;
+      if (written > 0) {
+        logger.debug({ written }, 'Coupon usage synced');
+      }
+      return written;
+    } finally {
+      await unlock(this.redis, LOCK_KEY, token);
+    }
+  }
+
+  async getStats(): Promise<PromotionEngineStats> {
+    const backlog = await this.redis.llen(USES_KEY).catch(() => 0);
+    const size = this.rules?.size ?? { coupons: 0, promotions: 0 };
+    return { ...size, version: this.rules?.version ?? 0, ...this.stats, backlog };
+  }
+
+  private tick(): void {
+    if (this.running) return;
+
+    this.running = (async () => {
+      if (this.rules && Date.now() - this.builtAt >= this.refreshInterval * 1000) {
+        await this.build(false);
+      }
+      await this.syncUsage();
+    })()
+      .catch(error => {
+        logger.error({ error }, 'Promotion engine run failed');
+      })
+      .finally(() => {
+        this.running = null;
+      });
+  }
+
+  private load(): Promise<PromotionRuleSet> {
+    if (!this.building) {
+      this.building = this.build(false).finally(() => {
+        this.building = null;
+      });
+    }
+    return this.building;
+  }
+
+  private checkVersion(rules: PromotionRuleSet): void {
+    this.redis.get(VERSION_KEY)
+      .then(value => {
+        if ((Number(value) || 0) !== rules.version) {
+          return this.build(true);
+        }
+      })
+      .catch(error => {
+        logger.warn({ error }, 'Promotion version check failed');
+      });
+  }
+
+  /**
+   * The version is read before the rules, so a write that lands during the
+   * build is caught by the next version check. A build only replaces older
+   * rules unless forced by a version seen in Redis.
+   */
+  private async build(force: boolean): Promise<PromotionRuleSet> {
+    const version = await this.redis.get(VERSION_KEY)
+      .then(value => Number(value) || 0)
+      .catch(error => {
+        logger.warn({ error }, 'Failed to read promotion version');
+        return this.rules?.version ?? 0;
+      });
+
+    const now = new Date();
+    const [coupons, promotions] = await Promise.all([
+      this.prisma.coupon.findMany({ where: { validTo: { gte: now } } }),
+      this.prisma.promotion.findMany({ where: { isActive: true, validTo: { gte: now } } })
+    ]);
+
+    const categoryIds = new Set([
+      ...coupons.flatMap(coupon => coupon.categoryIds),
+      ...promotions.flatMap(promotion => conditionsOf(promotion).categoryIds ?? [])
+    ]);
+    const categoryProducts = new Map<string, string[]>();
+    if (categoryIds.size > 0) {
+      const products = await this.prisma.product.findMany({
+        where: { categoryId: { in: [...categoryIds] } },
+        select: { id: true, categoryId: true }
+      });
+      for (const product of products) {
+        const list = categoryProducts.get(product.categoryId);
+        if (list) {
+          list.push(product.id);
+        } else {
+          categoryProducts.set(product.categoryId, [product.id]);
+        }
+      }
+    }
+
+    await this.seedUsage(coupons.filter(coupon => coupon.usageLimit || coupon.userLimit));
+
+    const rules = new PromotionRuleSet(coupons, promotions, categoryProducts, version);
+    if (force || !this.rules || rules.version >= this.rules.version) {
+      this.rules = rules;
+      this.builtAt = Date.now();
+      logger.debug({ version, ...rules.size }, 'Promotion rules built');
+    }
+    return this.rules;
+  }
+
+  /**
+   * Counters of limited coupons start from the uses recorded in Postgres.
+   * Only coupons not seeded yet are read.
+   */
+  private async seedUsage(coupons: Array<{ id: string; usageCount: number }>): Promise<void> {
+    if (coupons.length === 0) {
+      return;
+    }
+
+    const pipeline = this.redis.pipeline();
+    for (const coupon of coupons) {
+      pipeline.hexists(usageKey(coupon.id), 'seeded');
+    }
+    const seeded = await pipeline.exec();
+    const unseeded = coupons.filter((_, i) => seeded?.[i]?.[1] !== 1);
+    if (unseeded.length === 0) {
+      return;
+    }
+
+    const uses = await this.prisma.couponUse.groupBy({
+      by: ['couponId', 'userId'],
+      where: { couponId: { in: unseeded.map(coupon => coupon.id) } },
+      _count: { _all: true }
+    });
+    const fields = new Map<string, Array<string | number>>();
+    for (const coupon of unseeded) {
+      fields.set(coupon.id, ['total', coupon.usageCount]);
+    }
+    for (const use of uses) {
+      fields.get(use.couponId)!.push(userField(use.userId), use._count._all);
+    }
+
+    const seeds = this.redis.pipeline();
+    for (const [couponId, values] of fields) {
+      seeds.eval(SEED_SCRIPT, 1, usageKey(couponId), ...values);
+    }
+    await seeds.exec();
+  }
+
+  // Uses that will never be written stop counting against the limits
+  private async releaseUses(uses: CouponRedemption[]): Promise<void> {
+    if (uses.length === 0) {
+      return;
+    }
+
+    const pipeline = this.redis.pipeline();
+    for (const use of uses) {
+      pipeline.eval(RELEASE_SCRIPT, 2, usageKey(use.couponId), ordersKey(use.couponId), userField(use.userId), use.orderId);
+    }
+    await pipeline.exec();
+  }
+
+  /**
+   * One transaction per batch. Uses already written are skipped, so a batch
+   * can be retried after a failure without counting twice. Uses whose
+   * coupon or order is gone are dropped and returned to be released.
+   */
+  private async writeBatch(uses: CouponRedemption[]): Promise<{ count: number; dropped: CouponRedemption[] }> {
+    return this.prisma.$transaction(async (tx) => {
+      const existing = await tx.couponUse.findMany({
+        where: { OR: uses.map(use => ({ couponId: use.couponId, orderId: use.orderId })) },
+        select: { couponId: true, orderId: true }
+      });
+      const written = new Set(existing.map(use => `${use.couponId}:${use.orderId}`));
+      const pending = uses.filter(use => !written.has(`${use.couponId}:${use.orderId}`));
+      if (pending.length === 0) {
+        return { count: 0, dropped: [] };
+      }
+
+      // A coupon deleted before its uses were written takes them with it,
+      // and a use whose order never committed is not a use
+      const [coupons, orders] = await Promise.all([
+        tx.coupon.findMany({
+          where: { id: { in: [...new Set(pending.map(use => use.couponId))] } },
+          select: { id: true }
+        }),
+        tx.order.findMany({
+          where: { id: { in: [...new Set(pending.map(use => use.orderId))] } },
+          select: { id: true }
+        })
+      ]);
+      const couponIds = new Set(coupons.map(coupon => coupon.id));
+      const orderIds = new Set(orders.map(order => order.id));
+      const orphaned = pending.filter(use => !couponIds.has(use.couponId) || !orderIds.has(use.orderId));
+      if (orphaned.length > 0) {
+        logger.warn({ uses: orphaned }, 'Dropping coupon uses for deleted coupons or unknown orders');
+      }
+      const fresh = pending.filter(use => couponIds.has(use.couponId) && orderIds.has(use.orderId));
+      if (fresh.length === 0) {
+        return { count: 0, dropped: orphaned };
+      }
+
+      await tx.couponUse.createMany({
+        data: fresh.map(use => ({
+          couponId: use.couponId,
+          userId: use.userId,
+          orderId: use.orderId,
+          discount: use.discount
+        })),
+        skipDuplicates: true
+      });
+
+      // One increment per coupon per batch, in id order
+      const countByCoupon = new Map<string, number>();
+      for (const use of fresh) {
+        countByCoupon.set(use.couponId, (countByCoupon.get(use.couponId) ?? 0) + 1);
+      }
+      for (const [couponId, count] of [...countByCoupon].sort(([a], [b]) => a.localeCompare(b))) {
+        await tx.coupon.updateMany({
+          where: { id: couponId },
+          data: { usageCount: { increment: count } }
+        });
+      }
+
+      return { count: fresh.length, dropped: orphaned };
+    });
+  }
+}
+
+function conditionsOf(promotion: Promotion): PromotionConditions {
+  return (promotion.conditions ?? {}) as PromotionConditions;
+}
@@ -64,6 +64,10 @@ export class PromotionService extends CrudService<Promotion> {
     super(app);
   }
 
+  protected async afterWrite(): Promise<void> {
+    await this.app.promotionEngine.invalidate();
+  }
+
   /**
    * Create a new promotion
    */
@@ -143,7 +147,18 @@ export class PromotionService extends CrudService<Promotion> {
           value: data.value,
           validFrom: data.validFrom,
           validTo: data.validTo,
-          conditions: data.conditions || {},
+          // Targeting lives in conditions, where the promotion engine compiles it from
+          conditions: {
+            ...(data.conditions && typeof data.conditions === 'object' && !Array.isArray(data.conditions)
+              ? data.conditions
+              : {}),
+            minPurchaseAmount: data.minPurchaseAmount,
+            maxDiscountAmount: data.maxDiscountAmount,
+            productIds: data.productIds,
+            categoryIds: data.categoryIds,
+            excludeProductIds: data.excludeProductIds,
+            stackable: data.stackable
+          } as Prisma.InputJsonObject,
           isActive: data.isActive ?? true,
           priority: data.priority || 0
         }
@@ -151,6 +166,7 @@ export class PromotionService extends CrudService<Promotion> {
 
       // Clear cache
       await cache.invalidatePattern('promotions:*');
+      await this.app.promotionEngine.invalidate();
 
       // Emit event
       this.app.events?.emit('promotion.created', {
@@ -409,6 +425,7 @@ export class PromotionService extends CrudService<Promotion> {
 
       if (result.count > 0) {
         await cache.invalidatePattern('promotions:*');
+        await this.app.promotionEngine.invalidate();
         this.logger.info({ count: result.count }, 'Deactivated expired promotions');
       }
 
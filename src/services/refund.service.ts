@@ -2,7 +2,7 @@ import { Refund, Prisma, RefundReason } from '@prisma/client';
 import { ServiceResult, PaginatedResult } from '../types';
 import { ApiError } from '../utils/errors';
 import { logger } from '../utils/logger';
-import { RefundRepository } from '../repositories';
+import { RefundRepository } from '../repositories/refund.repository';
 import { cacheGet, cacheSet } from '../config/redis';
 import { nanoid } from 'nanoid';
 
@@ -0,0 +1,326 @@
+import { PrismaClient } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { Readable, Writable } from 'stream';
+import { pipeline } from 'stream/promises';
+import { AnalyticsEventRepository } from '../repositories/analytics-event.repository';
+import { OrderItemRepository } from '../repositories/order-item.repository';
+import { PaymentRepository } from '../repositories/payment.repository';
+import { ProductRepository } from '../repositories/product.repository';
+import { SellerRepository } from '../repositories/seller.repository';
+import { UserRepository } from '../repositories/user.repository';
+import { logger } from '../utils/logger';
+import { ExportFormat, ExportRecord, createRecordSerializer } from '../utils/report-export';
+
+export type ReportType = 'sales' | 'users' | 'products' | 'sellers' | 'traffic' | 'financial';
+
+export const REPORT_TYPES: ReportType[] = ['sales', 'users', 'products', 'sellers', 'traffic', 'financial'];
+
+export interface ReportRange {
+  startDate: Date;
+  endDate: Date;
+}
+
+export interface ExportOptions {
+  batchSize?: number;
+  onProgress?: (rows: number) => Promise<void> | void;
+}
+
+interface ReportDefinition {
+  columns: string[];
+  count(range: ReportRange): Promise<number>;
+  batches(range: ReportRange, batchSize: number): AsyncGenerator<ExportRecord[]>;
+}
+
+const DEFAULT_BATCH_SIZE = 1000;
+
+// Source rows of each report for a date range
+const salesWhere = (range: ReportRange) => ({
+  order: {
+    status: 'DELIVERED' as const,
+    createdAt: { gte: range.startDate, lte: range.endDate }
+  }
+});
+const usersWhere = (range: ReportRange) => ({ createdAt: { gte: range.startDate, lte: range.endDate } });
+const productsWhere = (range: ReportRange) => ({ createdAt: { gte: range.startDate, lte: range.endDate } });
+const sellersWhere = (range: ReportRange) => ({ joinedAt: { gte: range.startDate, lte: range.endDate } });
+const trafficWhere = (range: ReportRange) => ({
+  type: { in: ['PAGE_VIEW', 'SESSION_START', 'PRODUCT_VIEW'] },
+  createdAt: { gte: range.startDate, lte: range.endDate }
+});
+const financialWhere = (range: ReportRange) => ({
+  status: 'PAID' as const,
+  createdAt: { gte: range.startDate, lte: range.endDate }
+});
+
+export function isReportType(value: unknown): value is ReportType {
+  return typeof value === 'string' && (REPORT_TYPES as string[]).includes(value);
+}
+
+/**
+ * Row-level report exports. Every report walks its source table with a
+ * keyset cursor, enriches one batch at a time and streams the rows out,
+ * so memory stays at one batch regardless of the range exported.
+ */
+export class ReportExportService {
+  private definitions: Record<ReportType, ReportDefinition>;
+  private orderItemRepo: OrderItemRepository;
+  private userRepo: UserRepository;
+  private productRepo: ProductRepository;
+  private sellerRepo: SellerRepository;
+  private analyticsEventRepo: AnalyticsEventRepository;
+  private paymentRepo: PaymentRepository;
+
+  constructor(private prisma: PrismaClient, redis: Redis) {
+    this.orderItemRepo = new OrderItemRepository(prisma, redis, logger);
+    this.userRepo = new UserRepository(prisma, redis, logger);
+    this.productRepo = new ProductRepository(prisma, redis, logger);
+    this.sellerRepo = new SellerRepository(prisma, redis, logger);
+    this.analyticsEventRepo = new AnalyticsEventRepository(prisma, redis, logger);
+    this.paymentRepo = new PaymentRepository(prisma, redis, logger);
+
+    this.definitions = {
+      sales: {
+        columns: ['orderNumber', 'orderedAt', 'userId', 'productId', 'sku', 'productName', 'category', 'quantity', 'price', 'lineTotal'],
+        count: range => this.prisma.orderItem.count({ where: salesWhere(range) }),
+        batches: (range, batchSize) => this.salesBatches(range, batchSize)
+      },
+      users: {
+        columns: ['id', 'email', 'firstName', 'lastName', 'createdAt', 'deliveredOrders', 'customerValue'],
+        count: range => this.prisma.user.count({ where: usersWhere(range) }),
+        batches: (range, batchSize) => this.usersBatches(range, batchSize)
+      },
+      products: {
+        columns: ['id', 'sku', 'name', 'sellerId', 'createdAt', 'sales', 'revenue'],
+        count: range => this.prisma.product.count({ where: productsWhere(range) }),
+        batches: (range, batchSize) => this.productsBatches(range, batchSize)
+      },
+      sellers: {
+        columns: ['id', 'storeName', 'joinedAt', 'products', 'sales', 'revenue'],
+        count: range => this.prisma.seller.count({ where: sellersWhere(range) }),
+        batches: (range, batchSize) => this.sellersBatches(range, batchSize)
+      },
+      traffic: {
+        columns: ['id', 'type', 'createdAt', 'userId', 'productId', 'page'],
+        count: range => this.prisma.analyticsEvent.count({ where: trafficWhere(range) }),
+        batches: (range, batchSize) => this.trafficBatches(range, batchSize)
+      },
+      financial: {
+        columns: ['id', 'orderId', 'method', 'amount', 'currency', 'createdAt', 'completedAt'],
+        count: range => this.prisma.payment.count({ where: financialWhere(range) }),
+        batches: (range, batchSize) => this.financialBatches(range, batchSize)
+      }
+    };
+  }
+
+  columns(type: ReportType): string[] {
+    return this.definitions[type].columns;
+  }
+
+  // Rows an export will contain, for progress reporting
+  count(type: ReportType, range: ReportRange): Promise<number> {
+    return this.definitions[type].count(range);
+  }
+
+  /**
+   * Serialized report as a readable stream, e.g. to send as an HTTP response
+   */
+  stream(type: ReportType, format: ExportFormat, range: ReportRange, options: ExportOptions = {}): Readable {
+    const source = Readable.from(this.records(type, range, options));
+    const serializer = createRecordSerializer(format, this.columns(type));
+    source.on('error', error => serializer.destroy(error));
+    return source.pipe(serializer);
+  }
+
+  /**
+   * Write a report to any writable (file, response, upload) and resolve
+   * with the number of rows once the destination has flushed
+   */
+  async exportTo(
+    type: ReportType,
+    format: ExportFormat,
+    range: ReportRange,
+    destination: Writable,
+    options: ExportOptions = {}
+  ): Promise<number> {
+    let rows = 0;
+    await pipeline(
+      Readable.from(this.records(type, range, {
+        ...options,
+        onProgress: async (count) => {
+          rows = count;
+          await options.onProgress?.(count);
+        }
+      })),
+      createRecordSerializer(format, this.columns(type)),
+      destination
+    );
+    return rows;
+  }
+
+  private async *records(type: ReportType, range: ReportRange, options: ExportOptions): AsyncGenerator<ExportRecord> {
+    let rows = 0;
+    for await (const batch of this.definitions[type].batches(range, options.batchSize ?? DEFAULT_BATCH_SIZE)) {
+      yield* batch;
+      rows += batch.length;
+      await options.onProgress?.(rows);
+    }
+  }
+
+  // One row per delivered order line
+  private async *salesBatches(range: ReportRange, batchSize: number): AsyncGenerator<ExportRecord[]> {
+    const batches = this.orderItemRepo.iterateBatches(salesWhere(range), {
+      batchSize,
+      include: {
+        order: { select: { orderNumber: true, createdAt: true, userId: true } },
+        product: { select: { category: { select: { name: true } } } }
+      }
+    });
+
+    for await (const items of batches) {
+      yield items.map((item: any) => ({
+        orderNumber: item.order.orderNumber,
+        orderedAt: item.order.createdAt,
+        userId: item.order.userId,
+        productId: item.productId,
+        sku: item.sku,
+        productName: item.name,
+        category: item.product?.category?.name || 'Uncategorized',
+        quantity: item.quantity,
+        price: Number(item.price),
+        lineTotal: Number(item.subtotal)
+      }));
+    }
+  }
+
+  // One row per user who signed up in the range, with their delivered order value
+  private async *usersBatches(range: ReportRange, batchSize: number): AsyncGenerator<ExportRecord[]> {
+    const batches = this.userRepo.iterateBatches(usersWhere(range), {
+      batchSize,
+      select: { id: true, email: true, firstName: true, lastName: true, createdAt: true }
+    });
+
+    for await (const users of batches) {
+      const totals = await this.prisma.order.groupBy({
+        by: ['userId'],
+        where: { userId: { in: users.map(user => user.id) }, status: 'DELIVERED' },
+        _count: { _all: true },
+        _sum: { totalAmount: true }
+      });
+      const byUser = new Map(totals.map(total => [total.userId, total]));
+
+      yield users.map(user => ({
+        id: user.id,
+        email: user.email,
+        firstName: user.firstName,
+        lastName: user.lastName,
+        createdAt: user.createdAt,
+        deliveredOrders: byUser.get(user.id)?._count._all || 0,
+        customerValue: Number(byUser.get(user.id)?._sum.totalAmount || 0)
+      }));
+    }
+  }
+
+  // One row per product listed in the range, with its delivered sales
+  private async *productsBatches(range: ReportRange, batchSize: number): AsyncGenerator<ExportRecord[]> {
+    const batches = this.productRepo.iterateBatches(productsWhere(range), {
+      batchSize,
+      select: { id: true, sku: true, name: true, sellerId: true, createdAt: true }
+    });
+
+    for await (const products of batches) {
+      const totals = await this.prisma.orderItem.groupBy({
+        by: ['productId'],
+        where: { productId: { in: products.map(product => product.id) }, order: { status: 'DELIVERED' } },
+        _count: { _all: true },
+        _sum: { subtotal: true }
+      });
+      const byProduct = new Map(totals.map(total => [total.productId, total]));
+
+      yield products.map(product => ({
+        id: product.id,
+        sku: product.sku,
+        name: product.name,
+        sellerId: product.sellerId,
+        createdAt: product.createdAt,
+        sales: byProduct.get(product.id)?._count._all || 0,
+        revenue: Number(byProduct.get(product.id)?._sum.subtotal || 0)
+      }));
+    }
+  }
+
+  // One row per seller who joined in the range, with catalog size and delivered sales
+  private async *sellersBatches(range: ReportRange, batchSize: number): AsyncGenerator<ExportRecord[]> {
+    const batches = this.sellerRepo.iterateBatches(sellersWhere(range), {
+      batchSize,
+      select: { id: true, businessName: true, joinedAt: true }
+    });
+
+    for await (const sellers of batches) {
+      const ids = sellers.map(seller => seller.id);
+      const [catalog, sales] = await Promise.all([
+        this.prisma.product.groupBy({
+          by: ['sellerId'],
+          where: { sellerId: { in: ids } },
+          _count: { _all: true }
+        }),
+        this.prisma.$queryRaw<{ sellerId: string; sales: number; revenue: number }[]>`
+          SELECT p."sellerId", COUNT(*)::int AS sales, COALESCE(SUM(oi."subtotal"), 0)::float8 AS revenue
+          FROM "order_items" oi
+          JOIN "products" p ON p."id" = oi."productId"
+          JOIN "orders" o ON o."id" = oi."orderId"
+          WHERE p."sellerId" = ANY(${ids}::text[]) AND o."status" = 'DELIVERED'
+          GROUP BY p."sellerId"
+        `
+      ]);
+      const productCounts = new Map(catalog.map(row => [row.sellerId, row._count._all]));
+      const salesBySeller = new Map(sales.map(row => [row.sellerId, row]));
+
+      yield sellers.map(seller => ({
+        id: seller.id,
+        storeName: seller.businessName,
+        joinedAt: seller.joinedAt,
+        products: productCounts.get(seller.id) || 0,
+        sales: salesBySeller.get(seller.id)?.sales || 0,
+        revenue: salesBySeller.get(seller.id)?.revenue || 0
+      }));
+    }
+  }
+
+  // One row per page view, session start or product view
+  private async *trafficBatches(range: ReportRange, batchSize: number): AsyncGenerator<ExportRecord[]> {
+    const batches = this.analyticsEventRepo.iterateBatches(trafficWhere(range), { batchSize });
+
+    for await (const events of batches) {
+      yield events.map(event => ({
+        id: event.id,
+        type: event.type,
+        createdAt: event.createdAt,
+        userId: event.userId,
+        productId: event.productId,
+        page: event.data && typeof event.data === 'object' && 'page' in event.data
+          ? String(event.data.page)
+          : null
+      }));
+    }
+  }
+
+  // One row per paid payment
+  private async *financialBatches(range: ReportRange, batchSize: number): AsyncGenerator<ExportRecord[]> {
+    const batches = this.paymentRepo.iterateBatches(financialWhere(range), {
+      batchSize,
+      select: { id: true, orderId: true, method: true, amount: true, currency: true, createdAt: true, completedAt: true }
+    });
+
+    for await (const payments of batches) {
+      yield payments.map(payment => ({
+        id: payment.id,
+        orderId: payment.orderId,
+        method: payment.method,
+        amount: Number(payment.amount),
+        currency: payment.currency,
+        createdAt: payment.createdAt,
+        completedAt: payment.completedAt
+      }));
+    }
+  }
+}
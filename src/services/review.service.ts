@@ -1,15 +1,12 @@
 import { Review, Prisma } from '@prisma/client';
 import { FastifyInstance } from 'fastify';
 import { CrudService } from './crud.service';
-import {
-  ReviewRepository,
-  ProductRepository,
-  OrderItemRepository,
-} from '../repositories';
+import { ReviewRepository } from '../repositories/review.repository';
+import { ProductRepository } from '../repositories/product.repository';
+import { OrderItemRepository } from '../repositories/order-item.repository';
 import { ServiceResult } from '../types';
 import { cache } from '../utils/cache';
 import { ApiError } from '../utils/errors';
-import { updateSearchIndex } from '../utils/search';
 
 interface CreateProductReviewData {
   productId: string;
@@ -116,19 +113,6 @@ export class ReviewService extends CrudService<Review> {
         return newReview;
       });
 
-      // Update search index
-      await updateSearchIndex('reviews', {
-        id: review.id,
-        productId: review.productId,
-        userId: review.userId,
-        rating: review.rating,
-        title: review.title,
-        content: review.comment,
-        verifiedPurchase: review.isVerified,
-        status: review.status,
-        createdAt: review.createdAt.getTime(),
-      });
-
       // Emit review created event
       this.app.log.info(`Emitting review.created event for review ${review.id}`);
       /* this.app.events?.emit('review.created', {
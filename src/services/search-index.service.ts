@@ -0,0 +1,183 @@
+import { PrismaClient } from '@prisma/client';
+import type { Client } from 'typesense';
+import { autocomplete } from '../utils/autocomplete';
+import { cache } from '../utils/cache';
+import { logger } from '../utils/logger';
+import { productSearchTag } from '../utils/search-cache';
+import {
+  SearchCollection,
+  SearchIndexAction,
+  isSearchCollection,
+  loadSearchRows,
+  transformDocumentForSearch
+} from '../utils/search';
+
+export interface SearchIndexOptions {
+  batchSize?: number; // Documents per Typesense import call
+  readSize?: number; // Outbox rows read per drain pass
+}
+
+export interface DrainResult {
+  upserted: number;
+  deleted: number;
+  failed: SearchCollection[];
+}
+
+export interface SearchIndexLag {
+  pending: number;
+  lagSeconds: number; // Age of the oldest change not yet indexed
+}
+
+export interface SearchIndexStats {
+  upserted: number;
+  deleted: number;
+  failures: number;
+}
+
+interface PendingChange {
+  action: SearchIndexAction;
+  rowIds: bigint[];
+}
+
+/**
+ * Drains the search outbox into Typesense. Repeated changes to a document
+ * collapse to its latest action, upserts re-read the row so the index gets
+ * the committed state, and each collection is written with batched imports.
+ * Outbox rows are only removed once their collection was written, so a
+ * failed drain is simply retried.
+ */
+export class SearchIndexService {
+  private batchSize: number;
+  private readSize: number;
+  private stats: SearchIndexStats = { upserted: 0, deleted: 0, failures: 0 };
+
+  constructor(
+    private prisma: PrismaClient,
+    private client: Client,
+    options: SearchIndexOptions = {}
+  ) {
+    this.batchSize = options.batchSize ?? 250;
+    this.readSize = options.readSize ?? this.batchSize * 4;
+  }
+
+  /**
+   * Index everything currently in the outbox. Collections that fail are
+   * reported and left pending; the others still go through.
+   */
+  async drain(): Promise<DrainResult> {
+    const result: DrainResult = { upserted: 0, deleted: 0, failed: [] };
+    const failed = new Set<SearchCollection>();
+    let afterId = BigInt(0);
+
+    for (;;) {
+      const rows = await this.prisma.searchOutbox.findMany({
+        where: {
+          id: { gt: afterId },
+          ...(failed.size > 0 && { collection: { notIn: [...failed] } })
+        },
+        orderBy: { id: 'asc' },
+        take: this.readSize
+      });
+      if (rows.length === 0) {
+        break;
+      }
+      afterId = rows[rows.length - 1].id;
+
+      // Later rows win, so each document ends up with its most recent action
+      const changes = new Map<SearchCollection, Map<string, PendingChange>>();
+      for (const row of rows) {
+        const collection = row.collection;
+        if (!isSearchCollection(collection)) {
+          logger.warn({ collection, documentId: row.documentId }, 'Dropping outbox entry for unknown search collection');
+          await this.prisma.searchOutbox.delete({ where: { id: row.id } });
+          continue;
+        }
+
+        let documents = changes.get(collection);
+        if (!documents) {
+          documents = new Map();
+          changes.set(collection, documents);
+        }
+        const change = documents.get(row.documentId);
+        documents.set(row.documentId, {
+          action: row.action,
+          rowIds: change ? [...change.rowIds, row.id] : [row.id]
+        });
+      }
+
+      for (const [collection, documents] of changes) {
+        try {
+          const written = await this.writeCollection(collection, documents);
+          await this.prisma.searchOutbox.deleteMany({
+            where: { id: { in: [...documents.values()].flatMap(change => change.rowIds) } }
+          });
+          result.upserted += written.upserted;
+          result.deleted += written.deleted;
+        } catch (error) {
+          failed.add(collection);
+          this.stats.failures++;
+          logger.error({ error, collection, documents: documents.size }, 'Search index batch failed');
+        }
+      }
+    }
+
+    this.stats.upserted += result.upserted;
+    this.stats.deleted += result.deleted;
+    result.failed = [...failed];
+    return result;
+  }
+
+  async getLag(): Promise<SearchIndexLag> {
+    const outbox = await this.prisma.searchOutbox.aggregate({
+      _count: { _all: true },
+      _min: { createdAt: true }
+    });
+    const oldest = outbox._min.createdAt;
+
+    return {
+      pending: outbox._count._all,
+      lagSeconds: oldest ? Math.max((Date.now() - oldest.getTime()) / 1000, 0) : 0
+    };
+  }
+
+  getStats(): SearchIndexStats {
+    return { ...this.stats };
+  }
+
+  private async writeCollection(
+    collection: SearchCollection,
+    documents: Map<string, PendingChange>
+  ): Promise<{ upserted: number; deleted: number }> {
+    const upsertIds = [...documents].filter(([, change]) => change.action === 'UPSERT').map(([id]) => id);
+    const deleteIds = [...documents].filter(([, change]) => change.action === 'DELETE').map(([id]) => id);
+
+    const rows = upsertIds.length > 0 ? await loadSearchRows(this.prisma, collection, { in: upsertIds }) : [];
+    const found = new Set(rows.map(row => row.id));
+    // Rows deleted since the change was recorded leave the index too
+    deleteIds.push(...upsertIds.filter(id => !found.has(id)));
+
+    const search = this.client.collections(collection).documents();
+
+    for (let i = 0; i < rows.length; i += this.batchSize) {
+      const batch = rows.slice(i, i + this.batchSize).map(row => transformDocumentForSearch(collection, row));
+      const results = await search.import(batch, { action: 'upsert' });
+      const rejected = results.filter(item => !item.success);
+      if (rejected.length > 0) {
+        throw new Error(`Typesense rejected ${rejected.length} of ${batch.length} ${collection} documents: ${rejected[0].error}`);
+      }
+    }
+
+    for (let i = 0; i < deleteIds.length; i += this.batchSize) {
+      await search.delete({ filter_by: `id:[${deleteIds.slice(i, i + this.batchSize).join(',')}]` });
+    }
+
+    // Cached search pages showing these products are now out of date
+    if (collection === 'products') {
+      await cache.invalidateTags([...documents.keys()].map(productSearchTag));
+    }
+    await autocomplete.applyIndexUpdate(collection, rows, deleteIds);
+
+    logger.debug({ collection, upserted: rows.length, deleted: deleteIds.length }, 'Search index batch written');
+    return { upserted: rows.length, deleted: deleteIds.length };
+  }
+}
@@ -1,14 +1,12 @@
 import { Seller, SellerDocument, SellerAnalytics, SellerBadge, Prisma, SellerStatus } from '@prisma/client';
 import { FastifyInstance } from 'fastify';
 import { CrudService } from './crud.service';
-import { 
-  SellerRepository,
-  UserRepository
-} from "../repositories";
+import { SellerRepository } from "../repositories/seller.repository";
+import { UserRepository } from "../repositories/user.repository";
 import { ServiceResult, PaginatedResult } from '../types';
 import { cache } from '../utils/cache';
 import { ApiError } from '../utils/errors';
-import { updateSearchIndex } from '../utils/search';
+import { recordSearchChange } from '../utils/search';
 
 interface CreateSellerData {
   userId: string;
@@ -152,16 +150,12 @@ export class SellerService extends CrudService<Seller> {
           }
         });
 
+        await recordSearchChange(tx, 'sellers', newSeller.id);
+
         return newSeller;
       });
 
-      await updateSearchIndex('sellers', {
-        id: seller.id,
-        userId: seller.userId,
-        businessName: seller.businessName,
-        status: seller.status,
-        createdAt: seller.joinedAt.getTime()
-      });
+      await this.app.searchIndex.notify();
 
       this.app.log.info({ 
         sellerId: seller.id,
@@ -200,11 +194,8 @@ export class SellerService extends CrudService<Seller> {
         commissionRate: data.commissionRate,
       });
 
-      await updateSearchIndex('sellers', {
-        id: seller.id,
-        businessName: seller.businessName,
-        status: seller.status,
-      });
+      await recordSearchChange(this.prisma, 'sellers', seller.id);
+      await this.app.searchIndex.notify();
 
       await cache.invalidatePattern(`sellers:${seller.id}:*`);
 
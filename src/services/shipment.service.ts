@@ -2,7 +2,7 @@ import { Shipment, Prisma } from '@prisma/client';
 import { ServiceResult, PaginatedResult } from '../types';
 import { ApiError } from '../utils/errors';
 import { logger } from '../utils/logger';
-import { ShipmentRepository } from '../repositories';
+import { ShipmentRepository } from '../repositories/shipment.repository';
 import { cacheGet, cacheSet } from '../config/redis';
 import { nanoid } from 'nanoid';
 
@@ -2,10 +2,8 @@ import { ShippingZone, Prisma } from '@prisma/client';
 import { FastifyInstance } from 'fastify';
 import { CrudService } from './crud.service';
 import { cache } from '../utils/cache';
-import { 
-  ShippingZoneRepository,
-  ShippingZoneMethodRepository
-} from "../repositories";
+import { ShippingZoneRepository } from "../repositories/shipping-zone.repository";
+import { ShippingZoneMethodRepository } from "../repositories/shipping-zone-method.repository";
 import { ServiceResult, PaginatedResult } from '../types';
 import { ApiError } from '../utils/errors';
 
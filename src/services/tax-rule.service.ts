@@ -2,8 +2,9 @@ import { TaxRule, Prisma, TaxType } from '@prisma/client';
 import { ServiceResult, PaginatedResult } from '../types';
 import { ApiError } from '../utils/errors';
 import { logger } from '../utils/logger';
-import { TaxRuleRepository } from '../repositories';
+import { TaxRuleRepository } from '../repositories/tax-rule.repository';
 import { cacheGet, cacheSet } from '../config/redis';
+import { taxRuleIndex } from '../utils/tax-rule-index';
 import { nanoid } from 'nanoid';
 
 interface CreateTaxRuleData {
@@ -13,6 +14,8 @@ interface CreateTaxRuleData {
   zipCode?: string;
   taxType: TaxType;
   rate: number;
+  effectiveFrom?: Date;
+  effectiveTo?: Date;
 }
 
 interface UpdateTaxRuleData extends Partial<CreateTaxRuleData> {
@@ -75,9 +78,13 @@ interface BulkTaxRuleUpdate {
 
 export class TaxRuleService {
   private taxRuleRepo: TaxRuleRepository;
+  private prisma: any;
+  private redis: any;
 
   constructor(prisma: any, redis: any, logger: any) {
     this.taxRuleRepo = new TaxRuleRepository(prisma, redis, logger);
+    this.prisma = prisma;
+    this.redis = redis;
   }
 
   async create(data: CreateTaxRuleData): Promise<ServiceResult<TaxRule>> {
@@ -133,7 +140,14 @@ export class TaxRuleService {
         };
       }
 
-      // PRODUCTION: Check for duplicate tax rules
+      if (data.effectiveFrom && data.effectiveTo && data.effectiveFrom >= data.effectiveTo) {
+        return {
+          success: false,
+          error: new ApiError('Effective from must be before effective to', 400, 'INVALID_EFFECTIVE_DATES')
+        };
+      }
+
+      // PRODUCTION: Check for duplicate tax rules in effect over the same period
       const existingRule = await this.taxRuleRepo.findFirst({
         where: {
           country: data.country.toUpperCase(),
@@ -141,7 +155,8 @@ export class TaxRuleService {
           city: data.city?.toLowerCase() || null,
           zipCode: data.zipCode?.toUpperCase() || null,
           taxType: data.taxType,
-          isActive: true
+          isActive: true,
+          AND: this.overlappingPeriod(data.effectiveFrom, data.effectiveTo)
         }
       });
 
@@ -176,7 +191,9 @@ export class TaxRuleService {
         zipCode: data.zipCode?.toUpperCase() || null,
         taxType: data.taxType,
         rate: data.rate,
-        isActive: true
+        isActive: true,
+        effectiveFrom: data.effectiveFrom ?? null,
+        effectiveTo: data.effectiveTo ?? null
       });
 
       // Clear tax calculation caches
@@ -259,8 +276,17 @@ export class TaxRuleService {
         };
       }
 
-      // PRODUCTION: Check for duplicates if location or tax type changed
-      if (data.country || data.state || data.city || data.zipCode || data.taxType) {
+      const effectiveFrom = data.effectiveFrom ?? existingRule.effectiveFrom;
+      const effectiveTo = data.effectiveTo ?? existingRule.effectiveTo;
+      if (effectiveFrom && effectiveTo && effectiveFrom >= effectiveTo) {
+        return {
+          success: false,
+          error: new ApiError('Effective from must be before effective to', 400, 'INVALID_EFFECTIVE_DATES')
+        };
+      }
+
+      // PRODUCTION: Check for duplicates if location, tax type or effective period changed
+      if (data.country || data.state || data.city || data.zipCode || data.taxType || data.effectiveFrom || data.effectiveTo) {
         const country = data.country || existingRule.country;
         const state = data.state !== undefined ? data.state : existingRule.state;
         const city = data.city !== undefined ? data.city : existingRule.city;
@@ -275,7 +301,8 @@ export class TaxRuleService {
             city: city?.toLowerCase() || null,
             zipCode: zipCode?.toUpperCase() || null,
             taxType: taxType,
-            isActive: true
+            isActive: true,
+            AND: this.overlappingPeriod(effectiveFrom, effectiveTo)
           }
         });
 
@@ -485,14 +512,9 @@ export class TaxRuleService {
       }
 
       // PRODUCTION: Find applicable tax rules with hierarchical matching
-      // Priority: ZIP > City > State > Country
-      const cacheKey = `tax-calc:${request.country}:${request.state || 'null'}:${request.city || 'null'}:${request.zipCode || 'null'}:${request.taxType || 'all'}`;
-      
-      let applicableRules = await cacheGet(cacheKey) as TaxRule[] | null;
-      if (!applicableRules) {
-        applicableRules = await this.findApplicableTaxRules(request);
-        await cacheSet(cacheKey, applicableRules, 1800); // 30 minutes
-      }
+      // Priority: ZIP > City > State > Country, resolved in memory
+      const index = await taxRuleIndex.get(this.prisma, this.redis);
+      const applicableRules = index.resolve(request, request.taxType);
 
       if (applicableRules.length === 0) {
         // No tax rules found - return zero tax
@@ -760,63 +782,18 @@ export class TaxRuleService {
 
   // PRODUCTION: Private helper methods for tax calculation and validation
 
-  private async findApplicableTaxRules(request: TaxCalculationRequest): Promise<TaxRule[]> {
-    // PRODUCTION: Hierarchical tax rule matching - most specific first
-    const searchCriteria = [
-      // 1. Exact match: Country + State + City + ZIP
-      {
-        country: request.country.toUpperCase(),
-        state: request.state?.toUpperCase() || undefined,
-        city: request.city?.toLowerCase() || undefined,
-        zipCode: request.zipCode?.toUpperCase() || undefined
-      },
-      // 2. City level: Country + State + City
-      {
-        country: request.country.toUpperCase(),
-        state: request.state?.toUpperCase() || undefined,
-        city: request.city?.toLowerCase() || undefined,
-        zipCode: undefined
-      },
-      // 3. State level: Country + State
-      {
-        country: request.country.toUpperCase(),
-        state: request.state?.toUpperCase() || undefined,
-        city: undefined,
-        zipCode: undefined
-      },
-      // 4. Country level: Country only
-      {
-        country: request.country.toUpperCase(),
-        state: undefined,
-        city: undefined,
-        zipCode: undefined
-      }
-    ];
-
-    for (const criteria of searchCriteria) {
-      const where: Prisma.TaxRuleWhereInput = {
-        country: criteria.country,
-        state: criteria.state || null,
-        city: criteria.city || null,
-        zipCode: criteria.zipCode || null,
-        isActive: true
-      };
-
-      if (request.taxType) {
-        where.taxType = request.taxType;
-      }
-
-      const rules = await this.taxRuleRepo.findMany({
-        where,
-        orderBy: { rate: 'asc' } // Apply lower rates first
-      });
-
-      if (rules.length > 0) {
-        return rules;
-      }
+  /**
+   * Rules whose effective period overlaps [from, to); open ends are unbounded
+   */
+  private overlappingPeriod(from?: Date | null, to?: Date | null): Prisma.TaxRuleWhereInput[] {
+    const conditions: Prisma.TaxRuleWhereInput[] = [];
+    if (from) {
+      conditions.push({ OR: [{ effectiveTo: null }, { effectiveTo: { gt: from } }] });
     }
-
-    return [];
+    if (to) {
+      conditions.push({ OR: [{ effectiveFrom: null }, { effectiveFrom: { lt: to } }] });
+    }
+    return conditions;
   }
 
   private isValidCountryCode(country: string): boolean {
@@ -865,7 +842,8 @@ export class TaxRuleService {
 
   private async clearTaxCaches(country: string, state?: string | null): Promise<void> {
     try {
-      // Simple cache clearing - in a real implementation, this would clear specific patterns
+      // Rebuild this node's rule index and bump the version the other nodes check
+      await taxRuleIndex.invalidate(this.prisma, this.redis);
       logger.info({ country, state }, 'Tax calculation caches cleared');
     } catch (error) {
       logger.warn({ error, country, state }, 'Failed to clear some tax caches');
@@ -2,13 +2,11 @@ import { PrismaClient, User, Address, Wishlist, Product } from '@prisma/client';
 import { Redis } from 'ioredis';
 import bcrypt from 'bcrypt';
 // import { logger } from '../utils/logger';
-import { 
-  UserRepository,
-  AddressRepository,
-  WishlistRepository,
-  OrderRepository,
-  ReviewRepository
-} from "../repositories";
+import { UserRepository } from "../repositories/user.repository";
+import { AddressRepository } from "../repositories/address.repository";
+import { WishlistRepository } from "../repositories/wishlist.repository";
+import { OrderRepository } from "../repositories/order.repository";
+import { ReviewRepository } from "../repositories/review.repository";
 import { cacheGet, cacheSet } from '../config/redis';
 import { ApiError } from '../utils/errors';
 import { ServiceResult, PaginatedResult } from '../types';
@@ -2,6 +2,7 @@ import { FastifyInstance } from 'fastify';
 import { PrismaClient } from '@prisma/client';
 import { ServiceResult, CreateWebhookData, UpdateWebhookData, WebhookEventData } from '../types';
 import { logger } from '../utils/logger';
+import { scanDelete } from '../utils/cache';
 import axios from 'axios';
 import crypto from 'crypto';
 
@@ -669,11 +670,7 @@ export class WebhookService {
 
   private async clearWebhookCache(webhookId: string): Promise<void> {
     try {
-      const pattern = `webhook:${webhookId}:*`;
-      const keys = await this.redis.keys(pattern);
-      if (keys.length > 0) {
-        await this.redis.del(...keys);
-      }
+      await scanDelete(this.redis, `webhook:${webhookId}:*`);
     } catch (error) { logger.error({ error, webhookId }, 'Error clearing webhook cache');
     }
   }
@@ -3,9 +3,11 @@ import { FastifyInstance } from 'fastify';
 import { CrudService } from './crud.service';
 import { ServiceResult } from '../types';
 import { ApiError } from '../utils/errors';
-import { cache } from '../utils/cache';
+import { cache, cacheTags } from '../utils/cache';
+import { cartSnapshotKey } from '../utils/cart-snapshot';
 import { nanoid } from 'nanoid';
-import { WishlistRepository, ProductRepository } from '../repositories';
+import { WishlistRepository } from '../repositories/wishlist.repository';
+import { ProductRepository } from '../repositories/product.repository';
 
 interface WishlistItemWithProduct extends Wishlist {
   product: {
@@ -95,7 +97,7 @@ export class WishlistService extends CrudService<Wishlist> {
         itemCount: wishlistItems.length
       };
 
-      await cache.set(cacheKey, response, { ttl: 300 });
+      await cache.set(cacheKey, response, { ttl: 300, tags: [cacheTags.wishlist(userId)] });
       return { success: true, data: response };
     } catch (error) {
       this.logger.error({ error, userId }, 'Failed to get user wishlist');
@@ -184,7 +186,7 @@ export class WishlistService extends CrudService<Wishlist> {
       });
 
       // Clear cache
-      await cache.invalidatePattern(`wishlist:user:${userId}:*`);
+      await cache.invalidateTags([cacheTags.wishlist(userId)]);
 
       // Emit event
       this.app.events?.emit('wishlist.item.added', {
@@ -228,7 +230,7 @@ export class WishlistService extends CrudService<Wishlist> {
       await this.wishlistRepo.delete(wishlistItem.id);
 
       // Clear cache
-      await cache.invalidatePattern(`wishlist:user:${userId}:*`);
+      await cache.invalidateTags([cacheTags.wishlist(userId)]);
 
       // Emit event
       this.app.events?.emit('wishlist.item.removed', {
@@ -256,7 +258,7 @@ export class WishlistService extends CrudService<Wishlist> {
       });
 
       // Clear cache
-      await cache.invalidatePattern(`wishlist:user:${userId}:*`);
+      await cache.invalidateTags([cacheTags.wishlist(userId)]);
 
       // Emit event
       this.app.events?.emit('wishlist.cleared', {
@@ -293,7 +295,7 @@ export class WishlistService extends CrudService<Wishlist> {
       });
 
       const result = !!exists;
-      await cache.set(cacheKey, result, { ttl: 300 });
+      await cache.set(cacheKey, result, { ttl: 300, tags: [cacheTags.wishlist(userId)] });
       return { success: true, data: result };
     } catch (error) {
       this.logger.error({ error, userId, productId }, 'Failed to check wishlist');
@@ -497,11 +499,16 @@ export class WishlistService extends CrudService<Wishlist> {
         await this.wishlistRepo.deleteMany({
           userId
         });
+        // Cart snapshots older than this version are rebuilt, not patched
+        await this.prisma.cart.update({
+          where: { id: cart.id },
+          data: { version: { increment: 1 } }
+        });
       }
 
       // Clear caches
-      await cache.invalidatePattern(`wishlist:user:${userId}:*`);
-      await cache.invalidatePattern(`cart:${userId}:*`);
+      await cache.invalidateTags([cacheTags.wishlist(userId)]);
+      await cache.del(cartSnapshotKey(userId));
 
       return {
         success: true,
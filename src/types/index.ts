@@ -15,10 +15,12 @@ export interface ServiceResult<T> {
 export interface PaginatedResult<T> {
   data: T[];
   meta: {
-    total: number;
+    total: number | null; // null when the query asked for totals: 'none'
     page: number;
     limit: number;
-    totalPages: number;
+    totalPages: number | null;
+    hasMore?: boolean;
+    estimated?: boolean; // total is a planner estimate, or a lower bound for filtered queries
   };
 }
 
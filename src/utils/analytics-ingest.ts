@@ -0,0 +1,235 @@
+import { PrismaClient, Prisma, AnalyticsEvent } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { nanoid } from 'nanoid';
+import { logger } from './logger';
+
+export interface IngestOptions {
+  maxBuffer?: number; // Events held in memory before new ones are shed
+  batchSize?: number; // Flush as soon as this many events are buffered
+  flushInterval?: number; // Milliseconds between timed flushes
+  counterTTL?: number; // Seconds aggregate counter hashes live after their last update
+}
+
+export interface IngestEvent {
+  type: string;
+  userId?: string;
+  productId?: string;
+  sellerId?: string;
+  data: Prisma.InputJsonValue;
+}
+
+export interface IngestStats {
+  accepted: number;
+  shed: number;
+  flushed: number;
+  failed: number; // Dropped after a failed write found no room to requeue
+  buffered: number;
+  counterKeys: number;
+}
+
+interface PendingCounters {
+  increments: Map<string, number>;
+  floatIncrements: Map<string, number>;
+  values: Map<string, string>;
+}
+
+/**
+ * Buffers analytics events and their aggregate counters in memory and
+ * writes them in batches: one createMany per flush for events and one
+ * pipeline of HINCRBY/HSET per flush for counters, with every counter key
+ * coalesced first. A full buffer makes callers wait for the running flush;
+ * if it is still full after that the event is dropped and counted as shed.
+ */
+class AnalyticsIngest {
+  private prisma?: PrismaClient;
+  private redis?: Redis;
+  private buffer: Prisma.AnalyticsEventCreateManyInput[] = [];
+  private counters = new Map<string, PendingCounters>();
+  private flushing: Promise<void> | null = null;
+  private timer: NodeJS.Timeout | null = null;
+  private maxBuffer = 10000;
+  private batchSize = 500;
+  private flushInterval = 1000;
+  private counterTTL = 86400;
+  private stats = { accepted: 0, shed: 0, flushed: 0, failed: 0 };
+
+  initialize(prisma: PrismaClient, redis: Redis, options: IngestOptions = {}): void {
+    this.prisma = prisma;
+    this.redis = redis;
+    this.maxBuffer = options.maxBuffer ?? this.maxBuffer;
+    this.batchSize = Math.min(options.batchSize ?? this.batchSize, this.maxBuffer);
+    this.flushInterval = options.flushInterval ?? this.flushInterval;
+    this.counterTTL = options.counterTTL ?? this.counterTTL;
+
+    if (!this.timer) {
+      this.timer = setInterval(() => {
+        this.flush().catch(() => undefined);
+      }, this.flushInterval);
+      this.timer.unref();
+    }
+  }
+
+  /**
+   * Queue an event; resolves to the event as it will be stored, or null if it was shed
+   */
+  async track(event: IngestEvent): Promise<AnalyticsEvent | null> {
+    if (!this.prisma) {
+      logger.warn('Analytics ingest not initialized, dropping event');
+      return null;
+    }
+
+    if (this.buffer.length >= this.maxBuffer) {
+      await this.flush().catch(() => undefined);
+      if (this.buffer.length >= this.maxBuffer) {
+        this.stats.shed++;
+        return null;
+      }
+    }
+
+    const now = new Date();
+    const row = {
+      id: nanoid(),
+      type: event.type,
+      userId: event.userId ?? null,
+      productId: event.productId ?? null,
+      sellerId: event.sellerId ?? null,
+      data: event.data,
+      createdAt: now,
+      receivedAt: now
+    };
+    this.buffer.push(row);
+    this.stats.accepted++;
+
+    if (this.buffer.length >= this.batchSize) {
+      this.flush().catch(() => undefined);
+    }
+
+    return { ...row, data: event.data as Prisma.JsonValue };
+  }
+
+  /**
+   * Add to an integer field of a counter hash; applied at the next flush
+   */
+  increment(key: string, field: string, by: number = 1): void {
+    const pending = this.pendingFor(key);
+    pending.increments.set(field, (pending.increments.get(field) || 0) + by);
+  }
+
+  /**
+   * Add to a decimal field of a counter hash (HINCRBYFLOAT)
+   */
+  incrementFloat(key: string, field: string, by: number): void {
+    const pending = this.pendingFor(key);
+    pending.floatIncrements.set(field, (pending.floatIncrements.get(field) || 0) + by);
+  }
+
+  /**
+   * Set a field of a counter hash; the last value before a flush wins
+   */
+  setField(key: string, field: string, value: string): void {
+    this.pendingFor(key).values.set(field, value);
+  }
+
+  /**
+   * Write everything buffered so far. Concurrent callers share one flush.
+   */
+  async flush(): Promise<void> {
+    if (this.flushing) {
+      return this.flushing;
+    }
+    if (this.buffer.length === 0 && this.counters.size === 0) {
+      return;
+    }
+
+    this.flushing = (async () => {
+      try {
+        while (this.buffer.length > 0) {
+          await this.writeEvents(this.buffer.splice(0, this.batchSize));
+        }
+        await this.writeCounters();
+      } finally {
+        this.flushing = null;
+      }
+    })();
+
+    return this.flushing;
+  }
+
+  async close(): Promise<void> {
+    if (this.timer) {
+      clearInterval(this.timer);
+      this.timer = null;
+    }
+    await this.flush().catch(() => undefined);
+  }
+
+  getStats(): IngestStats {
+    return {
+      ...this.stats,
+      buffered: this.buffer.length,
+      counterKeys: this.counters.size
+    };
+  }
+
+  private pendingFor(key: string): PendingCounters {
+    let pending = this.counters.get(key);
+    if (!pending) {
+      pending = { increments: new Map(), floatIncrements: new Map(), values: new Map() };
+      this.counters.set(key, pending);
+    }
+    return pending;
+  }
+
+  private async writeEvents(batch: Prisma.AnalyticsEventCreateManyInput[]): Promise<void> {
+    // Rollups pick events up by receivedAt, so a retried batch is restamped
+    // and still rolled into the hour of its createdAt
+    const receivedAt = new Date();
+    for (const row of batch) {
+      row.receivedAt = receivedAt;
+    }
+
+    try {
+      await this.prisma!.analyticsEvent.createMany({ data: batch, skipDuplicates: true });
+      this.stats.flushed += batch.length;
+    } catch (error) {
+      // Put the batch back for the next flush, as far as there is room
+      const requeued = batch.slice(0, Math.max(this.maxBuffer - this.buffer.length, 0));
+      this.buffer.unshift(...requeued);
+      this.stats.failed += batch.length - requeued.length;
+      logger.error({ error, events: batch.length }, 'Failed to write analytics events');
+      throw error;
+    }
+  }
+
+  private async writeCounters(): Promise<void> {
+    if (!this.redis || this.counters.size === 0) {
+      return;
+    }
+
+    const counters = this.counters;
+    this.counters = new Map();
+
+    const pipeline = this.redis.pipeline();
+    for (const [key, pending] of counters) {
+      for (const [field, by] of pending.increments) {
+        pipeline.hincrby(key, field, by);
+      }
+      for (const [field, by] of pending.floatIncrements) {
+        pipeline.hincrbyfloat(key, field, by);
+      }
+      if (pending.values.size > 0) {
+        pipeline.hset(key, Object.fromEntries(pending.values));
+      }
+      pipeline.expire(key, this.counterTTL);
+    }
+
+    try {
+      await pipeline.exec();
+    } catch (error) {
+      // Counters are best effort; losing one flush is preferable to double counting on retry
+      logger.warn({ error, keys: counters.size }, 'Failed to write analytics counters');
+    }
+  }
+}
+
+export const analyticsIngest = new AnalyticsIngest();
@@ -0,0 +1,488 @@
+import { PrismaClient } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { logger } from './logger';
+import { normalizeSearchQuery } from './search-cache';
+import type { SearchCollection } from './search';
+
+export type SuggestionKind = 'query' | 'product' | 'category' | 'brand';
+
+export interface Suggestion {
+  text: string;
+  kind: SuggestionKind;
+  weight: number; // Popularity; higher ranks first
+}
+
+export interface AutocompleteEntry extends Suggestion {
+  id: string; // Source of the entry, e.g. 'product:<id>'; deltas replace by id
+}
+
+export interface AutocompleteOptions {
+  enabled?: boolean;
+  rebuildInterval?: number; // Seconds between full rebuilds
+  queryDays?: number; // Window of search_logs counted for popular queries
+  maxQueries?: number; // Popular queries taken from that window
+  maxDeltas?: number; // Changes held on top of the index before a rebuild is started early
+}
+
+export interface AutocompleteStats {
+  entries: number;
+  deltas: number;
+  builtAt: Date | null;
+  lookups: number;
+  fallbacks: number; // Lookups answered with nothing, left to Typesense
+}
+
+// Most suggestions a lookup returns
+export const MAX_SUGGESTIONS = 10;
+
+// Prefixes up to this length have their top entries precomputed
+const HEAD_LENGTH = 3;
+
+// Precomputed lists keep spares, so entries masked by a delta are backfilled
+const HEAD_SIZE = MAX_SUGGESTIONS * 2;
+
+// Every word start of a name is a key, up to this many per entry
+const MAX_KEYS_PER_ENTRY = 4;
+
+// Bound on the keys a longer prefix walks
+const SCAN_LIMIT = 2000;
+
+const BUILD_BATCH_SIZE = 5000;
+
+// Pub/sub channel carrying index deltas to every node
+const DELTA_CHANNEL = 'autocomplete:delta';
+
+interface DeltaMessage {
+  origin: string;
+  upserts: AutocompleteEntry[];
+  removes: string[];
+}
+
+interface IndexedEntry extends AutocompleteEntry {
+  normalized: string;
+}
+
+interface Delta {
+  entry: IndexedEntry | null; // null removes the entry
+  keys: string[];
+  at: number;
+}
+
+/**
+ * Lookup keys of a suggestion: the normalized text and each later word
+ * start, so "Red running shoes" is found by "run" and "sho" as well
+ */
+export function suggestionKeys(text: string): string[] {
+  const normalized = normalizeSearchQuery(text);
+  if (!normalized) {
+    return [];
+  }
+
+  const keys = [normalized];
+  for (let i = normalized.indexOf(' '); i !== -1 && keys.length < MAX_KEYS_PER_ENTRY; i = normalized.indexOf(' ', i + 1)) {
+    keys.push(normalized.slice(i + 1));
+  }
+  return keys;
+}
+
+function indexed(entry: AutocompleteEntry): IndexedEntry {
+  return { ...entry, normalized: normalizeSearchQuery(entry.text) };
+}
+
+/**
+ * Insert into a list kept sorted by weight, at most k long. Entries with the
+ * same text (a product and the query naming it) keep only the heavier one.
+ */
+function pushTop(top: IndexedEntry[], entry: IndexedEntry, k: number): void {
+  const same = top.findIndex(item => item.normalized === entry.normalized);
+  if (same !== -1) {
+    if (top[same].weight >= entry.weight) {
+      return;
+    }
+    top.splice(same, 1);
+  }
+  if (top.length >= k && top[top.length - 1].weight >= entry.weight) {
+    return;
+  }
+
+  let i = top.length;
+  while (i > 0 && top[i - 1].weight < entry.weight) {
+    i--;
+  }
+  top.splice(i, 0, entry);
+  if (top.length > k) {
+    top.pop();
+  }
+}
+
+function lowerBound(keys: string[], prefix: string): number {
+  let low = 0;
+  let high = keys.length;
+  while (low < high) {
+    const mid = (low + high) >>> 1;
+    if (keys[mid] < prefix) {
+      low = mid + 1;
+    } else {
+      high = mid;
+    }
+  }
+  return low;
+}
+
+/**
+ * Immutable sorted prefix array. Short prefixes, the ones that match most
+ * of the catalog, answer from precomputed top lists; longer ones binary
+ * search to their range and rank what is there.
+ */
+export class PrefixIndex {
+  readonly size: number;
+  private keys: string[];
+  private slots: IndexedEntry[];
+  private heads = new Map<string, IndexedEntry[]>();
+
+  constructor(entries: AutocompleteEntry[]) {
+    const pairs: [string, IndexedEntry][] = [];
+    for (const entry of entries) {
+      const item = indexed(entry);
+      for (const key of suggestionKeys(entry.text)) {
+        pairs.push([key, item]);
+      }
+    }
+    pairs.sort((a, b) => (a[0] < b[0] ? -1 : a[0] > b[0] ? 1 : 0));
+
+    this.size = entries.length;
+    this.keys = pairs.map(pair => pair[0]);
+    this.slots = pairs.map(pair => pair[1]);
+
+    for (const [key, entry] of pairs) {
+      for (let length = 1; length <= Math.min(key.length, HEAD_LENGTH); length++) {
+        const prefix = key.slice(0, length);
+        let top = this.heads.get(prefix);
+        if (!top) {
+          top = [];
+          this.heads.set(prefix, top);
+        }
+        pushTop(top, entry, HEAD_SIZE);
+      }
+    }
+  }
+
+  /**
+   * Top k entries with a key starting with the (normalized) prefix, skipping
+   * those the caller masks
+   */
+  lookup(prefix: string, k: number, masked?: (entry: AutocompleteEntry) => boolean): AutocompleteEntry[] {
+    const top: IndexedEntry[] = [];
+
+    if (prefix.length <= HEAD_LENGTH) {
+      for (const entry of this.heads.get(prefix) ?? []) {
+        if (top.length >= k) {
+          break;
+        }
+        if (!masked?.(entry)) {
+          pushTop(top, entry, k);
+        }
+      }
+      return top;
+    }
+
+    const start = lowerBound(this.keys, prefix);
+    const end = Math.min(start + SCAN_LIMIT, this.keys.length);
+    for (let i = start; i < end && this.keys[i].startsWith(prefix); i++) {
+      if (!masked?.(this.slots[i])) {
+        pushTop(top, this.slots[i], k);
+      }
+    }
+    return top;
+  }
+}
+
+/**
+ * Entry for a row read by the search indexer, or null when the row should
+ * not be suggested (unpublished products, inactive categories)
+ */
+export function entryFromSearchRow(collection: SearchCollection, row: any): AutocompleteEntry | null {
+  switch (collection) {
+    case 'products':
+      return row.status === 'PUBLISHED'
+        ? { id: `product:${row.id}`, kind: 'product', text: row.name, weight: productWeight(row) }
+        : null;
+    case 'categories':
+      return row.isActive
+        ? { id: `category:${row.id}`, kind: 'category', text: row.name, weight: row._count?.products ?? 0 }
+        : null;
+    default:
+      return null;
+  }
+}
+
+function productWeight(row: { salesCount: number; viewCount: number }): number {
+  return row.salesCount + row.viewCount / 100;
+}
+
+function entryPrefix(collection: SearchCollection): string | null {
+  switch (collection) {
+    case 'products':
+      return 'product';
+    case 'categories':
+      return 'category';
+    default:
+      return null;
+  }
+}
+
+/**
+ * Per-node autocomplete over product, category and brand names and popular
+ * searches. The prefix index is rebuilt from the database periodically and
+ * swapped in whole; between rebuilds, changes from the search indexer are
+ * layered on top as deltas, shared with every node over pub/sub.
+ */
+class AutocompleteService {
+  private prisma?: PrismaClient;
+  private redis?: Redis;
+  private subscriber?: Redis;
+  private index: PrefixIndex | null = null;
+  private deltas = new Map<string, Delta>();
+  private building: Promise<void> | null = null;
+  private timer: NodeJS.Timeout | null = null;
+  private builtAt: Date | null = null;
+  private queryDays = 30;
+  private maxQueries = 50000;
+  private maxDeltas = 10000;
+  private stats = { lookups: 0, fallbacks: 0 };
+  private readonly nodeId = `${process.pid}:${Math.random().toString(36).substring(2, 10)}`;
+
+  initialize(prisma: PrismaClient, redis: Redis, options: AutocompleteOptions = {}): void {
+    if (options.enabled === false) {
+      logger.info('Autocomplete index disabled, suggestions go to Typesense');
+      return;
+    }
+
+    this.prisma = prisma;
+    this.redis = redis;
+    this.queryDays = options.queryDays ?? this.queryDays;
+    this.maxQueries = options.maxQueries ?? this.maxQueries;
+    this.maxDeltas = options.maxDeltas ?? this.maxDeltas;
+
+    this.subscriber = redis.duplicate();
+    this.subscriber.on('message', (_channel: string, message: string) => {
+      this.receiveDeltas(message);
+    });
+    this.subscriber.subscribe(DELTA_CHANNEL).catch((error) => {
+      logger.error({ error }, 'Autocomplete delta subscribe error');
+    });
+
+    if (!this.timer) {
+      this.timer = setInterval(() => {
+        this.rebuild().catch(() => undefined);
+      }, (options.rebuildInterval ?? 900) * 1000);
+      this.timer.unref();
+    }
+
+    // Lookups fall back to Typesense until the first build is in
+    this.rebuild().catch(() => undefined);
+  }
+
+  /**
+   * Top suggestions for what the user typed so far, or null when the index
+   * has not been built on this node
+   */
+  suggest(query: string, limit: number = 5): Suggestion[] | null {
+    if (!this.index) {
+      return null;
+    }
+
+    const prefix = normalizeSearchQuery(query);
+    if (!prefix) {
+      return [];
+    }
+
+    const k = Math.min(Math.max(limit, 1), MAX_SUGGESTIONS);
+    this.stats.lookups++;
+
+    const top = this.index.lookup(prefix, k, entry => this.deltas.has(entry.id)) as IndexedEntry[];
+    for (const delta of this.deltas.values()) {
+      if (delta.entry && delta.keys.some(key => key.startsWith(prefix))) {
+        pushTop(top, delta.entry, k);
+      }
+    }
+
+    if (top.length === 0) {
+      this.stats.fallbacks++;
+    }
+    return top.map(({ text, kind, weight }) => ({ text, kind, weight }));
+  }
+
+  /**
+   * Reflect rows the search indexer just wrote or removed. Never throws:
+   * the next rebuild picks the change up regardless.
+   */
+  async applyIndexUpdate(collection: SearchCollection, rows: { id: string }[], removedIds: string[]): Promise<void> {
+    const prefix = entryPrefix(collection);
+    if (!this.redis || !prefix) {
+      return;
+    }
+
+    const upserts: AutocompleteEntry[] = [];
+    const removes = removedIds.map(id => `${prefix}:${id}`);
+    for (const row of rows) {
+      const entry = entryFromSearchRow(collection, row);
+      if (entry) {
+        upserts.push(entry);
+      } else {
+        removes.push(`${prefix}:${row.id}`);
+      }
+    }
+    if (upserts.length === 0 && removes.length === 0) {
+      return;
+    }
+
+    this.applyDeltas(upserts, removes);
+    try {
+      const message: DeltaMessage = { origin: this.nodeId, upserts, removes };
+      await this.redis.publish(DELTA_CHANNEL, JSON.stringify(message));
+    } catch (error) {
+      logger.warn({ error, collection }, 'Autocomplete delta broadcast error');
+    }
+  }
+
+  /**
+   * Build a fresh index and swap it in. Concurrent calls share one build.
+   */
+  rebuild(): Promise<void> {
+    if (!this.prisma) {
+      return Promise.resolve();
+    }
+    if (this.building) {
+      return this.building;
+    }
+
+    this.building = (async () => {
+      const startedAt = Date.now();
+      try {
+        const index = new PrefixIndex(await this.loadEntries());
+        this.index = index;
+        this.builtAt = new Date(startedAt);
+        // Deltas that arrived once the build was reading are kept on top
+        for (const [id, delta] of this.deltas) {
+          if (delta.at < startedAt) {
+            this.deltas.delete(id);
+          }
+        }
+        logger.info({ entries: index.size, durationMs: Date.now() - startedAt }, 'Autocomplete index built');
+      } catch (error) {
+        logger.error({ error }, 'Autocomplete index build failed');
+        throw error;
+      } finally {
+        this.building = null;
+      }
+    })();
+
+    return this.building;
+  }
+
+  getStats(): AutocompleteStats {
+    return {
+      entries: this.index?.size ?? 0,
+      deltas: this.deltas.size,
+      builtAt: this.builtAt,
+      ...this.stats
+    };
+  }
+
+  async close(): Promise<void> {
+    if (this.timer) {
+      clearInterval(this.timer);
+      this.timer = null;
+    }
+    if (this.subscriber) {
+      await this.subscriber.quit();
+      this.subscriber = undefined;
+    }
+  }
+
+  private applyDeltas(upserts: AutocompleteEntry[], removes: string[]): void {
+    const at = Date.now();
+    for (const id of removes) {
+      this.deltas.set(id, { entry: null, keys: [], at });
+    }
+    for (const entry of upserts) {
+      this.deltas.set(entry.id, { entry: indexed(entry), keys: suggestionKeys(entry.text), at });
+    }
+
+    if (this.deltas.size > this.maxDeltas && !this.building) {
+      this.rebuild().catch(() => undefined);
+    }
+  }
+
+  private receiveDeltas(raw: string): void {
+    try {
+      const message: DeltaMessage = JSON.parse(raw);
+      if (message.origin === this.nodeId) {
+        return;
+      }
+      this.applyDeltas(message.upserts || [], message.removes || []);
+    } catch (error) { logger.warn({ error }, 'Invalid autocomplete delta message');
+    }
+  }
+
+  private async loadEntries(): Promise<AutocompleteEntry[]> {
+    const prisma = this.prisma!;
+    const entries: AutocompleteEntry[] = [];
+
+    let afterId: string | undefined;
+    for (;;) {
+      const products = await prisma.product.findMany({
+        where: { status: 'PUBLISHED', ...(afterId && { id: { gt: afterId } }) },
+        select: { id: true, name: true, salesCount: true, viewCount: true },
+        orderBy: { id: 'asc' },
+        take: BUILD_BATCH_SIZE
+      });
+      for (const product of products) {
+        entries.push({ id: `product:${product.id}`, kind: 'product', text: product.name, weight: productWeight(product) });
+      }
+      if (products.length < BUILD_BATCH_SIZE) {
+        break;
+      }
+      afterId = products[products.length - 1].id;
+    }
+
+    const categories = await prisma.category.findMany({
+      where: { isActive: true },
+      select: { id: true, name: true, _count: { select: { products: true } } }
+    });
+    for (const category of categories) {
+      entries.push({ id: `category:${category.id}`, kind: 'category', text: category.name, weight: category._count.products });
+    }
+
+    const [brands, brandCounts] = await Promise.all([
+      prisma.brand.findMany({ where: { isActive: true }, select: { id: true, name: true } }),
+      prisma.product.groupBy({
+        by: ['brandId'],
+        where: { status: 'PUBLISHED', brandId: { not: null } },
+        _count: { _all: true }
+      })
+    ]);
+    const productsPerBrand = new Map(brandCounts.map(row => [row.brandId, row._count._all]));
+    for (const brand of brands) {
+      entries.push({ id: `brand:${brand.id}`, kind: 'brand', text: brand.name, weight: productsPerBrand.get(brand.id) ?? 0 });
+    }
+
+    // Only searches that found something are worth suggesting
+    const since = new Date(Date.now() - this.queryDays * 24 * 60 * 60 * 1000);
+    const queries = await prisma.searchLog.groupBy({
+      by: ['query'],
+      where: { createdAt: { gte: since }, results: { gt: 0 } },
+      _count: { query: true },
+      orderBy: { _count: { query: 'desc' } },
+      take: this.maxQueries
+    });
+    for (const { query, _count } of queries) {
+      entries.push({ id: `query:${query}`, kind: 'query', text: query, weight: _count.query });
+    }
+
+    return entries;
+  }
+}
+
+export const autocomplete = new AutocompleteService();
@@ -0,0 +1,146 @@
+import { promisify } from 'util';
+import { brotliCompress, brotliDecompress, constants as zlibConstants } from 'zlib';
+import { Packr, addExtension } from 'msgpackr';
+import { Prisma } from '@prisma/client';
+
+export type CacheFormat = 'json' | 'msgpack';
+
+export interface CodecOptions {
+  format?: CacheFormat;
+  compressThreshold?: number; // Compress payloads at least this many bytes; 0 disables
+}
+
+export interface CodecStats {
+  encoded: number;
+  decoded: number;
+  rawBytes: number; // Serialized size before compression
+  storedBytes: number; // Size written to Redis
+  compressed: number;
+  encodeMs: number;
+  decodeMs: number;
+}
+
+/**
+ * Payload layout: [version][flags][body]. Plain JSON without a header is
+ * still written for small JSON values and read as version 0, so nodes
+ * without the codec keep working during a rollout. Readers treat versions
+ * they don't know as a miss, so a new version can be rolled forward safely.
+ */
+export const CODEC_VERSION = 1;
+
+const FORMAT_MASK = 0x0f;
+const FORMAT_JSON = 0;
+const FORMAT_MSGPACK = 1;
+const FLAG_BROTLI = 0x10;
+
+// Lowest first byte of a plain JSON payload (tab); anything below is a header
+const MIN_JSON_BYTE = 0x09;
+
+const compress = promisify(brotliCompress);
+const decompress = promisify(brotliDecompress);
+
+// Decimals go over the wire as strings, the same as JSON.stringify does
+addExtension({
+  Class: Prisma.Decimal,
+  type: 1,
+  write: (decimal: Prisma.Decimal) => decimal.toString(),
+  read: (value: string) => value
+});
+
+// Dates use the standard MessagePack timestamp extension
+const packr = new Packr({ useRecords: false, moreTypes: true });
+
+export class UnknownCodecVersionError extends Error {
+  constructor(version: number) {
+    super(`Unknown cache codec version ${version}`);
+    this.name = 'UnknownCodecVersionError';
+  }
+}
+
+export class CacheCodec {
+  private stats = new Map<string, CodecStats>();
+  private readonly format: CacheFormat;
+  private readonly compressThreshold: number;
+
+  constructor(options: CodecOptions = {}) {
+    this.format = options.format ?? 'json';
+    this.compressThreshold = options.compressThreshold ?? 0;
+  }
+
+  async encode(prefix: string, value: any): Promise<Buffer> {
+    const start = process.hrtime.bigint();
+    const format = this.format === 'msgpack' ? FORMAT_MSGPACK : FORMAT_JSON;
+    const body = format === FORMAT_MSGPACK
+      ? packr.pack(value)
+      : Buffer.from(JSON.stringify(value), 'utf8');
+
+    let payload: Buffer;
+    if (this.compressThreshold > 0 && body.length >= this.compressThreshold) {
+      const compressed = await compress(body, {
+        params: {
+          [zlibConstants.BROTLI_PARAM_QUALITY]: 4,
+          [zlibConstants.BROTLI_PARAM_SIZE_HINT]: body.length
+        }
+      });
+      payload = Buffer.concat([Buffer.from([CODEC_VERSION, format | FLAG_BROTLI]), compressed]);
+    } else if (format === FORMAT_JSON) {
+      payload = body;
+    } else {
+      payload = Buffer.concat([Buffer.from([CODEC_VERSION, format]), body]);
+    }
+
+    const stats = this.statsFor(prefix);
+    stats.encoded++;
+    stats.rawBytes += body.length;
+    stats.storedBytes += payload.length;
+    stats.compressed += payload[0] === CODEC_VERSION && (payload[1] & FLAG_BROTLI) ? 1 : 0;
+    stats.encodeMs += Number(process.hrtime.bigint() - start) / 1e6;
+    return payload;
+  }
+
+  async decode<T = any>(prefix: string, payload: Buffer): Promise<T> {
+    const start = process.hrtime.bigint();
+    let value: T;
+
+    if (payload.length === 0 || payload[0] >= MIN_JSON_BYTE) {
+      value = JSON.parse(payload.toString('utf8'));
+    } else if (payload[0] === CODEC_VERSION && payload.length >= 2) {
+      const flags = payload[1];
+      let body = payload.subarray(2);
+      if (flags & FLAG_BROTLI) {
+        body = await decompress(body);
+      }
+      value = (flags & FORMAT_MASK) === FORMAT_MSGPACK
+        ? packr.unpack(body)
+        : JSON.parse(body.toString('utf8'));
+    } else {
+      throw new UnknownCodecVersionError(payload[0]);
+    }
+
+    const stats = this.statsFor(prefix);
+    stats.decoded++;
+    stats.decodeMs += Number(process.hrtime.bigint() - start) / 1e6;
+    return value;
+  }
+
+  getStats(): Record<string, CodecStats> {
+    return Object.fromEntries(this.stats);
+  }
+
+  private statsFor(prefix: string): CodecStats {
+    let stats = this.stats.get(prefix);
+    if (!stats) {
+      stats = { encoded: 0, decoded: 0, rawBytes: 0, storedBytes: 0, compressed: 0, encodeMs: 0, decodeMs: 0 };
+      this.stats.set(prefix, stats);
+    }
+    return stats;
+  }
+}
+
+/**
+ * Metrics bucket for a key: its first segment, so ids never become labels
+ */
+export function keyPrefix(key: string): string {
+  const end = key.indexOf(':');
+  return end === -1 ? key : key.substring(0, end);
+}
@@ -1,22 +1,354 @@
-import { Redis } from 'ioredis';
+import { Redis, ChainableCommander } from 'ioredis';
 import { logger } from './logger';
+import { MemoryCache, MemoryCacheOptions, MemoryCacheStats } from './memory-cache';
+import { CacheCodec, CodecOptions, CodecStats, UnknownCodecVersionError, keyPrefix } from './cache-codec';
+import { searchCacheKey } from './search-cache';
 
 export interface CacheOptions {
   ttl?: number; // Time to live in seconds
   prefix?: string;
   json?: boolean;
+  tags?: string[]; // Invalidate together with invalidateTags()
+  local?: boolean; // Also keep in the in-process L1 cache when it is enabled
+}
+
+export interface LocalCacheOptions extends MemoryCacheOptions {
+  enabled?: boolean;
+  prefixes?: string[]; // Keys under these prefixes always go through L1
+}
+
+export interface CacheInitOptions {
+  local?: LocalCacheOptions;
+  codec?: CodecOptions;
+}
+
+export interface CacheLockOptions {
+  ttl?: number; // Lock lifetime in milliseconds
+  wait?: number; // How long losers wait for the winner's value, in milliseconds
+}
+
+export interface ReadThroughOptions {
+  ttl?: number; // Fresh lifetime in seconds; omitted means the value never expires
+  staleTTL?: number; // Seconds an expired value is still served while one caller refreshes it
+  earlyRefresh?: number; // XFetch beta: > 0 refreshes probabilistically before expiry, 1 is typical
+  lock?: boolean | CacheLockOptions; // Serialize recomputation across nodes
+}
+
+export interface CachedOptions extends CacheOptions, ReadThroughOptions {}
+
+/**
+ * What read-through caching stores: the value, its logical expiry (ms epoch,
+ * null for never) and how long it took to compute (ms)
+ */
+export interface CacheEnvelope<T> {
+  v: T;
+  x: number | null;
+  d: number;
+}
+
+export interface ReadThroughStore<T> {
+  redis: Redis; // Used for the cross-node lock
+  key: string; // Full key; also the single-flight key
+  read(): Promise<CacheEnvelope<T> | null>;
+  write(envelope: CacheEnvelope<T>, ttl?: number): Promise<unknown>;
+}
+
+// Pub/sub channel used to drop L1 entries on every node
+const INVALIDATION_CHANNEL = 'cache:invalidate';
+
+interface InvalidationMessage {
+  origin: string;
+  keys?: string[];
+  pattern?: string;
+  clear?: boolean;
+}
+
+// Keys per SCAN/SSCAN page and per UNLINK batch
+const INVALIDATION_BATCH_SIZE = 500;
+
+/**
+ * Redis key of the set holding every cache key registered under a tag
+ */
+export function tagKey(tag: string): string {
+  return `tag:${tag}`;
+}
+
+/**
+ * Queue the commands that register a key in its tag sets.
+ * A tag set lives as long as its longest-lived member, so it never outlives
+ * the data it points to by more than one TTL.
+ */
+export function addToTagSets(
+  pipeline: ChainableCommander,
+  tagKeys: string[],
+  member: string,
+  ttl: number
+): void {
+  for (const key of tagKeys) {
+    pipeline.sadd(key, member);
+    pipeline.expire(key, ttl, 'NX');
+    pipeline.expire(key, ttl, 'GT');
+  }
+}
+
+/**
+ * Delete every key registered in the given tag sets.
+ * Each set is renamed away first (in one pipeline) so keys tagged while we
+ * drain it land in a fresh set, then its members are read with SSCAN and
+ * unlinked a batch at a time.
+ */
+export async function deleteTagSets(
+  redis: Redis,
+  tagKeys: string[],
+  batchSize: number = INVALIDATION_BATCH_SIZE,
+  onBatch?: (keys: string[]) => void
+): Promise<number> {
+  if (tagKeys.length === 0) {
+    return 0;
+  }
+
+  const suffix = `${Date.now()}:${Math.random().toString(36).substring(2, 8)}`;
+  const draining = tagKeys.map(key => `${key}:draining:${suffix}`);
+
+  const pipeline = redis.pipeline();
+  tagKeys.forEach((key, i) => pipeline.renamenx(key, draining[i]));
+  const renamed = (await pipeline.exec()) || [];
+
+  let deleted = 0;
+  for (let i = 0; i < draining.length; i++) {
+    // ERR no such key: nothing is tagged, nothing to do
+    if (renamed[i]?.[0] || renamed[i]?.[1] !== 1) {
+      continue;
+    }
+
+    let cursor = '0';
+    do {
+      const [next, members] = await redis.sscan(draining[i], cursor, 'COUNT', batchSize);
+      cursor = next;
+      if (members.length > 0) {
+        deleted += await redis.unlink(...members);
+        onBatch?.(members);
+      }
+    } while (cursor !== '0');
+
+    await redis.unlink(draining[i]);
+  }
+
+  return deleted;
+}
+
+/**
+ * Delete keys matching a glob pattern with incremental SCAN instead of KEYS,
+ * so Redis is never blocked for the whole keyspace walk
+ */
+export async function scanDelete(
+  redis: Redis,
+  pattern: string,
+  batchSize: number = INVALIDATION_BATCH_SIZE
+): Promise<number> {
+  // A plain key needs no scan at all
+  if (!/[*?[]/.test(pattern)) {
+    return redis.unlink(pattern);
+  }
+
+  let deleted = 0;
+  let cursor = '0';
+
+  do {
+    const [next, keys] = await redis.scan(cursor, 'MATCH', pattern, 'COUNT', batchSize);
+    cursor = next;
+    if (keys.length > 0) {
+      deleted += await redis.unlink(...keys);
+    }
+  } while (cursor !== '0');
+
+  return deleted;
+}
+
+const UNLOCK_SCRIPT = `
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  return redis.call('del', KEYS[1])
+end
+return 0`;
+
+/**
+ * SET NX PX lock under lock:<key>. Returns the owner token, or null when
+ * somebody else holds the lock.
+ */
+export async function tryLock(redis: Redis, key: string, ttl: number = 5000): Promise<string | null> {
+  const token = `${process.pid}:${Date.now()}:${Math.random().toString(36).substring(2, 10)}`;
+  const result = await redis.set(`lock:${key}`, token, 'PX', ttl, 'NX');
+  return result === 'OK' ? token : null;
+}
+
+/**
+ * Release a lock only if we still own it, so a lock that expired and was
+ * taken over is never deleted from under its new owner
+ */
+export async function unlock(redis: Redis, key: string, token: string): Promise<boolean> {
+  const result = await redis.eval(UNLOCK_SCRIPT, 1, `lock:${key}`, token);
+  return result === 1;
+}
+
+// Recomputations in flight in this process, by full key
+const inflight = new Map<string, Promise<{ value: any } | null>>();
+
+function isEnvelope<T>(value: unknown): value is CacheEnvelope<T> {
+  return !!value && typeof value === 'object' && 'v' in value && 'x' in value && 'd' in value;
+}
+
+function isFresh(envelope: CacheEnvelope<unknown>, now: number): boolean {
+  return envelope.x === null || now < envelope.x;
+}
+
+/**
+ * XFetch: refresh early with a probability that grows as expiry approaches
+ * and with how expensive the value was to compute
+ */
+function shouldRefreshEarly(envelope: CacheEnvelope<unknown>, now: number, beta?: number): boolean {
+  if (!beta || envelope.x === null) {
+    return false;
+  }
+  return now - envelope.d * beta * Math.log(Math.random()) >= envelope.x;
+}
+
+async function waitForFill<T>(store: ReadThroughStore<T>, wait: number): Promise<CacheEnvelope<T> | null> {
+  const deadline = Date.now() + wait;
+  while (Date.now() < deadline) {
+    await new Promise(resolve => setTimeout(resolve, 50));
+    const envelope = await store.read();
+    if (isEnvelope<T>(envelope) && isFresh(envelope, Date.now())) {
+      return envelope;
+    }
+  }
+  return null;
+}
+
+/**
+ * Recompute and store a value once per process (and once per cluster with
+ * a lock). Resolves to null when a background refresh found another node
+ * already refreshing.
+ */
+function refresh<T>(
+  store: ReadThroughStore<T>,
+  fn: () => Promise<T>,
+  options: ReadThroughOptions,
+  background: boolean
+): Promise<{ value: T } | null> {
+  const existing = inflight.get(store.key);
+  if (existing) {
+    return existing;
+  }
+
+  const promise = (async (): Promise<{ value: T } | null> => {
+    let token: string | null = null;
+
+    if (options.lock) {
+      const lockOptions: CacheLockOptions = options.lock === true ? {} : options.lock;
+      const { ttl: lockTTL = 5000, wait = 2000 } = lockOptions;
+      token = await tryLock(store.redis, `cache:${store.key}`, lockTTL);
+      if (!token) {
+        if (background) {
+          return null;
+        }
+        const filled = await waitForFill(store, wait);
+        if (filled) {
+          return { value: filled.v };
+        }
+        // The holder is slow or died; compute without the lock rather than fail
+      }
+    }
+
+    try {
+      const start = Date.now();
+      const value = await fn();
+      const now = Date.now();
+      const envelope: CacheEnvelope<T> = {
+        v: value,
+        x: options.ttl ? now + options.ttl * 1000 : null,
+        d: now - start
+      };
+      await store.write(envelope, options.ttl ? options.ttl + (options.staleTTL || 0) : undefined);
+      return { value };
+    } finally {
+      if (token) {
+        await unlock(store.redis, `cache:${store.key}`, token).catch((error) => {
+          logger.warn({ error, key: store.key }, 'Cache lock release error');
+        });
+      }
+    }
+  })().finally(() => inflight.delete(store.key));
+
+  inflight.set(store.key, promise);
+  return promise;
+}
+
+/**
+ * Read-through caching with single-flight misses, optional cross-node
+ * locking, probabilistic early refresh and stale-while-revalidate
+ */
+export async function readThrough<T>(
+  store: ReadThroughStore<T>,
+  fn: () => Promise<T>,
+  options: ReadThroughOptions = {}
+): Promise<T> {
+  const envelope = await store.read();
+
+  if (isEnvelope<T>(envelope)) {
+    const now = Date.now();
+    if (!isFresh(envelope, now) || shouldRefreshEarly(envelope, now, options.earlyRefresh)) {
+      // Serve what we have; one caller refreshes it in the background
+      refresh(store, fn, options, true).catch((error) => {
+        logger.error({ error, key: store.key }, 'Background cache refresh error');
+      });
+    }
+    return envelope.v;
+  }
+
+  logger.debug({ key: store.key }, 'Cache miss');
+  const result = await refresh(store, fn, options, false);
+  // Only null if we joined a background refresh that lost the lock
+  return result ? result.value : fn();
 }
 
 class CacheService {
   private redis?: Redis;
+  private subscriber?: Redis;
+  private local?: MemoryCache;
+  private localPrefixes: string[] = [];
+  private codec = new CacheCodec();
+  private readonly nodeId = `${process.pid}:${Math.random().toString(36).substring(2, 10)}`;
   private defaultTTL: number = 3600; // 1 hour
 
   /**
    * Initialize cache with Redis client
    */
-  initialize(redis: Redis): void {
+  initialize(redis: Redis, options: CacheInitOptions = {}): void {
     this.redis = redis;
-    logger.info('Cache service initialized');
+    this.codec = new CacheCodec(options.codec);
+    if (options.local?.enabled) {
+      this.enableLocalCache(redis, options.local);
+    }
+    logger.info({ localCache: !!this.local }, 'Cache service initialized');
+  }
+
+  /**
+   * Put a bounded in-process LRU in front of Redis. Writes and deletes are
+   * broadcast over pub/sub so every node drops its copy.
+   */
+  private enableLocalCache(redis: Redis, options: LocalCacheOptions): void {
+    this.local = new MemoryCache(options);
+    this.localPrefixes = options.prefixes || [];
+
+    this.subscriber = redis.duplicate();
+    this.subscriber.on('message', (_channel: string, message: string) => {
+      this.applyInvalidation(message);
+    });
+    // Messages published while we were disconnected are lost
+    this.subscriber.on('ready', () => this.local?.clear());
+    this.subscriber.subscribe(INVALIDATION_CHANNEL).catch((error) => {
+      logger.error({ error }, 'Cache invalidation subscribe error');
+    });
   }
 
   /**
@@ -30,17 +362,30 @@ class CacheService {
 
     try {
       const fullKey = this.getFullKey(key, options.prefix);
-      const value = await this.redis.get(fullKey);
+      const local = this.usesLocal(fullKey, options) ? this.local : undefined;
+      let payload = local?.get(fullKey) as Buffer | null | undefined;
+
+      if (payload === undefined) {
+        if (local) {
+          // Fetch the remaining TTL in the same round trip so L1 never outlives Redis
+          const [[, stored], [, pttl]] = (await this.redis.pipeline().getBuffer(fullKey).pttl(fullKey).exec()) as [
+            [Error | null, Buffer | null],
+            [Error | null, number]
+          ];
+          payload = stored;
+          if (payload) {
+            local.set(fullKey, payload, pttl > 0 ? pttl : Infinity);
+          }
+        } else {
+          payload = await this.redis.getBuffer(fullKey);
+        }
+      }
       
-      if (!value) {
+      if (!payload || payload.length === 0) {
         return null;
       }
 
-      if (options.json !== false) {
-        return JSON.parse(value);
-      }
-
-      return value as T;
+      return await this.deserialize<T>(fullKey, payload, options);
     } catch (error) { logger.error({ error, key }, 'Cache get error');
       return null;
     }
@@ -62,15 +407,106 @@ class CacheService {
     try {
       const fullKey = this.getFullKey(key, options.prefix);
       const ttl = options.ttl || this.defaultTTL;
-      const serialized = options.json !== false ? JSON.stringify(value) : value;
+      const serialized = await this.serialize(fullKey, value, options);
+
+      if (options.tags && options.tags.length > 0) {
+        const pipeline = this.redis.pipeline();
+        pipeline.setex(fullKey, ttl, serialized);
+        addToTagSets(pipeline, options.tags.map(tagKey), fullKey, ttl);
+        await pipeline.exec();
+      } else {
+        await this.redis.setex(fullKey, ttl, serialized);
+      }
 
-      await this.redis.setex(fullKey, ttl, serialized);
+      if (this.usesLocal(fullKey, options)) {
+        this.local!.set(fullKey, serialized, ttl * 1000);
+        await this.broadcast({ keys: [fullKey] });
+      }
       return true;
     } catch (error) { logger.error({ error, key }, 'Cache set error');
       return false;
     }
   }
 
+  /**
+   * Get several values in one round trip; results follow the order of keys
+   */
+  async mget<T = any>(keys: string[], options: CacheOptions = {}): Promise<(T | null)[]> {
+    if (!this.redis) {
+      logger.warn('Cache not initialized, skipping mget');
+      return keys.map(() => null);
+    }
+    if (keys.length === 0) {
+      return [];
+    }
+
+    try {
+      const fullKeys = keys.map(key => this.getFullKey(key, options.prefix));
+      const payloads = fullKeys.map(fullKey =>
+        this.usesLocal(fullKey, options) ? (this.local!.get(fullKey) as Buffer | undefined) ?? null : null
+      );
+
+      const missing = fullKeys.filter((_, i) => payloads[i] === null);
+      if (missing.length > 0) {
+        const fetched = await this.redis.mgetBuffer(...missing);
+        let j = 0;
+        payloads.forEach((payload, i) => {
+          if (payload === null) {
+            payloads[i] = fetched[j++];
+          }
+        });
+      }
+
+      return await Promise.all(payloads.map((payload, i) =>
+        payload && payload.length > 0 ? this.deserialize<T>(fullKeys[i], payload, options) : null
+      ));
+    } catch (error) { logger.error({ error, keys }, 'Cache mget error');
+      return keys.map(() => null);
+    }
+  }
+
+  /**
+   * Set several values in one pipeline, all with the same TTL and tags
+   */
+  async mset(entries: Record<string, any>, options: CacheOptions = {}): Promise<boolean> {
+    if (!this.redis) {
+      logger.warn('Cache not initialized, skipping mset');
+      return false;
+    }
+
+    const keys = Object.keys(entries);
+    if (keys.length === 0) {
+      return true;
+    }
+
+    try {
+      const ttl = options.ttl || this.defaultTTL;
+      const tagKeys = (options.tags || []).map(tagKey);
+      const localKeys: string[] = [];
+      const pipeline = this.redis.pipeline();
+
+      for (const key of keys) {
+        const fullKey = this.getFullKey(key, options.prefix);
+        const serialized = await this.serialize(fullKey, entries[key], options);
+        pipeline.setex(fullKey, ttl, serialized);
+        addToTagSets(pipeline, tagKeys, fullKey, ttl);
+
+        if (this.usesLocal(fullKey, options)) {
+          this.local!.set(fullKey, serialized, ttl * 1000);
+          localKeys.push(fullKey);
+        }
+      }
+
+      await pipeline.exec();
+      if (localKeys.length > 0) {
+        await this.broadcast({ keys: localKeys });
+      }
+      return true;
+    } catch (error) { logger.error({ error, keys }, 'Cache mset error');
+      return false;
+    }
+  }
+
   /**
    * Delete value from cache
    */
@@ -83,6 +519,10 @@ class CacheService {
     try {
       const fullKey = this.getFullKey(key, prefix);
       await this.redis.del(fullKey);
+      if (this.local) {
+        this.local.delete(fullKey);
+        await this.broadcast({ keys: [fullKey] });
+      }
       return true;
     } catch (error) { logger.error({ error, key }, 'Cache del error');
       return false;
@@ -90,7 +530,7 @@ class CacheService {
   }
 
   /**
-   * Delete multiple keys by pattern
+   * Delete multiple keys by pattern (incremental SCAN; prefer tags for hot paths)
    */
   async delPattern(pattern: string, prefix?: string): Promise<number> {
     if (!this.redis) {
@@ -100,19 +540,36 @@ class CacheService {
 
     try {
       const fullPattern = this.getFullKey(pattern, prefix);
-      const keys = await this.redis.keys(fullPattern);
-      
-      if (keys.length === 0) {
-        return 0;
+      if (this.local) {
+        this.local.deletePattern(fullPattern);
+        await this.broadcast({ pattern: fullPattern });
       }
-
-      await this.redis.del(...keys);
-      return keys.length;
+      return await scanDelete(this.redis, fullPattern);
     } catch (error) { logger.error({ error, pattern }, 'Cache delPattern error');
       return 0;
     }
   }
 
+  /**
+   * Delete every entry that was set with any of the given tags
+   */
+  async invalidateTags(tags: string[]): Promise<number> {
+    if (!this.redis) {
+      logger.warn('Cache not initialized, skipping invalidateTags');
+      return 0;
+    }
+
+    try {
+      const local = this.local;
+      return await deleteTagSets(this.redis, tags.map(tagKey), undefined, local && ((keys) => {
+        keys.forEach(key => local.delete(key));
+        void this.broadcast({ keys });
+      }));
+    } catch (error) { logger.error({ error, tags }, 'Cache invalidateTags error');
+      return 0;
+    }
+  }
+
   /**
    * Check if key exists
    */
@@ -183,28 +640,29 @@ class CacheService {
   }
 
   /**
-   * Execute a function with caching
+   * Execute a function with caching. Concurrent misses on a key share one
+   * call to fn; see ReadThroughOptions for locking, early refresh and
+   * stale-while-revalidate. Values are stored wrapped in a CacheEnvelope.
    */
   async cached<T>(
     key: string,
     fn: () => Promise<T>,
-    options: CacheOptions = {}
+    options: CachedOptions = {}
   ): Promise<T> {
-    // Try to get from cache first
-    const cached = await this.get<T>(key, options);
-    if (cached !== null) {
-      logger.debug({ key }, 'Cache hit');
-      return cached;
+    if (!this.redis) {
+      logger.warn('Cache not initialized, skipping cached');
+      return fn();
     }
 
-    // Execute function and cache result
-    logger.debug({ key }, 'Cache miss');
-    const result = await fn();
-    
-    // Cache the result
-    await this.set(key, result, options);
-    
-    return result;
+    const ttl = options.ttl || this.defaultTTL;
+    const entryOptions: CacheOptions = { ...options, json: true };
+
+    return readThrough<T>({
+      redis: this.redis,
+      key: this.getFullKey(key, options.prefix),
+      read: () => this.get<CacheEnvelope<T>>(key, entryOptions),
+      write: (envelope, physicalTTL) => this.set(key, envelope, { ...entryOptions, ttl: physicalTTL })
+    }, fn, { ...options, ttl });
   }
 
   /**
@@ -221,6 +679,90 @@ class CacheService {
     return this.delPattern(pattern, prefix);
   }
 
+  /**
+   * L1 hit/miss/eviction counters, or null when L1 is disabled
+   */
+  getLocalStats(): MemoryCacheStats | null {
+    return this.local ? this.local.getStats() : null;
+  }
+
+  /**
+   * Per-prefix payload sizes and encode/decode times
+   */
+  getCodecStats(): Record<string, CodecStats> {
+    return this.codec.getStats();
+  }
+
+  /**
+   * Close the pub/sub connection used for L1 invalidation
+   */
+  async close(): Promise<void> {
+    if (this.subscriber) {
+      await this.subscriber.quit();
+      this.subscriber = undefined;
+    }
+  }
+
+  // Raw (json: false) values are stored as given
+  private async serialize(fullKey: string, value: any, options: CacheOptions): Promise<Buffer> {
+    if (options.json === false) {
+      return Buffer.isBuffer(value) ? value : Buffer.from(String(value));
+    }
+    return this.codec.encode(keyPrefix(fullKey), value);
+  }
+
+  private async deserialize<T>(fullKey: string, payload: Buffer, options: CacheOptions): Promise<T | null> {
+    if (options.json === false) {
+      return payload.toString() as T;
+    }
+
+    try {
+      return await this.codec.decode<T>(keyPrefix(fullKey), payload);
+    } catch (error) {
+      // Written by a newer node; treat as a miss until this one is upgraded
+      if (error instanceof UnknownCodecVersionError) {
+        logger.warn({ key: fullKey, error: error.message }, 'Skipping cache entry with unknown codec version');
+        return null;
+      }
+      throw error;
+    }
+  }
+
+  private usesLocal(fullKey: string, options: CacheOptions): boolean {
+    if (!this.local) {
+      return false;
+    }
+    return options.local === true || this.localPrefixes.some(prefix => fullKey.startsWith(prefix));
+  }
+
+  private async broadcast(message: Omit<InvalidationMessage, 'origin'>): Promise<void> {
+    try {
+      await this.redis!.publish(INVALIDATION_CHANNEL, JSON.stringify({ origin: this.nodeId, ...message }));
+    } catch (error) { logger.warn({ error }, 'Cache invalidation broadcast error');
+    }
+  }
+
+  private applyInvalidation(raw: string): void {
+    if (!this.local) {
+      return;
+    }
+
+    try {
+      const message: InvalidationMessage = JSON.parse(raw);
+      if (message.origin === this.nodeId) {
+        return;
+      }
+      if (message.clear) {
+        this.local.clear();
+      }
+      message.keys?.forEach(key => this.local!.delete(key));
+      if (message.pattern) {
+        this.local.deletePattern(message.pattern);
+      }
+    } catch (error) { logger.warn({ error }, 'Invalid cache invalidation message');
+    }
+  }
+
   /**
    * Get full cache key with prefix
    */
@@ -251,10 +793,17 @@ export const cacheKeys = {
   passwordReset: (token: string) => `password-reset:${token}`,
   twoFactorSecret: (userId: string) => `2fa:${userId}`,
   rateLimit: (key: string) => `rate-limit:${key}`,
-  search: (query: string) => `search:${query}`,
+  search: (params: Record<string, unknown>) => searchCacheKey(params),
   analytics: (key: string) => `analytics:${key}`,
 };
 
+// Tags for entries that are dropped together, instead of by key pattern
+export const cacheTags = {
+  product: (id: string) => `product:${id}`,
+  productTags: () => 'product-tags',
+  wishlist: (userId: string) => `wishlist:${userId}`,
+};
+
 // Cache TTL constants
 export const cacheTTL = {
   SHORT: 60, // 1 minute
@@ -0,0 +1,70 @@
+import { Redis } from 'ioredis';
+import { logger } from './logger';
+
+// Store the snapshot unless the one already there is as new or newer
+const PUT_SCRIPT = `
+local current = redis.call('hget', KEYS[1], 'v')
+if current and tonumber(current) >= tonumber(ARGV[1]) then
+  return 0
+end
+redis.call('hset', KEYS[1], 'v', ARGV[1], 'd', ARGV[2])
+redis.call('expire', KEYS[1], ARGV[3])
+return 1`;
+
+/**
+ * Redis key of a user's cart snapshot. It sits under cart:<userId>:, so
+ * writers that drop the user's cart cache drop the snapshot too.
+ */
+export function cartSnapshotKey(userId: string): string {
+  return `cart:${userId}:snapshot`;
+}
+
+/**
+ * Versioned cart snapshots kept in a Redis hash: `v` holds the cart version
+ * the snapshot reflects, `d` the snapshot itself. Writes are compare-and-set
+ * on the version, so a slow writer can never replace a newer snapshot.
+ */
+export class CartSnapshotStore<T extends { version: number }> {
+  constructor(
+    private redis: Redis,
+    private ttl: number = 600 // Seconds a snapshot lives without being written
+  ) {}
+
+  async get(userId: string): Promise<T | null> {
+    try {
+      const data = await this.redis.hget(cartSnapshotKey(userId), 'd');
+      return data ? JSON.parse(data) : null;
+    } catch (error) {
+      logger.warn({ error, userId }, 'Cart snapshot read failed');
+      return null;
+    }
+  }
+
+  /**
+   * Returns false when a snapshot at the same or a later version is stored
+   */
+  async put(userId: string, snapshot: T): Promise<boolean> {
+    try {
+      const result = await this.redis.eval(
+        PUT_SCRIPT,
+        1,
+        cartSnapshotKey(userId),
+        snapshot.version,
+        JSON.stringify(snapshot),
+        this.ttl
+      );
+      return result === 1;
+    } catch (error) {
+      logger.warn({ error, userId, version: snapshot.version }, 'Cart snapshot write failed');
+      return false;
+    }
+  }
+
+  async delete(userId: string): Promise<void> {
+    try {
+      await this.redis.unlink(cartSnapshotKey(userId));
+    } catch (error) {
+      logger.warn({ error, userId }, 'Cart snapshot delete failed');
+    }
+  }
+}
@@ -0,0 +1,154 @@
+import { Prisma, PrismaClient, Product, ProductStatus, ProductVariant } from '@prisma/client';
+
+// Checkout reserves tracked stock at this location
+export const DEFAULT_STOCK_LOCATION = 'main-warehouse';
+
+// Price differences below this are rounding, not a change
+const PRICE_TOLERANCE = 0.005;
+
+export interface CartLine {
+  id: string;
+  productId: string;
+  variantId: string | null;
+  quantity: number;
+  price: Prisma.Decimal | number | string;
+}
+
+/**
+ * Current state of everything a set of cart lines refers to
+ */
+export interface CartCatalog {
+  products: Map<string, Product>;
+  variants: Map<string, ProductVariant>;
+  stock: Map<string, number>; // Unreserved units of tracked products at the checkout location
+}
+
+export type CartLineChangeType =
+  | 'unavailable'
+  | 'variant_unavailable'
+  | 'out_of_stock'
+  | 'quantity_clamped'
+  | 'price_changed';
+
+export interface CartLineChange {
+  itemId: string;
+  productId: string;
+  variantId: string | null;
+  type: CartLineChangeType;
+  from?: number;
+  to?: number;
+}
+
+export interface CartLineReview {
+  line: CartLine;
+  available: number; // Units that can be sold right now
+  quantity: number; // Quantity the line can keep; 0 when it cannot be bought
+  price: number; // Current unit price
+  changes: CartLineChange[];
+}
+
+/**
+ * Load the products, variants and stock levels of any number of cart lines
+ * in four queries, whatever the size of the cart
+ */
+export async function loadCartCatalog(
+  db: PrismaClient | Prisma.TransactionClient,
+  lines: Pick<CartLine, 'productId' | 'variantId'>[]
+): Promise<CartCatalog> {
+  const productIds = [...new Set(lines.map(line => line.productId))];
+  const variantIds = [...new Set(lines.map(line => line.variantId).filter((id): id is string => !!id))];
+
+  if (productIds.length === 0) {
+    return { products: new Map(), variants: new Map(), stock: new Map() };
+  }
+
+  const [products, variants, inventory, reservations] = await Promise.all([
+    db.product.findMany({ where: { id: { in: productIds } } }),
+    variantIds.length > 0
+      ? db.productVariant.findMany({ where: { id: { in: variantIds } } })
+      : Promise.resolve([] as ProductVariant[]),
+    db.inventory_items.groupBy({
+      by: ['product_id'],
+      where: { product_id: { in: productIds }, location_id: DEFAULT_STOCK_LOCATION },
+      _sum: { quantity: true }
+    }),
+    db.inventory_reservations.groupBy({
+      by: ['product_id'],
+      where: { product_id: { in: productIds } },
+      _sum: { quantity: true }
+    })
+  ]);
+
+  const reserved = new Map(reservations.map(row => [row.product_id, row._sum.quantity ?? 0]));
+  const stock = new Map(inventory.map(row => [
+    row.product_id,
+    (row._sum.quantity ?? 0) - (reserved.get(row.product_id) ?? 0)
+  ]));
+
+  return {
+    products: new Map(products.map(product => [product.id, product])),
+    variants: new Map(variants.map(variant => [variant.id, variant])),
+    stock
+  };
+}
+
+/**
+ * Units of a line's product (or variant) that can be sold. Tracked products
+ * are also bounded by unreserved stock at the checkout location, which is
+ * what order creation enforces.
+ */
+export function availableQuantity(catalog: CartCatalog, line: Pick<CartLine, 'productId' | 'variantId'>): number {
+  const product = catalog.products.get(line.productId);
+  if (!product) {
+    return 0;
+  }
+
+  const variant = line.variantId ? catalog.variants.get(line.variantId) : undefined;
+  const units = variant?.quantity ?? product.quantity;
+  const available = product.trackInventory ? Math.min(units, catalog.stock.get(product.id) ?? 0) : units;
+  return Math.max(available, 0);
+}
+
+/**
+ * Compare cart lines with the catalog, in memory. Every difference is
+ * reported: lines that can no longer be bought, quantities above what is
+ * available and prices that moved since the item was added.
+ */
+export function reviewCartLines(lines: CartLine[], catalog: CartCatalog): CartLineReview[] {
+  return lines.map(line => {
+    const change = (type: CartLineChangeType, from?: number, to?: number): CartLineChange => ({
+      itemId: line.id,
+      productId: line.productId,
+      variantId: line.variantId,
+      type,
+      ...(from !== undefined && { from, to })
+    });
+
+    const product = catalog.products.get(line.productId);
+    const variant = line.variantId ? catalog.variants.get(line.variantId) : undefined;
+    const price = Number(variant?.price ?? product?.price ?? line.price);
+
+    if (!product || product.status !== ProductStatus.PUBLISHED) {
+      return { line, available: 0, quantity: 0, price, changes: [change('unavailable')] };
+    }
+    if (line.variantId && (!variant || variant.productId !== line.productId)) {
+      return { line, available: 0, quantity: 0, price, changes: [change('variant_unavailable')] };
+    }
+
+    const available = availableQuantity(catalog, line);
+    if (available === 0) {
+      return { line, available, quantity: 0, price, changes: [change('out_of_stock', line.quantity, 0)] };
+    }
+
+    const changes: CartLineChange[] = [];
+    const quantity = Math.min(line.quantity, available);
+    if (quantity < line.quantity) {
+      changes.push(change('quantity_clamped', line.quantity, quantity));
+    }
+    if (Math.abs(price - Number(line.price)) > PRICE_TOLERANCE) {
+      changes.push(change('price_changed', Number(line.price), price));
+    }
+
+    return { line, available, quantity, price, changes };
+  });
+}
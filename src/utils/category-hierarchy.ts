@@ -0,0 +1,141 @@
+import { PrismaClient } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { logger } from './logger';
+
+// Bumped on every hierarchy change; nodes reload their snapshot when it moves
+export const HIERARCHY_VERSION_KEY = 'categories:hierarchy:version';
+
+// How often a node checks the version key, in milliseconds
+const VERSION_CHECK_INTERVAL = 5000;
+
+export interface HierarchyNode {
+  id: string;
+  name: string;
+  slug: string;
+  parentId: string | null;
+}
+
+/**
+ * Immutable in-memory copy of the category tree for hot path/descendant reads
+ */
+export class CategoryHierarchy {
+  private nodes = new Map<string, HierarchyNode>();
+  private children = new Map<string, string[]>();
+
+  constructor(nodes: HierarchyNode[]) {
+    for (const node of nodes) {
+      this.nodes.set(node.id, node);
+      if (node.parentId) {
+        const siblings = this.children.get(node.parentId);
+        if (siblings) {
+          siblings.push(node.id);
+        } else {
+          this.children.set(node.parentId, [node.id]);
+        }
+      }
+    }
+  }
+
+  get(categoryId: string): HierarchyNode | undefined {
+    return this.nodes.get(categoryId);
+  }
+
+  // The category and its ancestors, root first
+  path(categoryId: string): HierarchyNode[] {
+    const path: HierarchyNode[] = [];
+    const seen = new Set<string>();
+    let node = this.nodes.get(categoryId);
+
+    while (node && !seen.has(node.id)) {
+      seen.add(node.id);
+      path.unshift(node);
+      node = node.parentId ? this.nodes.get(node.parentId) : undefined;
+    }
+
+    return path;
+  }
+
+  depth(categoryId: string): number {
+    return Math.max(this.path(categoryId).length - 1, 0);
+  }
+
+  childIds(categoryId: string): string[] {
+    return [...(this.children.get(categoryId) || [])];
+  }
+
+  // Every category below this one, breadth first
+  descendantIds(categoryId: string): string[] {
+    const descendants: string[] = [];
+    const seen = new Set<string>([categoryId]);
+    const queue = [categoryId];
+
+    for (let i = 0; i < queue.length; i++) {
+      for (const childId of this.children.get(queue[i]) || []) {
+        if (!seen.has(childId)) {
+          seen.add(childId);
+          descendants.push(childId);
+          queue.push(childId);
+        }
+      }
+    }
+
+    return descendants;
+  }
+}
+
+let current: { hierarchy: CategoryHierarchy; version: string | null; checkedAt: number } | null = null;
+let loading: Promise<CategoryHierarchy> | null = null;
+
+async function load(prisma: PrismaClient, version: string | null): Promise<CategoryHierarchy> {
+  const nodes = await prisma.category.findMany({
+    select: { id: true, name: true, slug: true, parentId: true }
+  });
+  const hierarchy = new CategoryHierarchy(nodes);
+  current = { hierarchy, version, checkedAt: Date.now() };
+  logger.debug({ categories: nodes.length, version }, 'Category hierarchy snapshot loaded');
+  return hierarchy;
+}
+
+/**
+ * Current hierarchy snapshot. At most one GET per VERSION_CHECK_INTERVAL
+ * and one reload per version change per process.
+ */
+export async function getCategoryHierarchy(prisma: PrismaClient, redis: Redis): Promise<CategoryHierarchy> {
+  if (current && Date.now() - current.checkedAt < VERSION_CHECK_INTERVAL) {
+    return current.hierarchy;
+  }
+  if (loading) {
+    return loading;
+  }
+
+  loading = (async () => {
+    let version: string | null = null;
+    try {
+      version = await redis.get(HIERARCHY_VERSION_KEY);
+    } catch (error) {
+      logger.warn({ error }, 'Failed to read category hierarchy version');
+    }
+
+    if (current && version === current.version) {
+      current.checkedAt = Date.now();
+      return current.hierarchy;
+    }
+    return load(prisma, version);
+  })().finally(() => {
+    loading = null;
+  });
+
+  return loading;
+}
+
+/**
+ * Mark every node's snapshot stale; call after any parent/name/slug change
+ */
+export async function invalidateCategoryHierarchy(redis: Redis): Promise<void> {
+  current = null;
+  try {
+    await redis.incr(HIERARCHY_VERSION_KEY);
+  } catch (error) {
+    logger.warn({ error }, 'Failed to bump category hierarchy version');
+  }
+}
@@ -0,0 +1,406 @@
+import { FraudRule, PrismaClient } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { DEFAULT_FRAUD_RULES } from './fraud-rules';
+import { logger } from './logger';
+
+export interface RuleCheckResult {
+  ruleId: string;
+  ruleName: string;
+  passed: boolean;
+  score: number;
+  reason?: string;
+}
+
+/**
+ * What a user has done so far, as kept by the fraud feature store
+ */
+export interface FraudFeatures {
+  accountCreatedAt: number | null;
+  orderCount: number;
+  orderTotal: number;
+  recentOrders: Array<{ at: number; amount: number }>; // Last 30 days, oldest first
+  failedPayments: number; // In the last day
+}
+
+export interface FraudTransaction {
+  amount: number;
+  country?: string | null;
+  paymentMethod?: string | null;
+}
+
+export interface FraudEvaluation {
+  score: number; // Weighted failures over the total weight, 0 to 1 or more
+  rules: RuleCheckResult[];
+  blockedReason?: string;
+}
+
+export interface FraudCondition {
+  field: string;
+  operator: 'equals' | 'greater_than' | 'less_than' | 'contains';
+  value: unknown;
+}
+
+export interface TriggeredFraudRule {
+  id: string;
+  name: string;
+  weight: number;
+  conditions: FraudCondition[];
+  actions: string[];
+}
+
+type RuleType = 'VELOCITY' | 'AMOUNT' | 'LOCATION' | 'PATTERN' | 'DEVICE' | 'CUSTOM' | 'CONDITIONS' | 'UNKNOWN';
+
+type RuleCheck = (transaction: FraudTransaction, features: FraudFeatures, at: number) => {
+  score: number;
+  reason: string;
+} | null;
+
+interface CompiledFraudRule {
+  id: string;
+  name: string;
+  weight: number;
+  check: RuleCheck;
+}
+
+interface CompiledConditionRule extends TriggeredFraudRule {
+  test: (context: Record<string, unknown>) => boolean;
+}
+
+interface RuleSource {
+  id: string;
+  name: string;
+  weight: number;
+  type: RuleType;
+  config: any;
+}
+
+// Bumped on every fraud rule write; a node whose rules are at another version rebuilds
+const VERSION_KEY = 'fraud-rules:version';
+
+// How often a node compares its rules with the Redis version
+const VERSION_CHECK_MS = 5000;
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+// Rule types accepted by the fraud rule API that go by another name here
+const TYPE_ALIASES: Record<string, RuleType> = {
+  GEOGRAPHIC: 'LOCATION',
+  BEHAVIORAL: 'PATTERN'
+};
+
+function ordersSince(features: FraudFeatures, since: number): Array<{ at: number; amount: number }> {
+  return features.recentOrders.filter(order => order.at > since);
+}
+
+/**
+ * Rule type from the configuration, or from the name for rules saved
+ * without one. Rules with a condition list (the whole configuration, or
+ * its when field) are matched condition by condition instead.
+ */
+function ruleType(name: string, conditions: any): RuleType {
+  if (Array.isArray(conditions) || Array.isArray(conditions?.when)) return 'CONDITIONS';
+
+  const declared = conditions?.ruleType;
+  if (typeof declared === 'string') {
+    const upper = declared.toUpperCase();
+    return TYPE_ALIASES[upper] ?? upper as RuleType;
+  }
+
+  const lower = name.toLowerCase();
+  if (lower.includes('velocity')) return 'VELOCITY';
+  if (lower.includes('amount')) return 'AMOUNT';
+  if (lower.includes('location') || lower.includes('geolocation') || lower.includes('country')) return 'LOCATION';
+  if (lower.includes('pattern')) return 'PATTERN';
+  if (lower.includes('device')) return 'DEVICE';
+  if (lower.includes('payment')) return 'CUSTOM';
+  return 'UNKNOWN';
+}
+
+function compileCheck(type: RuleType, config: any): RuleCheck | null {
+  switch (type) {
+    case 'VELOCITY': {
+      const timeWindow = config.timeWindow || 3600;
+      const maxCount = config.maxCount || 5;
+      return (_transaction, features, at) => {
+        // The transaction being scored counts towards the limit
+        const count = ordersSince(features, at - timeWindow * 1000).length + 1;
+        return count > maxCount ? { score: 1, reason: `Too many orders: ${count} in ${timeWindow}s` } : null;
+      };
+    }
+
+    case 'AMOUNT': {
+      const maxAmount = config.maxAmount || 1000;
+      const firstTimeMax = config.firstTimeUserMaxAmount || maxAmount;
+      return (transaction, features) => {
+        const limit = features.orderCount === 0 ? firstTimeMax : maxAmount;
+        return transaction.amount > limit
+          ? { score: Math.min(transaction.amount / limit, 2), reason: `Amount ${transaction.amount} exceeds limit ${limit}` }
+          : null;
+      };
+    }
+
+    case 'LOCATION': {
+      const allowed = new Set<string>((config.allowedCountries || []).map((code: string) => code.toUpperCase()));
+      const blocked = new Set<string>((config.blockedCountries || []).map((code: string) => code.toUpperCase()));
+      return transaction => {
+        const country = transaction.country?.toUpperCase();
+        if (!country) return null;
+        if (blocked.has(country)) return { score: 1, reason: `Country ${country} is blocked` };
+        if (allowed.size > 0 && !allowed.has(country)) return { score: 1, reason: `Country ${country} not in allowed list` };
+        return null;
+      };
+    }
+
+    case 'PATTERN': {
+      const checkFailedPayments = config.checkFailedPayments ?? true;
+      const checkOrderPatterns = config.checkOrderPatterns ?? true;
+      return (transaction, features, at) => {
+        const patterns: string[] = [];
+        if (checkFailedPayments && features.failedPayments >= 3) {
+          patterns.push('multipleFailedPayments');
+        }
+        if (checkOrderPatterns) {
+          // A spike over the last week's average, this transaction included
+          const week = ordersSince(features, at - 7 * DAY_MS);
+          const average = (week.reduce((sum, order) => sum + order.amount, 0) + transaction.amount) / (week.length + 1);
+          if (week.length > 0 && transaction.amount > average * 3) {
+            patterns.push('unusualOrderPattern');
+          }
+        }
+        return patterns.length > 0
+          ? { score: patterns.length * 0.3, reason: `Suspicious patterns: ${patterns.join(', ')}` }
+          : null;
+      };
+    }
+
+    case 'CUSTOM': {
+      const highRisk = new Set<string>(config.highRiskPaymentMethods || []);
+      const verify = new Set<string>(config.requireVerificationFor || []);
+      const blockAfterFailures = config.blockAfterFailures || 0;
+      if (highRisk.size === 0 && verify.size === 0 && !blockAfterFailures) return null;
+      return (transaction, features) => {
+        if (blockAfterFailures && features.failedPayments >= blockAfterFailures) {
+          return { score: 1, reason: `${features.failedPayments} failed payments in the last day` };
+        }
+        const method = transaction.paymentMethod;
+        if (method && highRisk.has(method)) return { score: 1, reason: `High risk payment method ${method}` };
+        if (method && verify.has(method)) return { score: 0.5, reason: `Payment method ${method} requires verification` };
+        return null;
+      };
+    }
+
+    default:
+      // Device rules need fingerprints this backend does not collect yet
+      return null;
+  }
+}
+
+function compileCondition({ field, operator, value }: FraudCondition): (context: Record<string, unknown>) => boolean {
+  switch (operator) {
+    case 'equals':
+      return context => context[field] === value;
+    case 'greater_than':
+      return context => (context[field] as any) > (value as any);
+    case 'less_than':
+      return context => (context[field] as any) < (value as any);
+    case 'contains':
+      return context => {
+        const found = context[field] as { includes?: (item: unknown) => boolean } | undefined;
+        return typeof found?.includes === 'function' && found.includes(value);
+      };
+    default:
+      return () => false;
+  }
+}
+
+/**
+ * Fraud rules compiled for evaluation in memory.
+ *
+ * Each typed rule becomes a closure over its parsed configuration (country
+ * lists become sets, defaults are filled in once), and evaluating a
+ * transaction is a pass over those closures against the user's
+ * precomputed features. Rules stored as condition lists are compiled into
+ * predicates for evaluateRules. Default rules apply unless a stored rule
+ * has the same name, so saving an inactive copy disables a default.
+ */
+export class FraudRuleSet {
+  private rules: CompiledFraudRule[] = [];
+  private conditionRules: CompiledConditionRule[] = [];
+  private totalWeight = 0;
+
+  constructor(stored: FraudRule[], readonly version: number = 0) {
+    const names = new Set(stored.map(rule => rule.name));
+    const sources: RuleSource[] = stored
+      .filter(rule => rule.isActive)
+      .map(rule => ({
+        id: rule.id,
+        name: rule.name,
+        weight: rule.weight,
+        type: ruleType(rule.name, rule.conditions),
+        config: rule.conditions ?? {}
+      }));
+
+    for (const rule of DEFAULT_FRAUD_RULES) {
+      if (rule.isActive && !names.has(rule.name)) {
+        sources.push({
+          id: `default:${rule.type.toLowerCase()}`,
+          name: rule.name,
+          weight: rule.weight,
+          type: rule.type as RuleType,
+          config: rule.configuration
+        });
+      }
+    }
+
+    // Heaviest first, so results read in order of importance
+    sources.sort((a, b) => b.weight - a.weight);
+    for (const source of sources) {
+      if (source.type === 'CONDITIONS') {
+        const listed = Array.isArray(source.config);
+        const conditions: FraudCondition[] = listed ? source.config : source.config.when;
+        const tests = conditions.map(compileCondition);
+        this.conditionRules.push({
+          id: source.id,
+          name: source.name,
+          weight: source.weight,
+          conditions,
+          actions: listed ? [] : source.config.actions ?? [],
+          test: context => tests.every(test => test(context))
+        });
+        continue;
+      }
+
+      // Rules that cannot fail still count towards the total weight
+      this.totalWeight += source.weight;
+      this.rules.push({
+        id: source.id,
+        name: source.name,
+        weight: source.weight,
+        check: compileCheck(source.type, source.config) ?? (() => null)
+      });
+    }
+  }
+
+  get size(): number {
+    return this.rules.length + this.conditionRules.length;
+  }
+
+  /**
+   * Score a transaction against every typed rule. A rule that fails adds
+   * its score times its weight; the total is divided by the sum of weights.
+   */
+  evaluate(transaction: FraudTransaction, features: FraudFeatures, at: number = Date.now()): FraudEvaluation {
+    const results: RuleCheckResult[] = [];
+    let total = 0;
+    let blockedReason: string | undefined;
+
+    for (const rule of this.rules) {
+      const failure = rule.check(transaction, features, at);
+      if (!failure) {
+        results.push({ ruleId: rule.id, ruleName: rule.name, passed: true, score: 0 });
+        continue;
+      }
+
+      const score = failure.score * rule.weight;
+      total += score;
+      if (!blockedReason && score >= 1) {
+        blockedReason = failure.reason;
+      }
+      results.push({ ruleId: rule.id, ruleName: rule.name, passed: false, score, reason: failure.reason });
+    }
+
+    return {
+      score: this.totalWeight > 0 ? total / this.totalWeight : 0,
+      rules: results,
+      blockedReason
+    };
+  }
+
+  /**
+   * Condition-list rules whose every condition holds for the context
+   */
+  match(context: Record<string, unknown>): TriggeredFraudRule[] {
+    return this.conditionRules
+      .filter(rule => rule.test(context))
+      .map(({ id, name, weight, conditions, actions }) => ({ id, name, weight, conditions, actions }));
+  }
+}
+
+/**
+ * The process-wide fraud rule set, kept current the same way as the tax
+ * rule index: writers call invalidate(), which bumps the version in Redis
+ * and rebuilds locally, and other nodes rebuild in the background within
+ * VERSION_CHECK_MS of seeing a new version.
+ */
+class FraudRuleSetHolder {
+  private rules: FraudRuleSet | null = null;
+  private building: Promise<FraudRuleSet> | null = null;
+  private checkedAt = 0;
+
+  async get(prisma: PrismaClient, redis: Redis): Promise<FraudRuleSet> {
+    if (!this.rules) {
+      return this.load(prisma, redis);
+    }
+
+    const now = Date.now();
+    if (now - this.checkedAt >= VERSION_CHECK_MS) {
+      this.checkedAt = now;
+      this.checkVersion(prisma, redis);
+    }
+    return this.rules;
+  }
+
+  async invalidate(prisma: PrismaClient, redis: Redis): Promise<void> {
+    try {
+      await redis.incr(VERSION_KEY);
+    } catch (error) {
+      logger.warn({ error }, 'Failed to bump fraud rule version, other nodes will not rebuild');
+    }
+    await this.build(prisma, redis, false);
+  }
+
+  private load(prisma: PrismaClient, redis: Redis): Promise<FraudRuleSet> {
+    if (!this.building) {
+      this.building = this.build(prisma, redis, false).finally(() => {
+        this.building = null;
+      });
+    }
+    return this.building;
+  }
+
+  private checkVersion(prisma: PrismaClient, redis: Redis): void {
+    redis.get(VERSION_KEY)
+      .then(value => {
+        if (this.rules && (Number(value) || 0) !== this.rules.version) {
+          return this.build(prisma, redis, true);
+        }
+      })
+      .catch(error => {
+        logger.warn({ error }, 'Fraud rule version check failed');
+      });
+  }
+
+  /**
+   * Inactive rules are loaded too, since they can disable a default rule
+   * of the same name
+   */
+  private async build(prisma: PrismaClient, redis: Redis, force: boolean): Promise<FraudRuleSet> {
+    const version = await redis.get(VERSION_KEY)
+      .then(value => Number(value) || 0)
+      .catch(error => {
+        logger.warn({ error }, 'Failed to read fraud rule version');
+        return this.rules?.version ?? 0;
+      });
+
+    const stored = await prisma.fraudRule.findMany();
+    const rules = new FraudRuleSet(stored, version);
+
+    if (force || !this.rules || rules.version >= this.rules.version) {
+      this.rules = rules;
+      logger.debug({ version, rules: rules.size }, 'Fraud rules compiled');
+    }
+    return this.rules;
+  }
+}
+
+export const fraudRuleSet = new FraudRuleSetHolder();
@@ -0,0 +1,157 @@
+export interface MemoryCacheOptions {
+  maxEntries?: number;
+  maxBytes?: number;
+  maxTTL?: number; // Upper bound for any entry, in seconds
+}
+
+export interface MemoryCacheStats {
+  hits: number;
+  misses: number;
+  evictions: number;
+  expirations: number;
+  entries: number;
+  bytes: number;
+}
+
+interface MemoryCacheEntry {
+  value: string | Buffer;
+  bytes: number;
+  expiresAt: number;
+}
+
+/**
+ * Size-bounded in-process LRU for serialized cache values (encoded payloads
+ * as stored in Redis, so every hit still returns a private copy).
+ * Map iteration order is insertion order, so re-inserting on every hit keeps
+ * the least recently used entry at the front.
+ */
+export class MemoryCache {
+  private entries = new Map<string, MemoryCacheEntry>();
+  private bytes = 0;
+  private readonly maxEntries: number;
+  private readonly maxBytes: number;
+  private readonly maxTTL: number;
+  private stats = { hits: 0, misses: 0, evictions: 0, expirations: 0 };
+
+  constructor(options: MemoryCacheOptions = {}) {
+    this.maxEntries = options.maxEntries ?? 10000;
+    this.maxBytes = options.maxBytes ?? 64 * 1024 * 1024;
+    this.maxTTL = options.maxTTL ?? 30;
+  }
+
+  get(key: string): string | Buffer | undefined {
+    const entry = this.entries.get(key);
+    if (!entry) {
+      this.stats.misses++;
+      return undefined;
+    }
+
+    if (entry.expiresAt <= Date.now()) {
+      this.remove(key, entry);
+      this.stats.expirations++;
+      this.stats.misses++;
+      return undefined;
+    }
+
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    this.stats.hits++;
+    return entry.value;
+  }
+
+  /**
+   * Store a value for at most ttlMs, capped at maxTTL
+   */
+  set(key: string, value: string | Buffer, ttlMs: number): void {
+    const existing = this.entries.get(key);
+    if (existing) {
+      this.remove(key, existing);
+    }
+
+    const ttl = Math.min(ttlMs, this.maxTTL * 1000);
+    // UTF-16 code units, close enough to V8's string footprint
+    const bytes = key.length * 2 + (typeof value === 'string' ? value.length * 2 : value.length);
+    if (ttl <= 0 || bytes > this.maxBytes) {
+      return;
+    }
+
+    this.entries.set(key, { value, bytes, expiresAt: Date.now() + ttl });
+    this.bytes += bytes;
+
+    while (this.entries.size > this.maxEntries || this.bytes > this.maxBytes) {
+      const oldest = this.entries.keys().next().value as string;
+      this.remove(oldest, this.entries.get(oldest)!);
+      this.stats.evictions++;
+    }
+  }
+
+  delete(key: string): boolean {
+    const entry = this.entries.get(key);
+    if (!entry) {
+      return false;
+    }
+    this.remove(key, entry);
+    return true;
+  }
+
+  /**
+   * Drop every entry whose key matches a Redis-style glob pattern
+   */
+  deletePattern(pattern: string): number {
+    const regex = globToRegExp(pattern);
+    let deleted = 0;
+    for (const [key, entry] of this.entries) {
+      if (regex.test(key)) {
+        this.remove(key, entry);
+        deleted++;
+      }
+    }
+    return deleted;
+  }
+
+  clear(): void {
+    this.entries.clear();
+    this.bytes = 0;
+  }
+
+  getStats(): MemoryCacheStats {
+    return {
+      ...this.stats,
+      entries: this.entries.size,
+      bytes: this.bytes
+    };
+  }
+
+  private remove(key: string, entry: MemoryCacheEntry): void {
+    this.entries.delete(key);
+    this.bytes -= entry.bytes;
+  }
+}
+
+/**
+ * Convert a Redis glob (*, ?, [abc]) into an anchored RegExp
+ */
+export function globToRegExp(pattern: string): RegExp {
+  let source = '';
+  for (let i = 0; i < pattern.length; i++) {
+    const char = pattern[i];
+    if (char === '*') {
+      source += '.*';
+    } else if (char === '?') {
+      source += '.';
+    } else if (char === '[') {
+      const end = pattern.indexOf(']', i + 1);
+      if (end === -1) {
+        source += '\\[';
+      } else {
+        source += `[${pattern.slice(i + 1, end).replace(/\\/g, '\\\\')}]`;
+        i = end;
+      }
+    } else if (char === '\\' && i + 1 < pattern.length) {
+      source += pattern[++i].replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+    } else {
+      source += char.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+    }
+  }
+  return new RegExp(`^${source}$`);
+}
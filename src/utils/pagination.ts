@@ -0,0 +1,133 @@
+import { PrismaClient, Prisma } from '@prisma/client';
+import { createHash } from 'crypto';
+import { cache } from './cache';
+
+/**
+ * How a paginated query reports its total:
+ * - exact: COUNT(*) in the same transaction as the page (default)
+ * - estimated: planner row estimate of the table when unfiltered; a filtered
+ *   count is exact up to ESTIMATE_COUNT_CAP and past it reported as the
+ *   lower bound ESTIMATE_COUNT_CAP + 1
+ * - cached: exact COUNT(*) memoized per where clause for COUNT_CACHE_TTL
+ * - none: no total, only hasMore from fetching one extra row
+ */
+export type TotalsMode = 'exact' | 'estimated' | 'cached' | 'none';
+
+export const TOTALS_MODES: TotalsMode[] = ['exact', 'estimated', 'cached', 'none'];
+
+// Seconds a cached count is reused
+export const COUNT_CACHE_TTL = 30;
+
+// Filtered estimates count exactly up to this many rows, then report a lower bound
+export const ESTIMATE_COUNT_CAP = 1000;
+
+export interface PageArgs {
+  where?: any;
+  skip: number;
+  take: number;
+  orderBy?: any;
+  include?: any;
+  select?: any;
+  cursor?: any;
+}
+
+export interface Page<T> {
+  items: T[];
+  total: number | null;
+  hasMore: boolean;
+  estimated: boolean;
+}
+
+export function isTotalsMode(value: unknown): value is TotalsMode {
+  return typeof value === 'string' && (TOTALS_MODES as string[]).includes(value);
+}
+
+// Physical table of a Prisma model, honouring @@map
+function tableName(modelName: string): string {
+  const model = Prisma.dmmf.datamodel.models.find(m => m.name.toLowerCase() === modelName.toLowerCase());
+  return model?.dbName || model?.name || modelName;
+}
+
+/**
+ * Planner row estimate for a whole table, or null if it was never analyzed
+ */
+export async function estimateTableRows(prisma: PrismaClient, modelName: string): Promise<number | null> {
+  const rows = await prisma.$queryRaw<{ estimate: number | bigint }[]>`
+    SELECT reltuples::bigint AS estimate FROM pg_class WHERE oid = to_regclass(quote_ident(${tableName(modelName)}))
+  `;
+  const estimate = rows.length > 0 ? Number(rows[0].estimate) : -1;
+  return estimate >= 0 ? estimate : null;
+}
+
+async function countWithMode(
+  prisma: PrismaClient,
+  modelName: string,
+  where: any,
+  mode: TotalsMode
+): Promise<{ total: number; estimated: boolean }> {
+  const delegate = (prisma as any)[modelName];
+  const filtered = !!where && Object.keys(where).length > 0;
+
+  if (mode === 'cached') {
+    const whereHash = createHash('sha1').update(JSON.stringify(where || {})).digest('hex').substring(0, 16);
+    const total = await cache.cached<number>(
+      `count:${modelName}:${whereHash}`,
+      () => delegate.count({ where }),
+      { ttl: COUNT_CACHE_TTL }
+    );
+    return { total, estimated: false };
+  }
+
+  // estimated
+  if (filtered) {
+    // The table's row estimate says nothing about how many rows a filter
+    // matches, so past the cap only the lower bound is known
+    const capped: number = await delegate.count({ where, take: ESTIMATE_COUNT_CAP + 1 });
+    return { total: capped, estimated: capped > ESTIMATE_COUNT_CAP };
+  }
+
+  const estimate = await estimateTableRows(prisma, modelName);
+  if (estimate === null) {
+    return { total: await delegate.count({ where }), estimated: false };
+  }
+  return { total: estimate, estimated: true };
+}
+
+/**
+ * Fetch one page of a model and its total according to mode
+ */
+export async function findPage<T>(
+  prisma: PrismaClient,
+  modelName: string,
+  args: PageArgs,
+  mode: TotalsMode = 'exact'
+): Promise<Page<T>> {
+  const delegate = (prisma as any)[modelName];
+
+  if (mode === 'exact') {
+    const [items, total] = await prisma.$transaction([
+      delegate.findMany(args),
+      delegate.count({ where: args.where })
+    ]);
+    return { items, total, hasMore: args.skip + items.length < total, estimated: false };
+  }
+
+  // One extra row tells us whether there is a next page without counting
+  const rows: T[] = await delegate.findMany({ ...args, take: args.take + 1 });
+  const hasMore = rows.length > args.take;
+  const items = hasMore ? rows.slice(0, args.take) : rows;
+
+  if (mode === 'none') {
+    return { items, total: null, hasMore, estimated: false };
+  }
+
+  // A short page that isn't past the end gives the exact total for free
+  if (!hasMore && (items.length > 0 || args.skip === 0)) {
+    return { items, total: args.skip + items.length, hasMore, estimated: false };
+  }
+
+  const { total, estimated } = await countWithMode(prisma, modelName, args.where, mode);
+  // Stale estimates must not contradict the rows we just read
+  const seen = args.skip + items.length + (hasMore ? 1 : 0);
+  return { items, total: Math.max(total, seen), hasMore, estimated };
+}
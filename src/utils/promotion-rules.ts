@@ -0,0 +1,363 @@
+import { Coupon, CouponStatus, Promotion, PromotionType } from '@prisma/client';
+
+export interface PromotionCartLine {
+  productId: string;
+  categoryId?: string | null;
+  sellerId?: string | null;
+  quantity: number;
+  price: number;
+}
+
+export interface PromotionCart {
+  lines: PromotionCartLine[];
+  subtotal?: number; // Defaults to the sum of the lines
+}
+
+/**
+ * Targeting and thresholds a promotion keeps in its conditions column
+ */
+export interface PromotionConditions {
+  minPurchaseAmount?: number;
+  maxDiscountAmount?: number;
+  productIds?: string[];
+  categoryIds?: string[];
+  excludeProductIds?: string[];
+  stackable?: boolean;
+}
+
+export interface CouponUsage {
+  total: number; // Redemptions so far
+  user: number; // Redemptions by the cart's user
+}
+
+export interface AppliedDiscount {
+  id: string;
+  name: string;
+  type: PromotionType;
+  amount: number;
+  freeShipping: boolean;
+}
+
+export interface CouponRejection {
+  code: string;
+  message: string;
+  statusCode: number;
+}
+
+export interface CartEvaluation {
+  subtotal: number;
+  promotions: AppliedDiscount[];
+  coupon: AppliedDiscount | null;
+  couponError?: CouponRejection;
+  discountTotal: number;
+  freeShipping: boolean;
+}
+
+interface RuleTarget {
+  products: Set<string>; // Includes the products of targeted categories at compile time
+  categories: Set<string>;
+  sellers: Set<string>;
+  excluded: Set<string>;
+  everything: boolean;
+}
+
+interface CompiledRule {
+  slot: number;
+  id: string;
+  name: string;
+  type: PromotionType;
+  value: number;
+  minPurchase: number;
+  maxDiscount: number | null;
+  validFrom: number;
+  validTo: number;
+  target: RuleTarget;
+}
+
+interface CompiledPromotion extends CompiledRule {
+  priority: number;
+  stackable: boolean;
+}
+
+export interface CompiledCoupon extends CompiledRule {
+  code: string;
+  description: string | null;
+  active: boolean;
+  usageLimit: number | null;
+  userLimit: number | null;
+}
+
+const roundMoney = (value: number) => Math.round(value * 100) / 100;
+
+function compileTarget(
+  productIds: string[],
+  categoryIds: string[],
+  sellerIds: string[],
+  excludeProductIds: string[],
+  categoryProducts: Map<string, string[]>
+): RuleTarget {
+  const products = new Set(productIds);
+  for (const categoryId of categoryIds) {
+    for (const productId of categoryProducts.get(categoryId) ?? []) {
+      products.add(productId);
+    }
+  }
+
+  return {
+    products,
+    categories: new Set(categoryIds),
+    sellers: new Set(sellerIds),
+    excluded: new Set(excludeProductIds),
+    everything: productIds.length === 0 && categoryIds.length === 0 && sellerIds.length === 0
+  };
+}
+
+function matches(target: RuleTarget, line: PromotionCartLine): boolean {
+  if (target.excluded.has(line.productId)) {
+    return false;
+  }
+  return target.everything
+    || target.products.has(line.productId)
+    || (!!line.categoryId && target.categories.has(line.categoryId))
+    || (!!line.sellerId && target.sellers.has(line.sellerId));
+}
+
+function isLive(rule: CompiledRule, at: number): boolean {
+  return rule.validFrom <= at && at <= rule.validTo;
+}
+
+function discountFor(rule: CompiledRule, eligible: number): number {
+  let amount = 0;
+  if (rule.type === PromotionType.PERCENTAGE) {
+    amount = (eligible * rule.value) / 100;
+  } else if (rule.type === PromotionType.FIXED_AMOUNT) {
+    amount = Math.min(rule.value, eligible);
+  }
+  if (rule.maxDiscount !== null) {
+    amount = Math.min(amount, rule.maxDiscount);
+  }
+  return roundMoney(amount);
+}
+
+function applied(rule: CompiledRule, amount: number): AppliedDiscount {
+  return {
+    id: rule.id,
+    name: rule.name,
+    type: rule.type,
+    amount,
+    freeShipping: rule.type === PromotionType.FREE_SHIPPING
+  };
+}
+
+/**
+ * Coupons and promotions compiled for evaluation in memory.
+ *
+ * Promotions are indexed by the products and categories they target, so
+ * a cart is evaluated against every promotion in one pass over its lines,
+ * touching only the rules a line can match. Category targets are expanded
+ * to their products at compile time; lines that carry a categoryId also
+ * match on it directly.
+ */
+export class PromotionRuleSet {
+  private coupons = new Map<string, CompiledCoupon>();
+  private promotions: CompiledPromotion[] = [];
+  private everywhere: CompiledPromotion[] = [];
+  private byProduct = new Map<string, CompiledPromotion[]>();
+  private byCategory = new Map<string, CompiledPromotion[]>();
+
+  constructor(
+    coupons: Coupon[],
+    promotions: Promotion[],
+    categoryProducts: Map<string, string[]> = new Map(),
+    readonly version: number = 0
+  ) {
+    for (const coupon of coupons) {
+      this.coupons.set(coupon.code.toUpperCase(), {
+        slot: -1,
+        id: coupon.id,
+        code: coupon.code,
+        name: coupon.code,
+        description: coupon.description,
+        type: coupon.type,
+        value: Number(coupon.value),
+        minPurchase: Number(coupon.minimumPurchase ?? 0),
+        maxDiscount: null,
+        validFrom: new Date(coupon.validFrom).getTime(),
+        validTo: new Date(coupon.validTo).getTime(),
+        target: compileTarget(coupon.productIds, coupon.categoryIds, coupon.sellerIds, [], categoryProducts),
+        active: coupon.status === CouponStatus.ACTIVE,
+        usageLimit: coupon.usageLimit,
+        userLimit: coupon.userLimit
+      });
+    }
+
+    // Highest priority first, so the first non-stackable match wins
+    const sorted = [...promotions].sort((a, b) => b.priority - a.priority);
+    for (const promotion of sorted) {
+      const conditions = (promotion.conditions ?? {}) as PromotionConditions;
+      const compiled: CompiledPromotion = {
+        slot: this.promotions.length,
+        id: promotion.id,
+        name: promotion.name,
+        type: promotion.type,
+        value: Number(promotion.value),
+        minPurchase: conditions.minPurchaseAmount ?? 0,
+        maxDiscount: conditions.maxDiscountAmount ?? null,
+        validFrom: new Date(promotion.validFrom).getTime(),
+        validTo: new Date(promotion.validTo).getTime(),
+        target: compileTarget(
+          conditions.productIds ?? [],
+          conditions.categoryIds ?? [],
+          [],
+          conditions.excludeProductIds ?? [],
+          categoryProducts
+        ),
+        priority: promotion.priority,
+        stackable: conditions.stackable ?? false
+      };
+      this.promotions.push(compiled);
+
+      if (compiled.target.everything) {
+        this.everywhere.push(compiled);
+      }
+      for (const productId of compiled.target.products) {
+        push(this.byProduct, productId, compiled);
+      }
+      for (const categoryId of compiled.target.categories) {
+        push(this.byCategory, categoryId, compiled);
+      }
+    }
+  }
+
+  getCoupon(code: string): CompiledCoupon | undefined {
+    return this.coupons.get(code.toUpperCase());
+  }
+
+  get size(): { coupons: number; promotions: number } {
+    return { coupons: this.coupons.size, promotions: this.promotions.length };
+  }
+
+  /**
+   * Apply every live promotion and, when given, a coupon to a cart. The
+   * highest-priority non-stackable promotion applies along with every
+   * stackable one; discounts never exceed the subtotal. Coupon usage comes
+   * from the caller, which keeps the counters. A cart without lines only
+   * checks the coupon itself, not what it applies to.
+   */
+  evaluate(cart: PromotionCart, couponCode?: string, couponUsage?: CouponUsage, at: number = Date.now()): CartEvaluation {
+    const eligible = new Float64Array(this.promotions.length);
+    const seen = new Int32Array(this.promotions.length).fill(-1);
+    const coupon = couponCode ? this.getCoupon(couponCode) : undefined;
+    let couponMatched = false;
+    let lineTotal = 0;
+
+    cart.lines.forEach((line, index) => {
+      const amount = line.price * line.quantity;
+      lineTotal += amount;
+
+      const visit = (rules: CompiledPromotion[] | undefined) => {
+        if (!rules) return;
+        for (const rule of rules) {
+          if (seen[rule.slot] === index || rule.target.excluded.has(line.productId)) continue;
+          seen[rule.slot] = index;
+          eligible[rule.slot] += amount;
+        }
+      };
+      visit(this.everywhere);
+      visit(this.byProduct.get(line.productId));
+      if (line.categoryId) {
+        visit(this.byCategory.get(line.categoryId));
+      }
+
+      if (coupon && !couponMatched) {
+        couponMatched = matches(coupon.target, line);
+      }
+    });
+
+    const subtotal = roundMoney(cart.subtotal ?? lineTotal);
+    const promotions: AppliedDiscount[] = [];
+    let remaining = subtotal;
+    let exclusiveApplied = false;
+
+    for (const rule of this.promotions) {
+      if (seen[rule.slot] === -1 || !isLive(rule, at) || subtotal < rule.minPurchase) continue;
+
+      const amount = Math.min(discountFor(rule, eligible[rule.slot]), remaining);
+      if (amount === 0 && rule.type !== PromotionType.FREE_SHIPPING) continue;
+      if (!rule.stackable) {
+        if (exclusiveApplied) continue;
+        exclusiveApplied = true;
+      }
+
+      remaining = roundMoney(remaining - amount);
+      promotions.push(applied(rule, amount));
+    }
+
+    let appliedCoupon: AppliedDiscount | null = null;
+    let couponError: CouponRejection | undefined;
+    if (couponCode) {
+      couponError = checkCoupon(coupon, subtotal, couponMatched || cart.lines.length === 0, couponUsage, at);
+      if (!couponError) {
+        // Coupons discount the whole order once any of its items qualifies
+        const amount = Math.min(discountFor(coupon!, subtotal), remaining);
+        remaining = roundMoney(remaining - amount);
+        appliedCoupon = applied(coupon!, amount);
+      }
+    }
+
+    const discounts = appliedCoupon ? [...promotions, appliedCoupon] : promotions;
+    return {
+      subtotal,
+      promotions,
+      coupon: appliedCoupon,
+      ...(couponError && { couponError }),
+      discountTotal: roundMoney(subtotal - remaining),
+      freeShipping: discounts.some(discount => discount.freeShipping)
+    };
+  }
+}
+
+function push<T>(map: Map<string, T[]>, key: string, value: T): void {
+  const list = map.get(key);
+  if (list) {
+    list.push(value);
+  } else {
+    map.set(key, [value]);
+  }
+}
+
+function checkCoupon(
+  coupon: CompiledCoupon | undefined,
+  subtotal: number,
+  matched: boolean,
+  usage: CouponUsage | undefined,
+  at: number
+): CouponRejection | undefined {
+  const reject = (code: string, message: string, statusCode: number = 400) => ({ code, message, statusCode });
+
+  if (!coupon) {
+    return reject('COUPON_NOT_FOUND', 'Coupon not found', 404);
+  }
+  if (!coupon.active) {
+    return reject('COUPON_INACTIVE', 'Coupon is not active');
+  }
+  if (at < coupon.validFrom) {
+    return reject('COUPON_NOT_STARTED', 'Coupon is not yet valid');
+  }
+  if (at > coupon.validTo) {
+    return reject('COUPON_EXPIRED', 'Coupon has expired');
+  }
+  if (coupon.usageLimit && (usage?.total ?? 0) >= coupon.usageLimit) {
+    return reject('COUPON_USAGE_LIMIT', 'Coupon usage limit reached');
+  }
+  if (coupon.userLimit && (usage?.user ?? 0) >= coupon.userLimit) {
+    return reject('COUPON_USER_LIMIT', 'User has reached the usage limit for this coupon');
+  }
+  if (subtotal < coupon.minPurchase) {
+    return reject('COUPON_MINIMUM_NOT_MET', `Minimum order amount of ${coupon.minPurchase} required`);
+  }
+  if (!coupon.target.everything && !matched) {
+    return reject('COUPON_NOT_APPLICABLE', 'Coupon is not applicable to the items in your cart');
+  }
+  return undefined;
+}
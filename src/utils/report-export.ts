@@ -0,0 +1,54 @@
+import { Transform } from 'stream';
+
+export type ExportFormat = 'csv' | 'ndjson';
+
+export const EXPORT_FORMATS: ExportFormat[] = ['csv', 'ndjson'];
+
+export const EXPORT_CONTENT_TYPES: Record<ExportFormat, string> = {
+  csv: 'text/csv; charset=utf-8',
+  ndjson: 'application/x-ndjson'
+};
+
+export type ExportRecord = Record<string, string | number | boolean | Date | null | undefined>;
+
+function csvCell(value: ExportRecord[string]): string {
+  if (value === null || value === undefined) {
+    return '';
+  }
+  const text = value instanceof Date ? value.toISOString() : String(value);
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+}
+
+export function csvLine(values: ExportRecord[string][]): string {
+  return values.map(csvCell).join(',') + '\n';
+}
+
+/**
+ * Object-mode records in, CSV or NDJSON text out. Runs inside a stream
+ * pipeline, so a slow consumer pauses the reader instead of buffering.
+ */
+export function createRecordSerializer(format: ExportFormat, columns: string[]): Transform {
+  let headerWritten = false;
+
+  return new Transform({
+    writableObjectMode: true,
+    transform(record: ExportRecord, _encoding, callback) {
+      if (format === 'ndjson') {
+        callback(null, JSON.stringify(record) + '\n');
+        return;
+      }
+
+      const line = csvLine(columns.map(column => record[column]));
+      if (!headerWritten) {
+        headerWritten = true;
+        callback(null, csvLine(columns) + line);
+        return;
+      }
+      callback(null, line);
+    },
+    flush(callback) {
+      // An empty CSV export still gets its header row
+      callback(null, format === 'csv' && !headerWritten ? csvLine(columns) : undefined);
+    }
+  });
+}
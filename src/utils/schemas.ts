@@ -10,7 +10,13 @@ export const PaginationSchema = Type.Object({
   limit: Type.Optional(Type.Integer({ minimum: 1, maximum: 100, default: 20 })),
   search: Type.Optional(Type.String()),
   sort: Type.Optional(Type.String()),
-  order: Type.Optional(Type.Union([Type.Literal('asc'), Type.Literal('desc')]))
+  order: Type.Optional(Type.Union([Type.Literal('asc'), Type.Literal('desc')])),
+  totals: Type.Optional(Type.Union([
+    Type.Literal('exact'),
+    Type.Literal('estimated'),
+    Type.Literal('cached'),
+    Type.Literal('none')
+  ]))
 });
 
 export type PaginationQuery = Static<typeof PaginationSchema>;
@@ -39,8 +45,9 @@ export const PaginatedResponseSchema = Type.Object({
   pagination: Type.Object({
     page: Type.Number(),
     limit: Type.Number(),
-    total: Type.Number(),
-    pages: Type.Number()
+    total: Type.Union([Type.Number(), Type.Null()]),
+    pages: Type.Union([Type.Number(), Type.Null()]),
+    hasMore: Type.Optional(Type.Boolean())
   })
 });
 
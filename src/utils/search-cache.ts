@@ -0,0 +1,55 @@
+import { createHash } from 'crypto';
+
+// Every cached product search carries this tag; invalidating it drops them all
+export const SEARCH_CACHE_TAG = 'products:search';
+
+/**
+ * Tag of the cached searches whose results include a product, so an index
+ * update to that product drops exactly those pages
+ */
+export function productSearchTag(productId: string): string {
+  return `${SEARCH_CACHE_TAG}:doc:${productId}`;
+}
+
+/**
+ * Search text as it is cached and logged: trimmed, lowercased, inner
+ * whitespace collapsed; the match-all query becomes ''
+ */
+export function normalizeSearchQuery(query: string | undefined | null): string {
+  const text = (query || '').trim().toLowerCase().replace(/\s+/g, ' ');
+  return text === '*' ? '' : text;
+}
+
+function canonicalValue(value: unknown): unknown {
+  if (Array.isArray(value)) {
+    const items = [...new Set(value.map(item => String(item)))].sort();
+    return items.length > 0 ? items : undefined;
+  }
+  if (value && typeof value === 'object') {
+    const entries = Object.keys(value)
+      .sort()
+      .map(key => [key, canonicalValue((value as Record<string, unknown>)[key])] as const)
+      .filter(([, item]) => item !== undefined);
+    return entries.length > 0 ? Object.fromEntries(entries) : undefined;
+  }
+  if (value === undefined || value === null || value === '') {
+    return undefined;
+  }
+  return value;
+}
+
+/**
+ * Canonical form of a search request: the query text normalized, keys and
+ * filter/facet values sorted, empty filters dropped. Two requests that
+ * Typesense would answer identically produce the same string.
+ */
+export function canonicalizeSearch(params: Record<string, unknown>): string {
+  const { query, ...filters } = params;
+  const canonical = canonicalValue(filters) as Record<string, unknown> | undefined;
+  return JSON.stringify({ q: normalizeSearchQuery(query as string | undefined), ...canonical });
+}
+
+export function searchCacheKey(params: Record<string, unknown>): string {
+  const digest = createHash('sha1').update(canonicalizeSearch(params)).digest('hex');
+  return `${SEARCH_CACHE_TAG}:${digest}`;
+}
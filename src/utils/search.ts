@@ -1,8 +1,13 @@
+import { Prisma, PrismaClient } from '@prisma/client';
+import type { Client } from 'typesense';
 import { TypesenseClient } from '../integrations/typesense/client';
 
 const typesenseClientInstance = TypesenseClient.getInstance();
 const typesenseClient = typesenseClientInstance.getClient();
 import { logger } from './logger';
+import { cache } from './cache';
+import { autocomplete } from './autocomplete';
+import { SEARCH_CACHE_TAG } from './search-cache';
 
 export interface SearchFilters {
   categories?: string[];
@@ -37,59 +42,115 @@ export interface SearchResult<T> {
   }>;
 }
 
+export type SearchCollection = 'products' | 'categories' | 'sellers' | 'orders';
+
+export type SearchIndexAction = 'UPSERT' | 'DELETE';
+
+interface SearchSource {
+  // Indexable rows matching an id filter, in id order
+  rows(prisma: PrismaClient, id: Prisma.StringFilter, take?: number): Promise<{ id: string }[]>;
+  // Ids of rows modified since a point in time
+  changedSince(prisma: PrismaClient, since: Date): Promise<string[]>;
+}
+
+// What each collection is indexed from, with the relations transformDocumentForSearch reads
+const searchSources: Record<SearchCollection, SearchSource> = {
+  products: {
+    rows: (prisma, id, take) => prisma.product.findMany({
+      where: { id, status: { not: 'ARCHIVED' } },
+      include: {
+        category: { select: { name: true } },
+        seller: { select: { businessName: true } }
+      },
+      orderBy: { id: 'asc' },
+      take
+    }),
+    changedSince: async (prisma, since) => (await prisma.product.findMany({
+      where: { updatedAt: { gte: since } },
+      select: { id: true }
+    })).map(row => row.id)
+  },
+  categories: {
+    rows: (prisma, id, take) => prisma.category.findMany({
+      where: { id },
+      include: { _count: { select: { products: true } } },
+      orderBy: { id: 'asc' },
+      take
+    }),
+    changedSince: async (prisma, since) => (await prisma.category.findMany({
+      where: { updatedAt: { gte: since } },
+      select: { id: true }
+    })).map(row => row.id)
+  },
+  sellers: {
+    rows: (prisma, id, take) => prisma.seller.findMany({
+      where: { id },
+      orderBy: { id: 'asc' },
+      take
+    }),
+    changedSince: async (prisma, since) => (await prisma.seller.findMany({
+      where: { updatedAt: { gte: since } },
+      select: { id: true }
+    })).map(row => row.id)
+  },
+  orders: {
+    rows: (prisma, id, take) => prisma.order.findMany({
+      where: { id },
+      include: { user: { select: { email: true } } },
+      orderBy: { id: 'asc' },
+      take
+    }),
+    changedSince: async (prisma, since) => (await prisma.order.findMany({
+      where: { updatedAt: { gte: since } },
+      select: { id: true }
+    })).map(row => row.id)
+  }
+};
+
+export const SEARCH_COLLECTIONS = Object.keys(searchSources) as SearchCollection[];
+
+export function isSearchCollection(value: unknown): value is SearchCollection {
+  return typeof value === 'string' && (SEARCH_COLLECTIONS as string[]).includes(value);
+}
+
 /**
- * Update product in search index
+ * Load the rows a collection is indexed from. Rows that exist but are not
+ * indexable (archived products) are left out, so callers treat them as gone.
  */
-export async function updateSearchIndex(
-  collection: string,
-  document: any
-): Promise<void> {
-  try {
-    const searchDoc = transformDocumentForSearch(collection, document);
-    await typesenseClient.collections(collection).documents().upsert(searchDoc);
-    
-    logger.debug({
-      collection,
-      documentId: document.id
-    }, 'Document updated in search index');
-  } catch (error) {
-    logger.error({
-      error,
-      collection,
-      documentId: document.id
-    }, 'Failed to update search index');
-    throw error;
-  }
+export function loadSearchRows(
+  prisma: PrismaClient,
+  collection: SearchCollection,
+  id: Prisma.StringFilter,
+  take?: number
+): Promise<{ id: string }[]> {
+  return searchSources[collection].rows(prisma, id, take);
 }
 
 /**
- * Remove document from search index
+ * Record that documents need (re)indexing. Pass the transaction client so
+ * the outbox row commits or rolls back together with the entity change;
+ * the search index worker picks it up from there.
  */
-export async function removeFromSearchIndex(
-  collection: string,
-  documentId: string
+export async function recordSearchChange(
+  db: Prisma.TransactionClient,
+  collection: SearchCollection,
+  documentIds: string | string[],
+  action: SearchIndexAction = 'UPSERT'
 ): Promise<void> {
-  try {
-    await typesenseClient.collections(collection).documents(documentId).delete();
-    
-    logger.debug({
-      collection,
-      documentId
-    }, 'Document removed from search index');
-  } catch (error) {
-    logger.error({
-      error,
-      collection,
-      documentId
-    }, 'Failed to remove from search index');
-    throw error;
+  const ids = Array.isArray(documentIds) ? documentIds : [documentIds];
+  if (ids.length === 0) {
+    return;
   }
+
+  await db.searchOutbox.createMany({
+    data: ids.map(documentId => ({ collection, documentId, action }))
+  });
 }
 
 /**
  * Transform database document for search indexing
  */
-function transformDocumentForSearch(collection: string, document: any): any {
+export function transformDocumentForSearch(collection: string, document: any): any {
   switch (collection) {
     case 'products':
       return {
@@ -99,9 +160,9 @@ function transformDocumentForSearch(collection: string, document: any): any {
         category_id: document.categoryId,
         category_name: document.category?.name || '',
         seller_id: document.sellerId,
-        seller_name: document.seller?.storeName || '',
-        price: document.price,
-        compare_at_price: document.compareAtPrice || 0,
+        seller_name: document.seller?.storeName || document.seller?.businessName || '',
+        price: Number(document.price),
+        compare_at_price: Number(document.compareAtPrice || 0),
         currency: document.currency,
         sku: document.sku,
         barcode: document.barcode || '',
@@ -130,7 +191,7 @@ function transformDocumentForSearch(collection: string, document: any): any {
     case 'sellers':
       return {
         id: document.id,
-        store_name: document.storeName,
+        store_name: document.storeName || document.businessName,
         store_description: document.storeDescription || '',
         rating: document.rating || 0,
         total_reviews: document.totalReviews || 0,
@@ -145,7 +206,7 @@ function transformDocumentForSearch(collection: string, document: any): any {
         order_number: document.orderNumber,
         user_id: document.userId,
         user_email: document.user?.email || '',
-        total: document.total,
+        total: Number(document.totalAmount ?? document.total),
         status: document.status,
         created_at: Math.floor(new Date(document.createdAt).getTime() / 1000)
       };
@@ -337,6 +398,14 @@ export async function getSearchSuggestions(
   collection: string = 'products',
   limit: number = 5
 ): Promise<string[]> {
+  // Product autocomplete is answered in process; Typesense covers misses
+  if (collection === 'products') {
+    const suggestions = autocomplete.suggest(query, limit);
+    if (suggestions && suggestions.length > 0) {
+      return suggestions.map(suggestion => suggestion.text);
+    }
+  }
+
   try {
     const searchParameters = {
       q: query,
@@ -377,54 +446,158 @@ export async function getSearchAnalytics(
   }
 }
 
+export interface RebuildOptions {
+  batchSize?: number; // Documents per import call
+  concurrency?: number; // Import calls in flight at once
+  keepVersions?: number; // Previous versions kept after the swap, for rollback
+  client?: Client;
+  onProgress?: (indexed: number) => void;
+}
+
+export interface RebuildResult {
+  collection: string;
+  version: string;
+  documents: number;
+  dropped: string[];
+}
+
+const versionSuffix = (collection: string, name: string): number | null => {
+  const match = name.match(new RegExp(`^${collection}_v(\\d+)$`));
+  return match ? Number(match[1]) : null;
+};
+
 /**
- * Rebuild search index for a collection
+ * Rebuild a collection without taking search offline. Rows are read with a
+ * keyset cursor and imported into a new versioned collection, with at most
+ * `concurrency` batches in memory at once; the collection alias is then
+ * repointed in one step and old versions beyond `keepVersions` are dropped.
+ * Rows changed while the rebuild ran are queued for reindexing afterwards.
  */
 export async function rebuildSearchIndex(
-  collection: string,
-  documents: any[]
-): Promise<void> {
+  prisma: PrismaClient,
+  collection: SearchCollection,
+  options: RebuildOptions = {}
+): Promise<RebuildResult> {
+  const client = options.client ?? typesenseClient;
+  const batchSize = options.batchSize ?? 1000;
+  const concurrency = Math.max(options.concurrency ?? 4, 1);
+  const keepVersions = options.keepVersions ?? 1;
+  const startedAt = new Date();
+  const version = `${collection}_v${startedAt.getTime()}`;
+
+  logger.info({ collection, version }, 'Rebuilding search index');
+  await createCollectionSchema(collection, version, client);
+
+  let documents = 0;
   try {
-    logger.info({ collection, count: documents.length }, 'Rebuilding search index');
-    
-    // Delete and recreate collection
-    try {
-      await typesenseClient.collections(collection).delete();
-    } catch (error) {
-      // Collection might not exist
-    }
-    
-    // Create collection schema based on type
-    await createCollectionSchema(collection);
-    
-    // Batch import documents
-    const batchSize = 100;
-    for (let i = 0; i < documents.length; i += batchSize) {
-      const batch = documents.slice(i, i + batchSize);
-      const searchDocs = batch.map(doc => transformDocumentForSearch(collection, doc));
-      
-      await typesenseClient
-        .collections(collection)
+    const inFlight = new Set<Promise<void>>();
+    let failure: unknown = null;
+    let cursor: string | null = null;
+
+    const importBatch = async (rows: { id: string }[]) => {
+      const results = await client
+        .collections(version)
         .documents()
-        .import(searchDocs, { action: 'create' });
-      
-      logger.debug({
-        collection,
-        progress: `${i + batch.length}/${documents.length}`
-      }, 'Index rebuild progress');
+        .import(rows.map(row => transformDocumentForSearch(collection, row)), { action: 'create' });
+      const rejected = results.filter(item => !item.success);
+      if (rejected.length > 0) {
+        throw new Error(`Typesense rejected ${rejected.length} of ${rows.length} documents: ${rejected[0].error}`);
+      }
+      documents += rows.length;
+      options.onProgress?.(documents);
+    };
+
+    while (failure === null) {
+      const rows = await loadSearchRows(prisma, collection, cursor ? { gt: cursor } : {}, batchSize);
+      if (rows.length === 0) {
+        break;
+      }
+      cursor = rows[rows.length - 1].id;
+
+      const task: Promise<void> = importBatch(rows)
+        .catch(error => { failure = failure ?? error; })
+        .finally(() => inFlight.delete(task));
+      inFlight.add(task);
+
+      // Keep reading only while there is room; this bounds memory to the in-flight batches
+      if (inFlight.size >= concurrency) {
+        await Promise.race(inFlight);
+      }
+      if (rows.length < batchSize) {
+        break;
+      }
+    }
+
+    await Promise.all(inFlight);
+    if (failure !== null) {
+      throw failure;
+    }
+
+    await swapSearchAlias(client, collection, version);
+    if (collection === 'products') {
+      await cache.invalidateTags([SEARCH_CACHE_TAG]);
     }
-    
-    logger.info({ collection }, 'Search index rebuilt successfully');
   } catch (error) {
-    logger.error({ error, collection }, 'Failed to rebuild search index');
+    logger.error({ error, collection, version, documents }, 'Failed to rebuild search index');
+    await client.collections(version).delete().catch(() => undefined);
     throw error;
   }
+
+  // Changes made during the rebuild went to the old version; replay them into the new one
+  const changed = await searchSources[collection].changedSince(prisma, startedAt);
+  await recordSearchChange(prisma, collection, changed);
+
+  const dropped = await dropOldSearchVersions(client, collection, version, keepVersions);
+
+  logger.info({ collection, version, documents, replayed: changed.length, dropped }, 'Search index rebuilt successfully');
+  return { collection, version, documents, dropped };
+}
+
+/**
+ * Point the collection alias at a new version. The first rebuild of a
+ * collection that still exists under its plain name drops it first, since
+ * a collection and an alias cannot share a name.
+ */
+async function swapSearchAlias(client: Client, collection: string, version: string): Promise<void> {
+  const hasAlias = await client.aliases(collection).retrieve().then(() => true, () => false);
+  if (!hasAlias) {
+    await client.collections(collection).delete().catch((error: any) => {
+      if (error.httpStatus !== 404) {
+        throw error;
+      }
+    });
+  }
+
+  await client.aliases().upsert(collection, { collection_name: version });
+}
+
+async function dropOldSearchVersions(
+  client: Client,
+  collection: string,
+  current: string,
+  keepVersions: number
+): Promise<string[]> {
+  const existing = await client.collections().retrieve();
+  const stale = existing
+    .map(schema => ({ name: schema.name, version: versionSuffix(collection, schema.name) }))
+    .filter((entry): entry is { name: string; version: number } => entry.version !== null && entry.name !== current)
+    .sort((a, b) => b.version - a.version)
+    .slice(keepVersions);
+
+  for (const { name } of stale) {
+    await client.collections(name).delete();
+  }
+  return stale.map(({ name }) => name);
 }
 
 /**
  * Create collection schema
  */
-async function createCollectionSchema(collection: string): Promise<void> {
+async function createCollectionSchema(
+  collection: string,
+  name: string = collection,
+  client: Client = typesenseClient
+): Promise<void> {
   const schemas: Record<string, any> = {
     products: {
       name: 'products',
@@ -500,5 +673,5 @@ async function createCollectionSchema(collection: string): Promise<void> {
     throw new Error(`No schema defined for collection: ${collection}`);
   }
 
-  await typesenseClient.collections().create(schema);
+  await client.collections().create({ ...schema, name });
 }
\ No newline at end of file
@@ -2,6 +2,8 @@ import { S3Client, PutObjectCommand, DeleteObjectCommand, GetObjectCommand } fro
 import { getSignedUrl } from '@aws-sdk/s3-request-presigner';
 import sharp from 'sharp';
 import fs from 'fs/promises';
+import { createReadStream } from 'fs';
+import { Readable } from 'stream';
 import path from 'path';
 import { nanoid } from 'nanoid';
 import { logger } from './logger';
@@ -10,6 +12,7 @@ interface StorageConfig {
   type: 'local' | 's3' | 'r2';
   region?: string;
   bucket?: string;
+  privateBucket?: string; // Never served publicly; exports and other private files
   accessKeyId?: string;
   secretAccessKey?: string;
   endpoint?: string;
@@ -20,6 +23,7 @@ const config: StorageConfig = {
   type: (process.env.STORAGE_TYPE as 'local' | 's3' | 'r2') || 'local',
   region: process.env.AWS_REGION || 'us-east-1',
   bucket: process.env.AWS_BUCKET || process.env.R2_BUCKET || 'ordendirecta-assets',
+  privateBucket: process.env.AWS_PRIVATE_BUCKET || process.env.R2_PRIVATE_BUCKET || 'ordendirecta-private',
   accessKeyId: process.env.AWS_ACCESS_KEY_ID || process.env.R2_ACCESS_KEY_ID,
   secretAccessKey: process.env.AWS_SECRET_ACCESS_KEY || process.env.R2_SECRET_ACCESS_KEY,
   endpoint: process.env.R2_ACCOUNT_ID ? `https://${process.env.R2_ACCOUNT_ID}.r2.cloudflarestorage.com` : undefined,
@@ -39,6 +43,18 @@ const s3Client = config.type !== 'local' ? new S3Client({
 // Local storage base path
 const LOCAL_STORAGE_PATH = path.join(process.cwd(), 'uploads');
 
+// Private files live outside the served uploads directory
+const LOCAL_PRIVATE_PATH = path.join(process.cwd(), 'private');
+
+export interface StorageOptions {
+  private?: boolean; // Use the private bucket (or directory) instead of the public one
+}
+
+const localPath = (key: string, options: StorageOptions) =>
+  path.join(options.private ? LOCAL_PRIVATE_PATH : LOCAL_STORAGE_PATH, key);
+
+const bucketFor = (options: StorageOptions) => (options.private ? config.privateBucket : config.bucket);
+
 // Image variants configuration
 export const IMAGE_VARIANTS = {
   thumbnail: { width: 150, height: 150, fit: 'cover' as const },
@@ -98,11 +114,11 @@ export async function uploadToS3(
 /**
  * Delete file from storage
  */
-export async function deleteFromS3(key: string): Promise<void> {
+export async function deleteFromS3(key: string, options: StorageOptions = {}): Promise<void> {
   try {
     if (config.type === 'local') {
       // Local file deletion
-      const filePath = path.join(LOCAL_STORAGE_PATH, key);
+      const filePath = localPath(key, options);
       await fs.unlink(filePath);
       return;
     }
@@ -113,7 +129,7 @@ export async function deleteFromS3(key: string): Promise<void> {
     }
 
     const command = new DeleteObjectCommand({
-      Bucket: config.bucket,
+      Bucket: bucketFor(options),
       Key: key
     });
 
@@ -124,6 +140,76 @@ export async function deleteFromS3(key: string): Promise<void> {
   }
 }
 
+/**
+ * Upload a file from disk without reading it into memory
+ */
+export async function uploadLocalFileToS3(
+  filePath: string,
+  key: string,
+  contentType?: string,
+  options: StorageOptions = {}
+): Promise<void> {
+  try {
+    if (config.type === 'local') {
+      const target = localPath(key, options);
+      await fs.mkdir(path.dirname(target), { recursive: true });
+      await fs.copyFile(filePath, target);
+      return;
+    }
+
+    if (!s3Client) {
+      throw new Error('S3 client not configured');
+    }
+
+    const { size } = await fs.stat(filePath);
+    const command = new PutObjectCommand({
+      Bucket: bucketFor(options),
+      Key: key,
+      Body: createReadStream(filePath),
+      ContentLength: size,
+      ContentType: contentType
+    });
+
+    await s3Client.send(command);
+  } catch (error) {
+    logger.error({ error, key }, 'Failed to upload file');
+    throw error;
+  }
+}
+
+/**
+ * Stream a stored file; resolves to null if it does not exist
+ */
+export async function downloadFromS3(key: string, options: StorageOptions = {}): Promise<Readable | null> {
+  if (config.type === 'local') {
+    const filePath = localPath(key, options);
+    try {
+      await fs.access(filePath);
+    } catch {
+      return null;
+    }
+    return createReadStream(filePath);
+  }
+
+  if (!s3Client) {
+    throw new Error('S3 client not configured');
+  }
+
+  try {
+    const response = await s3Client.send(new GetObjectCommand({
+      Bucket: bucketFor(options),
+      Key: key
+    }));
+    return response.Body as Readable;
+  } catch (error: any) {
+    if (error?.name === 'NoSuchKey') {
+      return null;
+    }
+    logger.error({ error, key }, 'Failed to download file');
+    throw error;
+  }
+}
+
 /**
  * Get signed URL for private file access
  */
@@ -0,0 +1,230 @@
+import { PrismaClient, TaxRule, TaxType } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { logger } from './logger';
+
+export interface TaxLocation {
+  country: string;
+  state?: string | null;
+  city?: string | null;
+  zipCode?: string | null;
+}
+
+// Bumped on every tax rule write; a node whose index is at another version rebuilds
+const VERSION_KEY = 'tax-rules:version';
+
+// How often a node compares its index with the Redis version
+const VERSION_CHECK_MS = 5000;
+
+// Resolved list key for requests without a tax type
+const ALL_TYPES = '*';
+
+interface TaxRuleNode {
+  children: Map<string, TaxRuleNode>;
+  rules: TaxRule[]; // Rules for exactly this jurisdiction
+  resolved: Map<string, TaxRule[]>; // By tax type: own rules, or the nearest ancestor's
+}
+
+const newNode = (): TaxRuleNode => ({ children: new Map(), rules: [], resolved: new Map() });
+
+/**
+ * Country, state, city and ZIP segments, normalized the way rules are
+ * stored. A missing segment is ''.
+ */
+function jurisdictionPath(location: TaxLocation): string[] {
+  return [
+    location.country.toUpperCase(),
+    location.state?.toUpperCase() || '',
+    location.city?.toLowerCase() || '',
+    location.zipCode?.toUpperCase() || ''
+  ];
+}
+
+/**
+ * Active tax rules compiled into a country → state → city → ZIP tree.
+ *
+ * Every node holds, per tax type, the rules that apply to it: its own when
+ * it has any, otherwise its parent's. Resolving a location is one walk down
+ * the tree with no fallback queries, and gives the same answer as trying
+ * ZIP, then city, then state, then country. Rules are placed by their
+ * trimmed path, so a state rule sits on the state node, not under an
+ * empty city.
+ *
+ * Only rules in effect at compile time are placed; validUntil is the next
+ * effectiveFrom or effectiveTo boundary, after which the index must be
+ * recompiled from the same rules.
+ */
+export class TaxRuleIndex {
+  private constructor(
+    private root: TaxRuleNode,
+    private rules: TaxRule[],
+    readonly version: number,
+    readonly validUntil: number
+  ) {}
+
+  static compile(rules: TaxRule[], version: number = 0, at: number = Date.now()): TaxRuleIndex {
+    const root = newNode();
+    let validUntil = Infinity;
+
+    for (const rule of rules) {
+      const from = rule.effectiveFrom?.getTime();
+      const to = rule.effectiveTo?.getTime();
+      if (from !== undefined && from > at) {
+        validUntil = Math.min(validUntil, from);
+        continue;
+      }
+      if (to !== undefined) {
+        if (to <= at) continue;
+        validUntil = Math.min(validUntil, to);
+      }
+
+      const path = jurisdictionPath(rule);
+      while (path.length > 1 && path[path.length - 1] === '') {
+        path.pop();
+      }
+
+      let node = root;
+      for (const segment of path) {
+        let child = node.children.get(segment);
+        if (!child) {
+          child = newNode();
+          node.children.set(segment, child);
+        }
+        node = child;
+      }
+      node.rules.push(rule);
+    }
+
+    resolveNode(root, new Map());
+    return new TaxRuleIndex(root, rules, version, validUntil);
+  }
+
+  /**
+   * Rules for the most specific jurisdiction that has any, lowest rate first
+   */
+  resolve(location: TaxLocation, taxType?: TaxType): TaxRule[] {
+    let node = this.root;
+    for (const segment of jurisdictionPath(location)) {
+      const child = node.children.get(segment);
+      if (!child) break;
+      node = child;
+    }
+    return node.resolved.get(taxType ?? ALL_TYPES) ?? [];
+  }
+
+  /**
+   * Same rules, placed for another point in time
+   */
+  recompile(at: number = Date.now()): TaxRuleIndex {
+    return TaxRuleIndex.compile(this.rules, this.version, at);
+  }
+
+  get size(): number {
+    return this.rules.length;
+  }
+}
+
+function resolveNode(node: TaxRuleNode, inherited: Map<string, TaxRule[]>): void {
+  node.rules.sort((a, b) => a.rate - b.rate);
+
+  for (const type of [ALL_TYPES, ...Object.values(TaxType)]) {
+    const own = type === ALL_TYPES ? node.rules : node.rules.filter(rule => rule.taxType === type);
+    const rules = own.length > 0 ? own : inherited.get(type);
+    if (rules) {
+      node.resolved.set(type, rules);
+    }
+  }
+
+  for (const child of node.children.values()) {
+    resolveNode(child, node.resolved);
+  }
+}
+
+/**
+ * The process-wide tax rule index. Writers call invalidate() after
+ * changing rules, which bumps the version in Redis and rebuilds locally;
+ * other nodes notice the new version within VERSION_CHECK_MS and rebuild in
+ * the background while serving the index they have.
+ */
+class TaxRuleIndexHolder {
+  private index: TaxRuleIndex | null = null;
+  private building: Promise<TaxRuleIndex> | null = null;
+  private checkedAt = 0;
+
+  async get(prisma: PrismaClient, redis: Redis): Promise<TaxRuleIndex> {
+    let index = this.index;
+    if (!index) {
+      return this.load(prisma, redis);
+    }
+
+    const now = Date.now();
+    if (now >= index.validUntil) {
+      index = this.index = index.recompile(now);
+    }
+    if (now - this.checkedAt >= VERSION_CHECK_MS) {
+      this.checkedAt = now;
+      this.checkVersion(prisma, redis);
+    }
+    return index;
+  }
+
+  async invalidate(prisma: PrismaClient, redis: Redis): Promise<void> {
+    try {
+      await redis.incr(VERSION_KEY);
+    } catch (error) {
+      logger.warn({ error }, 'Failed to bump tax rule version, other nodes will not rebuild');
+    }
+    await this.build(prisma, redis, false);
+  }
+
+  private load(prisma: PrismaClient, redis: Redis): Promise<TaxRuleIndex> {
+    if (!this.building) {
+      this.building = this.build(prisma, redis, false).finally(() => {
+        this.building = null;
+      });
+    }
+    return this.building;
+  }
+
+  private checkVersion(prisma: PrismaClient, redis: Redis): void {
+    redis.get(VERSION_KEY)
+      .then(value => {
+        if (this.index && (Number(value) || 0) !== this.index.version) {
+          return this.build(prisma, redis, true);
+        }
+      })
+      .catch(error => {
+        logger.warn({ error }, 'Tax rule index version check failed');
+      });
+  }
+
+  /**
+   * The version is read before the rules, so a write that lands during the
+   * build is caught by the next version check. A build only replaces an
+   * older index unless forced by a version seen in Redis, which also
+   * covers the key being reset.
+   */
+  private async build(prisma: PrismaClient, redis: Redis, force: boolean): Promise<TaxRuleIndex> {
+    const version = await redis.get(VERSION_KEY)
+      .then(value => Number(value) || 0)
+      .catch(error => {
+        logger.warn({ error }, 'Failed to read tax rule version');
+        return this.index?.version ?? 0;
+      });
+
+    const rules = await prisma.taxRule.findMany({
+      where: {
+        isActive: true,
+        OR: [{ effectiveTo: null }, { effectiveTo: { gt: new Date() } }]
+      }
+    });
+    const index = TaxRuleIndex.compile(rules, version);
+
+    if (force || !this.index || index.version >= this.index.version) {
+      this.index = index;
+      logger.debug({ version, rules: rules.length }, 'Tax rule index built');
+    }
+    return this.index;
+  }
+}
+
+export const taxRuleIndex = new TaxRuleIndexHolder();
@@ -14,7 +14,8 @@ export const paginationSchema = z.object({
   page: z.coerce.number().int().positive().default(1),
   limit: z.coerce.number().int().positive().max(100).default(20),
   sortBy: z.string().optional(),
-  sortOrder: z.enum(['asc', 'desc']).default('desc')
+  sortOrder: z.enum(['asc', 'desc']).default('desc'),
+  totals: z.enum(['exact', 'estimated', 'cached', 'none']).optional()
 });
 
 export const idSchema = z.object({
@@ -0,0 +1,152 @@
+import http from 'http';
+import { AddressInfo } from 'net';
+import Typesense from 'typesense';
+import type { Client } from 'typesense';
+
+export interface StubRequest {
+  method: string;
+  path: string;
+  documents: number;
+}
+
+/**
+ * Minimal in-memory Typesense: collections, aliases, document import
+ * (JSONL), delete by id filter and health. Enough to exercise indexing
+ * without a search node.
+ */
+export class TypesenseStub {
+  collections = new Map<string, Map<string, any>>();
+  aliases = new Map<string, string>();
+  requests: StubRequest[] = [];
+  failRequests = 0; // Answer the next N requests with a 503
+
+  private server = http.createServer((req, res) => this.handle(req, res));
+
+  async start(): Promise<void> {
+    await new Promise<void>(resolve => this.server.listen(0, '127.0.0.1', resolve));
+  }
+
+  async stop(): Promise<void> {
+    await new Promise<void>(resolve => this.server.close(() => resolve()));
+  }
+
+  get port(): number {
+    return (this.server.address() as AddressInfo).port;
+  }
+
+  client(): Client {
+    return new Typesense.Client({
+      nodes: [{ host: '127.0.0.1', port: this.port, protocol: 'http' }],
+      apiKey: 'stub',
+      numRetries: 0,
+      connectionTimeoutSeconds: 2,
+      logLevel: 'silent'
+    });
+  }
+
+  // Documents of a collection, looked up through an alias like the real server
+  documents(name: string): Map<string, any> {
+    const collection = this.aliases.get(name) ?? name;
+    let documents = this.collections.get(collection);
+    if (!documents) {
+      documents = new Map();
+      this.collections.set(collection, documents);
+    }
+    return documents;
+  }
+
+  reset(): void {
+    this.collections.clear();
+    this.aliases.clear();
+    this.requests = [];
+    this.failRequests = 0;
+  }
+
+  private handle(req: http.IncomingMessage, res: http.ServerResponse): void {
+    let body = '';
+    req.on('data', chunk => { body += chunk; });
+    req.on('end', () => {
+      const url = new URL(req.url || '/', 'http://stub');
+      const match = url.pathname.match(/^\/collections\/([^/]+)\/documents(\/import)?$/);
+
+      if (this.failRequests > 0) {
+        this.failRequests--;
+        this.requests.push({ method: req.method!, path: url.pathname, documents: 0 });
+        this.reply(res, 503, JSON.stringify({ message: 'Not Ready or Lagging' }));
+        return;
+      }
+
+      if (url.pathname === '/health') {
+        this.reply(res, 200, JSON.stringify({ ok: true }));
+        return;
+      }
+
+      if (url.pathname === '/collections' && req.method === 'POST') {
+        const schema = JSON.parse(body);
+        if (this.collections.has(schema.name)) {
+          this.reply(res, 409, JSON.stringify({ message: `A collection with name \`${schema.name}\` already exists.` }));
+          return;
+        }
+        this.collections.set(schema.name, new Map());
+        this.reply(res, 201, JSON.stringify({ ...schema, num_documents: 0 }));
+        return;
+      }
+
+      if (url.pathname === '/collections' && req.method === 'GET') {
+        const list = [...this.collections].map(([name, documents]) => ({ name, num_documents: documents.size }));
+        this.reply(res, 200, JSON.stringify(list));
+        return;
+      }
+
+      const collection = url.pathname.match(/^\/collections\/([^/]+)$/);
+      if (collection && req.method === 'DELETE') {
+        const name = this.aliases.get(collection[1]) ?? collection[1];
+        const existed = this.collections.delete(name);
+        this.reply(res, existed ? 200 : 404, JSON.stringify(existed ? { name } : { message: 'Not Found' }));
+        return;
+      }
+
+      const alias = url.pathname.match(/^\/aliases\/([^/]+)$/);
+      if (alias && req.method === 'PUT') {
+        const { collection_name } = JSON.parse(body);
+        this.aliases.set(alias[1], collection_name);
+        this.reply(res, 200, JSON.stringify({ name: alias[1], collection_name }));
+        return;
+      }
+      if (alias && req.method === 'GET') {
+        const target = this.aliases.get(alias[1]);
+        this.reply(res, target ? 200 : 404, JSON.stringify(target ? { name: alias[1], collection_name: target } : { message: 'Not Found' }));
+        return;
+      }
+
+      if (match && match[2] && req.method === 'POST') {
+        const lines = body.split('\n').filter(line => line.trim());
+        const documents = this.documents(match[1]);
+        for (const line of lines) {
+          const document = JSON.parse(line);
+          documents.set(document.id, document);
+        }
+        this.requests.push({ method: 'POST', path: url.pathname, documents: lines.length });
+        this.reply(res, 200, lines.map(() => JSON.stringify({ success: true })).join('\n'));
+        return;
+      }
+
+      if (match && !match[2] && req.method === 'DELETE') {
+        const filter = url.searchParams.get('filter_by') || '';
+        const ids = (filter.match(/^id:\[(.*)\]$/)?.[1] || '').split(',').filter(Boolean);
+        const documents = this.documents(match[1]);
+        const deleted = ids.filter(id => documents.delete(id)).length;
+        this.requests.push({ method: 'DELETE', path: url.pathname, documents: ids.length });
+        this.reply(res, 200, JSON.stringify({ num_deleted: deleted }));
+        return;
+      }
+
+      this.reply(res, 404, JSON.stringify({ message: 'Not Found' }));
+    });
+  }
+
+  private reply(res: http.ServerResponse, status: number, body: string): void {
+    res.writeHead(status, { 'Content-Type': 'application/json' });
+    res.end(body);
+  }
+}
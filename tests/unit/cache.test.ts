@@ -0,0 +1,166 @@
+import { describe, test, expect, beforeEach } from '@jest/globals';
+import { redis } from '../setup';
+import { cache, tagKey, scanDelete } from '../../src/utils/cache';
+import { MemoryCache } from '../../src/utils/memory-cache';
+import { CacheCodec, CODEC_VERSION } from '../../src/utils/cache-codec';
+import { canonicalizeSearch, searchCacheKey } from '../../src/utils/search-cache';
+
+describe('Cache Service', () => {
+  beforeEach(async () => {
+    await redis.flushdb();
+    cache.initialize(redis as any);
+  });
+
+  describe('Tag invalidation', () => {
+    test('should delete every entry registered under a tag', async () => {
+      await cache.set('categories:tree:default', [{ id: 'a' }], { ttl: 60, tags: ['categories'] });
+      await cache.set('categories:path:a', [{ id: 'a' }], { ttl: 60, tags: ['categories'] });
+      await cache.set('products:search:{}', { data: [] }, { ttl: 60, tags: ['products:search'] });
+
+      const deleted = await cache.invalidateTags(['categories']);
+
+      expect(deleted).toBe(2);
+      expect(await cache.get('categories:tree:default')).toBeNull();
+      expect(await cache.get('categories:path:a')).toBeNull();
+      expect(await cache.get('products:search:{}')).toEqual({ data: [] });
+      expect(await redis.exists(tagKey('categories'))).toBe(0);
+    });
+
+    test('should give tag sets the TTL of their longest-lived member', async () => {
+      await cache.set('short', 1, { ttl: 30, tags: ['t'] });
+      await cache.set('long', 2, { ttl: 600, tags: ['t'] });
+      await cache.set('shorter', 3, { ttl: 10, tags: ['t'] });
+
+      const ttl = await redis.ttl(tagKey('t'));
+      expect(ttl).toBeGreaterThan(30);
+      expect(ttl).toBeLessThanOrEqual(600);
+    });
+
+    test('should be a no-op for unknown tags', async () => {
+      expect(await cache.invalidateTags(['missing'])).toBe(0);
+    });
+  });
+
+  describe('Pattern deletes', () => {
+    test('should delete matching keys with SCAN', async () => {
+      for (let i = 0; i < 1200; i++) {
+        await redis.set(`seller:1:item:${i}`, 'x');
+      }
+      await redis.set('seller:2:item:0', 'x');
+
+      const deleted = await cache.delPattern('seller:1:*');
+
+      expect(deleted).toBe(1200);
+      expect(await redis.exists('seller:2:item:0')).toBe(1);
+    });
+
+    test('should unlink plain keys without scanning', async () => {
+      await redis.set('plain', 'x');
+      expect(await scanDelete(redis as any, 'plain')).toBe(1);
+    });
+  });
+
+  describe('Local LRU', () => {
+    test('should evict the least recently used entry', () => {
+      const local = new MemoryCache({ maxEntries: 2 });
+      local.set('a', '1', 10000);
+      local.set('b', '2', 10000);
+      local.get('a');
+      local.set('c', '3', 10000);
+
+      expect(local.get('a')).toBe('1');
+      expect(local.get('b')).toBeUndefined();
+      expect(local.getStats().evictions).toBe(1);
+    });
+
+    test('should drop entries matching a glob', () => {
+      const local = new MemoryCache();
+      local.set('categories:tree:en', '[]', 10000);
+      local.set('categories:path:1', '[]', 10000);
+
+      expect(local.deletePattern('categories:tree:*')).toBe(1);
+      expect(local.get('categories:path:1')).toBe('[]');
+    });
+  });
+
+  describe('Read-through', () => {
+    test('should compute concurrent misses once', async () => {
+      let calls = 0;
+      const compute = async () => {
+        calls++;
+        await new Promise(resolve => setTimeout(resolve, 20));
+        return { tree: [] };
+      };
+
+      const results = await Promise.all(
+        Array.from({ length: 10 }, () => cache.cached('categories:tree:test', compute, { ttl: 60, lock: true }))
+      );
+
+      expect(calls).toBe(1);
+      results.forEach(result => expect(result).toEqual({ tree: [] }));
+    });
+
+    test('should serve a stale value while refreshing in the background', async () => {
+      await cache.set('stale', { v: 'old', x: Date.now() - 1000, d: 5 }, { ttl: 60 });
+
+      const value = await cache.cached('stale', async () => 'new', { ttl: 60, staleTTL: 60 });
+      expect(value).toBe('old');
+
+      await new Promise(resolve => setTimeout(resolve, 20));
+      expect(await cache.cached('stale', async () => 'newer', { ttl: 60 })).toBe('new');
+    });
+  });
+
+  describe('Multi-key', () => {
+    test('should set and get several keys in order', async () => {
+      await cache.mset({ a: 1, b: { x: 2 } }, { ttl: 60, tags: ['multi'] });
+
+      expect(await cache.mget(['b', 'missing', 'a'])).toEqual([{ x: 2 }, null, 1]);
+      expect(await redis.scard(tagKey('multi'))).toBe(2);
+    });
+  });
+
+  describe('Codec', () => {
+    const value = { id: 'p1', createdAt: new Date('2024-01-01T00:00:00Z'), tags: Array(2000).fill('x') };
+
+    test('should keep small JSON values header-free', async () => {
+      const codec = new CacheCodec({ compressThreshold: 0 });
+      const payload = await codec.encode('products', { a: 1 });
+
+      expect(payload.toString()).toBe('{"a":1}');
+      expect(await codec.decode('products', payload)).toEqual({ a: 1 });
+    });
+
+    test('should round-trip compressed MessagePack with dates', async () => {
+      const codec = new CacheCodec({ format: 'msgpack', compressThreshold: 1024 });
+      const payload = await codec.encode('products', value);
+
+      expect(payload[0]).toBe(CODEC_VERSION);
+      expect(await codec.decode('products', payload)).toEqual(value);
+      expect(codec.getStats().products.compressed).toBe(1);
+      expect(codec.getStats().products.storedBytes).toBeLessThan(codec.getStats().products.rawBytes);
+    });
+
+    test('should reject versions it does not know', async () => {
+      const codec = new CacheCodec();
+      await expect(codec.decode('x', Buffer.from([7, 0, 1]))).rejects.toThrow('Unknown cache codec version 7');
+    });
+  });
+
+  describe('Search keys', () => {
+    test('should ignore query case, spacing and filter order', () => {
+      const a = searchCacheKey({ query: '  Red   Shoes ', categoryIds: ['b', 'a'], attributes: { size: ['42', '41'], color: ['red'] }, page: 1 });
+      const b = searchCacheKey({ page: 1, attributes: { color: ['red'], size: ['41', '42', '41'] }, categoryIds: ['a', 'b'], query: 'red shoes' });
+
+      expect(a).toBe(b);
+      expect(a.startsWith('products:search:')).toBe(true);
+    });
+
+    test('should drop empty filters but keep page, sort and values apart', () => {
+      expect(canonicalizeSearch({ query: '*', tags: [], brands: undefined, attributes: {} })).toBe('{"q":""}');
+      expect(searchCacheKey({ query: 'lamp', page: 1 })).not.toBe(searchCacheKey({ query: 'lamp', page: 2 }));
+      expect(searchCacheKey({ query: 'lamp', sortBy: 'price_asc' })).not.toBe(searchCacheKey({ query: 'lamp', sortBy: 'price_desc' }));
+      expect(searchCacheKey({ query: 'lamp', minPrice: 10 })).not.toBe(searchCacheKey({ query: 'lamp', maxPrice: 10 }));
+    });
+  });
+});
@@ -0,0 +1,105 @@
+import { describe, test, expect, beforeEach, jest } from '@jest/globals';
+import { FastifyInstance } from 'fastify';
+import { redis } from '../setup';
+import { CartService } from '../../src/services/cart.service';
+import { CartSnapshotStore, cartSnapshotKey } from '../../src/utils/cart-snapshot';
+
+describe('Cart snapshots', () => {
+  const userId = 'user-1';
+
+  beforeEach(async () => {
+    await redis.flushdb();
+  });
+
+  describe('Snapshot store', () => {
+    const store = () => new CartSnapshotStore<{ version: number; items: string[] }>(redis as any, 60);
+
+    test('should keep the newest snapshot when a stale writer loses the compare-and-set', async () => {
+      const snapshots = store();
+
+      expect(await snapshots.put(userId, { version: 3, items: ['a', 'b'] })).toBe(true);
+      expect(await snapshots.put(userId, { version: 2, items: ['a'] })).toBe(false);
+      expect(await snapshots.put(userId, { version: 3, items: [] })).toBe(false);
+
+      expect(await snapshots.get(userId)).toEqual({ version: 3, items: ['a', 'b'] });
+      expect(await redis.ttl(cartSnapshotKey(userId))).toBeGreaterThan(0);
+    });
+
+    test('should drop the snapshot on delete', async () => {
+      const snapshots = store();
+      await snapshots.put(userId, { version: 1, items: [] });
+      await snapshots.delete(userId);
+
+      expect(await snapshots.get(userId)).toBeNull();
+    });
+  });
+
+  describe('Cart changes', () => {
+    let service: any;
+
+    const line = (id: string, lineTotal: number) => ({ id, productId: `product-${id}`, quantity: 1, lineTotal });
+
+    const snapshot = (version: number, items: Array<ReturnType<typeof line>>) => ({
+      id: 'cart-1',
+      userId,
+      version,
+      updatedAt: new Date(0),
+      items,
+      calculation: service.calculateCartTotals(items.reduce((sum, item) => sum + item.lineTotal, 0))
+    });
+
+    beforeEach(() => {
+      service = new CartService({ prisma: {}, redis } as unknown as FastifyInstance);
+    });
+
+    test('should patch a snapshot exactly one version behind in place', async () => {
+      await service.snapshots.put(userId, snapshot(4, [line('a', 10)]));
+      const rebuild = jest.spyOn(service, 'getCartWithDetails');
+
+      const updated = await service.applyCartChange({ id: 'cart-1', userId }, 5, (cart: any) => {
+        service.upsertLine(cart, line('b', 5));
+      });
+
+      expect(rebuild).not.toHaveBeenCalled();
+      expect(updated.version).toBe(5);
+      expect(updated.items.map((item: any) => item.id)).toEqual(['a', 'b']);
+      expect(updated.calculation).toEqual(service.calculateCartTotals(15));
+      expect((await service.snapshots.get(userId)).version).toBe(5);
+    });
+
+    test('should rebuild a missing or older snapshot from the database', async () => {
+      const fresh = snapshot(7, [line('a', 10), line('b', 5)]);
+      const rebuild = jest.spyOn(service, 'getCartWithDetails').mockImplementation(async () => fresh);
+      const change = jest.fn();
+
+      const missing = await service.applyCartChange({ id: 'cart-1', userId }, 7, change);
+      expect(missing).toBe(fresh);
+
+      await redis.flushdb();
+      await service.snapshots.put(userId, snapshot(5, [line('a', 10)]));
+      const older = await service.applyCartChange({ id: 'cart-1', userId }, 7, change);
+
+      expect(older).toBe(fresh);
+      expect(change).not.toHaveBeenCalled();
+      expect(rebuild).toHaveBeenCalledTimes(2);
+      expect((await service.snapshots.get(userId)).version).toBe(7);
+    });
+
+    test('should leave the snapshot unchanged when a change is applied twice', () => {
+      const cart = snapshot(1, [line('a', 10)]);
+
+      service.upsertLine(cart, line('b', 5));
+      service.upsertLine(cart, line('b', 5));
+      expect(cart.items).toHaveLength(2);
+      expect(cart.calculation).toEqual(service.calculateCartTotals(15));
+
+      service.upsertLine(cart, line('b', 8));
+      expect(cart.calculation).toEqual(service.calculateCartTotals(18));
+
+      service.removeLine(cart, 'a');
+      service.removeLine(cart, 'a');
+      expect(cart.items.map((item: any) => item.id)).toEqual(['b']);
+      expect(cart.calculation).toEqual(service.calculateCartTotals(8));
+    });
+  });
+});
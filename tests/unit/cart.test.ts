@@ -0,0 +1,63 @@
+import { describe, test, expect } from '@jest/globals';
+import { Product, ProductVariant } from '@prisma/client';
+import { CartCatalog, CartLine, reviewCartLines } from '../../src/utils/cart-validation';
+
+describe('Cart validation', () => {
+  const product = (id: string, fields: Partial<Product> = {}) => ({
+    id,
+    status: 'PUBLISHED',
+    price: 10,
+    quantity: 100,
+    trackInventory: false,
+    lowStockAlert: 10,
+    ...fields
+  }) as unknown as Product;
+
+  const catalog: CartCatalog = {
+    products: new Map([
+      ['p1', product('p1')],
+      ['p2', product('p2', { status: 'ARCHIVED' })],
+      ['p3', product('p3', { trackInventory: true })],
+      ['p4', product('p4', { price: 12 as any })],
+      ['p5', product('p5', { quantity: 0 })]
+    ]),
+    variants: new Map([
+      ['v1', { id: 'v1', productId: 'p1', price: 15, quantity: 2 } as unknown as ProductVariant]
+    ]),
+    stock: new Map([['p3', 3]])
+  };
+
+  const line = (id: string, productId: string, quantity: number, fields: Partial<CartLine> = {}): CartLine => ({
+    id,
+    productId,
+    variantId: null,
+    quantity,
+    price: 10,
+    ...fields
+  });
+
+  test('should report every change in one pass', () => {
+    const reviews = reviewCartLines([
+      line('ok', 'p1', 1),
+      line('archived', 'p2', 1),
+      line('tracked', 'p3', 5),
+      line('repriced', 'p4', 1),
+      line('empty', 'p5', 1),
+      line('variant', 'p1', 4, { variantId: 'v1', price: 15 }),
+      line('foreign', 'p3', 1, { variantId: 'v1' }),
+      line('missing', 'gone', 1)
+    ], catalog);
+
+    expect(reviews.map(review => [review.line.id, review.quantity, review.changes.map(change => change.type)])).toEqual([
+      ['ok', 1, []],
+      ['archived', 0, ['unavailable']],
+      ['tracked', 3, ['quantity_clamped']],
+      ['repriced', 1, ['price_changed']],
+      ['empty', 0, ['out_of_stock']],
+      ['variant', 2, ['quantity_clamped']],
+      ['foreign', 0, ['variant_unavailable']],
+      ['missing', 0, ['unavailable']]
+    ]);
+    expect(reviews[3].changes[0]).toMatchObject({ from: 10, to: 12 });
+  });
+});
@@ -0,0 +1,109 @@
+import { describe, test, expect, beforeEach } from '@jest/globals';
+import { prisma, redis, cleanupDatabase, createTestProduct, createTestOrder, waitFor } from '../setup';
+import { FlashSaleStockService } from '../../src/services/flash-sale-stock.service';
+
+describe('Flash sale stock', () => {
+  let stock: FlashSaleStockService;
+  let product: any;
+  let saleId: string;
+  let itemId: string;
+
+  const createItem = async (fields: { quantity: number; maxQuantityPerUser?: number }) => {
+    const sale = await prisma.flashSale.create({
+      data: {
+        name: 'Midnight deals',
+        startsAt: new Date(Date.now() - 60 * 1000),
+        endsAt: new Date(Date.now() + 60 * 60 * 1000),
+        items: {
+          create: { productId: product.id, discount: 50, ...fields }
+        }
+      },
+      include: { items: true }
+    });
+    return { saleId: sale.id, itemId: sale.items[0].id };
+  };
+
+  beforeEach(async () => {
+    await prisma.inventory_reservations.deleteMany();
+    await cleanupDatabase();
+    stock = new FlashSaleStockService(prisma, redis as any, { holdTTL: 1 });
+    product = await createTestProduct();
+    ({ saleId, itemId } = await createItem({ quantity: 3, maxQuantityPerUser: 2 }));
+  });
+
+  test('should hold units and report what is left', async () => {
+    const first = await stock.reserve(saleId, itemId, 'user-1', 2);
+    const second = await stock.reserve(saleId, itemId, 'user-2', 1);
+
+    expect(first.data).toMatchObject({ itemId, quantity: 2, remaining: 1 });
+    expect(second.data?.remaining).toBe(0);
+    expect((await stock.getStats()).reserved).toBe(2);
+  });
+
+  test('should enforce the per-user limit across holds', async () => {
+    await stock.reserve(saleId, itemId, 'user-1', 1);
+    const over = await stock.reserve(saleId, itemId, 'user-1', 2);
+
+    expect(over.success).toBe(false);
+    expect(over.error?.code).toBe('FLASH_SALE_LIMIT_EXCEEDED');
+    expect((await stock.reserve(saleId, itemId, 'user-1', 1)).success).toBe(true);
+  });
+
+  test('should reject reservations once the item is sold out', async () => {
+    await stock.reserve(saleId, itemId, 'user-1', 2);
+    const soldOut = await stock.reserve(saleId, itemId, 'user-2', 2);
+
+    expect(soldOut.error?.code).toBe('FLASH_SALE_SOLD_OUT');
+    expect((await stock.reserve(saleId, itemId, 'user-2', 1)).data?.remaining).toBe(0);
+  });
+
+  test('should return expired holds to stock and refuse to commit them', async () => {
+    const hold = await stock.reserve(saleId, itemId, 'user-1', 2);
+    await waitFor(1100);
+
+    const again = await stock.reserve(saleId, itemId, 'user-1', 2);
+    expect(again.data?.remaining).toBe(1);
+
+    const expired = await stock.commit(saleId, itemId, hold.data!.reservationId, 'user-1', 'order-1');
+    expect(expired.error?.code).toBe('RESERVATION_EXPIRED');
+  });
+
+  test('should take over the checkout reservation and ignore a replayed batch', async () => {
+    const order = await createTestOrder({ product, quantity: 2 });
+    await prisma.inventory_reservations.create({
+      data: { id: 'checkout-1', product_id: product.id, order_id: order!.id, quantity: 2 }
+    });
+
+    const hold = await stock.reserve(saleId, itemId, order!.userId, 2);
+    await stock.commit(saleId, itemId, hold.data!.reservationId, order!.userId, order!.id);
+    const [entry] = await redis.lrange('flash:commits', 0, -1);
+
+    expect(await stock.reconcile()).toBe(1);
+
+    // A run that wrote the batch but died before trimming the list
+    await redis.rpush('flash:commits', entry);
+    expect(await stock.reconcile()).toBe(0);
+
+    const reservations = await prisma.inventory_reservations.findMany({ where: { order_id: order!.id } });
+    expect(reservations.map(row => [row.id, row.quantity])).toEqual([[hold.data!.reservationId, 2]]);
+    expect((await prisma.flashSaleItem.findUnique({ where: { id: itemId } }))?.sold).toBe(2);
+    expect(await redis.llen('flash:commits')).toBe(0);
+  });
+
+  test('should not find an item through another sale', async () => {
+    const other = await createItem({ quantity: 1 });
+
+    const cold = await stock.reserve(other.saleId, itemId, 'user-1', 1);
+    expect(cold.error?.code).toBe('FLASH_SALE_ITEM_NOT_FOUND');
+
+    const hold = await stock.reserve(saleId, itemId, 'user-1', 1);
+    const loaded = await stock.reserve(other.saleId, itemId, 'user-1', 1);
+    expect(loaded.error?.code).toBe('FLASH_SALE_ITEM_NOT_FOUND');
+
+    const release = await stock.release(other.saleId, itemId, hold.data!.reservationId, 'user-1');
+    const commit = await stock.commit(other.saleId, itemId, hold.data!.reservationId, 'user-1', 'order-1');
+    expect(release.error?.code).toBe('FLASH_SALE_ITEM_NOT_FOUND');
+    expect(commit.error?.code).toBe('FLASH_SALE_ITEM_NOT_FOUND');
+    expect((await stock.release(saleId, itemId, hold.data!.reservationId, 'user-1')).data).toBe(true);
+  });
+});
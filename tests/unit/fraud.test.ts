@@ -0,0 +1,96 @@
+import { describe, test, expect, beforeEach } from '@jest/globals';
+import { FraudRule } from '@prisma/client';
+import { prisma, redis, cleanupDatabase, createTestOrder } from '../setup';
+import { FraudFeatureStore } from '../../src/services/fraud-feature-store.service';
+import { FraudFeatures, FraudRuleSet } from '../../src/utils/fraud-rule-engine';
+
+describe('Fraud rule set', () => {
+  const now = Date.UTC(2026, 0, 1);
+
+  const rule = (id: string, fields: Partial<FraudRule>): FraudRule => ({
+    id,
+    name: id,
+    description: '',
+    isActive: true,
+    weight: 1,
+    conditions: {},
+    createdAt: new Date(0),
+    updatedAt: new Date(0),
+    ...fields
+  });
+
+  const features = (fields: Partial<FraudFeatures> = {}): FraudFeatures => ({
+    accountCreatedAt: now - 90 * 24 * 60 * 60 * 1000,
+    orderCount: 10,
+    orderTotal: 1000,
+    recentOrders: [],
+    failedPayments: 0,
+    ...fields
+  });
+
+  const failed = (rules: FraudRuleSet, transaction: { amount: number; country?: string; paymentMethod?: string }, userFeatures: FraudFeatures) =>
+    rules.evaluate(transaction, userFeatures, now).rules.filter(result => !result.passed).map(result => result.ruleName);
+
+  test('should apply default rules unless a stored rule has the same name', () => {
+    const defaults = new FraudRuleSet([]);
+    expect(failed(defaults, { amount: 100, country: 'KP' }, features())).toEqual(['Suspicious Location']);
+
+    const disabled = new FraudRuleSet([rule('location', { name: 'Suspicious Location', isActive: false })]);
+    expect(failed(disabled, { amount: 100, country: 'KP' }, features())).toEqual([]);
+  });
+
+  test('should score from precomputed features', () => {
+    const rules = new FraudRuleSet([]);
+    const busy = features({
+      recentOrders: Array.from({ length: 5 }, (_, index) => ({ at: now - (index + 1) * 60 * 1000, amount: 50 }))
+    });
+
+    expect(failed(rules, { amount: 100 }, busy)).toEqual(['High Velocity Check']);
+    expect(failed(rules, { amount: 600 }, features({ orderCount: 0 }))).toEqual(['Large Transaction Amount']);
+    expect(failed(rules, { amount: 600 }, features())).toEqual([]);
+
+    const evaluation = new FraudRuleSet([
+      rule('velocity', { name: 'High Velocity Check', isActive: false }),
+      rule('blocked', { name: 'Country check', weight: 3, conditions: { blockedCountries: ['IR'] } })
+    ]).evaluate({ amount: 100, country: 'ir' }, features(), now);
+    expect(evaluation.blockedReason).toBe('Country IR is blocked');
+    expect(evaluation.score).toBeGreaterThan(0);
+  });
+
+  test('should match condition lists against a context', () => {
+    const rules = new FraudRuleSet([
+      rule('big-prepaid', {
+        conditions: {
+          when: [
+            { field: 'amount', operator: 'greater_than', value: 500 },
+            { field: 'paymentMethod', operator: 'equals', value: 'PREPAID_CARD' }
+          ],
+          actions: ['FLAG_FOR_REVIEW']
+        }
+      })
+    ]);
+
+    expect(rules.match({ amount: 800, paymentMethod: 'PREPAID_CARD' })).toMatchObject([{ id: 'big-prepaid', actions: ['FLAG_FOR_REVIEW'] }]);
+    expect(rules.match({ amount: 800, paymentMethod: 'CREDIT_CARD' })).toEqual([]);
+  });
+});
+
+describe('Fraud feature store', () => {
+  beforeEach(async () => {
+    await cleanupDatabase();
+    await redis.flushdb();
+  });
+
+  test('should seed a cold user from their orders before scoring them', async () => {
+    const order = await createTestOrder();
+    const store = new FraudFeatureStore(prisma, redis as any);
+
+    const features = await store.get(order!.userId);
+
+    expect(features.orderCount).toBe(1);
+    expect(features.orderTotal).toBe(order!.totalAmount.toNumber());
+    expect(features.recentOrders).toEqual([{ at: order!.createdAt.getTime(), amount: order!.totalAmount.toNumber() }]);
+    expect(features.accountCreatedAt).not.toBeNull();
+    expect(await redis.hget(`fraud:features:${order!.userId}`, 'seeded')).toBe('1');
+  });
+});
@@ -0,0 +1,144 @@
+import { describe, test, expect } from '@jest/globals';
+import { Coupon, CouponStatus, Prisma, ProductStatus, Promotion, PromotionType, ShippingMethod } from '@prisma/client';
+import { FastifyInstance } from 'fastify';
+import { PromotionCart, PromotionRuleSet } from '../../src/utils/promotion-rules';
+import { CartService } from '../../src/services/cart.service';
+import { OrderService } from '../../src/services/order.service';
+
+describe('Promotion rule set', () => {
+  const from = new Date(0);
+  const to = new Date(Date.UTC(2100, 0, 1));
+
+  const promotion = (id: string, fields: Partial<Promotion>): Promotion => ({
+    id,
+    name: id,
+    description: null,
+    type: PromotionType.PERCENTAGE,
+    value: new Prisma.Decimal(10),
+    conditions: {},
+    priority: 0,
+    isActive: true,
+    validFrom: from,
+    validTo: to,
+    createdAt: from,
+    updatedAt: from,
+    ...fields
+  });
+
+  const coupon = (code: string, fields: Partial<Coupon>): Coupon => ({
+    id: code.toLowerCase(),
+    code,
+    description: null,
+    type: PromotionType.FIXED_AMOUNT,
+    value: new Prisma.Decimal(10),
+    minimumPurchase: null,
+    usageLimit: null,
+    usageCount: 0,
+    userLimit: null,
+    status: CouponStatus.ACTIVE,
+    validFrom: from,
+    validTo: to,
+    createdAt: from,
+    updatedAt: from,
+    productIds: [],
+    categoryIds: [],
+    sellerIds: [],
+    ...fields
+  });
+
+  const rules = new PromotionRuleSet(
+    [
+      coupon('SAVE10', { minimumPurchase: new Prisma.Decimal(150), productIds: ['p2'] }),
+      coupon('ONCE', { usageLimit: 1 })
+    ],
+    [
+      promotion('site', { priority: 1 }),
+      promotion('shoes', { priority: 5, value: new Prisma.Decimal(20), conditions: { categoryIds: ['shoes'] } }),
+      promotion('ship', { type: PromotionType.FREE_SHIPPING, value: new Prisma.Decimal(0), conditions: { stackable: true } })
+    ],
+    new Map([['shoes', ['p1']]])
+  );
+
+  const cart = {
+    lines: [
+      { productId: 'p1', quantity: 2, price: 50 },
+      { productId: 'p2', quantity: 1, price: 100 }
+    ]
+  };
+
+  test('should apply the top exclusive promotion with every stackable one', () => {
+    const result = rules.evaluate(cart);
+
+    expect(result.subtotal).toBe(200);
+    expect(result.promotions.map(applied => [applied.id, applied.amount])).toEqual([['shoes', 20], ['ship', 0]]);
+    expect(result.discountTotal).toBe(20);
+    expect(result.freeShipping).toBe(true);
+  });
+
+  test('should apply a coupon once any item qualifies', () => {
+    const result = rules.evaluate(cart, 'save10');
+
+    expect(result.coupon).toMatchObject({ id: 'save10', amount: 10 });
+    expect(result.couponError).toBeUndefined();
+    expect(result.discountTotal).toBe(30);
+  });
+
+  test('should reject coupons that do not apply', () => {
+    const onlyShoes = { lines: [{ productId: 'p1', quantity: 4, price: 50 }] };
+
+    expect(rules.evaluate(onlyShoes, 'SAVE10').couponError?.code).toBe('COUPON_NOT_APPLICABLE');
+    expect(rules.evaluate(cart, 'ONCE', { total: 1, user: 0 }).couponError?.code).toBe('COUPON_USAGE_LIMIT');
+    expect(rules.evaluate(cart, 'MISSING').couponError).toMatchObject({ code: 'COUPON_NOT_FOUND', statusCode: 404 });
+    expect(rules.evaluate(cart, 'MISSING').coupon).toBeNull();
+  });
+
+  test('should apply a seller coupon to the cart lines and again at checkout', async () => {
+    const sellerRules = new PromotionRuleSet(
+      [coupon('SELLER5', { value: new Prisma.Decimal(5), sellerIds: ['s1'] })],
+      [],
+      new Map()
+    );
+    const priced: PromotionCart[] = [];
+    const app = {
+      prisma: {
+        product: {
+          findMany: async () => [{
+            id: 'p9',
+            name: 'Lamp',
+            sku: 'LAMP',
+            status: ProductStatus.PUBLISHED,
+            price: new Prisma.Decimal(40),
+            trackInventory: false,
+            sellerId: 's1',
+            categoryId: 'lighting'
+          }]
+        }
+      },
+      redis: {},
+      promotionEngine: {
+        evaluate: async (cart: PromotionCart, options: { couponCode?: string } = {}) => {
+          priced.push(cart);
+          return sellerRules.evaluate(cart, options.couponCode);
+        },
+        getRules: async () => sellerRules
+      }
+    } as unknown as FastifyInstance;
+
+    const cartService: any = new CartService(app);
+    await cartService.withPromotions({
+      id: 'cart-1',
+      userId: 'user-1',
+      items: [{ productId: 'p9', quantity: 2, calculatedPrice: 40, product: { sellerId: 's1' } }],
+      calculation: cartService.calculateCartTotals(80)
+    });
+    expect(sellerRules.evaluate(priced[0], 'SELLER5').coupon).toMatchObject({ id: 'seller5', amount: 5 });
+
+    const orderService: any = new OrderService(app);
+    const items = await orderService.validateOrderItems([{ productId: 'p9', quantity: 2 }]);
+    const totals = await orderService.calculateOrderTotals('user-1', items.data, ShippingMethod.STANDARD, 'SELLER5');
+
+    expect(priced[1].lines).toEqual([expect.objectContaining({ productId: 'p9', sellerId: 's1' })]);
+    expect(totals.discountAmount).toBe(5);
+    expect(totals.coupon).toMatchObject({ rule: { id: 'seller5' }, amount: 5 });
+  });
+});
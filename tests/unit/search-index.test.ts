@@ -0,0 +1,137 @@
+import { describe, test, expect, beforeAll, afterAll, beforeEach } from '@jest/globals';
+import { prisma, cleanupDatabase, createTestProduct, waitFor } from '../setup';
+import { TypesenseStub } from '../typesense-stub';
+import { SearchIndexService } from '../../src/services/search-index.service';
+import { rebuildSearchIndex, recordSearchChange } from '../../src/utils/search';
+import { PrefixIndex, suggestionKeys } from '../../src/utils/autocomplete';
+
+describe('Search Index Service', () => {
+  const stub = new TypesenseStub();
+  let indexer: SearchIndexService;
+
+  beforeAll(async () => {
+    await stub.start();
+  });
+
+  afterAll(async () => {
+    await stub.stop();
+  });
+
+  beforeEach(async () => {
+    await cleanupDatabase();
+    await prisma.searchOutbox.deleteMany();
+    stub.reset();
+    indexer = new SearchIndexService(prisma, stub.client(), { batchSize: 2 });
+  });
+
+  test('should coalesce repeated changes to a document into one import', async () => {
+    const product = await createTestProduct({ name: 'Coalesced Lamp' });
+    await recordSearchChange(prisma, 'products', product.id);
+    await recordSearchChange(prisma, 'products', product.id);
+    await recordSearchChange(prisma, 'products', product.id);
+
+    const result = await indexer.drain();
+
+    expect(result).toEqual({ upserted: 1, deleted: 0, failed: [] });
+    expect(stub.requests).toEqual([
+      { method: 'POST', path: '/collections/products/documents/import', documents: 1 }
+    ]);
+    expect(stub.documents('products').get(product.id).name).toBe('Coalesced Lamp');
+    expect(await prisma.searchOutbox.count()).toBe(0);
+  });
+
+  test('should import in batches and apply the latest action per document', async () => {
+    const products = await Promise.all([1, 2, 3].map(i => createTestProduct({ sku: `BATCH-${i}-${Date.now()}` })));
+    await recordSearchChange(prisma, 'products', products.map(product => product.id));
+    await recordSearchChange(prisma, 'products', products[2].id, 'DELETE');
+
+    const result = await indexer.drain();
+
+    expect(result).toEqual({ upserted: 2, deleted: 1, failed: [] });
+    expect(stub.requests.filter(request => request.method === 'POST').map(request => request.documents)).toEqual([2]);
+    expect(stub.documents('products').has(products[2].id)).toBe(false);
+  });
+
+  test('should remove documents whose row no longer exists', async () => {
+    stub.documents('products').set('gone', { id: 'gone' });
+    await recordSearchChange(prisma, 'products', 'gone');
+
+    const result = await indexer.drain();
+
+    expect(result).toEqual({ upserted: 0, deleted: 1, failed: [] });
+    expect(stub.documents('products').has('gone')).toBe(false);
+  });
+
+  test('should keep changes pending when Typesense fails and index them on retry', async () => {
+    const product = await createTestProduct();
+    await recordSearchChange(prisma, 'products', product.id);
+    stub.failRequests = 1;
+
+    const failed = await indexer.drain();
+
+    expect(failed.failed).toEqual(['products']);
+    expect((await indexer.getLag()).pending).toBe(1);
+    expect(indexer.getStats().failures).toBe(1);
+
+    const retried = await indexer.drain();
+
+    expect(retried).toEqual({ upserted: 1, deleted: 0, failed: [] });
+    expect(await indexer.getLag()).toEqual({ pending: 0, lagSeconds: 0 });
+    expect(stub.documents('products').has(product.id)).toBe(true);
+  });
+
+  describe('Rebuild', () => {
+    test('should import into a new version and repoint the alias', async () => {
+      const products = await Promise.all([1, 2, 3].map(i => createTestProduct({ sku: `REBUILD-${i}-${Date.now()}` })));
+      stub.documents('products').set('stale', { id: 'stale' });
+
+      const result = await rebuildSearchIndex(prisma, 'products', { client: stub.client(), batchSize: 2, concurrency: 2 });
+
+      expect(result.documents).toBe(3);
+      expect(stub.aliases.get('products')).toBe(result.version);
+      expect([...stub.documents('products').keys()].sort()).toEqual(products.map(product => product.id).sort());
+      expect(stub.requests.filter(request => request.method === 'POST').map(request => request.documents)).toEqual([2, 1]);
+    });
+
+    test('should drop versions beyond the ones kept', async () => {
+      await createTestProduct();
+      const first = await rebuildSearchIndex(prisma, 'products', { client: stub.client() });
+      await waitFor(5);
+      const second = await rebuildSearchIndex(prisma, 'products', { client: stub.client() });
+      await waitFor(5);
+      const third = await rebuildSearchIndex(prisma, 'products', { client: stub.client(), keepVersions: 1 });
+
+      expect(third.dropped).toEqual([first.version]);
+      expect([...stub.collections.keys()].sort()).toEqual([second.version, third.version].sort());
+      expect(stub.aliases.get('products')).toBe(third.version);
+    });
+  });
+
+  describe('Autocomplete', () => {
+    const index = new PrefixIndex([
+      { id: 'product:1', kind: 'product', text: 'Red Running Shoes', weight: 40 },
+      { id: 'product:2', kind: 'product', text: 'Running Watch', weight: 90 },
+      { id: 'query:running shoes', kind: 'query', text: 'running shoes', weight: 120 },
+      { id: 'category:1', kind: 'category', text: 'Rugs', weight: 10 },
+      { id: 'brand:1', kind: 'brand', text: 'Runa', weight: 5 }
+    ]);
+
+    test('should key entries by every word start', () => {
+      expect(suggestionKeys('  Red  Running Shoes ')).toEqual(['red running shoes', 'running shoes', 'shoes']);
+    });
+
+    test('should rank short prefixes from the precomputed top lists', () => {
+      expect(index.lookup('ru', 5).map(entry => entry.text)).toEqual(['running shoes', 'Running Watch', 'Red Running Shoes', 'Rugs', 'Runa']);
+    });
+
+    test('should rank longer prefixes from their range of the array', () => {
+      expect(index.lookup('runn', 5).map(entry => entry.text)).toEqual(['running shoes', 'Running Watch', 'Red Running Shoes']);
+      expect(index.lookup('sho', 5).map(entry => entry.id)).toEqual(['query:running shoes', 'product:1']);
+    });
+
+    test('should skip masked entries', () => {
+      const masked = index.lookup('run', 2, entry => entry.id === 'product:2');
+      expect(masked.map(entry => entry.id)).toEqual(['query:running shoes', 'product:1']);
+    });
+  });
+});
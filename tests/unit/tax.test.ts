@@ -0,0 +1,64 @@
+import { describe, test, expect } from '@jest/globals';
+import { TaxRule, TaxType } from '@prisma/client';
+import { TaxRuleIndex } from '../../src/utils/tax-rule-index';
+
+describe('Tax rule index', () => {
+  const rule = (id: string, fields: Partial<TaxRule>): TaxRule => ({
+    id,
+    country: 'US',
+    state: null,
+    city: null,
+    zipCode: null,
+    taxType: TaxType.SALES_TAX,
+    rate: 0.05,
+    isActive: true,
+    effectiveFrom: null,
+    effectiveTo: null,
+    createdAt: new Date(0),
+    updatedAt: new Date(0),
+    ...fields
+  });
+
+  const rules = [
+    rule('us', {}),
+    rule('ca', { state: 'CA', rate: 0.0725 }),
+    rule('la', { state: 'CA', city: 'los angeles', rate: 0.02 }),
+    rule('la-zip', { state: 'CA', city: 'los angeles', zipCode: '90001', rate: 0.01 }),
+    rule('ca-vat', { state: 'CA', taxType: TaxType.VAT, rate: 0.03 }),
+    rule('ca-low', { state: 'CA', rate: 0.01 })
+  ];
+  const index = TaxRuleIndex.compile(rules);
+
+  const ids = (found: TaxRule[]) => found.map(item => item.id);
+
+  test('should resolve the most specific jurisdiction with rules', () => {
+    expect(ids(index.resolve({ country: 'us', state: 'ca', city: 'Los Angeles', zipCode: '90001' }))).toEqual(['la-zip']);
+    expect(ids(index.resolve({ country: 'US', state: 'CA', city: 'Los Angeles', zipCode: '90002' }))).toEqual(['la']);
+    expect(ids(index.resolve({ country: 'US', state: 'CA', city: 'San Diego' }))).toEqual(['ca-low', 'ca-vat', 'ca']);
+    expect(ids(index.resolve({ country: 'US', state: 'NY', city: 'New York' }))).toEqual(['us']);
+    expect(ids(index.resolve({ country: 'MX' }))).toEqual([]);
+  });
+
+  test('should fall back per tax type', () => {
+    expect(ids(index.resolve({ country: 'US', state: 'CA', city: 'Los Angeles', zipCode: '90001' }, TaxType.VAT))).toEqual(['ca-vat']);
+    expect(ids(index.resolve({ country: 'US', state: 'TX' }, TaxType.VAT))).toEqual([]);
+  });
+
+  test('should only place rules in effect', () => {
+    const now = Date.UTC(2026, 0, 1);
+    const dated = [
+      rule('old', { effectiveTo: new Date(now) }),
+      rule('current', { effectiveFrom: new Date(now - 1000), effectiveTo: new Date(now + 5000) }),
+      rule('next', { effectiveFrom: new Date(now + 5000) })
+    ];
+
+    const current = TaxRuleIndex.compile(dated, 3, now);
+    expect(ids(current.resolve({ country: 'US' }))).toEqual(['current']);
+    expect(current.validUntil).toBe(now + 5000);
+
+    const later = current.recompile(now + 5000);
+    expect(ids(later.resolve({ country: 'US' }))).toEqual(['next']);
+    expect(later.version).toBe(3);
+    expect(later.validUntil).toBe(Infinity);
+  });
+});